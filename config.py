@@ -21,6 +21,7 @@ from config import (
     DEBUG_INDIVIDUAL_PREDICTIONS_DIR,
     RAW_PAGES_DIR,
     RAW_PAGES_INDEX_DIR,
+    RUNS_DIR,
     EXTRACTION_CONFIG,
     SEED_URLS,
 )
@@ -40,6 +41,7 @@ __all__ = [
     "DEBUG_INDIVIDUAL_PREDICTIONS_DIR",
     "RAW_PAGES_DIR",
     "RAW_PAGES_INDEX_DIR",
+    "RUNS_DIR",
     "EXTRACTION_CONFIG",
     "SEED_URLS",
 ]
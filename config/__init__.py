@@ -19,6 +19,7 @@ from config.global_config import (
     DEBUG_INDIVIDUAL_PREDICTIONS_DIR,
     RAW_PAGES_DIR,
     RAW_PAGES_INDEX_DIR,
+    RUNS_DIR,
     EXTRACTION_CONFIG,
 )
 
@@ -27,6 +28,7 @@ from config.sites import (
     SITE_DOMAINS,
     SITE_NAME_MAPPING,
     SITE_CONFIGS,
+    DEFAULT_KEYWORD_GROUPS,
     get_site_config,
     get_site_name_for_history,
 )
@@ -47,12 +49,14 @@ __all__ = [
     "DEBUG_INDIVIDUAL_PREDICTIONS_DIR",
     "RAW_PAGES_DIR",
     "RAW_PAGES_INDEX_DIR",
+    "RUNS_DIR",
     "EXTRACTION_CONFIG",
     # Sites config
     "SEED_URLS",
     "SITE_DOMAINS",
     "SITE_NAME_MAPPING",
     "SITE_CONFIGS",
+    "DEFAULT_KEYWORD_GROUPS",
     "get_site_config",
     "get_site_name_for_history",
 ]
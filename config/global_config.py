@@ -17,42 +17,57 @@ CRAWLER_CONFIG = {
 }
 
 # Modelos Gemini disponibles con información de Free Tier
+# rate_limits: límites por API key (requests/minuto, tokens de entrada/minuto, requests/día)
+# usados por el limitador proactivo (utils/rate_limiter.py). Ajustar según el tier del proyecto.
+# context_cache_min_tokens: mínimo de tokens que Gemini exige para cachear contenido (cachedContents)
 AVAILABLE_MODELS = {
     "gemini-2.5-flash-lite": {
         "name": "Gemini 2.5 Flash Lite",
         "description": "Más económico, optimizado para uso a escala",
         "free_tier": True,
-        "recommended": True
+        "recommended": True,
+        "rate_limits": {"rpm": 15, "tpm": 250000, "rpd": 1000},
+        "context_cache_min_tokens": 1024
     },
     "gemini-2.5-flash-lite-preview-09-2025": {
         "name": "Gemini 2.5 Flash Lite Preview",
         "description": "Última versión Flash Lite, alta eficiencia",
         "free_tier": True,
-        "recommended": True
+        "recommended": True,
+        "rate_limits": {"rpm": 15, "tpm": 250000, "rpd": 1000},
+        "context_cache_min_tokens": 1024
     },
     "gemini-2.5-flash": {
         "name": "Gemini 2.5 Flash",
         "description": "Modelo híbrido con razonamiento, ventana de 1M tokens",
         "free_tier": True,
-        "recommended": False
+        "recommended": False,
+        "rate_limits": {"rpm": 10, "tpm": 250000, "rpd": 250},
+        "context_cache_min_tokens": 1024
     },
     "gemini-2.5-flash-preview-09-2025": {
         "name": "Gemini 2.5 Flash Preview",
         "description": "Última versión Flash, mejor para tareas de alto volumen",
         "free_tier": True,
-        "recommended": False
+        "recommended": False,
+        "rate_limits": {"rpm": 10, "tpm": 250000, "rpd": 250},
+        "context_cache_min_tokens": 1024
     },
     "gemini-2.0-flash": {
         "name": "Gemini 2.0 Flash",
         "description": "Modelo balanceado, ventana de 1M tokens",
         "free_tier": True,
-        "recommended": False
+        "recommended": False,
+        "rate_limits": {"rpm": 15, "tpm": 1000000, "rpd": 200},
+        "context_cache_min_tokens": 4096
     },
     "gemini-2.5-pro": {
         "name": "Gemini 2.5 Pro",
         "description": "Modelo más potente, excelente para razonamiento complejo",
         "free_tier": True,
-        "recommended": False
+        "recommended": False,
+        "rate_limits": {"rpm": 5, "tpm": 250000, "rpd": 100},
+        "context_cache_min_tokens": 4096
     }
 }
 
@@ -61,6 +76,12 @@ GEMINI_CONFIG = {
     "model": "gemini-2.5-flash-lite",  # Modelo recomendado para free tier
     "temperature": 0.1,  # Bajo para consistencia en extracción
     "max_output_tokens": 8000,
+    # Limitador de tasa proactivo (RPM/TPM/RPD por key y modelo, ver AVAILABLE_MODELS)
+    "rate_limiting": True,
+    "rate_limit_safety_factor": 0.9,  # Usar el 90% de cada límite para quedar bajo el umbral
+    "rate_limit_max_wait": 120,  # Espera máxima (segundos) antes de intentar de todas formas
+    # Registro de cuota compartido entre procesos (data/.quota_ledger.db): reservas y keys agotadas
+    "quota_ledger": True,
 }
 
 # Rutas de directorios
@@ -76,13 +97,20 @@ DEBUG_INDIVIDUAL_PREDICTIONS_DIR = f"{DATA_DIR}/debug/predictions/individual"
 # Almacenamiento completo de páginas individuales (HTML/Markdown) sin compresión
 RAW_PAGES_DIR = f"{DATA_DIR}/raw_pages"
 RAW_PAGES_INDEX_DIR = RAW_PAGES_DIR  # Índices JSON por sitio se guardan en el mismo directorio raíz
+# Bitácoras de corridas de extracción (para reanudar corridas interrumpidas)
+RUNS_DIR = f"{DATA_DIR}/runs"
 
 # Configuración de extracción
 EXTRACTION_CONFIG = {
     # Reducir tamaño máximo por batch para hacer las llamadas al LLM más robustas
     # y evitar golpear tan rápido los límites de cuota de tokens.
     "batch_size": 250000,  # Caracteres por batch - agrupa múltiples páginas hasta este límite
-    "chunk_size": 250000,  # Mantener para compatibilidad, pero usar batch_size
+    # Una página más grande que chunk_size se divide en chunks (entre items de listado o
+    # secciones) antes de armar los batches; cada chunk repite hasta chunk_overlap
+    # caracteres del final del anterior. Es fijo (no sigue al batch adaptativo) para que
+    # los chunks sean los mismos al reanudar una corrida.
+    "chunk_size": 250000,
+    "chunk_overlap": 2000,
     "max_retries": 3,
     "retry_delay": 2,  # segundos
     "api_timeout": 60,  # Timeout para llamadas a API (segundos) - evita que se quede colgado
@@ -90,5 +118,79 @@ EXTRACTION_CONFIG = {
     "max_total_time": None,  # Tiempo máximo total de ejecución (segundos) - None = sin límite
     "continue_on_error": True,  # Continuar procesando aunque falle un batch
     "max_consecutive_failures": 5,  # Máximo de fallos consecutivos antes de abortar
+    # Extracción determinística de páginas de detalle: si todos los campos requeridos
+    # se resuelven con confianza >= umbral, la página no pasa por el LLM de enriquecimiento.
+    # Los campos no resueltos se piden con un prompt focalizado (mucho más pequeño).
+    "deterministic_skip_llm": True,
+    "deterministic_confidence_threshold": 0.8,
+    "deterministic_required_fields": ["nombre", "fecha_apertura", "fecha_cierre"],
+    "targeted_prompt_batch_size": 40000,  # Caracteres por batch de prompts focalizados
+    # Segmentación de listados por item: solo los items nuevos o cuyo contenido cambió
+    # (hash distinto al guardado en historial) se envían al LLM.
+    "listing_diff_enabled": True,
+    # Caché del prefijo estático del prompt de extracción (sistema + instrucciones):
+    # "gemini" lo registra en cachedContents, "local" usa un sustituto en memoria (sin red)
+    # y None lo envía en línea en cada llamada. Gemini exige un mínimo de tokens por
+    # contenido cacheado: prefijos con menos de context_cache_min_tokens (None: el mínimo del
+    # modelo en AVAILABLE_MODELS) se envían en línea. Si el registro falla, esa combinación
+    # no se reintenta hasta pasados context_cache_failure_ttl_seconds.
+    # Desactivado por defecto: el prefijo actual (~2.000 caracteres, ~512 tokens estimados)
+    # queda bajo el mínimo de todos los modelos (1024/4096), así que nunca se cachearía.
+    "context_cache": None,
+    "context_cache_ttl_seconds": 3600,
+    "context_cache_min_tokens": None,
+    "context_cache_failure_ttl_seconds": 600,
+    # Tamaño de batch y timeout adaptativos (AIMD) según la latencia, truncamientos y
+    # timeouts observados por modelo (data/cache/batch_stats.json). batch_size y
+    # api_timeout son los valores iniciales; los batches fallidos se reintentan divididos.
+    "adaptive_batching": True,
+    "adaptive_min_batch_size": 20000,
+    "adaptive_max_batch_size": 500000,
+    "adaptive_batch_step": 25000,  # Incremento tras un batch exitoso y holgado
+    "adaptive_min_timeout": 30,
+    "adaptive_max_timeout": 300,
+    # Tasa reciente de timeouts/truncamientos por rango de tamaño a partir de la cual se reduce el batch
+    "adaptive_max_error_rate": 0.2,
+    "adaptive_min_calls_for_rate": 3,
+    "adaptive_stats_save_seconds": 60,  # Intervalo mínimo entre escrituras de batch_stats.json
+    # Post-procesamiento de páginas (sanitizar HTML, limpiar markdown, URLs, concursos anteriores,
+    # extracción determinística) en un pool de procesos, en paralelo con el scraping.
+    # None = núcleos disponibles - 1; 0 = en el proceso principal (sin pool)
+    "page_processing_workers": None,
+    # Pipeline de páginas individuales (scraping → procesamiento → batches → LLM): items en
+    # espera entre etapas (backpressure) y batches enviados al LLM en paralelo
+    "pipeline_queue_size": 4,
+    "pipeline_llm_workers": 1,
+    # Bitácora de corrida (data/runs/<run_id>/): páginas scrapeadas, batches completados y
+    # páginas individuales enriquecidas, para reanudar con ExtractionService.resume_run(run_id)
+    # sin repetir trabajo; las corridas sin actualizar en "retention_days" se eliminan y el cron
+    # reanuda la última corrida en curso si se actualizó hace menos de "resume_max_age_hours"
+    "run_journal_enabled": True,
+    "run_journal_retention_days": 7,
+    "run_journal_resume_max_age_hours": 12,
+    # Modo batch de Gemini (PredictionService.generate_predictions(execution_mode="batch")):
+    # intervalo de consulta del trabajo, espera máxima (None = sin límite) y URL base
+    # (None = API de Gemini; la de llm.batch_jobs.LocalBatchServer para pruebas locales)
+    "batch_api_poll_interval": 30,
+    "batch_api_max_wait": 24 * 60 * 60,
+    "batch_api_base_url": None,
+    # Batches de predicción en paralelo (limitado además por el número de API keys disponibles)
+    "prediction_max_concurrency": 4,
+    # Predicción estadística (utils/statistical_predictor.py): concursos con cadencia anual
+    # regular se predicen sin LLM si la confianza (versiones + dispersión estacional) supera el umbral
+    "statistical_predictions": True,
+    "statistical_min_observations": 3,  # Versiones con fecha conocidas (incluida la actual)
+    "statistical_min_confidence": 0.75,
+    "statistical_max_interval_deviation_days": 45,  # Desviación máxima de cada intervalo respecto de un año
+    "statistical_max_dispersion_days": 60,  # Dispersión estacional con la que la confianza llega a 0
+    # Eventos de cambio del historial (data/.change_events.db): concursos nuevos, cerrados o con
+    # concursos anteriores nuevos; PredictionService.process_change_events predice solo esos
+    "change_events": True,
+    # Cada cuántas horas el worker barre el historial y encola los concursos cerrados sin predicción
+    # vigente (sin predicción o con la fecha predicha vencida); el primer barrido siembra la cola
+    "change_events_sweep_hours": 24,
+    # Clusters de concursos (data/entity_clusters.json, python -m scripts.resolve_entities): si un
+    # concurso no tiene "Concursos anteriores", se predice con los registros del mismo concurso en otros años
+    "entity_clusters": True,
 }
 
@@ -48,6 +48,19 @@ SITE_NAME_MAPPING = {
     "Manual": "manual.local",
 }
 
+# Grupos de palabras clave que se buscan en el texto de las páginas (utils/keyword_scanner.py).
+# Cada sitio puede agregar palabras a un grupo con "keyword_groups" en SITE_CONFIGS; el grupo
+# "subdireccion" se arma con sus known_subdirecciones
+DEFAULT_KEYWORD_GROUPS: Dict[str, List[str]] = {
+    # Concurso suspendido o adjudicado (ambos cerrados) en el markdown de la página
+    "suspendido": ["concurso suspendido", "suspendido", "concurso adjudicado"],
+    # Aviso de suspensión en el HTML/markdown de la página de un concurso (también con espacio
+    # no separable, como aparece en algunas páginas)
+    "aviso_suspension": ["concurso suspendido", "concurso\u00a0suspendido"],
+    # Items de listado con fechas (verificación de que el contenido AJAX se cargó)
+    "fecha_listado": ["noviembre", "diciembre", "octubre", "cierre", "apertura", "inicio"],
+}
+
 # Configuración específica por sitio
 SITE_CONFIGS: Dict[str, Dict[str, Any]] = {
     "anid.cl": {
@@ -3,25 +3,38 @@ Procesador de batches inteligente para agrupar contenido de múltiples páginas
 hasta un límite de caracteres antes de enviar al LLM
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
 import logging
 
+from crawler.markdown_processor import chunk_markdown
+
 logger = logging.getLogger(__name__)
 
 
 def create_batches(
     page_contents: List[Dict[str, Any]], 
-    batch_size: int = 500000
+    batch_size: int = 500000,
+    chunk_overlap: int = 0,
+    chunk_size: Optional[int] = None
 ) -> List[Tuple[List[Dict[str, Any]], str]]:
     """
     Agrupa contenido de múltiples páginas en batches hasta el límite de caracteres
     
+    Una página que excede chunk_size se divide con chunk_markdown (entre items de
+    listado o secciones) en varias páginas de tamaño adecuado, en vez de formar un
+    batch demasiado grande que termina en timeout (ver split_oversized_page).
+    
     Args:
         page_contents: Lista de diccionarios con contenido de páginas. Cada dict debe tener:
             - "markdown_cleaned": markdown limpio de la página
             - "url": URL de origen
             - Cualquier otro metadata necesario
         batch_size: Tamaño máximo por batch en caracteres (default: 500,000)
+        chunk_overlap: Caracteres repetidos entre chunks consecutivos de una página dividida
+        chunk_size: Tamaño a partir del cual se divide una página (None = batch_size). Con
+            un valor fijo la división no depende del tamaño de batch adaptativo y los
+            chunks (y sus journal_key) son los mismos al reanudar una corrida
         
     Returns:
         Lista de tuplas (pages_in_batch, combined_markdown) donde:
@@ -36,12 +49,16 @@ def create_batches(
     current_batch_size = 0
     separator = "\n\n---\n\n"  # Separador entre páginas
     
+    split_pages = []
     for page_data in page_contents:
         markdown = page_data.get("markdown_cleaned", "")
         if not markdown:
             logger.warning(f"Página {page_data.get('url', 'unknown')} no tiene markdown_cleaned, omitiendo")
             continue
-        
+        split_pages.extend(split_oversized_page(page_data, chunk_size or batch_size, chunk_overlap))
+    
+    for page_data in split_pages:
+        markdown = page_data.get("markdown_cleaned", "")
         markdown_size = len(markdown)
         separator_size = len(separator) if current_batch_pages else 0
         
@@ -77,6 +94,79 @@ def create_batches(
     return batches
 
 
+def split_oversized_page(
+    page_data: Dict[str, Any],
+    max_size: int,
+    overlap: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Divide una página cuyo markdown excede el tamaño máximo en páginas-chunk
+    
+    Cada chunk es una copia de la página (misma URL) con su parte del markdown,
+    "chunk_index"/"chunk_count" y un "journal_key" propio para que la bitácora de
+    corrida registre cada chunk por separado. Su concurso_urls_map conserva solo los
+    concursos que aparecen en el chunk (ver _assign_urls_to_chunks), para que el
+    fallback desde HTML no cree concursos de items que están en otro chunk.
+    
+    Args:
+        page_data: Página con "markdown_cleaned"
+        max_size: Tamaño máximo por chunk en caracteres
+        overlap: Caracteres repetidos entre chunks consecutivos
+        
+    Returns:
+        Lista con la página original si cabe, o con sus chunks
+    """
+    markdown = page_data.get("markdown_cleaned", "")
+    if len(markdown) <= max_size:
+        return [page_data]
+    
+    chunks = chunk_markdown(markdown, max_chunk_size=max_size, overlap=overlap)
+    base_key = page_data.get("journal_key") or page_data.get("url", "")
+    logger.info(
+        f"✂️ Página {page_data.get('url', 'unknown')} ({len(markdown):,} caracteres) "
+        f"dividida en {len(chunks)} chunks"
+    )
+    chunk_url_maps = _assign_urls_to_chunks(page_data.get("concurso_urls_map") or {}, chunks)
+    return [
+        {
+            **page_data,
+            "markdown_cleaned": chunk,
+            "concurso_urls_map": chunk_url_maps[index],
+            "chunk_index": index,
+            "chunk_count": len(chunks),
+            "journal_key": f"{base_key}#chunk-{index + 1}",
+        }
+        for index, chunk in enumerate(chunks)
+    ]
+
+
+def _assign_urls_to_chunks(concurso_urls_map: Dict[str, str], chunks: List[str]) -> List[Dict[str, str]]:
+    """
+    Reparte el concurso_urls_map de una página entre sus chunks
+    
+    Cada URL va al primer chunk que la menciona (URL completa, su ruta o el nombre del
+    item); las que no aparecen en ninguno quedan en el primer chunk, como en la página
+    sin dividir.
+    
+    Args:
+        concurso_urls_map: {url: nombre_html} de la página
+        chunks: Markdown de cada chunk
+        
+    Returns:
+        Un {url: nombre_html} por chunk
+    """
+    chunk_maps: List[Dict[str, str]] = [{} for _ in chunks]
+    for url, nombre in concurso_urls_map.items():
+        path = urlparse(url).path
+        needles = [needle for needle in (url, path if len(path) > 1 else "", (nombre or "").strip()) if needle]
+        target = next(
+            (index for index, chunk in enumerate(chunks) if any(needle in chunk for needle in needles)),
+            0
+        )
+        chunk_maps[target][url] = nombre
+    return chunk_maps
+
+
 def extract_urls_from_batch(pages_in_batch: List[Dict[str, Any]]) -> str:
     """
     Extrae las URLs de las páginas en un batch para usar como contexto
@@ -94,3 +184,69 @@ def extract_urls_from_batch(pages_in_batch: List[Dict[str, Any]]) -> str:
         return f"{urls[0]} (+{len(urls)-1} páginas más)"
     return ""
 
+
+
+def take_next_batch(
+    page_contents: List[Dict[str, Any]],
+    batch_size: int
+) -> Tuple[List[Dict[str, Any]], str, List[Dict[str, Any]]]:
+    """
+    Toma el siguiente batch de páginas hasta el límite de caracteres.
+    
+    A diferencia de create_batches, arma un solo batch y retorna las páginas restantes,
+    lo que permite cambiar el tamaño de batch entre llamadas (ver utils.batch_controller).
+    Las páginas ya vienen divididas (create_batches con chunk_size fijo): aquí no se
+    vuelven a dividir, para que los chunks registrados en la bitácora de corrida sigan
+    coincidiendo al reanudar aunque el tamaño de batch cambie.
+    
+    Args:
+        page_contents: Páginas pendientes (con "markdown_cleaned")
+        batch_size: Tamaño máximo del batch en caracteres
+        
+    Returns:
+        Tupla (pages_in_batch, combined_markdown, páginas restantes). Una página que
+        por sí sola excede el límite (p. ej. si el tamaño de batch bajó) forma su
+        propio batch.
+    """
+    separator = "\n\n---\n\n"
+    pages_in_batch = []
+    current_size = 0
+    
+    for idx, page_data in enumerate(page_contents):
+        markdown = page_data.get("markdown_cleaned", "")
+        separator_size = len(separator) if pages_in_batch else 0
+        if pages_in_batch and current_size + separator_size + len(markdown) > batch_size:
+            return pages_in_batch, join_batch_markdown(pages_in_batch), page_contents[idx:]
+        pages_in_batch.append(page_data)
+        current_size += separator_size + len(markdown)
+    
+    return pages_in_batch, join_batch_markdown(pages_in_batch), []
+
+
+def split_batch(pages_in_batch: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Divide un batch en dos mitades (para reintentar un batch fallido con menos contenido).
+    
+    Args:
+        pages_in_batch: Páginas del batch
+        
+    Returns:
+        Lista con las dos mitades, o lista vacía si el batch tiene una sola página
+    """
+    if len(pages_in_batch) < 2:
+        return []
+    middle = len(pages_in_batch) // 2
+    return [pages_in_batch[:middle], pages_in_batch[middle:]]
+
+
+def join_batch_markdown(pages_in_batch: List[Dict[str, Any]]) -> str:
+    """
+    Combina el markdown de las páginas de un batch con el separador estándar.
+    
+    Args:
+        pages_in_batch: Páginas del batch
+        
+    Returns:
+        Markdown combinado
+    """
+    return "\n\n---\n\n".join(page.get("markdown_cleaned", "") for page in pages_in_batch)
@@ -2,142 +2,218 @@
 Utilidades para procesar y optimizar markdown antes de enviarlo a Gemini
 """
 
+import bisect
 import re
 from typing import List
 
 
-def chunk_markdown(markdown: str, max_chunk_size: int = 500000) -> List[str]:
+# Fronteras de corte de chunk_markdown, de la más preferida a la menos: antes de un
+# título o después de un separador horizontal (límites de un item de listado o sección),
+# items de lista, párrafos y líneas. Se corta al final de cada coincidencia
+_CHUNK_BOUNDARY_RES = [
+    re.compile(r'\n(?=#{1,6}\s)|\n(?:---|\*\*\*|___)\n'),
+    re.compile(r'\n(?=[ ]{0,3}(?:[-*+]|\d+[.)])\s)'),
+    re.compile(r'\n\n(?=[^\n])'),
+    re.compile(r'\n'),
+]
+
+
+def _markdown_cut_points(text: str, max_size: int, start: int, end: int, level: int = 0) -> List[int]:
+    """Posiciones de corte en text[start:end] (ordenadas) tales que ningún tramo excede max_size"""
+    if end - start <= max_size:
+        return []
+    if level >= len(_CHUNK_BOUNDARY_RES):
+        # Sin fronteras (p. ej. una línea enorme): corte por caracteres
+        return list(range(start + max_size, end, max_size))
+    boundaries = [match.end() for match in _CHUNK_BOUNDARY_RES[level].finditer(text, start, end)]
+    points: List[int] = []
+    previous = start
+    for cut in boundaries + [end]:
+        if cut <= previous:
+            continue
+        if cut - previous > max_size:
+            # Tramo demasiado grande: se corta dentro con una frontera de menor nivel
+            points.extend(_markdown_cut_points(text, max_size, previous, cut, level + 1))
+        if cut < end:
+            points.append(cut)
+        previous = cut
+    return points
+
+
+def chunk_markdown(markdown: str, max_chunk_size: int = 500000, overlap: int = 0) -> List[str]:
     """
     Divide el markdown en chunks si es muy largo
     
+    Corta preferentemente entre items de listado o secciones (títulos), y solo dentro
+    de una sección demasiado grande baja a items de lista, párrafos, líneas y, en
+    último caso, caracteres.
+    
     Args:
         markdown: Contenido markdown a dividir
         max_chunk_size: Tamaño máximo por chunk en caracteres
-        
+        overlap: Caracteres máximos del final de un chunk que se repiten al inicio del
+            siguiente (desde una frontera, para no perder el contexto de un item cortado)
+    
     Returns:
         Lista de chunks
     """
     if len(markdown) <= max_chunk_size:
         return [markdown]
     
+    cuts = _markdown_cut_points(markdown, max_chunk_size, 0, len(markdown)) + [len(markdown)]
     chunks = []
-    current_chunk = ""
-    
-    # Intentar dividir por párrafos (doble salto de línea)
-    paragraphs = markdown.split("\n\n")
-    
-    for paragraph in paragraphs:
-        # Si agregar este párrafo excede el límite, guardar chunk actual
-        if len(current_chunk) + len(paragraph) + 2 > max_chunk_size:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-                current_chunk = paragraph
-            else:
-                # Si un párrafo individual es muy largo, dividirlo por líneas
-                lines = paragraph.split("\n")
-                for line in lines:
-                    if len(current_chunk) + len(line) + 1 > max_chunk_size:
-                        if current_chunk:
-                            chunks.append(current_chunk.strip())
-                        current_chunk = line
-                    else:
-                        current_chunk += "\n" + line if current_chunk else line
-        else:
-            current_chunk += "\n\n" + paragraph if current_chunk else paragraph
-    
-    # Agregar último chunk
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    chunk_start = 0
+    while chunk_start < len(markdown):
+        # Último corte que cabe en el chunk (siempre hay uno: ningún tramo excede el máximo)
+        end_index = bisect.bisect_right(cuts, chunk_start + max_chunk_size) - 1
+        chunk_end = cuts[end_index]
+        chunk = markdown[chunk_start:chunk_end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if chunk_end >= len(markdown):
+            break
+        if overlap <= 0:
+            chunk_start = chunk_end
+            continue
+        # El siguiente chunk parte en la primera frontera dentro del solapamiento que
+        # todavía le deja espacio para llegar al corte siguiente
+        next_start = max(chunk_end - overlap, cuts[end_index + 1] - max_chunk_size, chunk_start + 1)
+        chunk_start = cuts[bisect.bisect_left(cuts, next_start)]
     
     return chunks
 
 
-def clean_markdown_for_llm(markdown: str) -> str:
-    """
-    Limpia el markdown para optimizar el procesamiento con LLM
-    Elimina caracteres innecesarios, espacios excesivos, y contenido no relevante
+# Patrones de clean_markdown_for_llm (compilados una vez)
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F-\x9F]')
+_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\([^\)]+\)')
+_SELF_LINK_RE = re.compile(r'\[([^\]]+)\]\(\1\)')
+_REPEATED_SPECIAL_RE = re.compile(r'([\-_=*#])\1{3,}')
+_MULTIPLE_SPACES_RE = re.compile(r' {3,}')
+_TABS_RE = re.compile(r'\t+')
+_SPECIAL_LINE_RE = re.compile(r'^[\s\-_=*#\.]+$')
+_EMPTY_CODE_BLOCK_RE = re.compile(r'```[^\n]*\n[\s\-\_=*#\.]*\n```', flags=re.MULTILINE)
+_TRAILING_SPACES_RE = re.compile(r' +\n')
+_LEADING_SPACES_RE = re.compile(r'\n +')
+_SHORT_NUMERIC_LINE_RE = re.compile(r'^[\d\s\.\-\/]+$')
+_MULTIPLE_NEWLINES_RE = re.compile(r'\n{3,}')
+
+
+def _clean_inline(markdown: str) -> str:
+    """Pasos a nivel de caracteres: control, imágenes, enlaces, repeticiones, espacios y tabs"""
+    # 1. Eliminar caracteres de control y no imprimibles (excepto saltos de línea y tabs)
+    markdown = _CONTROL_CHARS_RE.sub('', markdown)
     
-    Args:
-        markdown: Markdown a limpiar
-        
-    Returns:
-        Markdown limpio y optimizado
-    """
-    if not markdown:
-        return ""
+    # 2. Imágenes: ![alt](url) -> alt text o eliminar si no hay alt
+    if '![' in markdown:
+        markdown = _IMAGE_RE.sub(r'\1', markdown)
     
-    # 1. Eliminar caracteres de control y no imprimibles (excepto saltos de línea y tabs)
-    markdown = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F-\x9F]', '', markdown)
+    # 3. Enlaces que son solo URLs sin texto descriptivo: [url](url) -> url
+    if '](' in markdown:
+        markdown = _SELF_LINK_RE.sub(r'\1', markdown)
     
-    # 2. Eliminar URLs de imágenes que no aportan información (solo mantener alt text si existe)
-    # Patrón: ![alt](url) -> alt text o eliminar si no hay alt
-    markdown = re.sub(r'!\[([^\]]*)\]\([^\)]+\)', r'\1', markdown)
+    # 4. Caracteres especiales repetidos: "------" se reduce a "---"
+    markdown = _REPEATED_SPECIAL_RE.sub(r'\1\1\1', markdown)
     
-    # 3. Eliminar enlaces que son solo URLs sin texto descriptivo
-    # Patrón: [url](url) -> url
-    markdown = re.sub(r'\[([^\]]+)\]\(\1\)', r'\1', markdown)
+    # 5. Espacios múltiples (más de 2 seguidos)
+    markdown = _MULTIPLE_SPACES_RE.sub(' ', markdown)
     
-    # 4. Eliminar caracteres especiales repetidos (más de 2 seguidos)
-    # Ejemplo: "---" se mantiene, pero "------" se reduce a "---"
-    markdown = re.sub(r'([\-_=*#])\1{3,}', r'\1\1\1', markdown)
+    # 6. Tabs
+    if '\t' in markdown:
+        markdown = _TABS_RE.sub(' ', markdown)
     
-    # 5. Eliminar espacios en blanco múltiples (más de 2 espacios seguidos)
-    markdown = re.sub(r' {3,}', ' ', markdown)
+    return markdown
+
+
+def _clean_lines(markdown: str) -> str:
+    """
+    Pasos por línea en una sola pasada (markdown sin bloques de código)
     
-    # 6. Eliminar tabs múltiples
-    markdown = re.sub(r'\t+', ' ', markdown)
+    Equivale a: eliminar líneas de solo caracteres especiales, quitar espacios al
+    inicio/fin de línea, eliminar líneas muy cortas de solo números/puntuación y dejar
+    como máximo una línea vacía entre líneas con contenido.
+    """
+    cleaned_lines = []
+    pending_empty = False
     
-    # 7. Eliminar líneas que solo contienen caracteres especiales o espacios
-    lines = markdown.split("\n")
+    for line in markdown.split("\n"):
+        stripped = line.strip()
+        
+        if not stripped:
+            # Las líneas vacías al inicio y al final se eliminan con el strip final
+            if cleaned_lines:
+                pending_empty = True
+            continue
+        
+        # Líneas con solo caracteres especiales, o muy cortas con solo números/puntuación
+        if _SPECIAL_LINE_RE.match(stripped) or \
+           (len(stripped) < 3 and _SHORT_NUMERIC_LINE_RE.match(stripped)):
+            continue
+        
+        if pending_empty:
+            cleaned_lines.append("")
+            pending_empty = False
+        cleaned_lines.append(line.strip(' '))
+    
+    return "\n".join(cleaned_lines).strip()
+
+
+def _clean_lines_with_code_blocks(markdown: str) -> str:
+    """Pasos por línea cuando hay bloques de código (eliminar uno vacío puede unir líneas)"""
+    # 7. Eliminar líneas que solo contienen caracteres especiales (máximo 2 vacías seguidas)
     cleaned_lines = []
     empty_count = 0
     
-    for line in lines:
+    for line in markdown.split("\n"):
         stripped = line.strip()
         
-        # Eliminar líneas que solo tienen caracteres especiales
-        if stripped and not re.match(r'^[\s\-_=*#\.]+$', stripped):
-            # Es una línea con contenido real
+        if stripped and not _SPECIAL_LINE_RE.match(stripped):
             empty_count = 0
             cleaned_lines.append(line)
         elif stripped == "":
-            # Línea vacía - limitar a máximo 2 seguidas
             empty_count += 1
             if empty_count <= 2:
                 cleaned_lines.append("")
-            # Si hay más de 2 vacías seguidas, no agregar
-        else:
-            # Línea con solo caracteres especiales - eliminar
-            pass
     
     markdown = "\n".join(cleaned_lines)
     
     # 8. Eliminar bloques de código vacíos o con solo caracteres especiales
-    markdown = re.sub(r'```[^\n]*\n[\s\-\_=*#\.]*\n```', '', markdown, flags=re.MULTILINE)
+    markdown = _EMPTY_CODE_BLOCK_RE.sub('', markdown)
     
     # 9. Limpiar espacios alrededor de saltos de línea
-    markdown = re.sub(r' +\n', '\n', markdown)
-    markdown = re.sub(r'\n +', '\n', markdown)
-    
-    # 10. Eliminar líneas que son solo números o fechas sin contexto (muy cortas)
-    # Pero mantener fechas que son parte de concursos
-    lines = markdown.split("\n")
-    final_lines = []
-    for line in lines:
-        stripped = line.strip()
-        # Si la línea es muy corta (menos de 3 caracteres) y solo tiene números/puntuación, eliminar
-        if len(stripped) < 3 and re.match(r'^[\d\s\.\-\/]+$', stripped):
-            continue
-        # Mantener líneas con contenido relevante
-        final_lines.append(line)
-    
-    markdown = "\n".join(final_lines)
+    markdown = _TRAILING_SPACES_RE.sub('\n', markdown)
+    markdown = _LEADING_SPACES_RE.sub('\n', markdown)
     
-    # 11. Eliminar múltiples saltos de línea al final
-    markdown = markdown.rstrip()
+    # 10. Eliminar líneas muy cortas con solo números/puntuación
+    markdown = "\n".join(
+        line for line in markdown.split("\n")
+        if not (len(line.strip()) < 3 and _SHORT_NUMERIC_LINE_RE.match(line.strip()))
+    )
     
-    # 12. Normalizar saltos de línea múltiples (máximo 2 seguidos)
-    markdown = re.sub(r'\n{3,}', '\n\n', markdown)
+    # 11-12. Normalizar saltos de línea múltiples (máximo 2 seguidos)
+    markdown = _MULTIPLE_NEWLINES_RE.sub('\n\n', markdown.rstrip())
     
     return markdown.strip()
 
+
+def clean_markdown_for_llm(markdown: str) -> str:
+    """
+    Limpia el markdown para optimizar el procesamiento con LLM
+    Elimina caracteres innecesarios, espacios excesivos, y contenido no relevante
+    
+    Los patrones están precompilados y los pasos por línea se aplican en una sola
+    pasada; solo si hay bloques de código (```) se usa la secuencia completa de pasos.
+    
+    Args:
+        markdown: Markdown a limpiar
+    
+    Returns:
+        Markdown limpio y optimizado
+    """
+    if not markdown:
+        return ""
+    
+    markdown = _clean_inline(markdown)
+    
+    if '```' in markdown:
+        return _clean_lines_with_code_blocks(markdown)
+    return _clean_lines(markdown)
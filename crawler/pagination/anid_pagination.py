@@ -11,7 +11,8 @@ from typing import List, Dict, Any
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
 from crawl4ai.content_filter_strategy import PruningContentFilter
-from bs4 import BeautifulSoup
+from utils.html_document import HtmlDocument, as_html_document, get_soup
+from utils.keyword_scanner import get_keyword_scanner
 
 logger = logging.getLogger(__name__)
 
@@ -121,7 +122,9 @@ class AnidPagination:
         first_result_crawl = await crawler.arun(url=url, config=first_run_config)
         
         if first_result_crawl.success:
-            raw_html = captured_html_first if captured_html_first else (first_result_crawl.html if first_result_crawl.html else "")
+            raw_html = as_html_document(
+                captured_html_first if captured_html_first else (first_result_crawl.html if first_result_crawl.html else "")
+            )
             
             if captured_html_first:
                 import html2text
@@ -135,7 +138,7 @@ class AnidPagination:
             
             # Sanitizar HTML antes de guardarlo
             from utils.html_sanitizer import sanitize_html
-            sanitized_html = sanitize_html(raw_html, preserve_structure=True)
+            sanitized_html = HtmlDocument(sanitize_html(raw_html, preserve_structure=True))
             
             first_result = {
                 "success": True,
@@ -176,7 +179,7 @@ class AnidPagination:
                 
                 if previous_html:
                     try:
-                        soup = BeautifulSoup(previous_html, 'html.parser')
+                        soup = get_soup(previous_html)
                         pagination = soup.select_one('.jet-filters-pagination, .jet-smart-filters-pagination')
                         if pagination:
                             links = pagination.select('.jet-filters-pagination__link')
@@ -430,9 +433,9 @@ class AnidPagination:
                     except:
                         pass
                     
-                    captured_html_page = await page.content()
+                    captured_html_page = HtmlDocument(await page.content())
                     
-                    soup_check = BeautifulSoup(captured_html_page, 'html.parser')
+                    soup_check = captured_html_page.soup
                     items = soup_check.select('.jet-listing-grid__item')
                     items_with_elementor = sum(1 for item in items if item.select_one('[data-elementor-type="jet-listing-items"]'))
                     logger.info(f"✅ HTML capturado para página {page_num}: {len(captured_html_page)} chars, {len(items)} items, {items_with_elementor} con Elementor")
@@ -460,17 +463,21 @@ class AnidPagination:
                 # que se procesa más abajo
                 
                 if result.success:
-                    captured_html = captured_html_page if captured_html_page else (result.html if result.html else "")
+                    captured_html = as_html_document(
+                        captured_html_page if captured_html_page else (result.html if result.html else "")
+                    )
                     
-                    soup_check = BeautifulSoup(captured_html, 'html.parser')
+                    # Árbol ya parseado en el hook (se reutiliza para la verificación de última página)
+                    soup_check = captured_html.soup
                     items = soup_check.select('.jet-listing-grid__item')
                     items_with_content = 0
                     items_with_elementor = 0
+                    keyword_scanner = get_keyword_scanner(url)
                     for item in items:
                         text = item.get_text(strip=True)
                         has_elementor = item.select_one('[data-elementor-type="jet-listing-items"]')
                         has_title = item.select_one('h1, h2, h3, h4, h5, h6, .elementor-heading-title')
-                        has_date = bool(item.get_text() and any(word in text.lower() for word in ['noviembre', 'diciembre', 'octubre', 'cierre', 'apertura', 'inicio']))
+                        has_date = keyword_scanner.contains(text, "fecha_listado")
                         
                         if has_elementor:
                             items_with_elementor += 1
@@ -492,9 +499,6 @@ class AnidPagination:
                     else:
                         markdown_content = result.markdown.raw_markdown if result.markdown else ""
                     
-                    from utils.html_sanitizer import sanitize_html
-                    sanitized_html = sanitize_html(captured_html, preserve_structure=True)
-                    
                     try:
                         pagination_check = soup_check.select_one('.jet-filters-pagination, .jet-smart-filters-pagination')
                         if pagination_check:
@@ -528,6 +532,10 @@ class AnidPagination:
                     except Exception as check_error:
                         logger.debug(f"⚠️ Error al verificar botón siguiente después de procesar página {page_num}: {check_error}")
                     
+                    # Sanitizar al final: sanitize_html modifica el árbol parseado
+                    from utils.html_sanitizer import sanitize_html
+                    sanitized_html = HtmlDocument(sanitize_html(captured_html, preserve_structure=True))
+                    
                     page_result = {
                         "success": True,
                         "markdown": markdown_content,
@@ -11,6 +11,7 @@ from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
 from crawl4ai.content_filter_strategy import PruningContentFilter
 from crawler.strategies import get_strategy_for_url
+from utils.keyword_scanner import get_keyword_scanner
 import logging
 
 logger = logging.getLogger(__name__)
@@ -301,12 +302,12 @@ class WebScraper:
                         except:
                             pass  # Continuar aunque no esté completamente idle
                         
-                        # CAPTURAR EL HTML DIRECTAMENTE
-                        captured_html = await page.content()
+                        # CAPTURAR EL HTML DIRECTAMENTE (parseado una sola vez: el árbol se reutiliza abajo)
+                        from utils.html_document import HtmlDocument
+                        captured_html = HtmlDocument(await page.content())
                         
                         # Verificar que el HTML capturado tiene contenido
-                        from bs4 import BeautifulSoup
-                        soup_check = BeautifulSoup(captured_html, 'html.parser')
+                        soup_check = captured_html.soup
                         items = soup_check.select('.jet-listing-grid__item')
                         items_with_elementor = sum(1 for item in items if item.select_one('[data-elementor-type="jet-listing-items"]'))
                         logger.info(f"✅ HTML capturado: {len(captured_html)} chars, {len(items)} items, {items_with_elementor} con Elementor")
@@ -369,22 +370,20 @@ class WebScraper:
                         else:
                             markdown_content = ""
                     
-                    # Sanitizar HTML antes de guardarlo
-                    from utils.html_sanitizer import sanitize_html
-                    sanitized_html = sanitize_html(raw_html, preserve_structure=True)
-                    
                     # Verificar que tenemos contenido de concursos en el HTML
-                    from bs4 import BeautifulSoup
-                    soup_check = BeautifulSoup(raw_html, 'html.parser')
+                    from utils.html_document import HtmlDocument, as_html_document
+                    raw_html = as_html_document(raw_html)
+                    soup_check = raw_html.soup
                     items = soup_check.select('.jet-listing-grid__item')
                     items_with_content = 0
                     items_with_elementor = 0
+                    keyword_scanner = get_keyword_scanner(url)
                     for item in items:
                         text = item.get_text(strip=True)
                         # Verificar si tiene el elemento Elementor que contiene el contenido AJAX
                         has_elementor = item.select_one('[data-elementor-type="jet-listing-items"]')
                         has_title = item.select_one('h1, h2, h3, h4, h5, h6, .elementor-heading-title')
-                        has_date = bool(item.get_text() and any(word in text.lower() for word in ['noviembre', 'diciembre', 'octubre', 'cierre', 'apertura', 'inicio']))
+                        has_date = keyword_scanner.contains(text, "fecha_listado")
                         
                         if has_elementor:
                             items_with_elementor += 1
@@ -404,6 +403,10 @@ class WebScraper:
                         content_logs = [m for m in result.console_messages if 'contenido' in m.get('text', '').lower() or 'item' in m.get('text', '').lower()]
                         if content_logs:
                             logger.info(f"Logs de contenido en consola: {len(content_logs)} mensajes")
+                    # Sanitizar HTML antes de guardarlo (al final: sanitize_html modifica el árbol parseado)
+                    from utils.html_sanitizer import sanitize_html
+                    sanitized_html = HtmlDocument(sanitize_html(raw_html, preserve_structure=True))
+                    
                     logger.debug(f"Markdown extraído para {url}: {len(markdown_content)} caracteres")
                     logger.debug(f"HTML sanitizado: {len(raw_html)} -> {len(sanitized_html)} caracteres")
                     
@@ -685,12 +688,12 @@ class WebScraper:
                         except:
                             pass  # Continuar aunque no esté completamente idle
                         
-                        # CAPTURAR EL HTML DIRECTAMENTE
-                        captured_html = await page.content()
+                        # CAPTURAR EL HTML DIRECTAMENTE (parseado una sola vez: el árbol se reutiliza abajo)
+                        from utils.html_document import HtmlDocument
+                        captured_html = HtmlDocument(await page.content())
                         
                         # Verificar que el HTML capturado tiene contenido
-                        from bs4 import BeautifulSoup
-                        soup_check = BeautifulSoup(captured_html, 'html.parser')
+                        soup_check = captured_html.soup
                         items = soup_check.select('.jet-listing-grid__item')
                         items_with_elementor = sum(1 for item in items if item.select_one('[data-elementor-type="jet-listing-items"]'))
                         logger.info(f"✅ HTML capturado: {len(captured_html)} chars, {len(items)} items, {items_with_elementor} con Elementor")
@@ -753,22 +756,20 @@ class WebScraper:
                         else:
                             markdown_content = ""
                     
-                    # Sanitizar HTML antes de guardarlo
-                    from utils.html_sanitizer import sanitize_html
-                    sanitized_html = sanitize_html(raw_html, preserve_structure=True)
-                    
                     # Verificar que tenemos contenido de concursos en el HTML
-                    from bs4 import BeautifulSoup
-                    soup_check = BeautifulSoup(raw_html, 'html.parser')
+                    from utils.html_document import HtmlDocument, as_html_document
+                    raw_html = as_html_document(raw_html)
+                    soup_check = raw_html.soup
                     items = soup_check.select('.jet-listing-grid__item')
                     items_with_content = 0
                     items_with_elementor = 0
+                    keyword_scanner = get_keyword_scanner(url)
                     for item in items:
                         text = item.get_text(strip=True)
                         # Verificar si tiene el elemento Elementor que contiene el contenido AJAX
                         has_elementor = item.select_one('[data-elementor-type="jet-listing-items"]')
                         has_title = item.select_one('h1, h2, h3, h4, h5, h6, .elementor-heading-title')
-                        has_date = bool(item.get_text() and any(word in text.lower() for word in ['noviembre', 'diciembre', 'octubre', 'cierre', 'apertura', 'inicio']))
+                        has_date = keyword_scanner.contains(text, "fecha_listado")
                         
                         if has_elementor:
                             items_with_elementor += 1
@@ -788,6 +789,10 @@ class WebScraper:
                         content_logs = [m for m in result.console_messages if 'contenido' in m.get('text', '').lower() or 'item' in m.get('text', '').lower()]
                         if content_logs:
                             logger.info(f"Logs de contenido en consola: {len(content_logs)} mensajes")
+                    # Sanitizar HTML antes de guardarlo (al final: sanitize_html modifica el árbol parseado)
+                    from utils.html_sanitizer import sanitize_html
+                    sanitized_html = HtmlDocument(sanitize_html(raw_html, preserve_structure=True))
+                    
                     logger.debug(f"Markdown extraído para {url}: {len(markdown_content)} caracteres")
                     logger.debug(f"HTML sanitizado: {len(raw_html)} -> {len(sanitized_html)} caracteres")
                     
@@ -888,10 +893,13 @@ class WebScraper:
                     else:
                         markdown_content = ""
                     
-                    # Sanitizar HTML
+                    # Sanitizar HTML (el resultado se guarda como HtmlDocument: los extractores
+                    # de la página comparten un único parseo). Se hace en el pool de procesos
+                    # para no bloquear el event loop del navegador
                     raw_html = result.html if result.html else ""
-                    from utils.html_sanitizer import sanitize_html
-                    sanitized_html = sanitize_html(raw_html, preserve_structure=True)
+                    from utils.html_document import HtmlDocument
+                    from utils.page_processing import get_page_processing_pool, sanitize_page_html
+                    sanitized_html = HtmlDocument(await get_page_processing_pool().run(sanitize_page_html, raw_html))
                     
                     return {
                         "success": True,
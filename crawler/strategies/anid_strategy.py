@@ -25,6 +25,18 @@ KNOWN_SUBDIRECCIONES = {
     "redes estrategia y conocimiento",
 }
 
+# Selectores de la página de detalle de un concurso ANID (plantilla Elementor/JetEngine)
+DETERMINISTIC_SELECTORS = {
+    "nombre": [
+        ".elementor-widget-theme-post-title .elementor-heading-title",
+        "h1.elementor-heading-title",
+    ],
+    "fechas": [
+        ".jet-listing-dynamic-field__content",
+        ".elementor-widget-text-editor",
+    ],
+}
+
 
 class ANIDStrategy(ScrapingStrategy):
     """
@@ -126,3 +138,12 @@ class ANIDStrategy(ScrapingStrategy):
         """
         return KNOWN_SUBDIRECCIONES
 
+    
+    def get_deterministic_selectors(self) -> Dict[str, List[str]]:
+        """
+        Retorna selectores CSS de la página de detalle de ANID.
+        
+        Returns:
+            Diccionario {campo: [selectores CSS]}
+        """
+        return DETERMINISTIC_SELECTORS
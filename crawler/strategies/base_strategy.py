@@ -144,3 +144,16 @@ class ScrapingStrategy(ABC):
         """
         return set()
 
+    
+    def get_deterministic_selectors(self) -> Dict[str, List[str]]:
+        """
+        Retorna selectores CSS para la extracción determinística de la página de detalle.
+        
+        Por defecto retorna diccionario vacío (se usan solo las heurísticas genéricas).
+        Las claves reconocidas son "nombre" (elemento cuyo texto es el nombre del
+        concurso) y "fechas" (elementos cuyo texto contiene "Inicio:", "Cierre:", etc.).
+        
+        Returns:
+            Diccionario {campo: [selectores CSS en orden de prioridad]}
+        """
+        return {}
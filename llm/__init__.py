@@ -6,7 +6,7 @@ El GeminiClient solo gestiona API keys y rotación.
 """
 
 from .gemini_client import GeminiClient
-from .prompts import get_system_prompt, get_extraction_prompt
+from .prompts import get_system_prompt, get_extraction_prompt, get_targeted_extraction_prompt
 
-__all__ = ["GeminiClient", "get_system_prompt", "get_extraction_prompt"]
+__all__ = ["GeminiClient", "get_system_prompt", "get_extraction_prompt", "get_targeted_extraction_prompt"]
 
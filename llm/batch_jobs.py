@@ -0,0 +1,359 @@
+"""
+Modo batch asíncrono de Gemini (Batch API) para trabajos no urgentes
+
+En lugar de una llamada generateContent síncrona por batch, todas las solicitudes
+se envían juntas como un único trabajo (models/<modelo>:batchGenerateContent), se
+consulta su estado periódicamente y, al terminar, se recuperan las respuestas por
+clave. Los trabajos batch tienen límites de tasa mucho más holgados que la ruta
+interactiva, por lo que son adecuados para las corridas nocturnas.
+
+LocalBatchServer es un sustituto local (HTTP en 127.0.0.1) con los mismos
+endpoints, para probar el flujo completo sin red ni cuota.
+"""
+
+import json
+import time
+import uuid
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_BASE_URL = "https://generativelanguage.googleapis.com"
+
+# Estados terminales de un trabajo (la API usa prefijos BATCH_STATE_ o JOB_STATE_)
+_TERMINAL_STATES = {"SUCCEEDED", "FAILED", "CANCELLED", "EXPIRED"}
+
+
+def _state_name(job: Dict[str, Any]) -> str:
+    """Estado del trabajo sin prefijo (ej: "RUNNING", "SUCCEEDED")"""
+    state = (job.get("metadata") or {}).get("state") or job.get("state") or ""
+    return state.split("_STATE_")[-1] if "_STATE_" in state else state
+
+
+def extract_response_text(response: Dict[str, Any]) -> str:
+    """
+    Extrae el texto de una respuesta generateContent
+    
+    Args:
+        response: GenerateContentResponse (dict)
+    
+    Returns:
+        Texto del primer candidato
+    
+    Raises:
+        Exception: Si la respuesta no contiene texto (bloqueo, sin candidatos)
+    """
+    candidates = response.get("candidates") or []
+    if candidates:
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        if parts and "text" in parts[0]:
+            return parts[0]["text"].strip()
+        raise Exception(
+            f"No se encontró texto en la respuesta de Gemini (finishReason: {candidates[0].get('finishReason', 'N/A')})"
+        )
+    block_reason = (response.get("promptFeedback") or {}).get("blockReason")
+    if block_reason:
+        raise Exception(f"Prompt bloqueado por Gemini (blockReason: {block_reason})")
+    raise Exception("Respuesta inesperada de Gemini: sin candidatos")
+
+
+class GeminiBatchClient:
+    """Envía, consulta y recupera trabajos de la Batch API de Gemini"""
+    
+    def __init__(
+        self,
+        api_key_manager,
+        model_name: str,
+        base_url: Optional[str] = None,
+        timeout: int = 60
+    ):
+        """
+        Args:
+            api_key_manager: Gestor de API keys (el trabajo se crea con la key actual)
+            model_name: Modelo a usar
+            base_url: URL base de la API (None = Gemini; la de LocalBatchServer para pruebas)
+            timeout: Timeout de cada llamada HTTP (segundos)
+        """
+        self.api_key_manager = api_key_manager
+        self.model_name = model_name
+        self.base_url = (base_url or GEMINI_API_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.api_key: Optional[str] = None
+    
+    def submit(self, keyed_requests: List[Tuple[str, Dict[str, Any]]], display_name: str) -> str:
+        """
+        Crea un trabajo batch con solicitudes en línea
+        
+        Args:
+            keyed_requests: Lista de (clave, GenerateContentRequest); la clave identifica la respuesta
+            display_name: Nombre descriptivo del trabajo
+        
+        Returns:
+            Nombre del trabajo ("batches/...")
+        """
+        self.api_key = self.api_key_manager.get_current_key() if self.api_key_manager else None
+        if not self.api_key:
+            raise Exception("No hay API keys disponibles para crear el trabajo batch")
+        
+        payload = {
+            "batch": {
+                "display_name": display_name,
+                "input_config": {
+                    "requests": {
+                        "requests": [
+                            {"request": request, "metadata": {"key": key}}
+                            for key, request in keyed_requests
+                        ]
+                    }
+                },
+            }
+        }
+        response = requests.post(
+            f"{self.base_url}/v1beta/models/{self.model_name}:batchGenerateContent",
+            json=payload,
+            params={"key": self.api_key},
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise Exception(f"Error al crear trabajo batch (HTTP {response.status_code}): {response.text[:300]}")
+        job_name = response.json().get("name")
+        if not job_name:
+            raise Exception("Respuesta de creación de trabajo batch sin nombre")
+        self.api_key_manager.record_api_call(self.api_key, success=True)
+        logger.info(f"📦 Trabajo batch creado: {job_name} ({len(keyed_requests)} solicitudes, {self.model_name})")
+        return job_name
+    
+    def get(self, job_name: str) -> Dict[str, Any]:
+        """Consulta el estado de un trabajo"""
+        response = requests.get(
+            f"{self.base_url}/v1beta/{job_name}",
+            params={"key": self.api_key or self.api_key_manager.get_current_key()},
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise Exception(f"Error al consultar trabajo batch (HTTP {response.status_code}): {response.text[:300]}")
+        return response.json()
+    
+    def wait(
+        self,
+        job_name: str,
+        poll_interval: float = 30,
+        max_wait: Optional[float] = None,
+        should_stop_callback: Optional[Callable[[], bool]] = None,
+        status_callback: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Espera a que un trabajo termine, consultándolo cada poll_interval segundos
+        
+        Args:
+            job_name: Nombre del trabajo
+            poll_interval: Segundos entre consultas
+            max_wait: Espera máxima en segundos (None = sin límite)
+            should_stop_callback: Función que retorna True si se debe dejar de esperar
+            status_callback: Función para reportar progreso
+        
+        Returns:
+            Trabajo en estado terminal
+        
+        Raises:
+            TimeoutError: Si se supera max_wait o se solicita detener
+        """
+        start = time.time()
+        last_state = None
+        while True:
+            try:
+                job = self.get(job_name)
+            except Exception as e:
+                # Error transitorio de consulta: el trabajo sigue corriendo en el servidor
+                logger.warning(f"⚠️ {e}. Se reintentará la consulta")
+                job = {}
+            state = _state_name(job)
+            if state in _TERMINAL_STATES:
+                logger.info(f"📦 Trabajo batch {job_name} terminado: {state} ({time.time() - start:.0f}s)")
+                return job
+            if state and state != last_state:
+                logger.info(f"📦 Trabajo batch {job_name}: {state}")
+                if status_callback:
+                    status_callback(f"📦 Trabajo batch en curso ({state.lower()})...")
+                last_state = state
+            if should_stop_callback and should_stop_callback():
+                raise TimeoutError(f"Espera del trabajo batch {job_name} detenida por el usuario")
+            if max_wait is not None and time.time() - start > max_wait:
+                raise TimeoutError(f"El trabajo batch {job_name} no terminó en {max_wait}s")
+            time.sleep(poll_interval)
+    
+    @staticmethod
+    def results(job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Respuestas de un trabajo terminado, por clave
+        
+        Args:
+            job: Trabajo en estado terminal
+        
+        Returns:
+            Diccionario {clave: GenerateContentResponse o Exception}
+        """
+        state = _state_name(job)
+        if state != "SUCCEEDED":
+            error = (job.get("error") or {}).get("message") or state
+            raise Exception(f"El trabajo batch no terminó correctamente: {error}")
+        
+        container = (job.get("response") or {}).get("inlinedResponses") \
+            or ((job.get("metadata") or {}).get("output") or {}).get("inlinedResponses") \
+            or {}
+        inlined = container.get("inlinedResponses", []) if isinstance(container, dict) else container
+        
+        results: Dict[str, Any] = {}
+        for idx, entry in enumerate(inlined):
+            key = (entry.get("metadata") or {}).get("key", str(idx))
+            if entry.get("error"):
+                results[key] = Exception(
+                    f"Error en solicitud del trabajo batch: {entry['error'].get('message', entry['error'])}"
+                )
+            else:
+                results[key] = entry.get("response") or {}
+        return results
+
+
+def _example_from_schema(schema: Dict[str, Any], defs: Dict[str, Any]) -> Any:
+    """Valor mínimo que cumple un esquema JSON (respuestas del sustituto local)"""
+    if "$ref" in schema:
+        return _example_from_schema(defs.get(schema["$ref"].split("/")[-1], {}), defs)
+    if "anyOf" in schema:
+        if any(option.get("type") == "null" for option in schema["anyOf"]):
+            return None
+        return _example_from_schema(schema["anyOf"][0], defs)
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {
+            name: _example_from_schema(prop, defs)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    return {"array": [], "string": "", "boolean": False, "integer": 0, "number": 0}.get(schema_type)
+
+
+def default_local_responder(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Respuesta del sustituto local: JSON mínimo que cumple responseJsonSchema"""
+    schema = (request.get("generationConfig") or {}).get("responseJsonSchema") or {}
+    text = json.dumps(_example_from_schema(schema, schema.get("$defs", {})), ensure_ascii=False)
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": 0},
+    }
+
+
+class LocalBatchServer:
+    """
+    Sustituto local de la Batch API de Gemini (sin red ni cuota).
+    
+    Implementa batchGenerateContent y la consulta de trabajos; cada trabajo pasa a
+    SUCCEEDED tras `delay_seconds` y sus respuestas las genera `responder`.
+    Uso: `with LocalBatchServer() as server: GeminiBatchClient(..., base_url=server.base_url)`.
+    """
+    
+    def __init__(
+        self,
+        responder: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        delay_seconds: float = 0.0
+    ):
+        """
+        Args:
+            responder: Función GenerateContentRequest -> GenerateContentResponse
+            delay_seconds: Segundos que cada trabajo permanece en RUNNING
+        """
+        self.responder = responder or default_local_responder
+        self.delay_seconds = delay_seconds
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "LocalBatchServer":
+        """Inicia el servidor en un puerto libre"""
+        batch_server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(f"LocalBatchServer: {format % args}")
+            
+            def _send(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def do_POST(self):
+                if not self.path.split("?")[0].endswith(":batchGenerateContent"):
+                    return self._send(404, {"error": {"code": 404, "message": "Not found"}})
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                self._send(200, batch_server._create_job(body))
+            
+            def do_GET(self):
+                job_name = self.path.split("?")[0].replace("/v1beta/", "", 1)
+                job = batch_server._get_job(job_name)
+                if job is None:
+                    return self._send(404, {"error": {"code": 404, "message": f"{job_name} not found"}})
+                self._send(200, job)
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-batch-server", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Detiene el servidor"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+    
+    def __enter__(self) -> "LocalBatchServer":
+        return self.start()
+    
+    def __exit__(self, *exc) -> None:
+        self.stop()
+    
+    def _create_job(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        batch = body.get("batch", {})
+        entries = ((batch.get("input_config") or {}).get("requests") or {}).get("requests", [])
+        job_name = f"batches/local-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self.jobs[job_name] = {
+                "entries": entries,
+                "display_name": batch.get("display_name"),
+                "ready_at": time.time() + self.delay_seconds,
+            }
+        return {"name": job_name, "metadata": {"state": "BATCH_STATE_PENDING"}}
+    
+    def _get_job(self, job_name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self.jobs.get(job_name)
+        if job is None:
+            return None
+        if time.time() < job["ready_at"]:
+            return {"name": job_name, "metadata": {"state": "BATCH_STATE_RUNNING"}, "done": False}
+        inlined = []
+        for entry in job["entries"]:
+            try:
+                inlined.append({"response": self.responder(entry.get("request", {})), "metadata": entry.get("metadata", {})})
+            except Exception as e:
+                inlined.append({"error": {"code": 500, "message": str(e)}, "metadata": entry.get("metadata", {})})
+        return {
+            "name": job_name,
+            "metadata": {"state": "BATCH_STATE_SUCCEEDED"},
+            "done": True,
+            "response": {"inlinedResponses": {"inlinedResponses": inlined}},
+        }
@@ -13,9 +13,17 @@ import traceback
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 
-from models import Concurso, ConcursoResponse
+from models import Concurso
 from llm.gemini_client import GeminiClient
-from llm.prompts import get_system_prompt, get_extraction_prompt
+from llm.prompts import (
+    get_system_prompt,
+    get_targeted_extraction_prompt,
+    get_batch_content_prompt,
+    EXTRACTION_CONTENT_TEMPLATE,
+    TARGETED_FIELD_NAMES,
+)
+from llm.prompt_cache import get_extraction_schema, get_prompt_prefix, get_prompt_cache
+from utils.rate_limiter import estimate_tokens
 from config import EXTRACTION_CONFIG
 
 logger = logging.getLogger(__name__)
@@ -61,6 +69,14 @@ class LLMExtractor:
         
         # Guardar configuración para acceso a timeouts
         self.extraction_config = EXTRACTION_CONFIG
+        
+        # Caché del prefijo estático del prompt (context caching de Gemini o sustituto local)
+        self.prompt_cache = get_prompt_cache(
+            self.extraction_config.get("context_cache"),
+            ttl_seconds=self.extraction_config.get("context_cache_ttl_seconds", 3600),
+            min_tokens=self.extraction_config.get("context_cache_min_tokens"),
+            failure_ttl_seconds=self.extraction_config.get("context_cache_failure_ttl_seconds", 600),
+        )
     
     def extract_from_markdown(
         self,
@@ -86,15 +102,14 @@ class LLMExtractor:
         else:
             cleaned_markdown = markdown
         
-        # Generar prompt (sin URL, se asigna después programáticamente)
-        system_prompt = get_system_prompt()
-        extraction_prompt = get_extraction_prompt(cleaned_markdown)
-        full_prompt = f"{system_prompt}\n\n{extraction_prompt}"
+        # Generar prompt (sin URL, se asigna después programáticamente).
+        # El prefijo estático (sistema + instrucciones) se precalcula una sola vez.
+        content_prompt = EXTRACTION_CONTENT_TEMPLATE.format(markdown=cleaned_markdown)
         
         # Llamar a Gemini
         logger.info(f"Enviando contenido a Gemini para {url} (tamaño: {len(cleaned_markdown)} caracteres)")
         
-        response = self._call_llm_with_retry(full_prompt, url)
+        response = self._call_llm_with_retry(content_prompt, url, prompt_prefix=get_prompt_prefix("markdown"))
         
         # Parsear y validar respuesta (sin URL, se asignará después programáticamente)
         concursos = self._parse_response(response)
@@ -114,7 +129,8 @@ class LLMExtractor:
     def extract_from_batch(
         self,
         markdown_batch: str,
-        urls_in_batch: List[str]
+        urls_in_batch: List[str],
+        api_timeout: Optional[int] = None
     ) -> tuple[List[Concurso], Dict[str, Any]]:
         """
         Extrae concursos de un batch de markdown (múltiples páginas combinadas).
@@ -122,47 +138,17 @@ class LLMExtractor:
         Args:
             markdown_batch: Markdown combinado de múltiples páginas
             urls_in_batch: Lista de URLs que fueron agrupadas en este batch
+            api_timeout: Timeout por llamada en segundos (default: EXTRACTION_CONFIG["api_timeout"])
             
         Returns:
-            Tupla (lista de objetos Concurso extraídos, datos crudos para auditoría)
+            Tupla (lista de objetos Concurso extraídos, datos crudos para auditoría).
+            Los datos crudos incluyen "call_info" ({"truncations", "timeouts"} de esta
+            llamada) para el control adaptativo de batches.
         """
-        # Crear prompt para batch
-        system_prompt = get_system_prompt()
-        
-        # Construir prompt de batch
+        # El prefijo estático (sistema + instrucciones) se precalcula una sola vez;
+        # solo la parte con el contenido del batch cambia entre llamadas.
         num_pages = len(urls_in_batch)
-        expected_concursos_per_page = 6  # ANID tiene 6 concursos por página (excepto la última)
-        expected_total = num_pages * expected_concursos_per_page
-        
-        batch_prompt = f"""Analiza el siguiente contenido markdown extraído de {num_pages} páginas y extrae TODOS los concursos u oportunidades de financiamiento que encuentres.
-
-INSTRUCCIONES CRÍTICAS:
-- Este batch contiene {num_pages} páginas de resultados
-- Cada página típicamente contiene aproximadamente 6 concursos (excepto posiblemente la última página)
-- Extrae TODOS los concursos que encuentres, sin omitir ninguno
-- Si una página tiene menos de 6 concursos, extrae exactamente los que encuentres
-- Si una página tiene más de 6 concursos, extrae TODOS sin excepción
-- Extrae TODOS los concursos que encuentres en el contenido
-
-Para cada concurso, extrae:
-1. **nombre** (REQUERIDO): Nombre completo del concurso
-2. **fecha_apertura**: Texto original tal como aparece (ej: "10 de diciembre, 2025"). Busca "Apertura:", "Inicio:", "Desde:". Si no encuentras, usa null.
-3. **fecha_cierre**: Texto original tal como aparece (ej: "19 de marzo, 2026 - 17:00"). Busca "Cierre:", "Fecha de cierre:", "Hasta:", "Vence:". Incluye hora si está presente. Si no encuentras, usa null.
-4. **organismo** (REQUERIDO): Organismo administrador (ej: "ANID", "MINEDUC", "CNA"). Infiere desde contexto si no está explícito.
-5. **financiamiento**: Monto o tipo disponible. Busca "monto", "financiamiento", "presupuesto", "$", "hasta", "entre", "máximo", "mínimo". Si no encuentras, usa null.
-6. **descripcion** (opcional): Resumen breve del concurso
-7. **subdireccion** (opcional): Subdirección o área del organismo
-
-IMPORTANTE: 
-- Extrae el TEXTO ORIGINAL de las fechas tal como aparecen en el contenido
-- Retorna SOLO un JSON válido con este formato exacto: {{"concursos": [...]}}
-- Los campos "nombre" y "organismo" son OBLIGATORIOS. Si faltan, no incluyas ese concurso.
-- Si encuentras un concurso, inclúyelo en la respuesta.
-
-CONTENIDO A ANALIZAR (separado por páginas con "---"):
-{markdown_batch}"""
-        
-        full_prompt = f"{system_prompt}\n\n{batch_prompt}"
+        batch_prompt = get_batch_content_prompt(markdown_batch, num_pages)
         
         # Llamar a Gemini
         logger.info(
@@ -170,7 +156,15 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
             f"tamaño: {len(markdown_batch):,} caracteres)"
         )
         
-        response = self._call_llm_with_retry(full_prompt, urls_in_batch[0] if urls_in_batch else "unknown")
+        # Resumen propio de esta llamada: extract_from_batch puede correr en varios hilos a la vez
+        call_info = {"truncations": 0, "timeouts": 0}
+        response = self._call_llm_with_retry(
+            batch_prompt,
+            urls_in_batch[0] if urls_in_batch else "unknown",
+            prompt_prefix=get_prompt_prefix("batch"),
+            api_timeout=api_timeout,
+            call_info=call_info
+        )
         
         # Parsear y validar respuesta (sin URL, se asignará después programáticamente)
         concursos = self._parse_response(response)
@@ -182,25 +176,109 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
             "llm_response": response,
             "llm_response_size": len(response),
             "concursos_extraidos": len(concursos),
-            "concursos": [c.model_dump() for c in concursos] if concursos else []
+            "concursos": [c.model_dump() for c in concursos] if concursos else [],
+            "call_info": call_info,
         }
         
         return concursos, raw_data
     
-    def _call_llm_with_retry(self, prompt: str, url: str) -> str:
+    def extract_fields_from_pages(
+        self,
+        pages: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Optional[str]]]:
+        """
+        Extrae solo los campos no resueltos de varias páginas con un prompt focalizado.
+        
+        A diferencia de extract_from_batch, no envía la página completa ni pide el
+        esquema Concurso entero: cada página aporta un fragmento recortado y la
+        lista de campos que faltan (los que la extracción determinística no pudo
+        resolver y los que solo trae la página de detalle).
+        
+        Args:
+            pages: Lista de diccionarios con "url", "fields" (campos a completar)
+                y "context" (fragmento del markdown, ver extract_field_context)
+                
+        Returns:
+            Diccionario {url: {campo: valor o None}}
+        """
+        if not pages:
+            return {}
+        
+        json_schema = {
+            "type": "object",
+            "properties": {
+                "resultados": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "indice": {"type": "integer"},
+                            **{campo: {"type": "string"} for campo in TARGETED_FIELD_NAMES},
+                        },
+                        "required": ["indice"],
+                    },
+                }
+            },
+            "required": ["resultados"],
+        }
+        
+        prompt = f"{get_system_prompt()}\n\n{get_targeted_extraction_prompt(pages)}"
+        logger.info(
+            f"Enviando prompt focalizado al LLM ({len(pages)} páginas, "
+            f"tamaño: {len(prompt):,} caracteres)"
+        )
+        
+        response = self._call_llm_with_retry(prompt, pages[0]["url"], json_schema=json_schema)
+        
+        try:
+            data = json.loads(response)
+        except json.JSONDecodeError as e:
+            logger.error(f"Error al parsear respuesta focalizada: {e}")
+            return {}
+        
+        results: Dict[str, Dict[str, Optional[str]]] = {}
+        for item in data.get("resultados", []) if isinstance(data, dict) else []:
+            indice = item.get("indice")
+            if not isinstance(indice, int) or not (0 <= indice < len(pages)):
+                continue
+            page = pages[indice]
+            values = {}
+            for campo in page["fields"]:
+                value = item.get(campo)
+                if isinstance(value, str) and value.strip().lower() not in ("", "null", "none"):
+                    values[campo] = value.strip()
+                else:
+                    values[campo] = None
+            results[page["url"]] = values
+        
+        return results
+    
+    def _call_llm_with_retry(
+        self,
+        prompt: str,
+        url: str,
+        json_schema: Optional[Dict[str, Any]] = None,
+        prompt_prefix: Optional[str] = None,
+        api_timeout: Optional[int] = None,
+        call_info: Optional[Dict[str, int]] = None
+    ) -> str:
         """
         Llama al LLM con manejo de errores y reintentos.
         Usa Structured Outputs para garantizar formato JSON correcto.
         
         Args:
-            prompt: Prompt completo a enviar
+            prompt: Prompt a enviar (solo la parte variable si se indica prompt_prefix)
             url: URL de origen (para logging)
+            json_schema: Esquema de respuesta (default: ConcursoResponse sin campos calculados)
+            prompt_prefix: Prefijo estático del prompt. Si el caché de contexto de Gemini
+                está activo se envía como cachedContent; si no, se antepone al prompt.
+            api_timeout: Timeout por llamada en segundos (default: EXTRACTION_CONFIG["api_timeout"])
+            call_info: Diccionario del llamador donde se acumulan "truncations" y "timeouts"
+                de esta llamada (para el control adaptativo de batches)
             
         Returns:
             Texto de respuesta del LLM (JSON válido según el esquema)
         """
-        from models import ConcursoResponse
-        
         # Número máximo de reintentos: respetar EXTRACTION_CONFIG y no quemar todas las keys en un solo batch
         configured_retries = self.extraction_config.get("max_retries", 3) if hasattr(self, "extraction_config") else 3
         total_keys = len(self.api_key_manager.api_keys) if self.api_key_manager else 1
@@ -208,49 +286,12 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
         last_error = None
         rate_limit_retry_times = []  # Rastrear tiempos de retry de rate limits temporales
         
-        # Obtener el esquema JSON del modelo Pydantic y modificarlo
-        json_schema = ConcursoResponse.model_json_schema()
-        
-        # Modificar el esquema:
-        # 1. Las fechas deben aceptar texto original, no formato específico
-        # 2. Eliminar campos que NO debe pensar el LLM (estado, URL, metadatos)
-        if "properties" in json_schema and "concursos" in json_schema["properties"]:
-            concursos_schema = json_schema["properties"]["concursos"]
-            if "items" in concursos_schema and "properties" in concursos_schema["items"]:
-                item_props = concursos_schema["items"]["properties"]
-                
-                # Asegurar que fecha_apertura y fecha_cierre sean strings sin formato específico
-                for fecha_field in ["fecha_apertura", "fecha_cierre"]:
-                    if fecha_field in item_props:
-                        item_props[fecha_field] = {
-                            "type": "string",
-                            "description": item_props[fecha_field].get("description", ""),
-                            "title": item_props[fecha_field].get("title", fecha_field)
-                        }
-                
-                # Eliminar campos calculados automáticamente o manejados por el sistema
-                fields_to_remove = [
-                    "estado",  # Calculado desde fechas
-                    "predicted_opening",  # Calculado por el sistema
-                    "extraido_en",  # Agregado por el sistema
-                    "fuente",  # Agregado por el sistema
-                    "fecha_apertura_original",  # Duplicado de fecha_apertura
-                    "url",  # La URL se obtiene SIEMPRE de forma programática desde el HTML, no del LLM
-                ]
-                
-                for field in fields_to_remove:
-                    if field in item_props:
-                        del item_props[field]
-                
-                # Actualizar required fields si existe
-                if "required" in concursos_schema["items"]:
-                    required = concursos_schema["items"]["required"]
-                    for field in fields_to_remove:
-                        if field in required:
-                            required.remove(field)
+        # Esquema precalculado (ConcursoResponse sin campos calculados), construido una sola vez
+        if json_schema is None:
+            json_schema = get_extraction_schema()
         
         # Inicializar max_output_tokens (se ajustará dinámicamente si hay truncamiento)
-        prompt_size = len(prompt)
+        prompt_size = len(prompt) + (len(prompt_prefix) + 2 if prompt_prefix else 0)
         if prompt_size > 200000:  # Batch grande (múltiples páginas)
             # Calcular tokens de salida estimados: ~6 concursos por página * ~800 tokens por concurso (más conservador)
             # Usar un factor más alto para evitar truncamiento
@@ -272,9 +313,15 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
         
         # Contador de reintentos por truncamiento (independiente de max_retries)
         truncation_retries = 0
+        if call_info is None:
+            call_info = {}
+        call_info.setdefault("truncations", 0)
+        call_info.setdefault("timeouts", 0)
         max_truncation_retries = 3  # Máximo 3 aumentos de tokens
         
         for attempt in range(max_retries):
+            slot_key = None
+            request_sent = False
             try:
                 # Usar API REST directamente para Structured Outputs
                 # El SDK antiguo google.generativeai no soporta response_json_schema
@@ -284,9 +331,24 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
                     "Content-Type": "application/json",
                 }
                 
+                # Limitador proactivo: elegir la key con más holgura y respetar RPM/TPM/RPD
+                estimated_tokens = estimate_tokens(prompt) + (estimate_tokens(prompt_prefix) if prompt_prefix else 0)
+                self.gemini_client.acquire_request_slot(estimated_tokens)
+                slot_key = self.gemini_client.api_key
+                
+                # Prefijo cacheado en Gemini (la key puede haber rotado: se resuelve por intento)
+                cached_content = None
+                if prompt_prefix and self.prompt_cache is not None:
+                    cache_name = self.prompt_cache.resolve(
+                        self.gemini_client.model_name, self.gemini_client.api_key, prompt_prefix
+                    )
+                    if self.prompt_cache.is_remote:
+                        cached_content = cache_name
+                request_text = prompt if (cached_content or not prompt_prefix) else f"{prompt_prefix}\n\n{prompt}"
+                
                 payload = {
                     "contents": [{
-                        "parts": [{"text": prompt}]
+                        "parts": [{"text": request_text}]
                     }],
                     "generationConfig": {
                         "temperature": self.gemini_client.temperature,
@@ -295,15 +357,20 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
                         "responseJsonSchema": json_schema,
                     }
                 }
+                if cached_content:
+                    payload["cachedContent"] = cached_content
                 
                 params = {"key": self.gemini_client.api_key}
                 
                 # Obtener timeout de configuración (default: 60 segundos)
-                api_timeout = self.extraction_config.get("api_timeout", 60)
+                if api_timeout is None:
+                    api_timeout = self.extraction_config.get("api_timeout", 60)
                 
                 try:
+                    request_sent = True
                     response = requests.post(url, json=payload, headers=headers, params=params, timeout=api_timeout)
                 except requests.Timeout as timeout_error:
+                    call_info["timeouts"] += 1
                     logger.error(f"⏱️ Timeout después de {api_timeout}s en llamada a API")
                     raise Exception(f"Timeout de {api_timeout}s excedido en llamada a Gemini API. La API no respondió a tiempo.")
                 except requests.ConnectionError as conn_error:
@@ -343,6 +410,7 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
                     raise error_exception
                 
                 result = response.json()
+                self.gemini_client.record_token_usage(result, estimated_tokens)
                 
                 # Extraer el texto de la respuesta
                 if "candidates" in result and len(result["candidates"]) > 0:
@@ -380,6 +448,7 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
                         
                         # Si está truncado, aumentar tokens y reintentar
                         if is_truncated:
+                            call_info["truncations"] += 1
                             if truncation_retries < max_truncation_retries:
                                 # Aumentar tokens significativamente
                                 old_max_tokens = max_output_tokens
@@ -433,6 +502,12 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
                 error_type = type(e).__name__
                 self.api_key_manager.record_api_call(self.gemini_client.api_key, success=False)
                 
+                # Contenido cacheado expirado o eliminado en Gemini: recrearlo en el próximo intento
+                if prompt_prefix and self.prompt_cache is not None and "cachedcontent" in error_str.lower():
+                    self.prompt_cache.invalidate(
+                        self.gemini_client.model_name, self.gemini_client.api_key, prompt_prefix
+                    )
+                
                 # Registrar error detallado
                 if not hasattr(self, '_last_error_details'):
                     self._last_error_details = []
@@ -592,6 +667,10 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
                     continue
                 else:
                     raise e
+            finally:
+                # La reserva de cuota no se confirmó en record_token_usage: cerrarla para que no quede pendiente
+                if slot_key is not None:
+                    self.gemini_client.settle_request_slot(slot_key, request_sent)
         
         # Si llegamos aquí, todos los intentos fallaron
         if last_error:
@@ -799,6 +878,7 @@ CONTENIDO A ANALIZAR (separado por páginas con "---"):
             "url": url_normalized or None,
             "estado": estado,  # Calculado
             "fecha_apertura_original": fecha_apertura_raw,  # Texto original
+            "fecha_cierre_original": fecha_cierre_raw,  # Texto original
             "descripcion": item.get("descripcion"),
             "predicted_opening": item.get("predicted_opening"),
             "subdireccion": item.get("subdireccion"),
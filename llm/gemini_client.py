@@ -9,6 +9,8 @@ Todas las llamadas a la API se hacen directamente vía REST para usar Structured
 import logging
 from typing import Optional, Dict, Any
 from utils.api_key_manager import APIKeyManager
+from utils.rate_limiter import get_rate_limiter
+from config import GEMINI_CONFIG
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +73,75 @@ class GeminiClient:
         self.api_key = current_key
         return True
     
+    def acquire_request_slot(self, estimated_tokens: int) -> None:
+        """
+        Elige la API key con más holgura de cuota y espera lo necesario para no exceder
+        sus límites RPM/TPM/RPD (ver utils.rate_limiter).
+        
+        Args:
+            estimated_tokens: Tokens de entrada estimados de la solicitud
+        
+        Raises:
+            Exception: (status_code 429) si ninguna key tiene cupo diario; los llamadores
+                la tratan como error de cuota y rotan/marcan las keys agotadas
+        """
+        if not self.config.get("rate_limiting", GEMINI_CONFIG.get("rate_limiting", True)):
+            return
+        
+        self.api_key_manager._clean_exhausted_keys()
+        candidates = [
+            key for key in self.api_key_manager.api_keys
+            if key not in self.api_key_manager.exhausted_keys
+        ]
+        if not candidates:
+            return
+        
+        limiter = get_rate_limiter()
+        while candidates:
+            best_key = limiter.select_key(candidates, self.model_name, estimated_tokens)
+            if best_key is None:
+                break
+            
+            if best_key != self.api_key:
+                self.api_key_manager.current_key_index = self.api_key_manager.api_keys.index(best_key)
+                self.api_key = best_key
+            
+            if limiter.acquire(best_key, self.model_name, estimated_tokens) >= 0:
+                return
+            # Otro proceso consumió el último cupo diario entre select_key y acquire: probar otra key
+            logger.info(f"🔄 API key sin cupo diario para {self.model_name} al reservar, probando otra")
+            limiter.mark_day_exhausted(best_key, self.model_name)
+            candidates.remove(best_key)
+        
+        logger.warning(f"⚠️ Todas las API keys alcanzaron su cupo diario estimado para {self.model_name}")
+        quota_error = Exception(f"Cuota diaria agotada (quota) en todas las API keys para {self.model_name}")
+        quota_error.status_code = 429
+        raise quota_error
+    
+    def record_token_usage(self, result: Dict[str, Any], estimated_tokens: int) -> None:
+        """
+        Ajusta el presupuesto TPM de la key actual con los tokens reales de la respuesta.
+        
+        Args:
+            result: Respuesta JSON de generateContent (usa usageMetadata.promptTokenCount)
+            estimated_tokens: Tokens reservados en acquire_request_slot
+        """
+        usage = result.get("usageMetadata") or {}
+        get_rate_limiter().record_usage(
+            self.api_key, self.model_name, estimated_tokens, usage.get("promptTokenCount")
+        )
+    
+    def settle_request_slot(self, api_key: str, sent: bool) -> None:
+        """
+        Cierra la reserva de acquire_request_slot cuando la llamada falló sin llegar
+        a record_token_usage (no hace nada si ya se confirmó).
+        
+        Args:
+            api_key: Key con la que se reservó (la key actual puede haber rotado tras el error)
+            sent: True si la solicitud llegó a enviarse
+        """
+        get_rate_limiter().settle(api_key, self.model_name, sent)
+    
     @property
     def api_key(self) -> str:
         """Obtiene la API key actual"""
@@ -123,6 +194,9 @@ class GeminiClient:
             
             # Marcar la key actual como agotada
             self.api_key_manager.mark_key_exhausted(self.api_key, retry_after_seconds)
+            if retry_after_seconds >= 60 * 60:
+                # Límite diario: el limitador no debe volver a elegir esta key hoy
+                get_rate_limiter().mark_day_exhausted(self.api_key, self.model_name)
             
             # Rotar a la siguiente key
             next_key = self.api_key_manager.rotate_to_next_key()
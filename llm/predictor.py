@@ -20,9 +20,13 @@ from models.prediccion import (
 )
 from llm.gemini_client import GeminiClient
 from config import EXTRACTION_CONFIG, GEMINI_CONFIG
+from utils.rate_limiter import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+# Incrementar al cambiar los prompts de predicción: invalida las predicciones memoizadas
+PREDICTION_PROMPT_VERSION = "1"
+
 
 PREDICTION_SYSTEM_PROMPT = """Eres un analista experto en fondos de financiamiento para investigación académica en Chile.
 Tu tarea es analizar concursos y generar predicciones prudentes y bien justificadas sobre futuras fechas de apertura.
@@ -287,36 +291,7 @@ class ConcursoPredictor:
         Returns:
             Diccionario {concurso_url: PrediccionConcurso}
         """
-        fecha_actual = datetime.now().strftime("%Y-%m-%d")
-        
-        # Construir bloque de items para el batch
-        items_blocks = []
-        for idx, item in enumerate(concursos_batch, start=1):
-            concurso = item.get("concurso", {})
-            previous_info = item.get("previous_concursos_info", "")
-            
-            block_lines = [
-                f"CONCURSO {idx}:",
-                f"- URL: {concurso.get('url', '')}",
-                f"- Nombre: {concurso.get('nombre', '')}",
-                f"- Fecha apertura: {concurso.get('fecha_apertura', 'N/A')}",
-                f"- Fecha cierre: {concurso.get('fecha_cierre', 'N/A')}",
-                f"- Organismo: {concurso.get('organismo', 'N/A')}",
-                f"- Descripción: {concurso.get('descripcion', '')}",
-                "",
-                "CONCURSOS ANTERIORES:",
-                previous_info,
-                "",
-            ]
-            items_blocks.append("\n".join(block_lines))
-        
-        items_block = "\n\n".join(items_blocks)
-        
-        prompt = PREDICTION_FROM_PREVIOUS_BATCH_PROMPT_TEMPLATE.format(
-            fecha_actual=fecha_actual,
-            items_block=items_block
-        )
-        full_prompt = f"{PREDICTION_SYSTEM_PROMPT}\n\n{prompt}"
+        full_prompt = self._build_batch_prompt(concursos_batch)
         
         logger.info(
             f"🔮 Prediciendo próximas versiones para un batch de {len(concursos_batch)} concursos "
@@ -402,6 +377,115 @@ class ConcursoPredictor:
                         f"Se detendrá la ejecución de predicciones."
                     ) from e
     
+    def _build_batch_prompt(self, concursos_batch: list[dict]) -> str:
+        """
+        Construye el prompt completo (sistema + instrucciones + items) para un batch de predicción.
+        
+        Args:
+            concursos_batch: Lista de diccionarios con "concurso" y "previous_concursos_info"
+        
+        Returns:
+            Prompt completo
+        """
+        fecha_actual = datetime.now().strftime("%Y-%m-%d")
+        
+        # Construir bloque de items para el batch
+        items_blocks = []
+        for idx, item in enumerate(concursos_batch, start=1):
+            concurso = item.get("concurso", {})
+            previous_info = item.get("previous_concursos_info", "")
+            
+            block_lines = [
+                f"CONCURSO {idx}:",
+                f"- URL: {concurso.get('url', '')}",
+                f"- Nombre: {concurso.get('nombre', '')}",
+                f"- Fecha apertura: {concurso.get('fecha_apertura', 'N/A')}",
+                f"- Fecha cierre: {concurso.get('fecha_cierre', 'N/A')}",
+                f"- Organismo: {concurso.get('organismo', 'N/A')}",
+                f"- Descripción: {concurso.get('descripcion', '')}",
+                "",
+                "CONCURSOS ANTERIORES:",
+                previous_info,
+                "",
+            ]
+            items_blocks.append("\n".join(block_lines))
+        
+        items_block = "\n\n".join(items_blocks)
+        
+        prompt = PREDICTION_FROM_PREVIOUS_BATCH_PROMPT_TEMPLATE.format(
+            fecha_actual=fecha_actual,
+            items_block=items_block
+        )
+        return f"{PREDICTION_SYSTEM_PROMPT}\n\n{prompt}"
+    
+    def predict_batches_offline(
+        self,
+        batches: List[list],
+        status_callback=None,
+        should_stop_callback=None
+    ) -> Optional[List[Any]]:
+        """
+        Predice varios batches en un único trabajo asíncrono de la Batch API de Gemini.
+        
+        Para corridas no urgentes (cron nocturno): el trabajo no consume el cupo RPM/TPM
+        interactivo. Con EXTRACTION_CONFIG["batch_api_base_url"] apuntando a un
+        LocalBatchServer se prueba el flujo completo sin red.
+        
+        Args:
+            batches: Lista de batches (cada uno como en predict_from_previous_concursos_batch)
+            status_callback: Función para reportar progreso
+            should_stop_callback: Función que retorna True si se debe dejar de esperar
+        
+        Returns:
+            Lista alineada con batches: {concurso_url: PrediccionConcurso} o la Exception
+            del batch; None si no se pudo crear o completar el trabajo (usar la ruta síncrona)
+        """
+        from llm.batch_jobs import GeminiBatchClient, extract_response_text
+        
+        batch_config = {**self.extraction_config, **self.config}
+        keyed_requests = [
+            (f"batch-{idx}", self._build_structured_payload(
+                self._build_batch_prompt(batch), PrediccionBatchResponse, 12000
+            ))
+            for idx, batch in enumerate(batches)
+        ]
+        client = GeminiBatchClient(
+            self.api_key_manager,
+            self.gemini_client.model_name,
+            base_url=batch_config.get("batch_api_base_url"),
+        )
+        try:
+            job_name = client.submit(
+                keyed_requests, f"predicciones-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            )
+            if status_callback:
+                status_callback(f"📦 Trabajo batch enviado ({len(batches)} batches): {job_name}")
+            job = client.wait(
+                job_name,
+                poll_interval=batch_config.get("batch_api_poll_interval", 30),
+                max_wait=batch_config.get("batch_api_max_wait"),
+                should_stop_callback=should_stop_callback,
+                status_callback=status_callback,
+            )
+            responses = client.results(job)
+        except Exception as e:
+            logger.error(f"❌ Modo batch de Gemini no disponible, se usará la ruta síncrona: {e}")
+            return None
+        
+        results: List[Any] = []
+        for key, _ in keyed_requests:
+            response = responses.get(key)
+            if response is None:
+                results.append(Exception("El trabajo batch no devolvió respuesta para este batch"))
+            elif isinstance(response, Exception):
+                results.append(response)
+            else:
+                try:
+                    results.append(self._parse_prediction_batch_response(extract_response_text(response)))
+                except Exception as e:
+                    results.append(e)
+        return results
+    
     def predict_concurso_similarity(
         self,
         concurso1: Dict[str, Any],
@@ -474,9 +558,9 @@ class ConcursoPredictor:
                 justificacion=f"Error al analizar: {str(e)}"
             )
     
-    def _call_llm_with_structured_output(self, prompt: str, response_model=None, max_output_tokens: Optional[int] = None) -> str:
+    def _build_structured_payload(self, prompt: str, response_model=None, max_output_tokens: Optional[int] = None) -> Dict[str, Any]:
         """
-        Llama al LLM con structured output para garantizar formato correcto.
+        Construye el cuerpo generateContent con structured output.
         
         Args:
             prompt: Prompt completo
@@ -484,7 +568,7 @@ class ConcursoPredictor:
             max_output_tokens: Límite de tokens de salida (opcional, por defecto 2000 para individual, 12000 para batch)
             
         Returns:
-            Texto de respuesta del LLM (JSON válido)
+            GenerateContentRequest (dict)
         """
         from models.prediccion import PrediccionResponse, PrediccionBatchResponse
         
@@ -503,12 +587,7 @@ class ConcursoPredictor:
         # Obtener esquema JSON del modelo
         json_schema = response_model.model_json_schema()
         
-        # URL de la API
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_client.model_name}:generateContent"
-        
-        headers = {"Content-Type": "application/json"}
-        
-        payload = {
+        return {
             "contents": [{
                 "parts": [{"text": prompt}]
             }],
@@ -519,6 +598,25 @@ class ConcursoPredictor:
                 "responseJsonSchema": json_schema,
             }
         }
+    
+    def _call_llm_with_structured_output(self, prompt: str, response_model=None, max_output_tokens: Optional[int] = None) -> str:
+        """
+        Llama al LLM con structured output para garantizar formato correcto.
+        
+        Args:
+            prompt: Prompt completo
+            response_model: Modelo Pydantic para la respuesta (opcional)
+            max_output_tokens: Límite de tokens de salida (opcional, por defecto 2000 para individual, 12000 para batch)
+            
+        Returns:
+            Texto de respuesta del LLM (JSON válido)
+        """
+        payload = self._build_structured_payload(prompt, response_model, max_output_tokens)
+        
+        # URL de la API
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_client.model_name}:generateContent"
+        
+        headers = {"Content-Type": "application/json"}
         
         # Timeout
         api_timeout = self.extraction_config.get("api_timeout", 60)
@@ -532,8 +630,15 @@ class ConcursoPredictor:
         
         for attempt in range(max_retries):
             last_attempt_info = f"intento {attempt + 1}/{max_retries}"
+            slot_key = None
+            request_sent = False
             try:
+                # Limitador proactivo: elegir la key con más holgura y respetar RPM/TPM/RPD
+                estimated_tokens = estimate_tokens(prompt)
+                self.gemini_client.acquire_request_slot(estimated_tokens)
+                slot_key = self.gemini_client.api_key
                 params = {"key": self.gemini_client.api_key}
+                request_sent = True
                 response = requests.post(url, json=payload, headers=headers, params=params, timeout=api_timeout)
                 
                 if response.status_code != 200:
@@ -603,6 +708,8 @@ class ConcursoPredictor:
                     else:
                         raise last_error
                 
+                self.gemini_client.record_token_usage(result, estimated_tokens)
+                
                 # Extraer texto de respuesta
                 if "candidates" in result and len(result["candidates"]) > 0:
                     content = result["candidates"][0].get("content", {})
@@ -708,6 +815,10 @@ class ConcursoPredictor:
                     # Otro tipo de error, mejorar mensaje y no reintentar
                     enhanced_error = Exception(f"Error inesperado al llamar a Gemini API (intento {attempt + 1}/{max_retries}): [{error_type}] {error_str}")
                     raise enhanced_error from e
+            finally:
+                # La reserva de cuota no se confirmó en record_token_usage: cerrarla para que no quede pendiente
+                if slot_key is not None:
+                    self.gemini_client.settle_request_slot(slot_key, request_sent)
         
         # Si llegamos aquí, todos los intentos fallaron
         if last_error:
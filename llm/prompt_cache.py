@@ -0,0 +1,321 @@
+"""
+Esquema JSON y prefijo de prompt precalculados para las llamadas de extracción
+
+El esquema de respuesta (ConcursoResponse sin campos calculados) y el bloque
+estático de instrucciones se construyen una sola vez por versión y se reutilizan
+en todos los batches. El prefijo puede además registrarse en el context caching
+de Gemini (cachedContents) para no reenviar ni re-facturar el mismo preámbulo
+en cada llamada. LocalPromptCache es un sustituto en memoria, sin red.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from config import AVAILABLE_MODELS
+from llm.prompts import (
+    get_system_prompt,
+    EXTRACTION_INSTRUCTIONS,
+    BATCH_EXTRACTION_INSTRUCTIONS,
+)
+from utils.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Incrementar al cambiar las instrucciones de forma que invalide cachés remotos
+PROMPT_VERSION = "1"
+
+# Campos calculados automáticamente o manejados por el sistema (el LLM no debe generarlos)
+SCHEMA_FIELDS_TO_REMOVE = [
+    "estado",  # Calculado desde fechas
+    "predicted_opening",  # Calculado por el sistema
+    "extraido_en",  # Agregado por el sistema
+    "fuente",  # Agregado por el sistema
+    "fecha_apertura_original",  # Duplicado de fecha_apertura
+    "fecha_cierre_original",  # Duplicado de fecha_cierre
+    # "url" se mantiene: Concurso la exige y _map_to_concurso_model solo acepta URLs de
+    # concursos; luego se verifica/corrige de forma programática desde el HTML
+]
+
+# Mínimo de tokens para cachear contenido en modelos sin "context_cache_min_tokens" en AVAILABLE_MODELS
+DEFAULT_MIN_CACHE_TOKENS = 4096
+
+_PREFIX_INSTRUCTIONS = {
+    "markdown": EXTRACTION_INSTRUCTIONS,
+    "batch": BATCH_EXTRACTION_INSTRUCTIONS,
+}
+
+
+@lru_cache(maxsize=1)
+def _build_extraction_schema() -> Tuple[Dict[str, Any], str]:
+    """
+    Construye el esquema de respuesta de extracción y su versión (hash del contenido).
+    
+    Returns:
+        Tupla (esquema, versión)
+    """
+    from models import ConcursoResponse
+    
+    json_schema = ConcursoResponse.model_json_schema()
+    
+    # Modificar el esquema:
+    # 1. Las fechas deben aceptar texto original, no formato específico
+    # 2. Eliminar campos que NO debe pensar el LLM (estado, URL, metadatos)
+    if "properties" in json_schema and "concursos" in json_schema["properties"]:
+        concursos_schema = json_schema["properties"]["concursos"]
+        item_schema = concursos_schema.get("items", {})
+        # Pydantic define Concurso en $defs y lo referencia desde items
+        if "$ref" in item_schema:
+            item_schema = json_schema.get("$defs", {}).get(item_schema["$ref"].split("/")[-1], {})
+        if "properties" in item_schema:
+            item_props = item_schema["properties"]
+            
+            for fecha_field in ["fecha_apertura", "fecha_cierre"]:
+                if fecha_field in item_props:
+                    item_props[fecha_field] = {
+                        "type": "string",
+                        "description": item_props[fecha_field].get("description", ""),
+                        "title": item_props[fecha_field].get("title", fecha_field)
+                    }
+            
+            for field in SCHEMA_FIELDS_TO_REMOVE:
+                item_props.pop(field, None)
+            
+            required = item_schema.get("required")
+            if required:
+                item_schema["required"] = [
+                    field for field in required if field not in SCHEMA_FIELDS_TO_REMOVE
+                ]
+    
+    version = hashlib.sha256(json.dumps(json_schema, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return json_schema, version
+
+
+def get_extraction_schema() -> Dict[str, Any]:
+    """
+    Retorna el esquema JSON de respuesta para extracción (ConcursoResponse sin campos calculados).
+    
+    El diccionario es compartido entre llamadas: no debe modificarse.
+    
+    Returns:
+        Esquema JSON para responseJsonSchema
+    """
+    return _build_extraction_schema()[0]
+
+
+def get_schema_version() -> str:
+    """Retorna la versión (hash) del esquema de extracción"""
+    return _build_extraction_schema()[1]
+
+
+@lru_cache(maxsize=None)
+def get_prompt_prefix(kind: str = "batch") -> str:
+    """
+    Retorna el prefijo estático del prompt (sistema + instrucciones) para un tipo de extracción.
+    
+    Args:
+        kind: "batch" (varias páginas de listado) o "markdown" (una página)
+    
+    Returns:
+        Prefijo del prompt, sin el contenido a analizar
+    """
+    return f"{get_system_prompt()}\n\n{_PREFIX_INSTRUCTIONS[kind]}"
+
+
+def get_min_cache_tokens(model: str) -> int:
+    """
+    Retorna el mínimo de tokens que Gemini exige para cachear contenido con un modelo.
+    
+    Args:
+        model: Nombre del modelo
+    
+    Returns:
+        "context_cache_min_tokens" del modelo en AVAILABLE_MODELS (DEFAULT_MIN_CACHE_TOKENS si no lo define)
+    """
+    return AVAILABLE_MODELS.get(model, {}).get("context_cache_min_tokens", DEFAULT_MIN_CACHE_TOKENS)
+
+
+def _prefix_key(model: str, api_key: str, prefix: str) -> Tuple[str, str, str]:
+    """Clave de caché: modelo, hash de la API key (el caché es por proyecto) y versión del prefijo"""
+    key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+    prefix_hash = hashlib.sha256(f"{PROMPT_VERSION}:{prefix}".encode("utf-8")).hexdigest()[:16]
+    return model, key_hash, prefix_hash
+
+
+class LocalPromptCache:
+    """
+    Sustituto en memoria del context caching de Gemini.
+    
+    No realiza llamadas de red: resolve() retorna un nombre local estable por
+    modelo/prefijo y el extractor envía el prefijo en línea. Útil en pruebas y
+    para medir cuántas llamadas reutilizan el mismo prefijo.
+    """
+    
+    is_remote = False
+    
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str], str] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+    
+    def resolve(self, model: str, api_key: str, prefix: str) -> Optional[str]:
+        """
+        Retorna el nombre del contenido cacheado para el prefijo, registrándolo si no existe.
+        
+        Args:
+            model: Nombre del modelo
+            api_key: API key con la que se hará la llamada
+            prefix: Prefijo estático del prompt
+        
+        Returns:
+            Nombre del contenido cacheado
+        """
+        key = _prefix_key(model, api_key, prefix)
+        with self._lock:
+            if key in self._entries:
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+                self._entries[key] = f"local/{key[0]}/{key[2]}"
+            return self._entries[key]
+    
+    def invalidate(self, model: str, api_key: str, prefix: str) -> None:
+        """Elimina el contenido cacheado de un prefijo"""
+        with self._lock:
+            self._entries.pop(_prefix_key(model, api_key, prefix), None)
+
+
+class GeminiPromptCache(LocalPromptCache):
+    """
+    Registra el prefijo del prompt en el context caching de Gemini (cachedContents).
+    
+    Los contenidos cacheados pertenecen al proyecto de la API key, por lo que se
+    registra uno por modelo/key/versión de prefijo y se renueva antes de expirar.
+    Prefijos bajo el mínimo de tokens del modelo se envían en línea sin intentarlo.
+    Si la creación falla, esa combinación no se reintenta hasta que pase
+    failure_ttl_seconds (el prefijo se envía en línea mientras tanto).
+    """
+    
+    is_remote = True
+    API_URL = "https://generativelanguage.googleapis.com/v1beta/cachedContents"
+    
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        min_tokens: Optional[int] = None,
+        timeout: int = 30,
+        failure_ttl_seconds: int = 600
+    ):
+        """
+        Args:
+            ttl_seconds: Tiempo de vida de cada contenido cacheado
+            min_tokens: Tokens mínimos del prefijo para intentar cachearlo (None: el
+                mínimo del modelo, ver get_min_cache_tokens)
+            timeout: Timeout de la llamada de creación (segundos)
+            failure_ttl_seconds: Tiempo sin reintentar una combinación cuya creación falló
+        """
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.timeout = timeout
+        self.failure_ttl_seconds = failure_ttl_seconds
+        self._expires_at: Dict[Tuple[str, str, str], float] = {}
+        # Combinaciones cuya creación falló -> momento desde el que se puede reintentar
+        self._failed: Dict[Tuple[str, str, str], float] = {}
+    
+    def resolve(self, model: str, api_key: str, prefix: str) -> Optional[str]:
+        """
+        Retorna el nombre del contenido cacheado en Gemini, creándolo si es necesario.
+        
+        Args:
+            model: Nombre del modelo
+            api_key: API key con la que se hará la llamada
+            prefix: Prefijo estático del prompt
+        
+        Returns:
+            Nombre "cachedContents/..." o None si no se pudo cachear
+        """
+        min_tokens = self.min_tokens if self.min_tokens is not None else get_min_cache_tokens(model)
+        if not api_key or estimate_tokens(prefix) < min_tokens:
+            return None
+        
+        key = _prefix_key(model, api_key, prefix)
+        with self._lock:
+            retry_at = self._failed.get(key)
+            if retry_at is not None:
+                if retry_at > time.time():
+                    return None
+                del self._failed[key]
+            # Renovar con un margen de 60s antes de la expiración
+            if key in self._entries and self._expires_at.get(key, 0) - 60 > time.time():
+                self.stats["hits"] += 1
+                return self._entries[key]
+        
+        payload = {
+            "model": f"models/{model}",
+            "contents": [{"role": "user", "parts": [{"text": prefix}]}],
+            "ttl": f"{self.ttl_seconds}s",
+        }
+        try:
+            response = requests.post(
+                self.API_URL, json=payload, params={"key": api_key}, timeout=self.timeout
+            )
+            if response.status_code != 200:
+                raise Exception(f"HTTP {response.status_code}: {response.text[:300]}")
+            name = response.json().get("name")
+            if not name:
+                raise Exception("Respuesta sin nombre de contenido cacheado")
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo registrar el prefijo en el caché de contexto de Gemini ({model}): {e}")
+            with self._lock:
+                self._failed[key] = time.time() + self.failure_ttl_seconds
+            return None
+        
+        with self._lock:
+            self.stats["misses"] += 1
+            self._entries[key] = name
+            self._expires_at[key] = time.time() + self.ttl_seconds
+        logger.info(f"🗄️ Prefijo de prompt cacheado en Gemini ({model}, {len(prefix):,} caracteres): {name}")
+        return name
+    
+    def invalidate(self, model: str, api_key: str, prefix: str) -> None:
+        """Elimina el contenido cacheado de un prefijo (p. ej. si Gemini ya no lo reconoce)"""
+        key = _prefix_key(model, api_key, prefix)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._expires_at.pop(key, None)
+
+
+_prompt_caches: Dict[str, LocalPromptCache] = {}
+_prompt_caches_lock = threading.Lock()
+
+
+def get_prompt_cache(mode: Optional[str], **kwargs) -> Optional[LocalPromptCache]:
+    """
+    Retorna la instancia compartida del caché de prefijos para un modo.
+    
+    Args:
+        mode: "gemini" (cachedContents), "local" (sustituto en memoria) o None (deshabilitado)
+        **kwargs: Parámetros de GeminiPromptCache (ttl_seconds, min_tokens, timeout, failure_ttl_seconds)
+    
+    Returns:
+        Instancia del caché o None si está deshabilitado
+    """
+    if not mode:
+        return None
+    with _prompt_caches_lock:
+        if mode not in _prompt_caches:
+            if mode == "gemini":
+                _prompt_caches[mode] = GeminiPromptCache(**kwargs)
+            elif mode == "local":
+                _prompt_caches[mode] = LocalPromptCache()
+            else:
+                logger.warning(f"⚠️ Modo de caché de contexto desconocido: {mode}")
+                return None
+        return _prompt_caches[mode]
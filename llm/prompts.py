@@ -7,7 +7,7 @@ Tu tarea es extraer información estructurada sobre concursos y oportunidades de
 
 Debes ser preciso, exhaustivo y seguir exactamente el esquema JSON proporcionado."""
 
-EXTRACTION_PROMPT_TEMPLATE = """Analiza el siguiente contenido markdown y extrae TODOS los concursos u oportunidades de financiamiento que encuentres.
+EXTRACTION_INSTRUCTIONS = """Analiza el siguiente contenido markdown y extrae TODOS los concursos u oportunidades de financiamiento que encuentres.
 
 Para cada concurso, extrae:
 
@@ -22,13 +22,61 @@ Para cada concurso, extrae:
 IMPORTANTE:
 - Extrae el TEXTO ORIGINAL de las fechas tal como aparecen en el contenido
 - Si encuentras múltiples concursos, extrae TODOS
-- Si NO encuentras ningún concurso, retorna: {{"concursos": []}}
-- Los campos "nombre" y "organismo" son OBLIGATORIOS. Si faltan, no incluyas ese concurso.
+- Si NO encuentras ningún concurso, retorna: {"concursos": []}
+- Los campos "nombre" y "organismo" son OBLIGATORIOS. Si faltan, no incluyas ese concurso."""
 
-CONTENIDO:
+EXTRACTION_CONTENT_TEMPLATE = """CONTENIDO:
 {markdown}
 """
 
+# Instrucciones estáticas para batches de varias páginas. No dependen del contenido,
+# por lo que forman el prefijo cacheable del prompt (ver llm.prompt_cache).
+BATCH_EXTRACTION_INSTRUCTIONS = """Analiza el contenido markdown extraído de varias páginas de resultados (al final de este mensaje) y extrae TODOS los concursos u oportunidades de financiamiento que encuentres.
+
+INSTRUCCIONES CRÍTICAS:
+- Cada página típicamente contiene aproximadamente 6 concursos (excepto posiblemente la última página)
+- Extrae TODOS los concursos que encuentres, sin omitir ninguno
+- Si una página tiene menos de 6 concursos, extrae exactamente los que encuentres
+- Si una página tiene más de 6 concursos, extrae TODOS sin excepción
+- Extrae TODOS los concursos que encuentres en el contenido
+
+Para cada concurso, extrae:
+1. **nombre** (REQUERIDO): Nombre completo del concurso
+2. **fecha_apertura**: Texto original tal como aparece (ej: "10 de diciembre, 2025"). Busca "Apertura:", "Inicio:", "Desde:". Si no encuentras, usa null.
+3. **fecha_cierre**: Texto original tal como aparece (ej: "19 de marzo, 2026 - 17:00"). Busca "Cierre:", "Fecha de cierre:", "Hasta:", "Vence:". Incluye hora si está presente. Si no encuentras, usa null.
+4. **organismo** (REQUERIDO): Organismo administrador (ej: "ANID", "MINEDUC", "CNA"). Infiere desde contexto si no está explícito.
+5. **financiamiento**: Monto o tipo disponible. Busca "monto", "financiamiento", "presupuesto", "$", "hasta", "entre", "máximo", "mínimo". Si no encuentras, usa null.
+6. **descripcion** (opcional): Resumen breve del concurso
+7. **subdireccion** (opcional): Subdirección o área del organismo
+
+IMPORTANTE: 
+- Extrae el TEXTO ORIGINAL de las fechas tal como aparecen en el contenido
+- Retorna SOLO un JSON válido con este formato exacto: {"concursos": [...]}
+- Los campos "nombre" y "organismo" son OBLIGATORIOS. Si faltan, no incluyas ese concurso.
+- Si encuentras un concurso, inclúyelo en la respuesta."""
+
+BATCH_CONTENT_TEMPLATE = """Este batch contiene {num_pages} páginas de resultados.
+
+CONTENIDO A ANALIZAR (separado por páginas con "---"):
+{markdown_batch}"""
+
+TARGETED_FIELDS_PROMPT_TEMPLATE = """Para cada fragmento de página de concurso, completa SOLO los campos indicados en "CAMPOS".
+
+- nombre: Nombre completo del concurso
+- fecha_apertura: Texto original de la fecha de inicio/apertura (ej: "10 de diciembre, 2025")
+- fecha_cierre: Texto original de la fecha de cierre, con hora si está presente (ej: "19 de marzo, 2026 - 17:00")
+- financiamiento: Monto o tipo de financiamiento (montos, rangos o menciones de presupuesto)
+- descripcion: Descripción breve del concurso (1-2 oraciones)
+- subdireccion: Subdirección o área del organismo a cargo del concurso
+
+Usa null si el dato no aparece. Devuelve un resultado por fragmento con su "indice".
+
+{fragmentos}
+"""
+
+# Campos que pueden pedirse en un prompt focalizado
+TARGETED_FIELD_NAMES = ("nombre", "fecha_apertura", "fecha_cierre", "financiamiento", "descripcion", "subdireccion")
+
 
 def get_system_prompt() -> str:
     """Retorna el prompt del sistema"""
@@ -47,5 +95,39 @@ def get_extraction_prompt(markdown: str) -> str:
     Returns:
         Prompt completo para la extracción
     """
-    return EXTRACTION_PROMPT_TEMPLATE.format(markdown=markdown)
+    return f"{EXTRACTION_INSTRUCTIONS}\n\n{EXTRACTION_CONTENT_TEMPLATE.format(markdown=markdown)}"
 
+
+def get_batch_content_prompt(markdown_batch: str, num_pages: int) -> str:
+    """
+    Genera la parte variable del prompt de batch (se envía tras BATCH_EXTRACTION_INSTRUCTIONS).
+    
+    Args:
+        markdown_batch: Markdown combinado de las páginas del batch
+        num_pages: Número de páginas incluidas en el batch
+        
+    Returns:
+        Parte variable del prompt de batch
+    """
+    return BATCH_CONTENT_TEMPLATE.format(num_pages=num_pages, markdown_batch=markdown_batch)
+
+
+
+def get_targeted_extraction_prompt(pages: list) -> str:
+    """
+    Genera un prompt pequeño que pide solo los campos no resueltos de cada página.
+    
+    Args:
+        pages: Lista de diccionarios con "fields" (campos a completar) y
+            "context" (fragmento relevante del markdown)
+        
+    Returns:
+        Prompt focalizado
+    """
+    fragmentos = []
+    for indice, page in enumerate(pages):
+        campos = ", ".join(page["fields"])
+        fragmentos.append(
+            f"### FRAGMENTO {indice}\nCAMPOS: {campos}\n{page['context']}"
+        )
+    return TARGETED_FIELDS_PROMPT_TEMPLATE.format(fragmentos="\n\n".join(fragmentos))
@@ -46,6 +46,7 @@ from utils import (
     clear_unpredictable_concursos,
     HistoryManager
 )
+from utils.entity_resolution import get_entity_clusters
 from utils.scraping_state import (
     save_scraping_state,
     load_scraping_state,
@@ -176,21 +177,19 @@ def load_concursos_from_site(site: str) -> List[Dict[str, Any]]:
     
     concursos = []
     
-    for hist_concurso in history.get("concursos", []):
+    # Recalcular el estado de todos los concursos basándose en las fechas (determinístico),
+    # en una pasada vectorizada sobre las fechas ya parseadas del historial
+    from utils.estado_engine import compute_estados
+    estados = compute_estados(st.session_state.history_manager.get_date_columns(site))
+    
+    for row, hist_concurso in enumerate(history.get("concursos", [])):
         # Obtener la versión más reciente
         versions = hist_concurso.get("versions", [])
         if versions:
             latest = versions[-1]
             fecha_apertura = latest.get("fecha_apertura")
             fecha_cierre = latest.get("fecha_cierre")
-            estado_guardado = hist_concurso.get("estado") or latest.get("estado")
-            
-            # Recalcular estado basándose en las fechas (determinístico)
-            estado_calculado = calculate_estado_from_fechas(
-                fecha_cierre=fecha_cierre,
-                fecha_apertura=fecha_apertura,
-                estado_guardado=estado_guardado
-            )
+            estado_calculado = estados[row]
             
             concurso = {
                 "nombre": hist_concurso.get("nombre"),
@@ -714,6 +713,7 @@ with tab1:
                     # Tabla con st.dataframe
                     import pandas as pd
                     df_data = []
+                    entity_clusters = get_entity_clusters()
                     for idx, concurso in enumerate(filtered_concursos_sorted):
                         # Buscar predicción para este concurso
                         pred = next((p for p in predictions if p.get("concurso_url") == concurso.get("url")), None)
@@ -725,6 +725,8 @@ with tab1:
                             "Fecha Cierre": concurso.get("fecha_cierre", ""),
                             "Próxima Apertura": pred.get("fecha_predicha", "") if pred else "",
                             # Confianza eliminada del modelo; no se muestra
+                            # Mismo concurso en otros años (clusters de resolución de entidades)
+                            "Otros Años": len(entity_clusters.other_years(concurso.get("url", ""))) if entity_clusters else 0,
                             "URL": concurso.get("url", "")
                         })
                     
@@ -1347,6 +1349,31 @@ with tab2:
                         else:
                             st.info("No hay información de concursos anteriores guardada.")
                         
+                        # Mismo concurso en otros años (clusters de resolución de entidades)
+                        entity_clusters = get_entity_clusters()
+                        other_years = entity_clusters.other_years(pred.get("concurso_url", "")) if entity_clusters else []
+                        if other_years:
+                            st.markdown("#### 🧩 Mismo Concurso, Otros Años")
+                            df_other = pd.DataFrame([
+                                {
+                                    "Nombre": record.get("nombre", ""),
+                                    "Año": record.get("año") or "",
+                                    "Sitio": record.get("site", ""),
+                                    "Fecha Apertura": record.get("fecha_apertura") or "",
+                                    "Fecha Cierre": record.get("fecha_cierre") or "",
+                                    "URL": record.get("url", "")
+                                }
+                                for record in other_years
+                            ])
+                            st.dataframe(
+                                df_other,
+                                width='stretch',
+                                hide_index=True,
+                                column_config={
+                                    "URL": st.column_config.LinkColumn("URL")
+                                },
+                            )
+                        
                         # Justificación
                         st.markdown("#### 💭 Justificación")
                         st.write(pred.get("justificacion", "No disponible"))
@@ -41,6 +41,7 @@ class Concurso(BaseModel):
     # Campos opcionales adicionales (para compatibilidad y enriquecimiento)
     estado: Optional[str] = Field(None, description="Estado del concurso calculado automáticamente: 'Abierto', 'Cerrado', 'Suspendido' o 'Próximo'. NO debe ser calculado por el LLM, se calcula determinísticamente desde las fechas o detección de 'suspendido' en URL/contenido.")
     fecha_apertura_original: Optional[str] = Field(None, description="Texto original de la fecha de apertura")
+    fecha_cierre_original: Optional[str] = Field(None, description="Texto original de la fecha de cierre")
     descripcion: Optional[str] = Field(None, description="Descripción breve del concurso")
     predicted_opening: Optional[str] = Field(None, description="Fecha estimada de próxima apertura (si está cerrado)")
     subdireccion: Optional[str] = Field(None, description="Subdirección o área del organismo (ej: 'Capital Humano', 'Investigación Aplicada', 'Redes, Estrategia y Conocimiento'). El nombre puede variar según el sitio.")
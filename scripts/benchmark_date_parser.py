@@ -0,0 +1,116 @@
+"""
+Benchmark del parser de fechas (utils.date_parser.parse_date)
+
+Usa como corpus las fechas reales del historial (data/history/*.json: versiones y
+concursos anteriores) más ejemplos de los formatos de ANID. Verifica que la ruta
+rápida dé el mismo resultado que la ruta general (dateutil + patrones) y compara
+tiempos: ruta general, ruta rápida sin caché y parse_date con caché.
+
+Uso: python -m scripts.benchmark_date_parser [--repeat N]
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+from config import DATA_DIR
+from utils import date_parser
+
+SAMPLE_DATES = [
+    "10 de diciembre, 2025",
+    "19 de marzo, 2026 - 17:00",
+    "1 de abril, 2025 - 13:00",
+    "15 de marzo de 2024",
+    "30 de septiembre de 2023",
+    "2025-12-10",
+    "2025-3-7",
+    "2025-12-10T17:00:00",
+    "2025-12-10 17:00",
+    "10/12/2025",
+    "07-03-2024",
+    "12/13/2025",
+    "31 de febrero, 2025",
+    "Marzo 2025",
+    "Por definir",
+    "",
+]
+
+
+def load_corpus(history_dir: str):
+    """Fechas (strings) del historial y de los ejemplos"""
+    corpus = list(SAMPLE_DATES)
+    for path in glob.glob(os.path.join(history_dir, "*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                history = json.load(f)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer {path}: {e}")
+            continue
+        for concurso in history.get("concursos", []):
+            entries = concurso.get("versions", []) + concurso.get("previous_concursos", [])
+            for entry in entries:
+                for field in ("fecha_apertura", "fecha_cierre"):
+                    value = entry.get(field)
+                    if isinstance(value, str):
+                        corpus.append(value)
+    return corpus
+
+
+def timed(func, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for value in corpus:
+            func(value)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del parser de fechas")
+    parser.add_argument("--repeat", type=int, default=20, help="Pasadas sobre el corpus")
+    parser.add_argument("--history-dir", default=os.path.join(DATA_DIR, "history"))
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.history_dir)
+    unique = sorted(set(corpus))
+    print(f"Corpus: {len(corpus)} fechas ({len(unique)} distintas)")
+
+    # Equivalencia: la ruta rápida no debe cambiar ningún resultado, salvo los
+    # datetime ISO, que dateutil con dayfirst=True invierte (2025-12-10T17:00 -> 12 de octubre)
+    mismatches = []
+    fast_hits = 0
+    for value in unique:
+        expected = date_parser._parse_date_fallback(value.strip())
+        fast = date_parser._parse_date_fast(value.strip())
+        if fast is not None:
+            fast_hits += 1
+            if fast != expected:
+                if date_parser._ISO_DATETIME_RE.match(value.strip()):
+                    print(f"ℹ️ {value!r}: {fast} (ruta general: {expected}, día y mes invertidos)")
+                else:
+                    mismatches.append((value, fast, expected))
+        elif date_parser.parse_date(value) != (expected if value.strip() else None):
+            mismatches.append((value, date_parser.parse_date(value), expected))
+    print(f"Ruta rápida: {fast_hits}/{len(unique)} fechas distintas")
+    for value, got, expected in mismatches:
+        print(f"❌ {value!r}: {got} != {expected}")
+
+    general = timed(lambda v: date_parser._parse_date_fallback(v.strip()) if v else None, corpus, args.repeat)
+    fast = timed(
+        lambda v: (date_parser._parse_date_fast(v.strip()) or date_parser._parse_date_fallback(v.strip())) if v else None,
+        corpus,
+        args.repeat,
+    )
+    date_parser._parse_date_cached.cache_clear()
+    cached = timed(date_parser.parse_date, corpus, args.repeat)
+    total = len(corpus) * args.repeat
+    for name, seconds in (("general (dateutil primero)", general), ("rápida sin caché", fast), ("parse_date (caché)", cached)):
+        print(f"{name:28s} {seconds * 1000:9.1f} ms  {total / seconds:12.0f} fechas/s  x{general / seconds:.1f}")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
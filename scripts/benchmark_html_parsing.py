@@ -0,0 +1,137 @@
+"""
+Benchmark de parseo de HTML por página: varios parseos vs HtmlDocument compartido
+
+Para cada página guardada en data/raw_pages (o páginas sintéticas con estructura
+de ANID si no hay ninguna) ejecuta el flujo de una página de detalle:
+sanitize_html del HTML crudo y, sobre el HTML sanitizado, extract_concurso_urls_from_html,
+extract_listing_segments, extract_previous_concursos_from_html y
+extract_concurso_data_with_confidence.
+
+- Ruta anterior: cada extractor recibe un str y parsea la página por su cuenta.
+- Ruta nueva: cada HTML es un HtmlDocument y se parsea una sola vez.
+
+Verifica que ambas rutas den el mismo resultado y compara tiempos.
+
+Uso: python -m scripts.benchmark_html_parsing [--repeat N] [--limit N]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from config import RAW_PAGES_DIR
+from utils.html_document import HTML_PARSER, HtmlDocument
+from utils.html_sanitizer import sanitize_html
+from utils.url_extractor import extract_concurso_urls_from_html, extract_listing_segments
+from utils.anid_previous_concursos import extract_previous_concursos_from_html
+from utils.deterministic_date_extractor import extract_concurso_data_with_confidence
+
+try:
+    from crawler.strategies.anid_strategy import DETERMINISTIC_SELECTORS
+except ImportError:
+    DETERMINISTIC_SELECTORS = {}
+
+
+def synthetic_pages(count: int = 20):
+    """Páginas de detalle con estructura de ANID (título, fechas y "Concursos anteriores")"""
+    pages = []
+    for n in range(count):
+        items = "".join(
+            f"""
+            <div class="jet-listing-grid__item" data-post-id="{n}{i}">
+              <div data-elementor-type="jet-listing-items">
+                <h3 class="elementor-heading-title"><a href="https://anid.cl/concursos/concurso-{n}-{2024 - i}/">Concurso {n} {2024 - i}</a></h3>
+                <div class="jet-listing-dynamic-field__content">Inicio: {1 + i} de marzo, {2024 - i}</div>
+                <div class="jet-listing-dynamic-field__content">Cierre: {10 + i} de abril, {2024 - i} - 17:00</div>
+                <a class="elementor-button" href="https://anid.cl/concursos/concurso-{n}-{2024 - i}/">Ver más</a>
+              </div>
+            </div>"""
+            for i in range(8)
+        )
+        pages.append((
+            f"https://anid.cl/concursos/concurso-{n}-2025/",
+            f"""<!DOCTYPE html><html><head><title>Concurso {n} 2025 - ANID</title>
+            <meta property="og:title" content="Concurso {n} 2025"><script>var x = 1;</script>
+            <style>.a{{color:red}}</style><link rel="stylesheet" href="a.css"></head>
+            <body><header><nav><a href="/">Inicio</a><a href="/noticias">Noticias</a></nav></header>
+            <main><div class="elementor-widget-theme-post-title"><h1 class="elementor-heading-title">Concurso {n} 2025</h1></div>
+            <div class="elementor-widget-text-editor" style="x"><p>Inicio: 1 de marzo, 2025</p><p>Cierre: 10 de abril, 2025 - 17:00</p></div>
+            {"<p data-x='1'>Texto descriptivo del concurso con bases y requisitos.</p>" * 30}
+            <section><h2>Concursos anteriores</h2></section>
+            <section><div class="jet-listing-grid">{items}</div></section></main>
+            <footer><a href="/contacto">Contacto</a></footer></body></html>""",
+            f"# Concurso {n} 2025\n\nInicio: 1 de marzo, 2025\n\nCierre: 10 de abril, 2025 - 17:00\n",
+        ))
+    return pages
+
+
+def load_pages(limit: int):
+    """Páginas guardadas (url aproximada desde el nombre de archivo, html, markdown)"""
+    pages = []
+    for html_path in sorted(glob.glob(os.path.join(RAW_PAGES_DIR, "*", "*.html")))[:limit]:
+        md_path = html_path[:-5] + ".md"
+        with open(html_path, "r", encoding="utf-8") as f:
+            html = f.read()
+        markdown = ""
+        if os.path.exists(md_path):
+            with open(md_path, "r", encoding="utf-8") as f:
+                markdown = f.read()
+        pages.append((os.path.basename(html_path)[:-5], html, markdown))
+    return pages
+
+
+def run_page(url: str, raw_html: str, markdown: str, shared: bool):
+    raw = HtmlDocument(raw_html) if shared else raw_html
+    sanitized = sanitize_html(raw, preserve_structure=True)
+    html = HtmlDocument(sanitized) if shared else sanitized
+    return (
+        sanitized,
+        extract_concurso_urls_from_html(html, url),
+        extract_listing_segments(html, url),
+        extract_previous_concursos_from_html(html, url),
+        extract_concurso_data_with_confidence(markdown, url, html, selectors=DETERMINISTIC_SELECTORS),
+    )
+
+
+def timed(pages, shared: bool, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            run_page(*page, shared=shared)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de parseo de HTML por página")
+    parser.add_argument("--repeat", type=int, default=3, help="Pasadas sobre las páginas")
+    parser.add_argument("--limit", type=int, default=200, help="Máximo de páginas guardadas a usar")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    pages = load_pages(args.limit)
+    source = RAW_PAGES_DIR
+    if not pages:
+        pages = synthetic_pages()
+        source = "páginas sintéticas"
+    total_mb = sum(len(html) for _, html, _ in pages) / 1e6
+    print(f"{len(pages)} páginas ({total_mb:.1f} MB) de {source}; parser: {HTML_PARSER}")
+
+    mismatches = [page[0] for page in pages if run_page(*page, shared=False) != run_page(*page, shared=True)]
+    for url in mismatches:
+        print(f"❌ Resultado distinto: {url}")
+
+    before = timed(pages, shared=False, repeat=args.repeat)
+    after = timed(pages, shared=True, repeat=args.repeat)
+    n = len(pages) * args.repeat
+    print(f"{'varios parseos por página':28s} {before * 1000 / n:8.1f} ms/página")
+    print(f"{'HtmlDocument compartido':28s} {after * 1000 / n:8.1f} ms/página  x{before / after:.2f}")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
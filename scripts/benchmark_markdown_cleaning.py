@@ -0,0 +1,137 @@
+"""
+Benchmark de clean_markdown_for_llm (MB/s)
+
+Usa el markdown de las páginas guardadas en data/raw_pages (o markdown sintético
+con la estructura de los listados y páginas de detalle de ANID si no hay ninguno),
+verifica que la salida sea idéntica a la implementación anterior (una pasada de
+re.sub por regla, sin compilar) y compara el throughput.
+
+Uso: python -m scripts.benchmark_markdown_cleaning [--repeat N] [--limit N]
+"""
+
+import argparse
+import re
+import time
+
+from config import RAW_PAGES_DIR
+from crawler.markdown_processor import clean_markdown_for_llm
+from scripts.benchmark_html_parsing import load_pages
+
+
+def reference_clean_markdown(markdown: str) -> str:
+    """Implementación anterior de clean_markdown_for_llm (referencia de salida)"""
+    if not markdown:
+        return ""
+    markdown = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F-\x9F]', '', markdown)
+    markdown = re.sub(r'!\[([^\]]*)\]\([^\)]+\)', r'\1', markdown)
+    markdown = re.sub(r'\[([^\]]+)\]\(\1\)', r'\1', markdown)
+    markdown = re.sub(r'([\-_=*#])\1{3,}', r'\1\1\1', markdown)
+    markdown = re.sub(r' {3,}', ' ', markdown)
+    markdown = re.sub(r'\t+', ' ', markdown)
+    cleaned_lines = []
+    empty_count = 0
+    for line in markdown.split("\n"):
+        stripped = line.strip()
+        if stripped and not re.match(r'^[\s\-_=*#\.]+$', stripped):
+            empty_count = 0
+            cleaned_lines.append(line)
+        elif stripped == "":
+            empty_count += 1
+            if empty_count <= 2:
+                cleaned_lines.append("")
+    markdown = "\n".join(cleaned_lines)
+    markdown = re.sub(r'```[^\n]*\n[\s\-\_=*#\.]*\n```', '', markdown, flags=re.MULTILINE)
+    markdown = re.sub(r' +\n', '\n', markdown)
+    markdown = re.sub(r'\n +', '\n', markdown)
+    final_lines = []
+    for line in markdown.split("\n"):
+        stripped = line.strip()
+        if len(stripped) < 3 and re.match(r'^[\d\s\.\-\/]+$', stripped):
+            continue
+        final_lines.append(line)
+    markdown = "\n".join(final_lines)
+    markdown = markdown.rstrip()
+    markdown = re.sub(r'\n{3,}', '\n\n', markdown)
+    return markdown.strip()
+
+
+def synthetic_markdown(count: int = 40):
+    """Markdown como el que genera Crawl4AI para listados y detalles de ANID"""
+    pages = []
+    for n in range(count):
+        items = "\n".join(
+            f"""
+[ ![Concurso {n} {2024 - i}](https://anid.cl/wp-content/uploads/2024/0{1 + i % 9}/banner-{n}-{i}.png) ](https://anid.cl/concursos/concurso-{n}-{2024 - i}/)
+### [Concurso {n} {2024 - i}](https://anid.cl/concursos/concurso-{n}-{2024 - i}/)
+Inicio: {1 + i} de marzo, {2024 - i}
+Cierre: {10 + i} de abril, {2024 - i} - 17:00
+
+[Ver más](https://anid.cl/concursos/concurso-{n}-{2024 - i}/)
+* * *
+"""
+            for i in range(12)
+        )
+        pages.append(f"""  * [Inicio](https://anid.cl/)
+  * [Concursos](https://anid.cl/concursos/)
+  * [Noticias](https://anid.cl/noticias/)
+![](https://anid.cl/wp-content/themes/anid/logo.svg)
+# Concurso {n} 2025
+\t\t
+Inicio: 1 de marzo, 2025
+Cierre: 10 de abril, 2025 - 17:00
+----------------------------------------
+
+{"El concurso tiene por objetivo apoyar proyectos de investigación.   Bases y requisitos en el sitio.  " * 8}
+
+
+
+## Concursos anteriores
+{items}
+1
+| Año | Convocatoria |
+|-----|--------------|
+| 2024 | [https://anid.cl/a](https://anid.cl/a) |
+.
+_____
+""")
+    return pages
+
+
+def timed(func, pages, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for markdown in pages:
+            func(markdown)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de clean_markdown_for_llm")
+    parser.add_argument("--repeat", type=int, default=20, help="Pasadas sobre el corpus")
+    parser.add_argument("--limit", type=int, default=500, help="Máximo de páginas guardadas a usar")
+    args = parser.parse_args()
+
+    pages = [markdown for _, _, markdown in load_pages(args.limit) if markdown]
+    source = RAW_PAGES_DIR
+    if not pages:
+        pages = synthetic_markdown()
+        source = "markdown sintético"
+    total_mb = sum(len(markdown.encode("utf-8")) for markdown in pages) / 1e6
+    print(f"{len(pages)} páginas ({total_mb:.2f} MB) de {source}")
+
+    mismatches = [i for i, markdown in enumerate(pages) if clean_markdown_for_llm(markdown) != reference_clean_markdown(markdown)]
+    for i in mismatches:
+        print(f"❌ Salida distinta en la página {i}")
+
+    before = timed(reference_clean_markdown, pages, args.repeat)
+    after = timed(clean_markdown_for_llm, pages, args.repeat)
+    mb = total_mb * args.repeat
+    print(f"{'anterior (re.sub por regla)':30s} {mb / before:8.1f} MB/s")
+    print(f"{'precompilado, una pasada':30s} {mb / after:8.1f} MB/s  x{before / after:.2f}")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
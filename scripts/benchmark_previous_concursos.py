@@ -0,0 +1,105 @@
+"""
+Benchmark y pruebas golden de la extracción de "Concursos anteriores" (ANID)
+
+Usa las páginas de ANID guardadas en data/raw_pages (índice de caché de páginas)
+o, si no hay ninguna, las páginas sintéticas de benchmark_html_parsing. Compara
+la salida de extract_previous_concursos_from_html (especificación compilada) con
+data/golden/previous_concursos/anid.cl.json y mide el tiempo por página con el
+árbol ya parseado (HtmlDocument), que es lo que cambia entre implementaciones.
+
+Generar o regenerar los golden (con una versión de referencia del extractor):
+    python -m scripts.benchmark_previous_concursos --update
+
+Verificar y medir:
+    python -m scripts.benchmark_previous_concursos [--repeat N] [--limit N]
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+from config import DATA_DIR, RAW_PAGES_INDEX_DIR
+from scripts.benchmark_html_parsing import synthetic_pages
+from utils.anid_previous_concursos import extract_previous_concursos_from_html
+from utils.html_document import HtmlDocument
+
+SITE = "anid.cl"
+PAGE_INDEX_PATH = os.path.join(RAW_PAGES_INDEX_DIR, "index_anid_cl.json")
+GOLDEN_PATH = os.path.join(DATA_DIR, "golden", "previous_concursos", f"{SITE}.json")
+
+
+def load_site_pages(limit: int):
+    """Páginas guardadas del sitio (url, html) según el índice de caché de páginas"""
+    if not os.path.exists(PAGE_INDEX_PATH):
+        return []
+    with open(PAGE_INDEX_PATH, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    pages = []
+    for url, entry in sorted(index.items())[:limit]:
+        html_path = Path(entry.get("html_path", ""))
+        if html_path.is_file():
+            pages.append((url, html_path.read_text(encoding="utf-8")))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extracción de concursos anteriores")
+    parser.add_argument("--update", action="store_true", help="Regenerar el archivo golden")
+    parser.add_argument("--limit", type=int, default=500, help="Máximo de páginas guardadas a usar")
+    parser.add_argument("--repeat", type=int, default=5, help="Pasadas para medir tiempos")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    pages = load_site_pages(args.limit)
+    source = f"data/raw_pages ({SITE})"
+    if not pages:
+        pages = [(url, html) for url, html, _ in synthetic_pages()]
+        source = "páginas sintéticas"
+    print(f"{len(pages)} páginas de {source}")
+
+    results = {url: extract_previous_concursos_from_html(HtmlDocument(html), url) for url, html in pages}
+
+    if args.update:
+        os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ Golden de {len(results)} páginas escrito en {GOLDEN_PATH}")
+        return
+
+    failures = []
+    if os.path.exists(GOLDEN_PATH):
+        with open(GOLDEN_PATH, "r", encoding="utf-8") as f:
+            golden = json.load(f)
+        checked = [url for url in results if url in golden]
+        failures = [url for url in checked if results[url] != golden[url]]
+        for url in failures:
+            print(f"❌ {url}: {len(golden[url])} esperados, {len(results[url])} extraídos")
+        print(f"{len(checked) - len(failures)}/{len(checked)} páginas iguales a su golden")
+    else:
+        print("⚠️ Sin golden (generar con --update)")
+
+    with_section = sum(1 for previous in results.values() if previous)
+    items = sum(len(previous) for previous in results.values())
+    print(f"{with_section} páginas con concursos anteriores, {items} items")
+
+    elapsed = 0.0
+    for _ in range(args.repeat):
+        documents = [(url, HtmlDocument(html)) for url, html in pages]
+        for _, document in documents:
+            document.soup
+        start = time.perf_counter()
+        for url, document in documents:
+            extract_previous_concursos_from_html(document, url)
+        elapsed += time.perf_counter() - start
+    print(f"extract_previous_concursos_from_html: {elapsed * 1000 / (len(pages) * args.repeat):.2f} ms/página (sin parseo)")
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,30 @@
+import argparse
 import logging
 from datetime import datetime
 
+from config import EXTRACTION_CONFIG
 from config.sites import SEED_URLS
 from utils.api_key_manager import APIKeyManager
 from services.extraction_service import ExtractionService
 from services.prediction_service import PredictionService
+from utils.entity_resolution import run_entity_resolution
+from utils.run_journal import RunJournal
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Scraping y predicciones diarias de ANID")
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="Generar predicciones con un trabajo asíncrono de la Batch API de Gemini",
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Predecir todos los concursos del historial, no solo los afectados por cambios",
+    )
+    args = parser.parse_args()
+
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
     logger = logging.getLogger("daily_anid")
 
@@ -20,16 +37,45 @@ def main():
         logger.error("No hay URLs semilla para ANID.")
         return
 
-    logger.info("Iniciando scraping diario ANID...")
-    concursos = extraction_service.extract_from_urls(
-        urls=urls,
-        follow_pagination=True,
-        max_pages=2
+    # Si la corrida anterior se interrumpió hace poco, se reanuda desde su bitácora
+    resumable_run = RunJournal.find_resumable(
+        "anid.cl",
+        EXTRACTION_CONFIG.get("run_journal_resume_max_age_hours", 12)
     )
+    if resumable_run:
+        logger.info(f"Reanudando corrida interrumpida {resumable_run}...")
+        concursos = extraction_service.resume_run(resumable_run)
+    else:
+        logger.info("Iniciando scraping diario ANID...")
+        concursos = extraction_service.extract_from_urls(
+            urls=urls,
+            follow_pagination=True,
+            max_pages=2
+        )
     logger.info(f"Scraping ANID completado: {len(concursos)} concursos extraídos")
 
-    logger.info("Iniciando predicciones para ANID...")
-    pred_result = prediction_service.generate_predictions(site="anid.cl")
+    # Clusters de "mismo concurso, otros años" actualizados antes de predecir
+    try:
+        run_entity_resolution()
+    except Exception as e:
+        logger.warning(f"No se pudo ejecutar la resolución de entidades: {e}")
+
+    execution_mode = "batch" if args.batch_api else "sync"
+    if args.all:
+        logger.info("Iniciando predicciones para todos los concursos de ANID...")
+        pred_result = prediction_service.generate_predictions(
+            site="anid.cl",
+            execution_mode=execution_mode
+        )
+    else:
+        # Solo los concursos afectados por eventos de cambio del historial (nuevos,
+        # cerrados o con concursos anteriores nuevos) desde la última corrida, más los
+        # cerrados sin predicción vigente que encuentra el barrido periódico
+        logger.info("Iniciando predicciones incrementales para ANID...")
+        pred_result = prediction_service.process_change_events(
+            site="anid.cl",
+            execution_mode=execution_mode
+        )
     if isinstance(pred_result, dict):
         logger.info(f"Predicciones ANID completadas. Stats: {pred_result.get('stats', {})}")
     else:
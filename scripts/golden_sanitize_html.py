@@ -0,0 +1,102 @@
+"""
+Pruebas golden de sanitize_html sobre páginas guardadas
+
+Para cada página de data/raw_pages (o las páginas sintéticas de
+benchmark_html_parsing si no hay ninguna) compara la salida de sanitize_html con
+su archivo golden en data/golden/sanitize_html/ y mide el tiempo de sanitización
+(con el árbol ya parseado, que es lo que cambia entre implementaciones).
+
+Generar o regenerar los golden (con una versión de referencia del sanitizador):
+    python -m scripts.golden_sanitize_html --update
+
+Verificar:
+    python -m scripts.golden_sanitize_html
+"""
+
+import argparse
+import difflib
+import os
+import time
+
+from config import DATA_DIR, RAW_PAGES_DIR
+from scripts.benchmark_html_parsing import load_pages, synthetic_pages
+from utils.html_document import HtmlDocument
+from utils.html_sanitizer import sanitize_html
+
+GOLDEN_DIR = os.path.join(DATA_DIR, "golden", "sanitize_html")
+
+
+def golden_path(name: str) -> str:
+    return os.path.join(GOLDEN_DIR, f"{name}.html")
+
+
+def first_difference(expected: str, got: str) -> str:
+    """Primeras líneas del diff entre el golden y la salida actual"""
+    diff = difflib.unified_diff(
+        expected.splitlines(), got.splitlines(), "golden", "actual", lineterm="", n=1
+    )
+    return "\n".join(list(diff)[:12])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pruebas golden de sanitize_html")
+    parser.add_argument("--update", action="store_true", help="Regenerar los archivos golden")
+    parser.add_argument("--limit", type=int, default=500, help="Máximo de páginas guardadas a usar")
+    parser.add_argument("--repeat", type=int, default=3, help="Pasadas para medir tiempos")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    pages = [(name, html) for name, html, _ in load_pages(args.limit)]
+    source = RAW_PAGES_DIR
+    if not pages:
+        pages = [(f"sintetica_{n}", html) for n, (_, html, _) in enumerate(synthetic_pages())]
+        source = "páginas sintéticas"
+    print(f"{len(pages)} páginas de {source}")
+
+    if args.update:
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        for name, html in pages:
+            with open(golden_path(name), "w", encoding="utf-8") as f:
+                f.write(sanitize_html(html))
+        print(f"✅ {len(pages)} archivos golden escritos en {GOLDEN_DIR}")
+        return
+
+    missing = []
+    failures = []
+    for name, html in pages:
+        path = golden_path(name)
+        if not os.path.exists(path):
+            missing.append(name)
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            expected = f.read()
+        got = sanitize_html(html)
+        if got != expected:
+            failures.append(name)
+            print(f"❌ {name}\n{first_difference(expected, got)}")
+
+    checked = len(pages) - len(missing)
+    if missing:
+        print(f"⚠️ {len(missing)} páginas sin golden (generar con --update)")
+    print(f"{checked - len(failures)}/{checked} páginas iguales a su golden")
+
+    # Tiempo de sanitización con el árbol ya parseado (HtmlDocument)
+    elapsed = 0.0
+    for _ in range(args.repeat):
+        documents = [HtmlDocument(html) for _, html in pages]
+        for document in documents:
+            document.soup
+        start = time.perf_counter()
+        for document in documents:
+            sanitize_html(document)
+        elapsed += time.perf_counter() - start
+    print(f"sanitize_html: {elapsed * 1000 / (len(pages) * args.repeat):.2f} ms/página (sin parseo)")
+
+    if failures or not checked:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
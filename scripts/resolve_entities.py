@@ -0,0 +1,37 @@
+"""
+Resolución de entidades offline: agrupa los concursos de todos los historiales
+
+Lee data/history/history_*.json, agrupa los registros del mismo concurso en
+distintos años (utils.entity_resolution) y guarda los clusters en
+data/entity_clusters.json, que consultan la UI y el servicio de predicciones.
+
+Uso: python -m scripts.resolve_entities [--threshold 0.85] [--history-dir DIR] [--output PATH]
+"""
+
+import argparse
+import logging
+
+from utils.entity_resolution import run_entity_resolution
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolución de entidades de concursos")
+    parser.add_argument("--threshold", type=float, default=0.85, help="Umbral de similitud de nombres")
+    parser.add_argument("--history-dir", default=None, help="Directorio de historiales (por defecto: data/history)")
+    parser.add_argument("--output", default=None, help="Archivo de clusters (por defecto: data/entity_clusters.json)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stats = run_entity_resolution(
+        history_dir=args.history_dir,
+        output_path=args.output,
+        similarity_threshold=args.threshold,
+    )
+    print(
+        f"{stats['records']} registros, {stats['clusters']} clusters "
+        f"({stats['clustered_records']} registros agrupados) en {stats['duration_seconds']}s -> {stats['path']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -13,12 +13,12 @@ import json
 import logging
 import asyncio
 import traceback
+from collections import deque
 from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 
 from crawler import WebScraper
-from crawler.markdown_processor import clean_markdown_for_llm
-from crawler.batch_processor import create_batches
+from crawler.batch_processor import create_batches, take_next_batch, split_batch, join_batch_markdown
 from crawler.strategies import get_strategy_for_url
 from crawler.strategies.centro_estudios_strategy import CentroEstudiosStrategy
 from llm.extractors.llm_extractor import LLMExtractor
@@ -26,6 +26,9 @@ from models import Concurso
 from config import CRAWLER_CONFIG, EXTRACTION_CONFIG, GEMINI_CONFIG
 from utils.history_manager import HistoryManager
 from utils.file_manager import save_page_cache, load_page_cache, save_debug_info_scraping, save_results
+from utils.html_document import as_html_document
+from utils.page_processing import get_page_processing_pool, process_detail_page, process_listing_page
+from utils.pipeline import SizeBatcher, StagedPipeline, batch_stage
 from utils.lock_manager import site_operation_lock
 # NOTA: extract_previous_concursos_from_html ahora se usa a través de estrategias
 # Se mantiene comentado para referencia, pero ya no se usa directamente
@@ -38,6 +41,10 @@ logger = logging.getLogger(__name__)
 # NOTA: KNOWN_SUBDIRECCIONES se ha movido a crawler/strategies/anid_strategy.py
 # Se mantiene aquí solo para compatibilidad temporal durante la migración
 
+# Campos que solo completa el enriquecimiento completo desde la página de detalle
+# (la extracción determinística y el prompt focalizado no los extraen)
+DETAIL_ONLY_FIELDS = ("financiamiento", "descripcion", "subdireccion")
+
 
 class ExtractionService:
     """
@@ -84,7 +91,8 @@ class ExtractionService:
         max_pages: int = 10,
         progress_callback: Optional[callable] = None,
         status_callback: Optional[callable] = None,
-        should_stop_callback: Optional[callable] = None
+        should_stop_callback: Optional[callable] = None,
+        run_id: Optional[str] = None
     ) -> List[Concurso]:
         """
         Wrapper resiliente: aplica lock por sitio/operación antes de extraer.
@@ -106,6 +114,7 @@ class ExtractionService:
                     progress_callback=progress_callback,
                     status_callback=status_callback,
                     should_stop_callback=should_stop_callback,
+                    run_id=run_id,
                 )
         return self._extract_from_urls_impl(
             urls,
@@ -114,6 +123,48 @@ class ExtractionService:
             progress_callback=progress_callback,
             status_callback=status_callback,
             should_stop_callback=should_stop_callback,
+            run_id=run_id,
+        )
+    
+    def resume_run(
+        self,
+        run_id: str,
+        progress_callback: Optional[callable] = None,
+        status_callback: Optional[callable] = None,
+        should_stop_callback: Optional[callable] = None
+    ) -> List[Concurso]:
+        """
+        Reanuda una corrida interrumpida reutilizando su bitácora (data/runs/<run_id>/).
+        
+        Las URLs ya scrapeadas se cargan desde la bitácora y los batches ya extraídos
+        no vuelven a enviarse al LLM; solo se procesa el trabajo pendiente.
+        
+        Args:
+            run_id: Identificador de la corrida (ver RunJournal.list_runs)
+            progress_callback: Función callback para reportar progreso (0.0 a 1.0)
+            status_callback: Función callback para reportar estado (mensaje string)
+            should_stop_callback: Función que retorna True si se debe detener
+            
+        Returns:
+            Lista de concursos extraídos y validados
+        """
+        from utils.run_journal import RunJournal
+        
+        journal = RunJournal.load(run_id)
+        if journal is None:
+            logger.error(f"❌ No se encontró la corrida {run_id}")
+            return []
+        if journal.data.get("status") == "completed":
+            logger.info(f"📒 La corrida {run_id} ya estaba completada; se re-ejecuta desde su bitácora")
+        
+        return self.extract_from_urls(
+            journal.data.get("urls", []),
+            follow_pagination=journal.data.get("follow_pagination", True),
+            max_pages=journal.data.get("max_pages", 10),
+            progress_callback=progress_callback,
+            status_callback=status_callback,
+            should_stop_callback=should_stop_callback,
+            run_id=run_id,
         )
 
     def _extract_from_urls_impl(
@@ -123,7 +174,8 @@ class ExtractionService:
         max_pages: int = 10,
         progress_callback: Optional[callable] = None,
         status_callback: Optional[callable] = None,
-        should_stop_callback: Optional[callable] = None
+        should_stop_callback: Optional[callable] = None,
+        run_id: Optional[str] = None
     ) -> List[Concurso]:
         """
         Extrae concursos de una lista de URLs.
@@ -134,6 +186,7 @@ class ExtractionService:
             max_pages: Número máximo de páginas a procesar cuando hay paginación
             progress_callback: Función callback para reportar progreso (0.0 a 1.0)
             status_callback: Función callback para reportar estado (mensaje string)
+            run_id: Corrida a reanudar (si None, se registra una corrida nueva)
             
         Returns:
             Lista de concursos extraídos y validados
@@ -248,6 +301,20 @@ class ExtractionService:
                     "existing_concursos": existing_count
                 }
         
+        # Bitácora de la corrida: permite reanudar sin repetir scraping ni batches ya extraídos
+        journal = None
+        if run_id or (urls and self.extraction_config.get("run_journal_enabled", True)):
+            from utils.run_journal import RunJournal
+            if run_id:
+                journal = RunJournal.load(run_id)
+                if journal is None:
+                    logger.warning(f"⚠️ No se encontró la corrida {run_id}; se ejecuta sin reanudar")
+            else:
+                RunJournal.purge_old_runs(self.extraction_config.get("run_journal_retention_days", 7))
+                journal = RunJournal.create(site, urls, follow_pagination, max_pages, self.model_name)
+            if journal:
+                debug_info["execution"]["run_id"] = journal.run_id
+        
         # Fase 1: Scraping de todas las URLs
         total_urls = len(urls)
         for i, url in enumerate(urls):
@@ -262,9 +329,31 @@ class ExtractionService:
                 if status_callback:
                     status_callback(f"Scrapeando {i+1}/{total_urls}: {url}")
                 
-                page_results = self._scrape_url(url, follow_pagination, max_pages, should_stop_callback)
+                page_results = journal.get_scraped_pages(url) if journal else None
+                if page_results is not None:
+                    logger.info(f"📒 Reutilizando {len(page_results)} páginas ya scrapeadas de {url} (corrida {journal.run_id})")
+                else:
+                    page_results = self._scrape_url(url, follow_pagination, max_pages, should_stop_callback)
+                    # No registrar scraping parcial (detenido por el usuario)
+                    if journal and not (should_stop_callback and should_stop_callback()):
+                        journal.record_scrape(
+                            url,
+                            [page for page in page_results if page.get("success") and page.get("markdown")]
+                        )
                 
-                # Limpiar y preparar markdown de todas las páginas
+                # Limpiar markdown y extraer URLs de concursos de todas las páginas en
+                # paralelo (pool de procesos)
+                page_pool = get_page_processing_pool(self.extraction_config.get("page_processing_workers"))
+                processing = {
+                    id(page_result): page_pool.submit(
+                        process_listing_page,
+                        page_result["markdown"],
+                        page_result.get("html", ""),
+                        page_result.get("url", url)
+                    )
+                    for page_result in page_results
+                    if page_result.get("success") and page_result.get("markdown")
+                }
                 for page_result in page_results:
                     # Verificar cancelación antes de procesar cada página
                     if should_stop_callback and should_stop_callback():
@@ -281,14 +370,21 @@ class ExtractionService:
                         continue
                     
                     markdown = page_result["markdown"]
-                    cleaned_markdown = clean_markdown_for_llm(markdown)
+                    # El HTML queda como HtmlDocument en el resultado: la segmentación del
+                    # listado (Fase 1.5) parsea el árbol una sola vez
+                    page_html = as_html_document(page_result.get("html", ""))
+                    page_result["html"] = page_html
+                    page_url = page_result.get("url", url)
+                    try:
+                        processed = page_pool.result_of(processing[id(page_result)])
+                    except Exception as e:
+                        logger.warning(f"⚠️ Error al procesar {page_url} en el pool, reintentando en el proceso principal: {e}")
+                        processed = process_listing_page(markdown, page_html, page_url)
+                    cleaned_markdown = processed["markdown_cleaned"]
                     page_result["markdown_cleaned"] = cleaned_markdown
                     
-                    # Extraer URLs de concursos desde el HTML programáticamente
-                    from utils.url_extractor import extract_concurso_urls_from_html
-                    page_html = page_result.get("html", "")
-                    page_url = page_result.get("url", url)
-                    concurso_urls_map = extract_concurso_urls_from_html(page_html, page_url)
+                    # URLs de concursos extraídas programáticamente desde el HTML
+                    concurso_urls_map = processed["concurso_urls_map"]
                     page_result["concurso_urls_map"] = concurso_urls_map
                     
                     # Actualizar contadores de concursos detectados en HTML
@@ -334,6 +430,16 @@ class ExtractionService:
                 status_callback("⚠️ Proceso detenido. Retornando resultados parciales...")
             return all_concursos
 
+        # Fase 1.5: Segmentación del listado por item. Solo los items nuevos o cuyo
+        # contenido cambió (hash distinto al guardado en historial) se envían al LLM.
+        listing_diff = {"hashes_to_store": {}, "pending_hashes": {}, "changed_existing_urls": set()}
+        if site and history_data and self.extraction_config.get("listing_diff_enabled", True):
+            listing_diff = self._diff_listing_segments(site, all_page_contents, history_data, debug_info)
+
+        # Post-procesamiento del listado terminado: las páginas siguen en memoria, sus árboles no
+        for page_result in all_page_contents:
+            as_html_document(page_result.get("html", "")).release()
+
         # Atajo de deduplicación: si todas las URLs detectadas ya existen en historial,
         # evitar pasar por LLM/enriquecimiento y salir temprano.
         if site and history_data:
@@ -344,9 +450,12 @@ class ExtractionService:
             }
             detected_urls = set()
             for page_result in all_page_contents:
-                detected_urls.update(page_result.get("concurso_urls_map", {}).keys())
+                detected_urls.update(
+                    page_result.get("concurso_urls_map_all", page_result.get("concurso_urls_map", {})).keys()
+                )
 
-            if detected_urls and detected_urls.issubset(history_urls):
+            if (detected_urls and detected_urls.issubset(history_urls)
+                    and not listing_diff["changed_existing_urls"]):
                 logger.info(
                     f"🔁 Todas las {len(detected_urls)} URLs detectadas ya existen en historial ({site}). "
                     "Saltando extracción/enriquecimiento y evitando costo de LLM."
@@ -362,12 +471,21 @@ class ExtractionService:
                 debug_info["extraction"]["concursos_found"] = len(detected_urls)
                 debug_info["extraction"]["concursos_after_dedup"] = len(detected_urls)
                 debug_info["extraction"]["duplicates_removed"] = len(detected_urls)
+                # Registrar hashes de items vistos por primera vez (historial previo a la segmentación)
+                if listing_diff["hashes_to_store"]:
+                    try:
+                        self.history_manager.set_listing_segment_hashes(site, listing_diff["hashes_to_store"])
+                        self.history_manager.save_history(site, history_data)
+                    except Exception as e:
+                        logger.warning(f"⚠️ No se pudieron guardar hashes de listado: {e}")
                 # Guardar debug mínimo
                 try:
                     debug_file_path = save_debug_info_scraping(debug_info)
                     logger.info(f"🐛 Archivo de debug generado (atajo dedup): {debug_file_path}")
                 except Exception as e:
                     logger.error(f"Error al guardar debug (atajo dedup): {e}", exc_info=True)
+                if journal:
+                    journal.mark_completed()
                 return []
         
         # Fase 2: Agrupación en batches
@@ -460,8 +578,28 @@ class ExtractionService:
             return [concurso]
 
         batch_size = self.extraction_config.get("batch_size", 500000)
-        batches = create_batches(all_page_contents, batch_size=batch_size)
-        logger.info(f"Creadas {len(batches)} batches para {len(all_page_contents)} páginas")
+        # Páginas de listado sin items nuevos ni modificados no se envían al LLM
+        pages_for_llm = [
+            page for page in all_page_contents
+            if not (page.get("listing_diff") and not page.get("concurso_urls_map"))
+        ]
+        # Control adaptativo (AIMD): el tamaño y el timeout de cada batch se eligen según
+        # la latencia, truncamientos y timeouts observados para el modelo
+        model_name = self.extractor.gemini_client.model_name
+        batch_controller = None
+        if self.extraction_config.get("adaptive_batching", True):
+            from utils.batch_controller import AdaptiveBatchController
+            batch_controller = AdaptiveBatchController(config=self.extraction_config)
+            batch_size = batch_controller.get_batch_size(model_name)
+        # Las páginas grandes se dividen una sola vez con un tamaño fijo (no el adaptativo):
+        # así los chunks registrados en la bitácora coinciden al reanudar la corrida
+        batches = create_batches(
+            pages_for_llm,
+            batch_size=batch_size,
+            chunk_overlap=self.extraction_config.get("chunk_overlap", 0),
+            chunk_size=self.extraction_config.get("chunk_size", batch_size)
+        )
+        logger.info(f"Creadas {len(batches)} batches para {len(pages_for_llm)} páginas")
         
         # Fase 3: Extracción con LLM
         total_batches = len(batches)
@@ -472,7 +610,47 @@ class ExtractionService:
         continue_on_error = self.extraction_config.get("continue_on_error", True)
         execution_start_time = datetime.now()
         
-        for batch_idx, (pages_in_batch, combined_markdown) in enumerate(batches):
+        # Los batches se arman uno a uno: el tamaño puede cambiar entre batches y los
+        # batches fallidos se reintentan divididos en dos mitades
+        pending_pages = [page for batch_pages, _ in batches for page in batch_pages]
+        retry_batches = deque()
+        unrecovered_batches = 0  # Batches fallidos que no se reintentarán en esta corrida
+        
+        # Reanudación: recuperar concursos de batches ya completados en esta corrida
+        if journal and journal.get_completed_batches():
+            completed_page_keys = set()
+            restored_count = 0
+            for batch_record in journal.get_completed_batches():
+                for concurso_data in batch_record.get("concursos", []):
+                    try:
+                        all_concursos.append(Concurso(**concurso_data))
+                        restored_count += 1
+                    except Exception as e:
+                        logger.warning(f"⚠️ No se pudo restaurar concurso de la corrida {journal.run_id}: {e}")
+                completed_page_keys.update(batch_record.get("pages", []))
+            pending_pages = [page for page in pending_pages if journal.page_key(page) not in completed_page_keys]
+            debug_info["llm"]["restored_from_journal"] = {
+                "batches": len(journal.get_completed_batches()),
+                "concursos": restored_count,
+            }
+            logger.info(
+                f"📒 Reanudando corrida {journal.run_id}: {restored_count} concursos de "
+                f"{len(journal.get_completed_batches())} batches ya completados, "
+                f"{len(pending_pages)} páginas pendientes"
+            )
+        batch_idx = -1
+        while pending_pages or retry_batches:
+            batch_idx += 1
+            if retry_batches:
+                pages_in_batch = retry_batches.popleft()
+                combined_markdown = join_batch_markdown(pages_in_batch)
+            else:
+                if batch_controller:
+                    batch_size = batch_controller.get_batch_size(model_name)
+                pages_in_batch, combined_markdown, pending_pages = take_next_batch(pending_pages, batch_size)
+            pending_chars = sum(len(page.get("markdown_cleaned", "")) for page in pending_pages)
+            total_batches = batch_idx + 1 + len(retry_batches) + (-(-pending_chars // batch_size) if pending_pages else 0)
+            
             # Verificar si debe detenerse
             if should_stop_callback and should_stop_callback():
                 logger.info("Proceso detenido por el usuario durante extracción LLM")
@@ -539,11 +717,13 @@ class ExtractionService:
             # Extraer concursos del batch con verificación de tiempo
             batch_start_time = datetime.now()
             try:
-                # El timeout real está en requests.post (60s por defecto)
-                # Aquí solo verificamos el tiempo total transcurrido para logging
+                # El timeout real está en requests.post (60s por defecto, o el elegido por el
+                # control adaptativo). Aquí solo verificamos el tiempo total transcurrido para logging
+                batch_timeout = batch_controller.get_timeout(model_name, len(combined_markdown)) if batch_controller else None
                 batch_concursos, raw_batch_data = self.extractor.extract_from_batch(
                     combined_markdown,
-                    urls_in_batch
+                    urls_in_batch,
+                    api_timeout=batch_timeout
                 )
                 
                 # Asignar URLs correctas programáticamente (refuerzo sobre lo que venga del LLM)
@@ -647,8 +827,16 @@ class ExtractionService:
                 
                 possible_data_loss = False
                 loss_severity = None
+                # Con segmentación por item solo se envían algunos items por página, y un
+                # chunk de una página dividida trae solo parte de sus items: la heurística
+                # de ~6 concursos por página no aplica (el fallback desde HTML ya garantiza
+                # un concurso por cada item del batch).
+                is_diffed_batch = any(page.get("listing_diff") for page in pages_in_batch)
+                is_chunked_batch = any(page.get("chunk_count", 1) > 1 for page in pages_in_batch)
                 
-                if concursos_per_page < threshold_suspicious:
+                if is_diffed_batch or is_chunked_batch:
+                    pass
+                elif concursos_per_page < threshold_suspicious:
                     # Muy sospechoso: menos de 4 por página
                     possible_data_loss = True
                     loss_severity = "high"
@@ -721,7 +909,7 @@ class ExtractionService:
                             "re_extraction_improved": False,
                             "urls": urls_in_batch[:3]  # Primeras 3 URLs para referencia
                         })
-                else:
+                elif not (is_diffed_batch or is_chunked_batch):
                     # Registrar información normal
                     if concursos_per_page < threshold_warning:
                         debug_info["warnings"].append({
@@ -753,6 +941,8 @@ class ExtractionService:
                         )
                 
                 all_concursos.extend(batch_concursos)
+                if journal:
+                    journal.record_batch(pages_in_batch, [c.model_dump() for c in batch_concursos])
                 debug_info["llm"]["batches_processed"] += 1
                 debug_info["extraction"]["concursos_found"] += len(batch_concursos)
                 consecutive_failures = 0  # Resetear contador de fallos
@@ -762,6 +952,17 @@ class ExtractionService:
                     f"({num_pages_in_batch} páginas) en {batch_elapsed:.1f}s"
                 )
                 
+                if batch_controller:
+                    call_info = raw_batch_data.get("call_info", {})
+                    batch_controller.record(
+                        model_name,
+                        len(combined_markdown),
+                        batch_elapsed,
+                        success=True,
+                        timed_out=call_info.get("timeouts", 0) > 0,
+                        truncated=call_info.get("truncations", 0) > 0
+                    )
+                
                 # Warning si se acerca al límite
                 if batch_elapsed > max_time_per_batch * 0.8:
                     logger.warning(f"⏱️ Batch {batch_idx+1} tomó {batch_elapsed:.1f}s (límite recomendado: {max_time_per_batch}s)")
@@ -789,6 +990,7 @@ class ExtractionService:
                         
             except Exception as e:
                 consecutive_failures += 1
+                unrecovered_batches += 1
                 error_msg = str(e)
                 batch_elapsed = (datetime.now() - batch_start_time).total_seconds()
                 is_timeout = "timeout" in error_msg.lower() or "Timeout" in type(e).__name__
@@ -819,6 +1021,16 @@ class ExtractionService:
                 error_details["consecutive_failures"] = consecutive_failures
                 error_details["batch_elapsed_seconds"] = batch_elapsed
                 
+                if batch_controller:
+                    batch_controller.record(
+                        model_name,
+                        len(combined_markdown),
+                        batch_elapsed,
+                        success=False,
+                        timed_out=is_timeout,
+                        truncated="truncada" in error_msg.lower()
+                    )
+                
                 # Decidir si continuar o abortar
                 if not continue_on_error:
                     logger.error("❌ continue_on_error=False. Abortando procesamiento.")
@@ -834,6 +1046,22 @@ class ExtractionService:
                     logger.warning(f"⚠️ Continuando con siguiente batch a pesar del error...")
                     if status_callback:
                         status_callback(f"⚠️ Error en batch {batch_idx+1}. Continuando...")
+                    
+                    # Reintentar el batch dividido en dos mitades (salvo si no quedan API keys)
+                    halves = split_batch(pages_in_batch) if batch_controller else []
+                    if halves and "agotadas" not in error_msg:
+                        retry_batches.extendleft(reversed(halves))
+                        unrecovered_batches -= 1
+                        logger.info(
+                            f"✂️ Batch {batch_idx+1} dividido en {len(halves[0])} + {len(halves[1])} páginas para reintentar"
+                        )
+        
+        if batch_controller:
+            batch_controller.flush()
+            debug_info["llm"]["adaptive_batching"] = batch_controller.get_model_stats(model_name)
+        # Si el loop se interrumpió (tiempo máximo, fallos consecutivos, detención), la corrida
+        # queda en curso para poder reanudarla con resume_run
+        llm_phase_complete = not pending_pages and not retry_batches and unrecovered_batches == 0
         
         # Fase 3.5: Comparar con historial y separar concursos nuevos vs existentes
         new_concursos: List[Concurso] = []
@@ -848,6 +1076,16 @@ class ExtractionService:
                 site, all_concursos
             )
             
+            # Items de listado modificados de concursos ya conocidos: registrar nueva versión
+            # antes de reconstruir los concursos desde el historial
+            if listing_diff["changed_existing_urls"]:
+                versions_added = 0
+                for concurso in existing_concursos_list:
+                    if (concurso.url or "").strip() in listing_diff["changed_existing_urls"]:
+                        if self.history_manager.add_listing_version(site, concurso):
+                            versions_added += 1
+                debug_info.setdefault("listing_diff", {})["versions_added"] = versions_added
+            
             # Convertir concursos existentes del historial a objetos Concurso
             for concurso in existing_concursos_list:
                 key = self.history_manager._normalize_concurso_key(concurso)
@@ -858,46 +1096,9 @@ class ExtractionService:
                 versions = hist_data.get("versions", [])
                 
                 if versions:
-                    # Usar la versión más reciente del historial
-                    latest_version = versions[-1]
-                    
-                    # Crear objeto Concurso desde historial
+                    # Crear objeto Concurso desde historial (versión más reciente)
                     try:
-                        # Construir objeto Concurso con datos del historial
-                        concurso_dict = {
-                            "nombre": hist_data.get("nombre"),
-                            "url": hist_data.get("url"),
-                            "organismo": hist_data.get("organismo"),
-                            "fecha_apertura": latest_version.get("fecha_apertura"),
-                            "fecha_cierre": latest_version.get("fecha_cierre"),
-                            "estado": latest_version.get("estado"),
-                            "financiamiento": latest_version.get("financiamiento") or hist_data.get("financiamiento"),
-                            "descripcion": latest_version.get("descripcion") or hist_data.get("descripcion"),
-                            "subdireccion": latest_version.get("subdireccion") or hist_data.get("subdireccion"),
-                            "fecha_apertura_original": latest_version.get("fecha_apertura"),
-                            "fuente": site
-                        }
-                        
-                        # Normalizar fechas si es necesario
-                        if concurso_dict["fecha_apertura"]:
-                            parsed = parse_date(concurso_dict["fecha_apertura"])
-                            if parsed:
-                                concurso_dict["fecha_apertura"] = parsed.strftime("%Y-%m-%d")
-                        
-                        if concurso_dict["fecha_cierre"]:
-                            parsed = parse_date(concurso_dict["fecha_cierre"])
-                            if parsed:
-                                concurso_dict["fecha_cierre"] = parsed.strftime("%Y-%m-%d")
-                        
-                        # Calcular estado si no está
-                        if not concurso_dict["estado"]:
-                            if concurso_dict["fecha_cierre"]:
-                                if is_past_date(concurso_dict["fecha_cierre"]):
-                                    concurso_dict["estado"] = "Cerrado"
-                                else:
-                                    concurso_dict["estado"] = "Abierto"
-                        
-                        concurso_from_history = Concurso(**concurso_dict)
+                        concurso_from_history = self._concurso_from_history(hist_data, site)
                         existing_concursos_from_history.append(concurso_from_history)
                     except Exception as e:
                         logger.warning(f"Error al reconstruir concurso desde historial: {e}")
@@ -909,6 +1110,17 @@ class ExtractionService:
             
             new_concursos = new_concursos_list
             
+            # Items de listado sin cambios: no pasaron por el LLM, se reconstruyen desde el
+            # historial para que el resultado siga incluyendo todos los concursos listados
+            if listing_diff["hashes_to_store"]:
+                unchanged_concursos = self._restore_unchanged_listing_concursos(
+                    site, listing_diff["hashes_to_store"], history_dict, all_concursos
+                )
+                for concurso in unchanged_concursos:
+                    existing_keys_set.add(self.history_manager._normalize_concurso_key(concurso))
+                existing_concursos_from_history.extend(unchanged_concursos)
+                debug_info.setdefault("listing_diff", {})["unchanged_restored"] = len(unchanged_concursos)
+            
             logger.info(
                 f"📊 Análisis de historial: {len(existing_concursos_from_history)} existentes, "
                 f"{len(new_concursos)} nuevos"
@@ -957,10 +1169,65 @@ class ExtractionService:
         # Crear un diccionario para mapear URLs a contenido enriquecido
         enriched_content = {}
         
-        # Scrapear URLs individuales de forma asíncrona pero secuencial (más robusto)
-        async def scrape_all_individual_urls():
-            """Scrapea todas las URLs individuales dentro de una sola sesión asíncrona"""
-            results = {}
+        # Fases 4 y 5 en un pipeline por etapas con colas acotadas (utils/pipeline.py):
+        # scraping → procesamiento en el pool de procesos → resolución determinística →
+        # batches → LLM → actualización de concursos. El primer batch va al LLM en cuanto
+        # hay páginas suficientes, mientras se siguen scrapeando las demás; si el LLM se
+        # satura, las colas llenas frenan el scraping (backpressure).
+        page_pool = get_page_processing_pool(self.extraction_config.get("page_processing_workers"))
+        deterministic_options = {
+            "required_fields": self.extraction_config.get("deterministic_required_fields"),
+            "threshold": self.extraction_config.get("deterministic_confidence_threshold", 0.8),
+        }
+        deterministic_skip_llm = self.extraction_config.get("deterministic_skip_llm", True)
+        targeted_batch_size = self.extraction_config.get("targeted_prompt_batch_size", 40000)
+        continue_on_error_enrichment = self.extraction_config.get("continue_on_error", True)
+        concursos_by_url = {c.url: c for c in new_concursos if getattr(c, "url", None)}
+        full_llm_urls: List[str] = []
+        # Páginas cuyo prompt focalizado falló o no tuvo respuesta: enriquecimiento completo al final
+        fallback_urls: List[str] = []
+        enrichment_state = {"aborted": False, "timed_out": False}
+        
+        # Páginas individuales ya enriquecidas en esta corrida (al reanudar): se restauran
+        # el concurso actualizado y su contenido, sin volver a scrapearlas ni enviarlas al LLM
+        restored_details = journal.get_details() if journal else {}
+        restored_urls = [url for url in concurso_urls if url in restored_details and url in concursos_by_url]
+        for url in restored_urls:
+            concurso = concursos_by_url[url]
+            for field, value in restored_details[url]["concurso"].items():
+                setattr(concurso, field, value)
+            enriched_content[url] = restored_details[url]["content"]
+        if restored_urls:
+            concurso_urls -= set(restored_urls)
+            debug_info["scraping"]["individual_pages_restored"] = len(restored_urls)
+            logger.info(
+                f"📒 Reanudando corrida {journal.run_id}: {len(restored_urls)} páginas individuales "
+                f"ya enriquecidas, {len(concurso_urls)} pendientes"
+            )
+        
+        def journal_details(detail_urls: List[str]) -> None:
+            """Registra en la bitácora las páginas individuales cuyo enriquecimiento terminó"""
+            if journal:
+                journal.record_details({
+                    url: {"concurso": concursos_by_url[url].model_dump(), "content": enriched_content[url]}
+                    for url in detail_urls
+                    if url in concursos_by_url and url in enriched_content
+                })
+        
+        def enrichment_stopped() -> bool:
+            """True si no se deben enviar más batches de enriquecimiento al LLM"""
+            if enrichment_state["aborted"] or (should_stop_callback and should_stop_callback()):
+                return True
+            # Verificar tiempo total transcurrido
+            if max_total_time and (datetime.now() - execution_start_time).total_seconds() > max_total_time:
+                if not enrichment_state["timed_out"]:
+                    enrichment_state["timed_out"] = True
+                    logger.warning(f"⏱️ Tiempo máximo de ejecución alcanzado durante enriquecimiento. Deteniendo.")
+                return True
+            return False
+        
+        async def scraped_pages():
+            """Fuente del pipeline: scrapea las URLs individuales una a una (más robusto)"""
             for i, concurso_url in enumerate(concurso_urls):
                 if should_stop_callback and should_stop_callback():
                     logger.info("Proceso detenido durante scraping de URLs individuales")
@@ -972,209 +1239,211 @@ class ExtractionService:
                     
                     # Scrapear URL individual usando método simple (sin hooks complejos)
                     result = await self.scraper.scrape_url_simple(concurso_url)
-                    results[concurso_url] = result
                     
                 except Exception as e:
                     logger.error(f"Error al scrapear URL individual {concurso_url}: {e}", exc_info=True)
-                    results[concurso_url] = {
+                    result = {
                         "success": False,
                         "error": str(e)
                     }
-            return results
+                yield concurso_url, result
         
-        # Ejecutar scraping asíncrono de todas las URLs
-        try:
-            individual_results = asyncio.run(scrape_all_individual_urls())
+        async def process_page(item, emit):
+            """Procesa la página en el pool de procesos y decide si necesita el LLM"""
+            concurso_url, result = item
+            if not (result.get("success") and result.get("markdown")):
+                debug_info["scraping"]["individual_pages_failed"] += 1
+                error_msg = result.get("error", "Error desconocido")
+                logger.warning(f"No se pudo scrapear URL individual: {concurso_url} - {error_msg}")
+                debug_info["scraping"]["errors"].append({
+                    "url": concurso_url,
+                    "error": error_msg,
+                    "type": type(result.get("error", Exception())).__name__ if result.get("error") else "UnknownError",
+                    "context": "individual_page_scraping"
+                })
+                return
             
-            # Procesar resultados
-            for concurso_url, result in individual_results.items():
-                if result.get("success") and result.get("markdown"):
-                    markdown = result["markdown"]
-                    cleaned_markdown = clean_markdown_for_llm(markdown)
-                    
-                    # Extraer información de "Concursos anteriores" usando la estrategia apropiada
-                    previous_concursos = []
-                    html_content = result.get("html", "")
-                    
-                    # Detectar concursos suspendidos directamente desde el HTML/markdown
-                    is_suspended = False
-                    try:
-                        texto_busqueda = (html_content or "") + "\n" + (markdown or "")
-                        texto_busqueda_lower = texto_busqueda.lower()
-                        if "concurso suspendido" in texto_busqueda_lower or "concurso suspendido" in texto_busqueda_lower:
-                            is_suspended = True
-                    except Exception:
-                        # Si algo falla en la detección, no marcamos como suspendido y continuamos normalmente
-                        is_suspended = False
-                    
-                    # Extraer información de "Concursos anteriores" usando la estrategia apropiada
-                    strategy = get_strategy_for_url(concurso_url)
-                    if html_content:
-                        try:
-                            previous_concursos = strategy.extract_previous_concursos(html_content, concurso_url)
-                            # El log de extracción ya se hace en el extractor específico
-                        except Exception as e:
-                            logger.warning(
-                                f"Error al extraer concursos anteriores de {concurso_url}: {e}",
-                                exc_info=True
-                            )
-                    
-                    # Guardar HTML/MD completos en cache sin compresión (solo en scraping inicial)
-                    try:
-                        if site:
-                            save_page_cache(site, concurso_url, html_content or "", markdown or "")
-                    except Exception as e:
-                        logger.warning(f"⚠️ No se pudo guardar cache de página para {concurso_url}: {e}")
-                    
-                    # OPTIMIZACIÓN: Intentar extraer datos determinísticamente antes de usar LLM
-                    # Extrae: nombre, fechas, y detecta suspendido
-                    deterministic_data = None
-                    if not is_suspended:  # Solo intentar si no está suspendido
-                        from utils.deterministic_date_extractor import extract_concurso_data_deterministically
-                        try:
-                            deterministic_data = extract_concurso_data_deterministically(
-                                cleaned_markdown,
-                                concurso_url,
-                                html_content
-                            )
-                            if deterministic_data:
-                                logger.debug(
-                                    f"✅ Datos extraídos determinísticamente para {concurso_url}: "
-                                    f"nombre={deterministic_data.get('nombre')}, "
-                                    f"apertura={deterministic_data.get('fecha_apertura')}, "
-                                    f"cierre={deterministic_data.get('fecha_cierre')}"
-                                )
-                        except Exception as e:
-                            logger.debug(f"Error en extracción determinística para {concurso_url}: {e}")
-                            deterministic_data = None
-                    
-                    enriched_content[concurso_url] = {
-                        "markdown": cleaned_markdown,
-                        "html_size": len(html_content),
-                        "markdown_size": len(markdown),
-                        "markdown_cleaned_size": len(cleaned_markdown),
-                        "previous_concursos": previous_concursos,  # Información histórica extraída
-                        "is_suspended": is_suspended,
-                        "deterministic_data": deterministic_data,  # Datos extraídos determinísticamente (nombre, fechas, suspendido)
-                    }
-                    debug_info["scraping"]["individual_pages_scraped"] += 1
-                    debug_info["scraping"]["total_html_size"] += len(html_content)
-                    debug_info["scraping"]["total_markdown_size"] += len(markdown)
-                    debug_info["scraping"]["total_markdown_cleaned_size"] += len(cleaned_markdown)
-                    
-                    # Registrar en debug_info cuántos concursos anteriores se encontraron
-                    if previous_concursos:
-                        if "previous_concursos_extracted" not in debug_info["scraping"]:
-                            debug_info["scraping"]["previous_concursos_extracted"] = {}
-                        debug_info["scraping"]["previous_concursos_extracted"][concurso_url] = len(previous_concursos)
-                else:
-                    debug_info["scraping"]["individual_pages_failed"] += 1
-                    error_msg = result.get("error", "Error desconocido")
-                    logger.warning(f"No se pudo scrapear URL individual: {concurso_url} - {error_msg}")
-                    debug_info["scraping"]["errors"].append({
-                        "url": concurso_url,
-                        "error": error_msg,
-                        "type": type(result.get("error", Exception())).__name__ if result.get("error") else "UnknownError",
-                        "context": "individual_page_scraping"
-                    })
-        except Exception as e:
-            logger.error(f"Error general al scrapear URLs individuales: {e}", exc_info=True)
-            debug_info["scraping"]["errors"].append({
-                "error": str(e),
-                "type": type(e).__name__,
-                "context": "individual_page_scraping_batch"
-            })
-        
-        # Guardar enriched_content en debug_info para acceso posterior
-        debug_info["scraping"]["enriched_content"] = enriched_content
-        
-        # Fase 5: Enriquecer concursos con información de páginas individuales
-        if enriched_content and status_callback:
-            status_callback("Enriqueciendo concursos con información detallada...")
-        
-        # Agrupar URLs por batch para enriquecimiento
-        enriched_batches = []
-        current_batch = []
-        current_size = 0
-        
-        for url, content in enriched_content.items():
-            content_size = len(content["markdown"])
-            if current_size + content_size > batch_size and current_batch:
-                # Guardar batch actual
-                combined_markdown = "\n\n---SEPARADOR DE CONCURSO---\n\n".join([enriched_content[u]["markdown"] for u in current_batch])
-                enriched_batches.append((current_batch, combined_markdown))
-                current_batch = [url]
-                current_size = content_size
-            else:
-                current_batch.append(url)
-                current_size += content_size
-        
-        if current_batch:
-            combined_markdown = "\n\n---SEPARADOR DE CONCURSO---\n\n".join([enriched_content[u]["markdown"] for u in current_batch])
-            enriched_batches.append((current_batch, combined_markdown))
-        
-        # Extraer información adicional de páginas individuales
-        continue_on_error_enrichment = self.extraction_config.get("continue_on_error", True)
-        
-        for batch_urls, combined_markdown in enriched_batches:
-            if should_stop_callback and should_stop_callback():
-                break
+            markdown = result["markdown"]
+            html_content = as_html_document(result.get("html", ""))
             
-            # Verificar tiempo total transcurrido
-            if max_total_time:
-                elapsed_time = (datetime.now() - execution_start_time).total_seconds()
-                if elapsed_time > max_total_time:
-                    logger.warning(f"⏱️ Tiempo máximo de ejecución alcanzado durante enriquecimiento. Deteniendo.")
-                    break
+            # Artefactos calculados en el pool (si falla, se procesa aquí mismo)
+            try:
+                processed = await page_pool.run(process_detail_page, concurso_url, html_content, markdown, deterministic_options)
+            except Exception as e:
+                logger.warning(f"⚠️ Error al procesar {concurso_url} en el pool, reintentando en el proceso principal: {e}")
+                processed = process_detail_page(concurso_url, html_content, markdown, deterministic_options)
+            html_content.release()
+            cleaned_markdown = processed["markdown_cleaned"]
+            previous_concursos = processed["previous_concursos"]
+            deterministic_data = processed["deterministic_data"]
             
+            # Guardar HTML/MD completos en cache sin compresión (solo en scraping inicial)
             try:
-                enriched_concursos, _ = self.extractor.extract_from_batch(
-                    combined_markdown,
-                    batch_urls
+                if site:
+                    save_page_cache(site, concurso_url, html_content or "", markdown or "")
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo guardar cache de página para {concurso_url}: {e}")
+            
+            if deterministic_data:
+                logger.debug(
+                    f"✅ Datos extraídos determinísticamente para {concurso_url}: "
+                    f"nombre={deterministic_data.get('nombre')}, "
+                    f"apertura={deterministic_data.get('fecha_apertura')}, "
+                    f"cierre={deterministic_data.get('fecha_cierre')}, "
+                    f"sin resolver={deterministic_data.get('unresolved_fields')}"
                 )
-                
-                # Actualizar concursos nuevos con información enriquecida.
-                # OPTIMIZACIÓN: Preferir fechas determinísticas sobre las del LLM si están disponibles.
-                # El LLM todavía se usa para nombre, organismo, descripción, etc.
-                for enriched in enriched_concursos:
-                    for concurso in new_concursos:
-                        if concurso.url == enriched.url:
-                            # Obtener datos determinísticos si están disponibles
-                            deterministic_data = enriched_content.get(concurso.url, {}).get("deterministic_data")
-                            
-                            # Si tenemos datos determinísticos, usarlos en lugar de los del LLM
-                            if deterministic_data:
-                                # Usar nombre determinístico si está disponible y el LLM no encontró uno válido
-                                if deterministic_data.get("nombre") and (
-                                    not enriched.nombre or 
-                                    enriched.nombre.strip().lower() == "concurso sin título"
-                                ):
-                                    enriched.nombre = deterministic_data["nombre"]
-                                
-                                # Usar fechas determinísticas si están disponibles
-                                if deterministic_data.get("fecha_apertura") and not concurso.fecha_apertura:
-                                    enriched.fecha_apertura = deterministic_data["fecha_apertura"]
-                                    enriched.fecha_apertura_original = deterministic_data["fecha_apertura"]
-                                if deterministic_data.get("fecha_cierre") and not concurso.fecha_cierre:
-                                    enriched.fecha_cierre = deterministic_data["fecha_cierre"]
-                            
-                            self._update_concurso_from_enriched(concurso, enriched, debug_info, enriched_content.get(concurso.url, {}))
-                            break
-                            
+            
+            enriched_content[concurso_url] = {
+                "markdown": cleaned_markdown,
+                "html_size": len(html_content),
+                "markdown_size": len(markdown),
+                "markdown_cleaned_size": len(cleaned_markdown),
+                "previous_concursos": previous_concursos,  # Información histórica extraída
+                "is_suspended": processed["is_suspended"],
+                "deterministic_data": deterministic_data,  # Datos extraídos determinísticamente (nombre, fechas, suspendido)
+            }
+            debug_info["scraping"]["individual_pages_scraped"] += 1
+            debug_info["scraping"]["total_html_size"] += len(html_content)
+            debug_info["scraping"]["total_markdown_size"] += len(markdown)
+            debug_info["scraping"]["total_markdown_cleaned_size"] += len(cleaned_markdown)
+            
+            # Registrar en debug_info cuántos concursos anteriores se encontraron
+            if previous_concursos:
+                if "previous_concursos_extracted" not in debug_info["scraping"]:
+                    debug_info["scraping"]["previous_concursos_extracted"] = {}
+                debug_info["scraping"]["previous_concursos_extracted"][concurso_url] = len(previous_concursos)
+            
+            # Fase 5a: Páginas resueltas determinísticamente no pasan por el LLM; los campos
+            # que quedaron sin resolver se piden con un prompt focalizado.
+            if deterministic_skip_llm:
+                route, payload = self._triage_deterministic_page(
+                    concurso_url,
+                    enriched_content[concurso_url],
+                    concursos_by_url,
+                    debug_info
+                )
+            else:
+                route, payload = "full", concurso_url
+            if route == "full":
+                full_llm_urls.append(concurso_url)
+            if route == "resolved":
+                journal_details([concurso_url])
+            else:
+                await emit((route, payload))
+        
+        # Batches por tamaño: prompts focalizados (contexto recortado) y enriquecimiento completo (markdown)
+        batch_pages, flush_batches = batch_stage(
+            [
+                (lambda item: item[0] == "targeted", SizeBatcher(targeted_batch_size), lambda item: len(item[1]["context"])),
+                (lambda item: item[0] == "full", SizeBatcher(batch_size), lambda item: len(enriched_content[item[1]]["markdown"])),
+            ],
+            wrap=lambda index, batch: (("targeted", "full")[index], [payload for _, payload in batch])
+        )
+        
+        async def call_llm(item, emit):
+            """Envía un batch al LLM en un hilo (el event loop sigue scrapeando y procesando)"""
+            kind, batch = item
+            if kind == "targeted":
+                batch_urls = [page["url"] for page in batch]
+                if enrichment_stopped():
+                    fallback_urls.extend(batch_urls)
+                    return
+                try:
+                    results = await asyncio.to_thread(self.extractor.extract_fields_from_pages, batch)
+                except Exception as e:
+                    self._log_and_capture_error(e, "targeted_enrichment", batch_urls, debug_info)
+                    # Fallback: enriquecimiento completo para las páginas del batch fallido
+                    fallback_urls.extend(batch_urls)
+                    return
+                await emit((kind, batch, results))
+                return
+            
+            if enrichment_stopped():
+                return
+            if status_callback:
+                status_callback(f"Enriqueciendo {len(batch)} concursos con información detallada...")
+            combined_markdown = "\n\n---SEPARADOR DE CONCURSO---\n\n".join([enriched_content[u]["markdown"] for u in batch])
+            try:
+                enriched_concursos, _ = await asyncio.to_thread(self.extractor.extract_from_batch, combined_markdown, batch)
             except Exception as e:
                 self._log_and_capture_error(
                     e,
                     "enrichment",
-                    batch_urls,
+                    batch,
                     debug_info
                 )
                 
                 # Continuar o abortar según configuración
                 if not continue_on_error_enrichment:
                     logger.error("❌ continue_on_error=False. Abortando enriquecimiento.")
-                    break
+                    enrichment_state["aborted"] = True
                 else:
                     logger.warning(f"⚠️ Continuando con siguiente batch de enriquecimiento a pesar del error...")
+                return
+            await emit((kind, batch, enriched_concursos))
+        
+        async def merge_results(item, emit):
+            """Actualiza los concursos nuevos con la respuesta del LLM"""
+            kind, batch, results = item
+            if kind == "targeted":
+                missing_urls = self._apply_targeted_results(batch, results, concursos_by_url, debug_info)
+                fallback_urls.extend(missing_urls)
+                journal_details([page["url"] for page in batch if page["url"] not in missing_urls])
+            else:
+                self._merge_enriched_concursos(results, new_concursos, enriched_content, debug_info)
+                journal_details(batch)
+        
+        def enrichment_pipeline(with_pages: bool) -> StagedPipeline:
+            queue_size = self.extraction_config.get("pipeline_queue_size", 4)
+            pipeline = StagedPipeline(queue_size=queue_size)
+            if with_pages:
+                pipeline.add_stage("process", process_page, workers=max(page_pool.workers, 1))
+            return (
+                pipeline
+                .add_stage("batch", batch_pages, on_end=flush_batches)
+                .add_stage("llm", call_llm, workers=self.extraction_config.get("pipeline_llm_workers", 1))
+                .add_stage("merge", merge_results)
+            )
+        
+        # Si el enriquecimiento se interrumpe, la corrida queda en curso para reanudarla
+        enrichment_complete = False
+        try:
+            pipeline_stats = asyncio.run(enrichment_pipeline(with_pages=True).run(scraped_pages()))
+            debug_info.setdefault("enrichment", {})["pipeline"] = pipeline_stats
+            
+            # Páginas cuyo prompt focalizado falló: enriquecimiento completo con las mismas etapas
+            if fallback_urls:
+                retry_urls, fallback_urls[:] = list(fallback_urls), []
+                full_llm_urls.extend(retry_urls)
+                asyncio.run(enrichment_pipeline(with_pages=False).run(("full", url) for url in retry_urls))
+            enrichment_complete = not (
+                enrichment_state["aborted"]
+                or enrichment_state["timed_out"]
+                or (should_stop_callback and should_stop_callback())
+            )
+        except Exception as e:
+            logger.error(f"Error general al scrapear URLs individuales: {e}", exc_info=True)
+            debug_info["scraping"]["errors"].append({
+                "error": str(e),
+                "type": type(e).__name__,
+                "context": "individual_page_scraping_batch"
+            })
+        
+        # Guardar enriched_content en debug_info para acceso posterior
+        debug_info["scraping"]["enriched_content"] = enriched_content
+        
+        if deterministic_skip_llm:
+            deterministic_stats = debug_info.setdefault("enrichment", {}).setdefault("deterministic", {
+                "resolved_without_llm": 0,
+                "targeted_pages": 0,
+                "targeted_fields": 0,
+                "full_llm_pages": 0,
+            })
+            deterministic_stats["full_llm_pages"] = len(full_llm_urls)
+            logger.info(
+                f"⚡ Enriquecimiento: {deterministic_stats['resolved_without_llm']} páginas resueltas sin LLM, "
+                f"{deterministic_stats['targeted_pages']} con prompt focalizado, {len(full_llm_urls)} con LLM completo"
+            )
         
         # Refuerzo: segundo intento focalizado en FECHAS para concursos que aún
         # no tienen fecha_cierre (y cuya página individual fue scrapeada con éxito).
@@ -1375,6 +1644,16 @@ class ExtractionService:
                 # porque unique_concursos incluye los existentes del historial
                 concursos_to_update = new_concursos
                 
+                # Registrar hashes de items de listado: los sin cambios y los procesados con éxito
+                # (un item cuyo batch falló conserva el hash anterior y se reintenta en la próxima corrida)
+                if listing_diff["hashes_to_store"] or listing_diff["pending_hashes"]:
+                    extracted_urls = {(c.url or "").strip() for c in all_concursos if getattr(c, "url", None)}
+                    hashes = dict(listing_diff["hashes_to_store"])
+                    for url_segment, segment_hash in listing_diff["pending_hashes"].items():
+                        if url_segment in extracted_urls:
+                            hashes[url_segment] = segment_hash
+                    self.history_manager.set_listing_segment_hashes(site, hashes)
+                
                 logger.info(
                     f"📝 Actualizando historial con {len(concursos_to_update)} concursos nuevos "
                     f"(de {len(unique_concursos)} totales, {len(existing_concursos_from_history)} existentes)"
@@ -1466,6 +1745,9 @@ class ExtractionService:
         except Exception as e:
             logger.error(f"Error al guardar archivo de debug: {e}", exc_info=True)
         
+        if journal and llm_phase_complete and enrichment_complete:
+            journal.mark_completed()
+        
         if status_callback:
             status_callback(f"✅ Procesamiento completado exitosamente")
         
@@ -1490,7 +1772,6 @@ class ExtractionService:
         Returns:
             Diccionario con estadísticas de la reparación
         """
-        from crawler.markdown_processor import clean_markdown_for_llm
         # NOTA: extract_previous_concursos_from_html ahora se usa a través de estrategias
         from models import Concurso as ConcursoModel
         
@@ -1586,7 +1867,15 @@ class ExtractionService:
         if status_callback and urls_to_scrape:
             status_callback(f"Scrapeando {len(urls_to_scrape)} URLs de concursos incompletos...")
         
-        # Scrapear URLs individuales
+        # Scrapear URLs individuales; cada página se procesa en el pool de procesos
+        # mientras se scrapea la siguiente (las de cache también, sin esperar al scraping)
+        page_pool = get_page_processing_pool(self.extraction_config.get("page_processing_workers"))
+        processing = {
+            url: page_pool.submit(process_detail_page, url, result.get("html", ""), result["markdown"])
+            for url, result in cached_results.items()
+            if result.get("success") and result.get("markdown")
+        }
+        
         async def scrape_repair_urls():
             """Scrapea las URLs de reparación"""
             results = {}
@@ -1602,6 +1891,8 @@ class ExtractionService:
                     result = await self.scraper.scrape_url_simple(url)
                     results[url] = result
                     repair_stats["urls_processed"] += 1
+                    if result.get("success") and result.get("markdown"):
+                        processing[url] = page_pool.submit(process_detail_page, url, result.get("html", ""), result["markdown"])
                     
                 except Exception as e:
                     logger.error(f"Error al scrapear URL de reparación {url}: {e}", exc_info=True)
@@ -1637,11 +1928,7 @@ class ExtractionService:
         for url, result in individual_results.items():
             if result.get("success") and result.get("markdown"):
                 markdown = result["markdown"]
-                cleaned_markdown = clean_markdown_for_llm(markdown)
-                
-                # Extraer información de "Concursos anteriores" usando la estrategia apropiada
-                previous_concursos = []
-                html_content = result.get("html", "")
+                html_content = as_html_document(result.get("html", ""))
                 is_cache_hit = result.get("cache_hit", False)
                 
                 # Guardar/actualizar cache si proviene de scraping nuevo
@@ -1651,44 +1938,24 @@ class ExtractionService:
                     except Exception as e:
                         logger.warning(f"⚠️ No se pudo guardar cache de página (repair) para {url}: {e}")
                 
-                # Detectar concursos suspendidos directamente desde el HTML/markdown
-                is_suspended = False
+                # Artefactos calculados en el pool (si falla, se procesa aquí mismo)
                 try:
-                    texto_busqueda = (html_content or "") + "\n" + (markdown or "")
-                    texto_busqueda_lower = texto_busqueda.lower()
-                    if "concurso suspendido" in texto_busqueda_lower or "concurso suspendido" in texto_busqueda_lower:
-                        is_suspended = True
-                except Exception:
-                    is_suspended = False
-                
-                # Extraer información de "Concursos anteriores" usando la estrategia apropiada
-                strategy = get_strategy_for_url(url)
-                if html_content:
-                    try:
-                        previous_concursos = strategy.extract_previous_concursos(html_content, url)
-                    except Exception as e:
-                        logger.warning(f"Error al extraer concursos anteriores de {url}: {e}")
-                
-                # OPTIMIZACIÓN: Intentar extraer datos determinísticamente antes de usar LLM
-                deterministic_data = None
-                if not is_suspended:  # Solo intentar si no está suspendido
-                    from utils.deterministic_date_extractor import extract_concurso_data_deterministically
-                    try:
-                        deterministic_data = extract_concurso_data_deterministically(
-                            cleaned_markdown,
-                            url,
-                            html_content
-                        )
-                        if deterministic_data:
-                            logger.debug(
-                                f"✅ Datos extraídos determinísticamente para reparación {url}: "
-                                f"nombre={deterministic_data.get('nombre')}, "
-                                f"apertura={deterministic_data.get('fecha_apertura')}, "
-                                f"cierre={deterministic_data.get('fecha_cierre')}"
-                            )
-                    except Exception as e:
-                        logger.debug(f"Error en extracción determinística para reparación {url}: {e}")
-                        deterministic_data = None
+                    processed = page_pool.result_of(processing[url])
+                except Exception as e:
+                    logger.warning(f"⚠️ Error al procesar {url} en el pool, reintentando en el proceso principal: {e}")
+                    processed = process_detail_page(url, html_content, markdown)
+                html_content.release()
+                cleaned_markdown = processed["markdown_cleaned"]
+                previous_concursos = processed["previous_concursos"]
+                is_suspended = processed["is_suspended"]
+                deterministic_data = processed["deterministic_data"]
+                if deterministic_data:
+                    logger.debug(
+                        f"✅ Datos extraídos determinísticamente para reparación {url}: "
+                        f"nombre={deterministic_data.get('nombre')}, "
+                        f"apertura={deterministic_data.get('fecha_apertura')}, "
+                        f"cierre={deterministic_data.get('fecha_cierre')}"
+                    )
                 
                 enriched_content[url] = {
                     "markdown": cleaned_markdown,
@@ -2112,6 +2379,417 @@ class ExtractionService:
             else:
                 return []
     
+    def _diff_listing_segments(
+        self,
+        site: str,
+        all_page_contents: List[Dict[str, Any]],
+        history_data: Dict[str, Any],
+        debug_info: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Segmenta las páginas de listado por item y deja en cada página solo los items
+        nuevos o modificados respecto al historial (comparando hashes de contenido).
+        
+        Modifica in-place cada página con segmentos: `markdown_cleaned` pasa a contener
+        solo el texto de los items cambiados y `concurso_urls_map` solo sus URLs
+        (el mapa completo queda en `concurso_urls_map_all`).
+        
+        Args:
+            site: Identificador del sitio
+            all_page_contents: Páginas scrapeadas en la Fase 1
+            history_data: Historial cargado del sitio
+            debug_info: Diccionario de debug a actualizar
+            
+        Returns:
+            Dict con:
+                - hashes_to_store: {url: hash} de items sin cambios (se guardan siempre)
+                - pending_hashes: {url: hash} de items cambiados (se guardan si se extraen)
+                - changed_existing_urls: URLs ya conocidas cuyo item cambió
+        """
+        from utils.url_extractor import extract_listing_segments
+        
+        result = {"hashes_to_store": {}, "pending_hashes": {}, "changed_existing_urls": set()}
+        history_urls = {
+            (c.get("url") or "").strip()
+            for c in history_data.get("concursos", [])
+            if c.get("url")
+        }
+        stored_hashes = self.history_manager.get_listing_segment_hashes(site)
+        stats = {"pages": 0, "segments": 0, "unchanged": 0, "new": 0, "changed": 0, "pages_skipped": 0}
+        
+        for page_result in all_page_contents:
+            try:
+                segments = extract_listing_segments(page_result.get("html", ""), page_result.get("url", ""))
+            except Exception as e:
+                logger.warning(f"⚠️ Error segmentando listado {page_result.get('url', '')}: {e}")
+                continue
+            if not segments:
+                continue
+            
+            stats["pages"] += 1
+            stats["segments"] += len(segments)
+            changed_segments = []
+            for segment in segments:
+                url_segment = segment["url"]
+                stored_hash = stored_hashes.get(url_segment)
+                if url_segment in history_urls and (stored_hash is None or stored_hash == segment["hash"]):
+                    # Sin hash previo (historial anterior a la segmentación) se asume sin cambios
+                    stats["unchanged"] += 1
+                    result["hashes_to_store"][url_segment] = segment["hash"]
+                    continue
+                if url_segment in history_urls:
+                    stats["changed"] += 1
+                    result["changed_existing_urls"].add(url_segment)
+                else:
+                    stats["new"] += 1
+                result["pending_hashes"][url_segment] = segment["hash"]
+                changed_segments.append(segment)
+            
+            full_map = page_result.get("concurso_urls_map", {})
+            page_result["concurso_urls_map_all"] = full_map
+            page_result["listing_diff"] = True
+            page_result["listing_segments"] = len(segments)
+            page_result["concurso_urls_map"] = {
+                seg["url"]: full_map.get(seg["url"], seg["nombre"]) for seg in changed_segments
+            }
+            page_result["markdown_cleaned"] = "\n\n".join(
+                f"{seg['text']}\n{seg['url']}" for seg in changed_segments
+            )
+            if not changed_segments:
+                stats["pages_skipped"] += 1
+        
+        if stats["pages"]:
+            logger.info(
+                f"🧩 Segmentación de listado: {stats['segments']} items en {stats['pages']} páginas "
+                f"({stats['new']} nuevos, {stats['changed']} modificados, {stats['unchanged']} sin cambios, "
+                f"{stats['pages_skipped']} páginas sin cambios)"
+            )
+        debug_info["listing_diff"] = stats
+        return result
+    
+    def _restore_unchanged_listing_concursos(
+        self,
+        site: str,
+        unchanged_urls: Dict[str, str],
+        history_dict: Dict[Tuple[str, str], Dict[str, Any]],
+        extracted_concursos: List[Concurso]
+    ) -> List[Concurso]:
+        """
+        Reconstruye desde el historial los concursos de items de listado sin cambios
+        (los que _diff_listing_segments no envió al LLM)
+        
+        Args:
+            site: Identificador del sitio
+            unchanged_urls: {url: hash} de items sin cambios (hashes_to_store)
+            history_dict: Historial indexado por (nombre, url), de find_existing_concursos
+            extracted_concursos: Concursos extraídos en la corrida (sus URLs no se duplican)
+            
+        Returns:
+            Concursos reconstruidos desde la versión más reciente del historial
+        """
+        extracted_urls = {(c.url or "").strip() for c in extracted_concursos if getattr(c, "url", None)}
+        history_by_url = {
+            (hist.get("url") or "").strip(): hist
+            for hist in history_dict.values()
+            if hist.get("url")
+        }
+        restored = []
+        for url in unchanged_urls:
+            hist_data = history_by_url.get(url)
+            if url in extracted_urls or not hist_data or not hist_data.get("versions"):
+                continue
+            try:
+                restored.append(self._concurso_from_history(hist_data, site))
+            except Exception as e:
+                logger.warning(f"Error al reconstruir concurso sin cambios desde historial ({url}): {e}")
+        return restored
+    
+    @staticmethod
+    def _concurso_from_history(hist_data: Dict[str, Any], site: str) -> Concurso:
+        """
+        Construye un Concurso con la versión más reciente de un concurso del historial
+        
+        Args:
+            hist_data: Entrada del historial (con "versions")
+            site: Identificador del sitio (fuente)
+            
+        Returns:
+            Concurso con fechas normalizadas y estado calculado si falta
+        """
+        latest_version = hist_data.get("versions", [])[-1]
+        concurso_dict = {
+            "nombre": hist_data.get("nombre"),
+            "url": hist_data.get("url"),
+            "organismo": hist_data.get("organismo"),
+            "fecha_apertura": latest_version.get("fecha_apertura"),
+            "fecha_cierre": latest_version.get("fecha_cierre"),
+            "estado": latest_version.get("estado"),
+            "financiamiento": latest_version.get("financiamiento") or hist_data.get("financiamiento"),
+            "descripcion": latest_version.get("descripcion") or hist_data.get("descripcion"),
+            "subdireccion": latest_version.get("subdireccion") or hist_data.get("subdireccion"),
+            "fecha_apertura_original": latest_version.get("fecha_apertura"),
+            "fuente": site
+        }
+        
+        # Normalizar fechas si es necesario
+        if concurso_dict["fecha_apertura"]:
+            parsed = parse_date(concurso_dict["fecha_apertura"])
+            if parsed:
+                concurso_dict["fecha_apertura"] = parsed.strftime("%Y-%m-%d")
+        
+        if concurso_dict["fecha_cierre"]:
+            parsed = parse_date(concurso_dict["fecha_cierre"])
+            if parsed:
+                concurso_dict["fecha_cierre"] = parsed.strftime("%Y-%m-%d")
+        
+        # Calcular estado si no está
+        if not concurso_dict["estado"]:
+            if concurso_dict["fecha_cierre"]:
+                if is_past_date(concurso_dict["fecha_cierre"]):
+                    concurso_dict["estado"] = "Cerrado"
+                else:
+                    concurso_dict["estado"] = "Abierto"
+        
+        return Concurso(**concurso_dict)
+    
+    def _triage_deterministic_page(
+        self,
+        url: str,
+        content: Dict[str, Any],
+        concursos_by_url: Dict[str, Concurso],
+        debug_info: Dict[str, Any]
+    ) -> Tuple[str, Any]:
+        """
+        Aplica la extracción determinística de una página y decide si necesita el LLM.
+        
+        - Si todos los campos requeridos quedan resueltos (por la extracción determinística
+          con confianza suficiente o porque el concurso ya los trae del listado) y el
+          concurso ya tiene los campos de DETAIL_ONLY_FIELDS, la página no se envía al LLM.
+        - Si quedan campos requeridos sin resolver o falta alguno de DETAIL_ONLY_FIELDS, se
+          piden con un prompt focalizado que incluye solo esos campos y un fragmento
+          recortado de la página.
+        - Si la página no tiene datos determinísticos, pasa por el enriquecimiento completo.
+        
+        Args:
+            url: URL de la página
+            content: Contenido scrapeado de la página (con deterministic_data)
+            concursos_by_url: Concursos nuevos por URL
+            debug_info: Diccionario de debug
+            
+        Returns:
+            ("resolved", None), ("targeted", {"url", "fields", "context"}) o ("full", url)
+        """
+        from utils.deterministic_date_extractor import extract_field_context
+        
+        stats = debug_info.setdefault("enrichment", {}).setdefault("deterministic", {
+            "resolved_without_llm": 0,
+            "targeted_pages": 0,
+            "targeted_fields": 0,
+            "full_llm_pages": 0,
+        })
+        concurso = concursos_by_url.get(url)
+        deterministic_data = content.get("deterministic_data")
+        if not concurso or not deterministic_data or "unresolved_fields" not in deterministic_data:
+            return "full", url
+        
+        known_subdirecciones = get_strategy_for_url(url).get_known_subdirecciones()
+        
+        def _field_present(campo: str) -> bool:
+            value = getattr(concurso, campo, None)
+            if campo == "nombre":
+                return bool(value) and (
+                    value.strip().lower() != "concurso sin título"
+                    and value.strip().lower() not in known_subdirecciones
+                )
+            return bool(value)
+        
+        # Un campo también está resuelto si el concurso ya lo trae del listado
+        missing = [
+            campo for campo in deterministic_data["unresolved_fields"]
+            if not _field_present(campo)
+        ]
+        
+        # Solo se aplican los campos con confianza suficiente
+        self._apply_resolved_fields(
+            concurso,
+            {
+                campo: deterministic_data.get(campo)
+                for campo in ("nombre", "fecha_apertura", "fecha_cierre")
+                if campo not in deterministic_data["unresolved_fields"]
+            },
+            deterministic_data.get("is_suspendido", False),
+            "deterministic",
+            debug_info,
+            known_subdirecciones
+        )
+        
+        # Los campos que solo trae la página de detalle también se piden en el prompt focalizado
+        missing += [campo for campo in DETAIL_ONLY_FIELDS if not getattr(concurso, campo, None)]
+        
+        if not missing:
+            stats["resolved_without_llm"] += 1
+            return "resolved", None
+        
+        return "targeted", {
+            "url": url,
+            "fields": missing,
+            "context": extract_field_context(content["markdown"], missing),
+        }
+    
+    def _apply_targeted_results(
+        self,
+        batch: List[Dict[str, Any]],
+        results: Dict[str, Dict[str, Optional[str]]],
+        concursos_by_url: Dict[str, Concurso],
+        debug_info: Dict[str, Any]
+    ) -> List[str]:
+        """
+        Aplica la respuesta de un batch de prompts focalizados.
+        
+        Args:
+            batch: Páginas del batch ({"url", "fields", "context"})
+            results: Campos extraídos por URL (respuesta de extract_fields_from_pages)
+            concursos_by_url: Concursos nuevos por URL
+            debug_info: Diccionario de debug
+            
+        Returns:
+            URLs sin respuesta, que deben pasar por el enriquecimiento completo
+        """
+        stats = debug_info.setdefault("enrichment", {}).setdefault("deterministic", {
+            "resolved_without_llm": 0,
+            "targeted_pages": 0,
+            "targeted_fields": 0,
+            "full_llm_pages": 0,
+        })
+        missing_urls = []
+        for page in batch:
+            values = results.get(page["url"])
+            if values is None:
+                missing_urls.append(page["url"])
+                continue
+            stats["targeted_pages"] += 1
+            stats["targeted_fields"] += len(page["fields"])
+            self._apply_resolved_fields(
+                concursos_by_url[page["url"]],
+                values,
+                False,
+                "llm_targeted",
+                debug_info,
+                get_strategy_for_url(page["url"]).get_known_subdirecciones()
+            )
+        return missing_urls
+    
+    def _merge_enriched_concursos(
+        self,
+        enriched_concursos: List[Concurso],
+        new_concursos: List[Concurso],
+        enriched_content: Dict[str, Dict[str, Any]],
+        debug_info: Dict[str, Any]
+    ) -> None:
+        """
+        Actualiza los concursos nuevos con la respuesta de un batch de enriquecimiento.
+        
+        OPTIMIZACIÓN: Se prefieren las fechas determinísticas sobre las del LLM si están
+        disponibles. El LLM todavía se usa para nombre, organismo, descripción, etc.
+        
+        Args:
+            enriched_concursos: Concursos devueltos por el LLM para el batch
+            new_concursos: Concursos nuevos a actualizar
+            enriched_content: Contenido scrapeado por URL (con deterministic_data)
+            debug_info: Diccionario de debug
+        """
+        for enriched in enriched_concursos:
+            for concurso in new_concursos:
+                if concurso.url == enriched.url:
+                    # Obtener datos determinísticos si están disponibles
+                    deterministic_data = enriched_content.get(concurso.url, {}).get("deterministic_data")
+                    
+                    # Si tenemos datos determinísticos, usarlos en lugar de los del LLM
+                    if deterministic_data:
+                        # Usar nombre determinístico si está disponible y el LLM no encontró uno válido
+                        if deterministic_data.get("nombre") and (
+                            not enriched.nombre or 
+                            enriched.nombre.strip().lower() == "concurso sin título"
+                        ):
+                            enriched.nombre = deterministic_data["nombre"]
+                        
+                        # Usar fechas determinísticas si están disponibles
+                        if deterministic_data.get("fecha_apertura") and not concurso.fecha_apertura:
+                            enriched.fecha_apertura = deterministic_data["fecha_apertura"]
+                            enriched.fecha_apertura_original = deterministic_data["fecha_apertura"]
+                        if deterministic_data.get("fecha_cierre") and not concurso.fecha_cierre:
+                            enriched.fecha_cierre = deterministic_data["fecha_cierre"]
+                            enriched.fecha_cierre_original = deterministic_data["fecha_cierre"]
+                    
+                    self._update_concurso_from_enriched(concurso, enriched, debug_info, enriched_content.get(concurso.url, {}))
+                    break
+    
+    def _apply_resolved_fields(
+        self,
+        concurso: Concurso,
+        values: Dict[str, Optional[str]],
+        is_suspendido: bool,
+        source: str,
+        debug_info: Dict[str, Any],
+        known_subdirecciones: Set[str]
+    ) -> None:
+        """
+        Completa un concurso con campos resueltos sin pasar por el enriquecimiento completo.
+        
+        Sigue las mismas reglas que _update_concurso_from_enriched: el nombre solo
+        reemplaza nombres genéricos y las fechas y los campos de DETAIL_ONLY_FIELDS solo
+        se completan si faltaban. El estado se recalcula desde las fechas si alguna cambió.
+        
+        Args:
+            concurso: Concurso a actualizar
+            values: Diccionario con nombre, fecha_apertura, fecha_cierre (texto original) y/o
+                campos de DETAIL_ONLY_FIELDS
+            is_suspendido: True si la página indica que el concurso está suspendido
+            source: Origen de los valores ("deterministic" o "llm_targeted")
+            debug_info: Diccionario de debug
+            known_subdirecciones: Subdirecciones que no se aceptan como nombre
+        """
+        new_name = (values.get("nombre") or "").strip()
+        if new_name and new_name.lower() not in known_subdirecciones:
+            current = (concurso.nombre or "").strip().lower()
+            if not current or current == "concurso sin título" or current in known_subdirecciones:
+                debug_info.setdefault("enrichment", {}).setdefault("name_updates", []).append({
+                    "url": concurso.url,
+                    "old_name": concurso.nombre or "Concurso sin título",
+                    "new_name": new_name,
+                    "source": source
+                })
+                concurso.nombre = new_name
+        
+        dates_changed = False
+        if values.get("fecha_apertura") and not concurso.fecha_apertura:
+            parsed = parse_date(values["fecha_apertura"])
+            if parsed:
+                concurso.fecha_apertura = parsed.strftime("%Y-%m-%d")
+                concurso.fecha_apertura_original = values["fecha_apertura"]
+                dates_changed = True
+        if values.get("fecha_cierre") and not concurso.fecha_cierre:
+            parsed = parse_date(values["fecha_cierre"])
+            if parsed:
+                concurso.fecha_cierre = parsed.strftime("%Y-%m-%d")
+                concurso.fecha_cierre_original = values["fecha_cierre"]
+                dates_changed = True
+        
+        for campo in DETAIL_ONLY_FIELDS:
+            if values.get(campo) and not getattr(concurso, campo, None):
+                setattr(concurso, campo, values[campo])
+        
+        if is_suspendido:
+            concurso.estado = "Suspendido"
+        elif dates_changed and concurso.estado != "Suspendido":
+            now = datetime.now()
+            cierre = parse_date(concurso.fecha_cierre) if concurso.fecha_cierre else None
+            apertura = parse_date(concurso.fecha_apertura) if concurso.fecha_apertura else None
+            if cierre:
+                concurso.estado = "Cerrado" if cierre < now else "Abierto"
+            elif apertura:
+                concurso.estado = "Próximo" if apertura > now else "Abierto"
+    
     def _update_concurso_from_enriched(
         self,
         concurso: Concurso,
@@ -2192,6 +2870,7 @@ class ExtractionService:
             # Usar fecha de cierre determinística si está disponible
             if deterministic_data.get("fecha_cierre") and not concurso.fecha_cierre:
                 concurso.fecha_cierre = deterministic_data["fecha_cierre"]
+                concurso.fecha_cierre_original = deterministic_data["fecha_cierre"]
                 logger.debug(f"✅ Usando fecha de cierre determinística para {concurso.url}")
         else:
             # Fallback: usar fechas del LLM si no hay determinísticas
@@ -2202,6 +2881,9 @@ class ExtractionService:
                 )
             if not concurso.fecha_cierre and enriched.fecha_cierre:
                 concurso.fecha_cierre = enriched.fecha_cierre
+                concurso.fecha_cierre_original = (
+                    enriched.fecha_cierre_original or enriched.fecha_cierre
+                )
         
         # Completar estado si estaba vacío (el estado se calcula determinísticamente, pero
         # si el LLM lo detectó como suspendido, lo respetamos)
@@ -12,25 +12,43 @@ Este servicio:
 """
 
 import asyncio
+import hashlib
 import logging
 import re
+import time
 import traceback
 import os
 import json
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Set
 from urllib.parse import urlparse
 
-from llm.predictor import ConcursoPredictor
+import numpy as np
+
+from llm.predictor import ConcursoPredictor, PREDICTION_PROMPT_VERSION
 from utils.history_manager import HistoryManager
 from utils.anid_previous_concursos import format_previous_concursos_for_prediction
-from utils.file_manager import save_predictions, save_debug_info_predictions, save_unpredictable_concursos
-from utils.date_parser import parse_date, is_past_date
+from utils.file_manager import (
+    save_predictions,
+    save_debug_info_predictions,
+    save_unpredictable_concursos,
+    load_predictions,
+    load_unpredictable_concursos,
+)
+from utils.date_parser import parse_date
 from utils.lock_manager import is_operation_locked
+from utils.statistical_predictor import StatisticalPredictor
+from utils.change_events import EVENT_SWEEP, get_change_event_queue
+from utils.entity_resolution import get_entity_clusters
+from utils.estado_engine import filter_mask
 from config import EXTRACTION_CONFIG, PREDICTIONS_DIR
 
 logger = logging.getLogger(__name__)
 
+# Motivos de "no predecible" que el barrido respeta (decisiones estables); los demás
+# (batch_error, llm_no_response, ...) son fallos transitorios y se vuelven a encolar
+SWEEP_SKIPPED_UNPREDICTABLE_REASONS = {"llm_rejected", "no_previous_versions", "self_reference"}
+
 
 class PredictionService:
     """Servicio para generar predicciones de fechas de apertura de concursos"""
@@ -68,7 +86,9 @@ class PredictionService:
         site: str,
         filters: Optional[Dict[str, Any]] = None,
         status_callback: Optional[Callable[[str], None]] = None,
-        should_stop_callback: Optional[Callable[[], bool]] = None
+        should_stop_callback: Optional[Callable[[], bool]] = None,
+        execution_mode: str = "sync",
+        only_urls: Optional[Set[str]] = None
     ) -> Dict[str, Any]:
         """
         Genera predicciones para concursos de un sitio.
@@ -81,6 +101,11 @@ class PredictionService:
                 - search_term: str o None
             status_callback: Función para reportar progreso
             should_stop_callback: Función que retorna True si se debe detener
+            execution_mode: "sync" (una llamada por batch) o "batch" (un único trabajo
+                asíncrono de la Batch API de Gemini, para corridas no urgentes; si no se
+                puede crear, se usa la ruta síncrona)
+            only_urls: Si se indica, solo se analizan los concursos con estas URLs
+                (p. ej. los afectados por eventos de cambio del historial)
             
         Returns:
             Diccionario con resultados:
@@ -101,7 +126,9 @@ class PredictionService:
             "execution": {
                 "start_time": start_time.isoformat(),
                 "site": site,
-                "filters": filters or {}
+                "filters": filters or {},
+                "execution_mode": execution_mode,
+                "only_urls": len(only_urls) if only_urls is not None else None
             },
             "scraping": {
                 "urls_scraped": 0,
@@ -147,6 +174,8 @@ class PredictionService:
         
         # Aplicar filtros
         filtered_concursos = self._apply_filters(all_concursos, filters or {})
+        if only_urls is not None:
+            filtered_concursos = [c for c in filtered_concursos if (c.get("url") or "").strip() in only_urls]
         logger.info(f"🔍 Después de filtros: {len(filtered_concursos)} concursos")
         
         debug_info["stats"]["total_concursos"] = len(all_concursos)
@@ -169,20 +198,21 @@ class PredictionService:
         logger.info(f"🔒 {len(closed_concursos)} concursos cerrados para analizar")
         special_domains_allow_without_previous = {"centroestudios.mineduc.cl"}
         
-        # Evitar predecir concursos que ya tienen predicción guardada
-        existing_pred_urls: set[str] = set()
+        # Predicciones guardadas: se reutilizan si la evidencia no cambió (misma huella)
+        # y la fecha predicha es válida y sigue en el futuro; si no, se recalculan y reemplazan
+        existing_predictions_by_url: Dict[str, Dict[str, Any]] = {}
         try:
             safe_site = site.replace(".", "_").replace("/", "_")
             pred_path = os.path.join(PREDICTIONS_DIR, f"predictions_{safe_site}.json")
             if os.path.exists(pred_path):
                 with open(pred_path, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                    existing_pred_urls = {
-                        p.get("concurso_url") for p in data.get("predictions", []) if p.get("concurso_url")
+                    existing_predictions_by_url = {
+                        p.get("concurso_url"): p for p in data.get("predictions", []) if p.get("concurso_url")
                     }
         except Exception as e:
             logger.warning(f"⚠️ No se pudieron cargar predicciones existentes para evitar duplicados: {e}")
-            existing_pred_urls = set()
+            existing_predictions_by_url = {}
 
         # Crear índice del historial por URL para búsqueda eficiente O(1)
         history_index_by_url = {}
@@ -191,6 +221,13 @@ class PredictionService:
             if url:
                 history_index_by_url[url] = hist_concurso
         
+        model_name = self.predictor.gemini_client.model_name
+        fingerprints: Dict[str, str] = {}
+        debug_info["predictions"]["memoized"] = 0
+        debug_info["predictions"]["recomputed"] = 0
+        # Predicciones guardadas que se están recalculando, por URL (para detectar recálculos fallidos)
+        recomputed_predictions: Dict[str, Dict[str, Any]] = {}
+        
         # Filtrar concursos que tienen previous_concursos en el historial
         # Solo estos pueden tener predicciones (necesitan versiones anteriores)
         concursos_con_versiones_previas = []
@@ -198,18 +235,40 @@ class PredictionService:
             concurso_url = concurso.get("url")
             if not concurso_url:
                 continue
-            if concurso_url in existing_pred_urls:
-                logger.info(
-                    f"⏭️ Concurso ya tiene predicción guardada, se omite: {concurso.get('nombre', 'N/A')} ({concurso_url})"
-                )
-                continue
+            
+            hist_previous = (
+                (history_index_by_url.get(concurso_url) or {}).get("previous_concursos", [])
+                or self._previous_from_entity_clusters(concurso_url)
+            )
+            fingerprint = self._prediction_fingerprint(concurso, hist_previous, model_name)
+            fingerprints[concurso_url] = fingerprint
+            existing_prediction = existing_predictions_by_url.get(concurso_url)
+            if existing_prediction:
+                stored_fingerprint = existing_prediction.get("fingerprint")
+                still_current = self._prediction_is_current(existing_prediction)
+                # Predicciones sin huella (anteriores a la memoización) se conservan mientras sigan vigentes
+                if still_current and stored_fingerprint in (None, fingerprint):
+                    debug_info["predictions"]["memoized"] += 1
+                    logger.info(
+                        f"⏭️ Concurso ya tiene predicción vigente con la misma evidencia, se omite: "
+                        f"{concurso.get('nombre', 'N/A')} ({concurso_url})"
+                    )
+                    continue
+                debug_info["predictions"]["recomputed"] += 1
+                recomputed_predictions[concurso_url] = existing_prediction
+                if still_current:
+                    reason = "cambió la evidencia"
+                elif existing_prediction.get("stale"):
+                    reason = "falló el recálculo anterior"
+                else:
+                    reason = "la fecha predicha ya pasó o no es válida"
+                logger.info(f"🔄 Recalculando predicción de '{concurso.get('nombre', 'N/A')}': {reason}")
             
             # Buscar en el índice del historial si tiene previous_concursos
             hist_concurso = history_index_by_url.get(concurso_url)
             if hist_concurso:
-                previous_concursos = hist_concurso.get("previous_concursos", [])
-                # Solo incluir si tiene versiones anteriores (lista no vacía)
-                if previous_concursos:
+                # Solo incluir si tiene versiones anteriores (propias o del mismo cluster)
+                if hist_previous:
                     concursos_con_versiones_previas.append(concurso)
                 else:
                     domain = urlparse(concurso_url).netloc.replace("www.", "")
@@ -230,6 +289,9 @@ class PredictionService:
         
         if not closed_concursos:
             logger.warning(f"⚠️ No hay concursos cerrados para generar predicciones")
+            debug_info["predictions"]["recompute_failed"] = self._flag_failed_recomputes(
+                site, recomputed_predictions, []
+            )
             debug_info["execution"]["end_time"] = datetime.now().isoformat()
             debug_info["execution"]["duration_seconds"] = (
                 datetime.now() - start_time
@@ -292,7 +354,10 @@ class PredictionService:
                         })
                         continue
                     
-                    previous_concursos = hist_concurso.get("previous_concursos", [])
+                    previous_concursos = (
+                        hist_concurso.get("previous_concursos", [])
+                        or self._previous_from_entity_clusters(concurso_url)
+                    )
                     domain = urlparse(concurso_url).netloc.replace("www.", "")
                     # Sitio especial: centroestudios.mineduc.cl (FONIDE anual)
                     if domain == "centroestudios.mineduc.cl" and not previous_concursos:
@@ -441,12 +506,33 @@ class PredictionService:
                 f"de {len(closed_concursos)} totales. Creando batches de {BATCH_SIZE}..."
             )
             
+            # Predicción estadística: los concursos con cadencia anual clara no pasan por el LLM
+            if EXTRACTION_CONFIG.get("statistical_predictions", True) and concursos_predecibles:
+                try:
+                    statistical_predictions, concursos_predecibles = StatisticalPredictor(
+                        history_manager=self.history_manager,
+                        config=EXTRACTION_CONFIG
+                    ).predict(concursos_predecibles)
+                except Exception as e:
+                    logger.error(f"Error en predicción estadística, todos los concursos irán al LLM: {e}", exc_info=True)
+                    statistical_predictions = []
+                predictions_to_save.extend(statistical_predictions)
+                debug_info["predictions"]["successful"] += len(statistical_predictions)
+                debug_info["predictions"]["statistical"] = len(statistical_predictions)
+                if statistical_predictions:
+                    logger.info(
+                        f"📈 {len(statistical_predictions)} concursos predichos por cadencia anual (sin LLM); "
+                        f"{len(concursos_predecibles)} casos ambiguos irán al LLM"
+                    )
+                    if status_callback:
+                        status_callback(
+                            f"📈 {len(statistical_predictions)} predicciones estadísticas; "
+                            f"{len(concursos_predecibles)} concursos irán al LLM"
+                        )
+            
             # Ahora crear batches de exactamente BATCH_SIZE con los concursos predecibles
+            prepared_batches = []
             for batch_start in range(0, len(concursos_predecibles), BATCH_SIZE):
-                if should_stop_callback and should_stop_callback():
-                    logger.info("Proceso detenido durante generación de predicciones")
-                    break
-                
                 batch_predecibles = concursos_predecibles[batch_start: batch_start + BATCH_SIZE]
                 batch_for_llm = []
                 
@@ -491,15 +577,103 @@ class PredictionService:
                     logger.warning(f"⚠️ Batch vacío detectado (índice {batch_start}). Esto no debería pasar después del filtrado previo.")
                     continue
                 
-                # Llamar al LLM una sola vez para el batch (con reintentos automáticos internos)
+                prepared_batches.append(batch_for_llm)
+            
+            # Modo batch: todos los batches en un único trabajo asíncrono de la Batch API
+            offline_results = None
+            if execution_mode == "batch" and prepared_batches:
+                if status_callback:
+                    status_callback(f"📦 Enviando {len(prepared_batches)} batches como trabajo batch de Gemini...")
+                offline_results = self.predictor.predict_batches_offline(
+                    prepared_batches,
+                    status_callback=status_callback,
+                    should_stop_callback=should_stop_callback
+                )
+                debug_info["execution"]["batch_api_used"] = offline_results is not None
+            
+            def predict_batch(predictor, batch_idx, batch_for_llm):
+                """Predice un batch (en un hilo): resultado del trabajo batch o llamada síncrona"""
+                if offline_results is not None:
+                    batch_predictions = offline_results[batch_idx]
+                    if not isinstance(batch_predictions, Exception):
+                        return batch_predictions
+                    # Reintentar por la ruta síncrona solo los batches fallidos del trabajo
+                    logger.warning(
+                        f"⚠️ Batch {batch_idx + 1} falló en el trabajo batch ({batch_predictions}). "
+                        f"Reintentando por la ruta síncrona..."
+                    )
+                return predictor.predict_from_previous_concursos_batch(batch_for_llm)
+            
+            # Concurrencia: hasta prediction_max_concurrency batches en paralelo, sin superar
+            # el número de API keys disponibles (cada batch en vuelo usa su propia key)
+            api_key_manager = self.predictor.api_key_manager
+            available_keys = 1
+            if api_key_manager is not None:
+                api_key_manager._clean_exhausted_keys()
+                available_keys = len([
+                    key for key in api_key_manager.api_keys if key not in api_key_manager.exhausted_keys
+                ]) or 1
+            concurrency = max(1, min(
+                EXTRACTION_CONFIG.get("prediction_max_concurrency", 4),
+                available_keys,
+                len(prepared_batches) or 1
+            ))
+            debug_info["execution"]["prediction_concurrency"] = concurrency
+            if concurrency > 1:
+                logger.info(f"⚡ Procesando {len(prepared_batches)} batches con concurrencia {concurrency}")
+            
+            # Un predictor por slot de concurrencia (cada cliente mantiene su key actual)
+            predictor_pool: asyncio.Queue = asyncio.Queue()
+            predictor_pool.put_nowait(self.predictor)
+            for _ in range(concurrency - 1):
+                predictor_pool.put_nowait(ConcursoPredictor(
+                    api_key_manager=api_key_manager,
+                    model_name=self.predictor.gemini_client.model_name,
+                    config=self.predictor.config
+                ))
+            semaphore = asyncio.Semaphore(concurrency)
+            # Tras un error crítico los batches en espera ya no se envían (quedan pendientes)
+            critical_error_seen = asyncio.Event()
+            
+            async def run_batch(batch_idx, batch_for_llm):
+                async with semaphore:
+                    if critical_error_seen.is_set() or (should_stop_callback and should_stop_callback()):
+                        return batch_idx, batch_for_llm, None, None
+                    predictor = await predictor_pool.get()
+                    try:
+                        batch_predictions = await asyncio.to_thread(predict_batch, predictor, batch_idx, batch_for_llm)
+                        return batch_idx, batch_for_llm, batch_predictions, None
+                    except Exception as e:
+                        if self._is_critical_batch_error(e):
+                            critical_error_seen.set()
+                        return batch_idx, batch_for_llm, None, e
+                    finally:
+                        predictor_pool.put_nowait(predictor)
+            
+            tasks = [
+                asyncio.create_task(run_batch(batch_idx, batch_for_llm))
+                for batch_idx, batch_for_llm in enumerate(prepared_batches)
+            ]
+            saved_predictions_count = 0
+            skipped_batches = 0
+            
+            # Procesar cada batch en cuanto termina (tras una detención, los batches en vuelo
+            # se procesan y guardan; los que no se llegaron a enviar quedan pendientes)
+            for next_batch in asyncio.as_completed(tasks):
+                # Resultado del LLM para el batch (con reintentos automáticos internos)
                 try:
-                    batch_predictions = self.predictor.predict_from_previous_concursos_batch(batch_for_llm)
+                    batch_idx, batch_for_llm, batch_predictions, batch_error = await next_batch
+                    if batch_error is not None:
+                        raise batch_error
+                    if batch_predictions is None:
+                        skipped_batches += 1
+                        continue
                 except Exception as e:
                     error_str = str(e)
                     error_type = type(e).__name__
                     
                     # Verificar si es un error crítico después de agotar reintentos
-                    is_critical_error = "Error crítico" in error_str or "Se detendrá la ejecución" in error_str
+                    is_critical_error = self._is_critical_batch_error(e)
                     
                     if is_critical_error:
                         # Error crítico: agotados los reintentos, detener ejecución
@@ -543,6 +717,8 @@ class PredictionService:
                         # Detener ejecución
                         if status_callback:
                             status_callback(f"❌ Error crítico: Deteniendo ejecución de predicciones")
+                        for task in tasks:
+                            task.cancel()
                         
                         return {
                             "predictions": predictions_to_save,
@@ -882,17 +1058,38 @@ class PredictionService:
                             f"es_mismo_concurso={prediccion.es_mismo_concurso}, "
                             f"fecha_predicha={prediccion.fecha_predicha}"
                         )
+                
+                # Guardar incrementalmente las predicciones nuevas (save_predictions deduplica por URL)
+                if len(predictions_to_save) > saved_predictions_count:
+                    try:
+                        save_predictions(
+                            site,
+                            self._with_fingerprints(predictions_to_save[saved_predictions_count:], fingerprints),
+                            replace_existing=True
+                        )
+                        saved_predictions_count = len(predictions_to_save)
+                    except Exception as e:
+                        logger.error(f"Error al guardar predicciones del batch: {e}", exc_info=True)
+            
+            if skipped_batches:
+                logger.info(
+                    f"Proceso detenido durante generación de predicciones: {skipped_batches} batches sin enviar"
+                )
+                debug_info["execution"]["stopped_early"] = True
+                debug_info["execution"]["stop_reason"] = "Detenido por el usuario"
         
         # Ejecutar generación de predicciones desde historial
         try:
             asyncio.run(generate_predictions_from_history())
         except Exception as e:
             logger.error(f"Error durante scraping y predicciones: {e}", exc_info=True)
+            debug_info["execution"]["stopped_early"] = True
+            debug_info["execution"]["stop_reason"] = f"Error durante la generación de predicciones: {e}"
         
         # Guardar predicciones
         if predictions_to_save:
             try:
-                save_predictions(site, predictions_to_save)
+                save_predictions(site, self._with_fingerprints(predictions_to_save, fingerprints), replace_existing=True)
                 logger.info(f"💾 Guardadas {len(predictions_to_save)} predicciones para {site}")
             except Exception as e:
                 logger.error(f"Error al guardar predicciones: {e}", exc_info=True)
@@ -900,11 +1097,15 @@ class PredictionService:
         # Guardar concursos no predecibles
         if unpredictable_to_save:
             try:
-                save_unpredictable_concursos(site, unpredictable_to_save)
+                save_unpredictable_concursos(site, unpredictable_to_save, replace_existing=True)
                 logger.info(f"⚠️ Guardados {len(unpredictable_to_save)} concursos no predecibles para {site}")
             except Exception as e:
                 logger.error(f"Error al guardar concursos no predecibles: {e}", exc_info=True)
         
+        debug_info["predictions"]["recompute_failed"] = self._flag_failed_recomputes(
+            site, recomputed_predictions, predictions_to_save
+        )
+        
         # Finalizar debug
         end_time = datetime.now()
         debug_info["execution"]["end_time"] = end_time.isoformat()
@@ -922,7 +1123,16 @@ class PredictionService:
         total_analizados = debug_info["predictions"]["total_analyzed"]
         
         # Verificar que la suma sea correcta
-        if total_procesados != total_disponibles:
+        if total_procesados != total_disponibles and debug_info["execution"].get("stopped_early"):
+            # Ejecución detenida (usuario o error crítico): los batches no enviados quedan
+            # pendientes para la próxima ejecución, no es un error de integridad
+            pending = total_disponibles - total_procesados
+            logger.warning(
+                f"⏹️ Ejecución detenida: {pending} concursos quedan pendientes "
+                f"({len(predictions_to_save)} predicciones + {len(unpredictable_to_save)} no predecibles)"
+            )
+            debug_info["execution"]["pending_after_stop"] = pending
+        elif total_procesados != total_disponibles:
             error_msg = (
                 f"❌ ERROR DE INTEGRIDAD: La suma de predicciones ({len(predictions_to_save)}) + "
                 f"no predecibles ({len(unpredictable_to_save)}) = {total_procesados} "
@@ -970,6 +1180,249 @@ class PredictionService:
             "stats": debug_info["stats"]
         }
 
+    def process_change_events(
+        self,
+        site: str,
+        status_callback: Optional[Callable[[str], None]] = None,
+        should_stop_callback: Optional[Callable[[], bool]] = None,
+        execution_mode: str = "sync"
+    ) -> Dict[str, Any]:
+        """
+        Worker de predicciones incrementales: predice solo los concursos afectados por
+        los eventos de cambio pendientes del historial (utils.change_events).
+        
+        Antes de leer la cola se barre el historial cada "change_events_sweep_hours"
+        (ver _sweep_closed_without_prediction): así se predicen también los concursos
+        que ya existían al activar la cola y los que tienen la predicción vencida,
+        que no generan eventos de cambio.
+        
+        Los eventos se marcan como procesados solo si la generación termina sin errores;
+        si se interrumpe, quedan pendientes para la próxima ejecución.
+        
+        Args:
+            site: Nombre del sitio (ej: "anid.cl")
+            status_callback: Función para reportar progreso
+            should_stop_callback: Función que retorna True si se debe detener
+            execution_mode: "sync" o "batch" (ver generate_predictions)
+            
+        Returns:
+            Resultado de generate_predictions (vacío si no hay eventos), con
+            stats["change_events"] = número de eventos procesados
+        """
+        queue = get_change_event_queue()
+        if queue is None:
+            logger.warning("⚠️ Cola de eventos de cambio no disponible, se predicen todos los concursos")
+            return self.generate_predictions(
+                site,
+                status_callback=status_callback,
+                should_stop_callback=should_stop_callback,
+                execution_mode=execution_mode
+            )
+        
+        sweep_hours = EXTRACTION_CONFIG.get("change_events_sweep_hours", 24)
+        try:
+            last_sweep = queue.last_sweep(site)
+            if last_sweep is None or time.time() - last_sweep >= sweep_hours * 3600:
+                self._sweep_closed_without_prediction(site, queue)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo barrer el historial de {site} en busca de predicciones pendientes: {e}")
+        
+        events = queue.pending(site)
+        if not events:
+            logger.info(f"📭 Sin eventos de cambio pendientes para {site}: no hay concursos que predecir")
+            return {"predictions": [], "debug_info": {"site": site}, "stats": {"change_events": 0}}
+        
+        affected_urls = {event["url"] for event in events}
+        counts: Dict[str, int] = {}
+        for event in events:
+            counts[event["event_type"]] = counts.get(event["event_type"], 0) + 1
+        logger.info(
+            f"📣 {len(events)} eventos de cambio pendientes para {site} ({counts}): "
+            f"{len(affected_urls)} concursos afectados"
+        )
+        if status_callback:
+            status_callback(f"📣 Prediciendo {len(affected_urls)} concursos afectados por cambios en el historial...")
+        
+        result = self.generate_predictions(
+            site,
+            status_callback=status_callback,
+            should_stop_callback=should_stop_callback,
+            execution_mode=execution_mode,
+            only_urls=affected_urls
+        )
+        # Corrida detenida (usuario, error crítico con keys agotadas o excepción): los
+        # concursos sin procesar conservan sus eventos para la próxima ejecución
+        result_debug = result.get("debug_info", {})
+        stopped = (
+            (should_stop_callback is not None and should_stop_callback())
+            or result_debug.get("execution", {}).get("stopped_early", False)
+        )
+        if result_debug.get("error") or stopped:
+            logger.warning(f"⚠️ Predicción incremental incompleta para {site}: los eventos quedan pendientes")
+            return result
+        
+        try:
+            queue.mark_consumed([event["id"] for event in events])
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron marcar los eventos de cambio como procesados: {e}")
+        result.setdefault("stats", {})["change_events"] = len(events)
+        return result
+    
+    def _sweep_closed_without_prediction(self, site: str, queue) -> int:
+        """
+        Encola eventos "sweep" para los concursos cerrados del historial sin predicción vigente.
+        
+        Se omiten los concursos que ya tienen eventos pendientes y los no predecibles por
+        una decisión estable (el LLM los rechazó o no tienen concursos anteriores; vuelven a
+        la cola por sus propios eventos de cambio si su evidencia cambia). Los no predecibles
+        por fallos transitorios (error de batch, sin respuesta del LLM, etc.) se vuelven a encolar.
+        
+        Args:
+            site: Nombre del sitio
+            queue: Cola de eventos de cambio
+            
+        Returns:
+            Número de eventos encolados
+        """
+        predictions_by_url = {p.get("concurso_url"): p for p in load_predictions(site) if p.get("concurso_url")}
+        unpredictable_urls = {
+            u.get("concurso_url") for u in load_unpredictable_concursos(site)
+            if u.get("reason") in SWEEP_SKIPPED_UNPREDICTABLE_REASONS
+        }
+        pending_urls = {event["url"] for event in queue.pending(site)}
+        detected_at = datetime.now().isoformat()
+        
+        events = []
+        for hist_concurso in self.history_manager.load_history(site).get("concursos", []):
+            url = (hist_concurso.get("url") or "").strip()
+            versions = hist_concurso.get("versions", [])
+            if not url or not versions or versions[-1].get("estado") != "Cerrado":
+                continue
+            if url in unpredictable_urls or url in pending_urls:
+                continue
+            if self._prediction_is_current(predictions_by_url.get(url)):
+                continue
+            events.append({
+                "url": url,
+                "nombre": hist_concurso.get("nombre"),
+                "event_type": EVENT_SWEEP,
+                "detected_at": detected_at,
+            })
+        
+        published = queue.publish(site, events)
+        queue.record_sweep(site)
+        logger.info(f"🧹 Barrido de {site}: {published} concursos cerrados sin predicción vigente encolados")
+        return published
+    
+    @staticmethod
+    def _is_critical_batch_error(error: Exception) -> bool:
+        """True si el error de un batch (reintentos agotados en el predictor) debe detener la ejecución"""
+        error_str = str(error)
+        return "Error crítico" in error_str or "Se detendrá la ejecución" in error_str
+    
+    @staticmethod
+    def _prediction_is_current(prediction: Optional[Dict[str, Any]]) -> bool:
+        """True si hay predicción vigente: no marcada como desactualizada y con fecha predicha válida y futura"""
+        if not prediction or prediction.get("stale"):
+            return False
+        fecha_predicha = parse_date(prediction.get("fecha_predicha") or "")
+        return fecha_predicha is not None and fecha_predicha >= datetime.now()
+    
+    @staticmethod
+    def _flag_failed_recomputes(
+        site: str,
+        recomputed_predictions: Dict[str, Dict[str, Any]],
+        new_predictions: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Marca como desactualizadas (stale) las predicciones guardadas cuyo recálculo no
+        produjo una predicción nueva: siguen en el archivo pero ya no son vigentes, y se
+        vuelven a recalcular en la próxima ejecución
+        
+        Args:
+            site: Nombre del sitio
+            recomputed_predictions: Predicciones guardadas que se recalcularon, por URL
+            new_predictions: Predicciones generadas en esta ejecución
+        
+        Returns:
+            Cantidad de recálculos fallidos
+        """
+        predicted_urls = {p.get("concurso_url") for p in new_predictions}
+        failed = [p for url, p in recomputed_predictions.items() if url not in predicted_urls]
+        if not failed:
+            return 0
+        for prediction in failed:
+            logger.warning(
+                f"⚠️ No se pudo recalcular la predicción de '{prediction.get('concurso_nombre', 'N/A')}' "
+                f"({prediction.get('concurso_url')}); se marca como desactualizada"
+            )
+        try:
+            save_predictions(site, [dict(p, stale=True) for p in failed], replace_existing=True)
+        except Exception as e:
+            logger.error(f"Error al marcar predicciones desactualizadas: {e}", exc_info=True)
+        return len(failed)
+    
+    @staticmethod
+    def _previous_from_entity_clusters(concurso_url: str) -> List[Dict[str, Any]]:
+        """
+        "Concursos anteriores" desde los clusters de resolución de entidades: los registros
+        del mismo concurso en otros años (para concursos cuya página no los lista)
+        
+        Args:
+            concurso_url: URL del concurso
+            
+        Returns:
+            Lista con el formato de previous_concursos (vacía si no hay clusters o no pertenece a uno)
+        """
+        clusters = get_entity_clusters()
+        if clusters is None:
+            return []
+        return [
+            {
+                "nombre": record.get("nombre"),
+                "url": record.get("url"),
+                "fecha_apertura": record.get("fecha_apertura"),
+                "fecha_cierre": record.get("fecha_cierre"),
+                "año": record.get("año"),
+                "source": "entity_clusters",
+            }
+            for record in clusters.other_years(concurso_url)
+        ]
+    
+    @staticmethod
+    def _prediction_fingerprint(
+        concurso: Dict[str, Any],
+        previous_concursos: List[Dict[str, Any]],
+        model_name: str
+    ) -> str:
+        """
+        Huella de la evidencia de una predicción: nombre, fechas, concursos anteriores,
+        modelo y versión del prompt. Si no cambia, la predicción guardada sigue siendo válida.
+        """
+        evidence = {
+            "nombre": concurso.get("nombre") or "",
+            "fecha_apertura": concurso.get("fecha_apertura") or "",
+            "fecha_cierre": concurso.get("fecha_cierre") or "",
+            "previous_concursos": [
+                {field: prev.get(field) for field in ("nombre", "url", "fecha_apertura", "fecha_cierre", "año")}
+                for prev in previous_concursos or []
+            ],
+            "model": model_name,
+            "prompt_version": PREDICTION_PROMPT_VERSION,
+        }
+        return hashlib.sha256(
+            json.dumps(evidence, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+    
+    @staticmethod
+    def _with_fingerprints(predictions: List[Dict[str, Any]], fingerprints: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Agrega a cada predicción la huella de la evidencia con la que se calculó"""
+        for prediction in predictions:
+            fingerprint = fingerprints.get(prediction.get("concurso_url"))
+            if fingerprint:
+                prediction["fingerprint"] = fingerprint
+        return predictions
+    
     def _predict_centro_estudios(
         self,
         concurso: Dict[str, Any],
@@ -1023,30 +1476,22 @@ class PredictionService:
         Returns:
             Lista filtrada de concursos
         """
-        filtered = concursos.copy()
+        # Máscara combinada de todos los filtros, evaluada por columnas (NumPy)
+        mask = np.ones(len(concursos), dtype=bool)
         
         # Filtro por estado
         if filters.get("estado"):
-            estado_filter = filters["estado"]
-            filtered = [c for c in filtered if c.get("estado") == estado_filter]
+            mask &= np.array([c.get("estado") for c in concursos], dtype=object) == filters["estado"]
         
         # Filtro por subdirección
         if filters.get("subdireccion"):
-            subdireccion_filter = filters["subdireccion"].lower()
-            filtered = [
-                c for c in filtered
-                if c.get("subdireccion", "").lower() == subdireccion_filter
-            ]
+            mask &= filter_mask([c.get("subdireccion") for c in concursos], equals=filters["subdireccion"])
         
         # Filtro por término de búsqueda
         if filters.get("search_term"):
-            search_term = filters["search_term"].lower()
-            filtered = [
-                c for c in filtered
-                if search_term in c.get("nombre", "").lower()
-            ]
+            mask &= filter_mask([c.get("nombre") for c in concursos], contains=filters["search_term"])
         
-        return filtered
+        return [c for c, keep in zip(concursos, mask) if keep]
     
     async def generate_prediction_for_concurso(
         self,
@@ -1101,13 +1546,18 @@ class PredictionService:
             hist_concurso = history_index_by_url.get(concurso_url)
             if hist_concurso:
                 previous_concursos = hist_concurso.get("previous_concursos", [])
+                source = "history"
+                if not previous_concursos:
+                    previous_concursos = self._previous_from_entity_clusters(concurso_url)
+                    source = "entity_clusters"
                 if previous_concursos:
                     logger.info(
-                        f"✅ Usando {len(previous_concursos)} concursos anteriores del historial para {concurso.get('nombre', 'N/A')}"
+                        f"✅ Usando {len(previous_concursos)} concursos anteriores "
+                        f"({'historial' if source == 'history' else 'cluster del concurso'}) para {concurso.get('nombre', 'N/A')}"
                     )
                     debug_info["previous_concursos"]["extracted_count"] = len(previous_concursos)
                     debug_info["previous_concursos"]["items"] = previous_concursos
-                    debug_info["previous_concursos"]["source"] = "history"
+                    debug_info["previous_concursos"]["source"] = source
                     debug_info["scraping"]["success"] = True
                 else:
                     logger.debug(
@@ -0,0 +1,52 @@
+"""
+Política del control adaptativo de batches
+"""
+
+import json
+
+from utils.batch_controller import AdaptiveBatchController
+
+MODEL = "gemini-2.5-flash"
+CONFIG = {
+    "batch_size": 100000,
+    "api_timeout": 60,
+    "adaptive_max_error_rate": 0.2,
+    "adaptive_min_calls_for_rate": 3,
+    "adaptive_stats_save_seconds": 3600,
+}
+
+
+def _controller(tmp_path):
+    return AdaptiveBatchController(stats_file=str(tmp_path / "batch_stats.json"), config=CONFIG)
+
+
+def test_recovered_truncation_does_not_halve_the_batch(tmp_path):
+    controller = _controller(tmp_path)
+    controller.record(MODEL, 100000, 10.0, success=True, truncated=True)
+    assert controller.get_batch_size(MODEL) == 100000
+
+
+def test_failed_truncation_halves_the_batch(tmp_path):
+    controller = _controller(tmp_path)
+    controller.record(MODEL, 100000, 10.0, success=False, truncated=True)
+    assert controller.get_batch_size(MODEL) == 50000
+
+
+def test_frequent_recovered_truncations_shrink_the_batch(tmp_path):
+    controller = _controller(tmp_path)
+    # Latencia sin holgura: sin crecimiento aditivo
+    controller.record(MODEL, 100000, 40.0, success=True)
+    controller.record(MODEL, 100000, 40.0, success=True, truncated=True)
+    assert controller.get_batch_size(MODEL) == 100000
+    controller.record(MODEL, 100000, 40.0, success=True, truncated=True)
+    assert controller.get_batch_size(MODEL) == 50000
+
+
+def test_stats_are_saved_on_flush_not_on_every_batch(tmp_path):
+    controller = _controller(tmp_path)
+    stats_file = tmp_path / "batch_stats.json"
+    controller.record(MODEL, 100000, 10.0, success=True)
+    assert not stats_file.exists()
+    controller.flush()
+    saved = json.loads(stats_file.read_text(encoding="utf-8"))
+    assert saved["models"][MODEL]["buckets"]["100000-125000"]["calls"] == 1
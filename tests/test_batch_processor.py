@@ -0,0 +1,75 @@
+"""
+División de páginas grandes en chunks (chunk_markdown / split_oversized_page)
+"""
+
+from crawler.batch_processor import create_batches, split_oversized_page, take_next_batch
+from crawler.markdown_processor import chunk_markdown
+
+BASE = "https://anid.cl/concursos"
+
+
+def _listing(count):
+    return "\n".join(
+        f"## Concurso {i}\n\n[Ver concurso {i}]({BASE}/concurso-{i}/)\n\nApertura: 01/03/2025. " + "x" * 200
+        for i in range(count)
+    )
+
+
+def test_chunk_markdown_cuts_between_items_within_size():
+    markdown = _listing(20)
+    chunks = chunk_markdown(markdown, max_chunk_size=1000)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert all(chunk.startswith("## Concurso") for chunk in chunks)
+    assert "\n".join(chunks) == markdown
+
+
+def test_chunk_markdown_overlap_repeats_tail_of_previous_chunk():
+    chunks = chunk_markdown(_listing(20), max_chunk_size=1000, overlap=300)
+    for previous, current in zip(chunks, chunks[1:]):
+        first_heading = current.split("\n", 1)[0]
+        assert first_heading in previous
+
+
+def test_chunk_markdown_falls_back_to_characters_without_boundaries():
+    chunks = chunk_markdown("a" * 2500, max_chunk_size=1000)
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+
+
+def test_split_oversized_page_gives_each_chunk_its_own_urls():
+    urls_map = {f"{BASE}/concurso-{i}/": f"Concurso {i}" for i in range(20)}
+    urls_map[f"{BASE}/sin-mencion/"] = "Item no mencionado"
+    page = {"url": f"{BASE}/", "markdown_cleaned": _listing(20), "concurso_urls_map": urls_map}
+
+    chunks = split_oversized_page(page, 1000, overlap=300)
+
+    assert len(chunks) > 1
+    assert [chunk["journal_key"] for chunk in chunks] == [
+        f"{BASE}/#chunk-{i + 1}" for i in range(len(chunks))
+    ]
+    assigned = [url for chunk in chunks for url in chunk["concurso_urls_map"]]
+    assert sorted(assigned) == sorted(urls_map)
+    for chunk in chunks:
+        for url in chunk["concurso_urls_map"]:
+            assert url in chunk["markdown_cleaned"] or url.endswith("/sin-mencion/")
+    assert f"{BASE}/sin-mencion/" in chunks[0]["concurso_urls_map"]
+
+
+def test_split_oversized_page_keeps_small_page():
+    page = {"url": f"{BASE}/", "markdown_cleaned": _listing(2), "concurso_urls_map": {}}
+    assert split_oversized_page(page, 10000) == [page]
+
+
+def test_chunks_are_stable_when_batch_size_changes():
+    page = {"url": f"{BASE}/", "markdown_cleaned": _listing(20), "concurso_urls_map": {}}
+    keys = []
+    for batch_size in (800, 3000):
+        batches = create_batches([page], batch_size=batch_size, chunk_size=1000)
+        keys.append([p["journal_key"] for pages, _ in batches for p in pages])
+    assert keys[0] == keys[1]
+
+    # take_next_batch no vuelve a dividir un chunk más grande que el batch
+    pending = [p for pages, _ in create_batches([page], batch_size=3000, chunk_size=1000) for p in pages]
+    pages_in_batch, _, remaining = take_next_batch(pending, 500)
+    assert pages_in_batch == pending[:1]
+    assert remaining == pending[1:]
@@ -0,0 +1,79 @@
+"""
+El barrido de la cola de eventos encola los concursos cerrados sin predicción vigente
+"""
+
+from datetime import datetime, timedelta
+
+import services.prediction_service as prediction_module
+from services.prediction_service import PredictionService
+from utils.change_events import EVENT_SWEEP, ChangeEventQueue
+
+
+class _History:
+    def __init__(self, concursos):
+        self.concursos = concursos
+
+    def load_history(self, site):
+        return {"concursos": self.concursos}
+
+
+def _hist(url, estado):
+    return {"url": url, "nombre": url.rsplit("/", 2)[-2], "versions": [{"estado": estado}]}
+
+
+def test_sweep_enqueues_closed_contests_without_current_prediction(tmp_path, monkeypatch):
+    future = (datetime.now() + timedelta(days=90)).strftime("%Y-%m-%d")
+    past = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    base = "https://anid.cl/concursos"
+    monkeypatch.setattr(prediction_module, "load_predictions", lambda site: [
+        {"concurso_url": f"{base}/vigente/", "fecha_predicha": future},
+        {"concurso_url": f"{base}/vencida/", "fecha_predicha": past},
+        {"concurso_url": f"{base}/sin-fecha/", "fecha_predicha": ""},
+    ])
+    monkeypatch.setattr(prediction_module, "load_unpredictable_concursos", lambda site: [
+        {"concurso_url": f"{base}/no-predecible/", "reason": "llm_rejected"},
+        {"concurso_url": f"{base}/error-batch/", "reason": "batch_error"},
+    ])
+    service = PredictionService.__new__(PredictionService)
+    service.history_manager = _History([
+        _hist(f"{base}/vigente/", "Cerrado"),
+        _hist(f"{base}/vencida/", "Cerrado"),
+        _hist(f"{base}/sin-fecha/", "Cerrado"),
+        _hist(f"{base}/sin-prediccion/", "Cerrado"),
+        _hist(f"{base}/no-predecible/", "Cerrado"),
+        _hist(f"{base}/error-batch/", "Cerrado"),
+        _hist(f"{base}/abierto/", "Abierto"),
+    ])
+    queue = ChangeEventQueue(db_path=str(tmp_path / "events.db"))
+
+    assert queue.last_sweep("anid.cl") is None
+    assert service._sweep_closed_without_prediction("anid.cl", queue) == 4
+    assert queue.last_sweep("anid.cl") is not None
+    pending = queue.pending("anid.cl")
+    # Los no predecibles por un fallo transitorio (batch_error) se reintentan
+    assert {event["url"] for event in pending} == {
+        f"{base}/vencida/", f"{base}/sin-fecha/", f"{base}/sin-prediccion/", f"{base}/error-batch/",
+    }
+    assert {event["event_type"] for event in pending} == {EVENT_SWEEP}
+
+    # Los concursos con eventos pendientes no se vuelven a encolar
+    assert service._sweep_closed_without_prediction("anid.cl", queue) == 0
+
+
+def test_events_stay_pending_when_the_run_stops_early(tmp_path, monkeypatch):
+    url = "https://anid.cl/concursos/vencida/"
+    queue = ChangeEventQueue(db_path=str(tmp_path / "events.db"))
+    queue.record_sweep("anid.cl")
+    queue.publish("anid.cl", [{"url": url, "nombre": "vencida", "event_type": "changed", "detected_at": "now"}])
+    monkeypatch.setattr(prediction_module, "get_change_event_queue", lambda: queue)
+    service = PredictionService.__new__(PredictionService)
+
+    stopped_result = {"predictions": [], "debug_info": {"execution": {"stopped_early": True}}, "stats": {}}
+    monkeypatch.setattr(service, "generate_predictions", lambda site, **kwargs: stopped_result)
+    service.process_change_events("anid.cl")
+    assert [event["url"] for event in queue.pending("anid.cl")] == [url]
+
+    finished_result = {"predictions": [], "debug_info": {"execution": {}}, "stats": {}}
+    monkeypatch.setattr(service, "generate_predictions", lambda site, **kwargs: finished_result)
+    assert service.process_change_events("anid.cl")["stats"]["change_events"] == 1
+    assert queue.pending("anid.cl") == []
@@ -0,0 +1,72 @@
+"""
+Triage de páginas de detalle: resueltas sin LLM, prompt focalizado o enriquecimiento completo
+"""
+
+from models import Concurso
+from services.extraction_service import ExtractionService
+
+URL = "https://anid.cl/concursos/fondecyt-regular-2026/"
+MARKDOWN = "\n".join([
+    "# Fondecyt Regular 2026",
+    "Concurso para financiar proyectos de investigación científica.",
+    "Subdirección de Proyectos de Investigación",
+    "Inicio: 10 de marzo, 2026",
+    "Cierre: 20 de abril, 2026",
+    "Financiamiento: hasta $60.000.000 por proyecto",
+])
+
+
+def _triage(concurso, deterministic_data):
+    service = ExtractionService.__new__(ExtractionService)
+    debug_info = {}
+    content = {"markdown": MARKDOWN, "deterministic_data": deterministic_data}
+    route, payload = service._triage_deterministic_page(URL, content, {URL: concurso}, debug_info)
+    return route, payload, debug_info
+
+
+def _concurso(**fields):
+    return Concurso(nombre="Fondecyt Regular 2026", organismo="ANID", url=URL, **fields)
+
+
+RESOLVED_DATES = {
+    "nombre": "Fondecyt Regular 2026",
+    "fecha_apertura": "10 de marzo, 2026",
+    "fecha_cierre": "20 de abril, 2026",
+    "unresolved_fields": [],
+}
+
+
+def test_resolved_page_skips_llm():
+    concurso = _concurso(financiamiento="$60.000.000", descripcion="Proyectos", subdireccion="Proyectos")
+    route, payload, debug_info = _triage(concurso, RESOLVED_DATES)
+    assert (route, payload) == ("resolved", None)
+    assert concurso.fecha_cierre == "2026-04-20"
+    assert concurso.fecha_cierre_original == "20 de abril, 2026"
+    assert debug_info["enrichment"]["deterministic"]["resolved_without_llm"] == 1
+
+
+def test_missing_detail_fields_use_targeted_prompt():
+    concurso = _concurso(subdireccion="Proyectos")
+    route, payload, _ = _triage(concurso, {**RESOLVED_DATES, "fecha_cierre": None, "unresolved_fields": ["fecha_cierre"]})
+    assert route == "targeted"
+    assert payload["fields"] == ["fecha_cierre", "financiamiento", "descripcion"]
+    assert "Cierre: 20 de abril, 2026" in payload["context"]
+    assert "$60.000.000" in payload["context"]
+    assert "Concurso para financiar proyectos" in payload["context"]
+
+    service = ExtractionService.__new__(ExtractionService)
+    missing = service._apply_targeted_results(
+        [payload],
+        {URL: {"fecha_cierre": "20 de abril, 2026", "financiamiento": "Hasta $60.000.000", "descripcion": None}},
+        {URL: concurso},
+        {},
+    )
+    assert missing == []
+    assert concurso.fecha_cierre == "2026-04-20"
+    assert concurso.financiamiento == "Hasta $60.000.000"
+    assert concurso.descripcion is None
+
+
+def test_page_without_deterministic_data_goes_to_full_enrichment():
+    route, payload, _ = _triage(_concurso(), None)
+    assert (route, payload) == ("full", URL)
@@ -0,0 +1,75 @@
+"""
+Clusters de concursos: programas distintos del mismo año no deben unirse
+"""
+
+from utils.entity_resolution import cluster_records
+
+
+def _record(nombre, year, parent_url=None):
+    slug = nombre.lower().replace(" ", "-").replace("í", "i")
+    return {
+        "url": f"https://anid.cl/concursos/{slug}/",
+        "nombre": nombre,
+        "site": "anid.cl",
+        "año": year,
+        "source": "previous" if parent_url else "history",
+        "parent_url": parent_url,
+    }
+
+
+def _cluster_of(clusters, nombre):
+    for members in clusters:
+        names = {m["nombre"] for m in members}
+        if nombre in names:
+            return names
+    return {nombre}
+
+
+def test_magister_and_doctorado_abroad_stay_apart():
+    records = [
+        _record("Beca de Magíster en el Extranjero 2025", 2025),
+        _record("Beca de Doctorado en el Extranjero 2025", 2025),
+        _record("Beca de Magíster en el Extranjero 2024", 2024),
+        _record("Beca de Doctorado en el Extranjero 2024", 2024),
+        _record("Becas de Doctorado en el Extranjero 2023", 2023),
+        _record("Beca Magíster en el Extranjero 2023", 2023),
+    ]
+    clusters = cluster_records(records)
+    assert _cluster_of(clusters, "Beca de Magíster en el Extranjero 2025") == {
+        "Beca de Magíster en el Extranjero 2025",
+        "Beca de Magíster en el Extranjero 2024",
+        "Beca Magíster en el Extranjero 2023",
+    }
+    assert _cluster_of(clusters, "Beca de Doctorado en el Extranjero 2025") == {
+        "Beca de Doctorado en el Extranjero 2025",
+        "Beca de Doctorado en el Extranjero 2024",
+        "Becas de Doctorado en el Extranjero 2023",
+    }
+
+
+def test_weak_links_do_not_chain_national_programs():
+    # "Magíster y Doctorado Nacional" se parece a ambos programas: no debe unirlos
+    records = [
+        _record("Doctorado Nacional 2025", 2025),
+        _record("Doctorado Nacional 2024", 2024),
+        _record("Magíster Nacional 2025", 2025),
+        _record("Magíster Nacional 2024", 2024),
+        _record("Magíster y Doctorado Nacional 2023", 2023),
+    ]
+    clusters = cluster_records(records)
+    doctorado = _cluster_of(clusters, "Doctorado Nacional 2025")
+    assert "Magíster Nacional 2025" not in doctorado
+    assert "Magíster Nacional 2024" not in doctorado
+
+
+def test_same_contest_across_years_is_clustered():
+    url_2025 = "https://anid.cl/concursos/fondecyt-regular-2025/"
+    records = [
+        _record("Fondecyt Regular 2025", 2025),
+        _record("Fondecyt Regular 2024", 2024, parent_url=url_2025),
+        _record("Concurso Fondecyt Regular 2023", 2023),
+    ]
+    clusters = cluster_records(records)
+    assert _cluster_of(clusters, "Fondecyt Regular 2025") == {
+        "Fondecyt Regular 2025", "Fondecyt Regular 2024", "Concurso Fondecyt Regular 2023",
+    }
@@ -0,0 +1,121 @@
+"""
+Estado vectorizado (compute_estados / filter_mask) contra la lógica anterior fila por fila
+"""
+
+from datetime import datetime
+
+from utils import history_manager as history_manager_module
+from utils.date_parser import parse_date
+from utils.estado_engine import build_date_columns, compute_estados, filter_mask
+from utils.history_manager import HistoryManager
+
+NOW = datetime(2026, 6, 15, 12, 0)
+
+
+def _estado_por_fila(fecha_cierre, fecha_apertura, estado_guardado, now):
+    """calculate_estado_from_fechas (main.py) con fecha de referencia fija"""
+    if estado_guardado == "Suspendido":
+        return "Suspendido"
+    if fecha_cierre:
+        parsed_cierre = parse_date(fecha_cierre)
+        if parsed_cierre:
+            return "Cerrado" if parsed_cierre < now else "Abierto"
+        return "Abierto"
+    elif fecha_apertura:
+        parsed_apertura = parse_date(fecha_apertura)
+        if parsed_apertura and parsed_apertura > now:
+            return "Próximo"
+        return "Abierto"
+    return estado_guardado
+
+
+def _history():
+    rows = [
+        ("2026-05-01", "2026-06-01", None),
+        ("2026-06-01", "2026-07-31", None),
+        ("2026-09-01", "2026-10-15", None),
+        ("2026-09-01", None, None),
+        ("2026-03-01", None, None),
+        (None, "2026-01-10", "Suspendido"),
+        (None, None, "Cerrado"),
+        (None, None, None),
+        ("2026-06-01", "fecha por confirmar", None),
+        ("próximamente", None, None),
+        ("1 de marzo, 2026", "30 de abril de 2026 - 17:00", None),
+        (None, "15/06/2026", None),
+    ]
+    concursos = [
+        {
+            "nombre": f"Concurso {i}",
+            "estado": estado if i % 2 else None,
+            "versions": [{"fecha_apertura": "2020-01-01"}, {
+                "fecha_apertura": apertura,
+                "fecha_cierre": cierre,
+                "estado": estado,
+            }],
+        }
+        for i, (apertura, cierre, estado) in enumerate(rows)
+    ]
+    concursos.append({"nombre": "Sin versiones", "versions": []})
+    return {"site": "anid.cl", "last_updated": "2026-06-15T00:00:00", "concursos": concursos}
+
+
+def test_compute_estados_matches_row_by_row_logic():
+    history = _history()
+    estados = compute_estados(build_date_columns(history), now=NOW)
+    
+    assert len(estados) == len(history["concursos"])
+    for row, hist_concurso in enumerate(history["concursos"]):
+        if not hist_concurso["versions"]:
+            assert estados[row] is None
+            continue
+        latest = hist_concurso["versions"][-1]
+        expected = _estado_por_fila(
+            latest.get("fecha_cierre"),
+            latest.get("fecha_apertura"),
+            hist_concurso.get("estado") or latest.get("estado"),
+            NOW,
+        )
+        assert estados[row] == expected, hist_concurso
+
+
+def test_filter_mask_matches_row_by_row_filters():
+    values = ["Capital Humano", "capital humano", "Investigación Aplicada", "", "CAPITAL HUMANO 2026", "Ñuble"]
+    for equals in ["capital humano", "Investigación aplicada", "ñuble", "otra"]:
+        mask = filter_mask(values, equals=equals)
+        assert list(mask) == [value.lower() == equals.lower() for value in values]
+    for contains in ["humano", "CIÓN", "", "ñu"]:
+        mask = filter_mask(values, contains=contains)
+        assert list(mask) == [contains.lower() in value.lower() for value in values]
+    mask = filter_mask(values, equals="capital humano", contains="capital")
+    assert list(mask) == [True, True, False, False, False, False]
+
+
+def test_filter_mask_treats_none_as_empty():
+    assert list(filter_mask([None, "Becas"], contains="becas")) == [False, True]
+    assert list(filter_mask([], equals="x")) == []
+
+
+def test_get_date_columns_built_once_per_history(tmp_path, monkeypatch):
+    calls = []
+    
+    def counting_build(history):
+        calls.append(history)
+        return build_date_columns(history)
+    
+    monkeypatch.setattr(history_manager_module, "build_date_columns", counting_build)
+    manager = HistoryManager(history_dir=str(tmp_path))
+    manager.save_history("anid.cl", _history())
+    
+    first = manager.get_date_columns("anid.cl")
+    assert manager.get_date_columns("anid.cl") is first
+    assert len(calls) == 1
+    
+    # Sin entrada en caché para el sitio (historial entregado sin pasar por load_history)
+    history = manager.load_history("anid.cl")
+    manager._cache.clear()
+    monkeypatch.setattr(manager, "load_history", lambda site: history)
+    second = manager.get_date_columns("anid.cl")
+    assert manager.get_date_columns("anid.cl") is second
+    assert len(calls) == 2
+    assert list(compute_estados(first, now=NOW)) == list(compute_estados(second, now=NOW))
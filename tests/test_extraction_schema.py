@@ -0,0 +1,45 @@
+"""
+Respuestas del LLM que cumplen el esquema de extracción deben validar como Concurso
+"""
+
+import json
+
+from llm.extractors.llm_extractor import LLMExtractor
+from llm.prompt_cache import SCHEMA_FIELDS_TO_REMOVE, get_extraction_schema
+
+
+def _item_schema():
+    schema = get_extraction_schema()
+    items = schema["properties"]["concursos"]["items"]
+    if "$ref" in items:
+        items = schema["$defs"][items["$ref"].split("/")[-1]]
+    return items
+
+
+def _response_from_schema(url: str) -> str:
+    """Respuesta mínima que cumple el esquema: solo los campos requeridos"""
+    values = {
+        "nombre": "Fondecyt Regular 2026",
+        "organismo": "ANID",
+        "url": url,
+    }
+    item = {field: values.get(field, "x") for field in _item_schema()["required"]}
+    return json.dumps({"concursos": [item]})
+
+
+def test_schema_excludes_system_fields_but_keeps_required_model_fields():
+    props = _item_schema()["properties"]
+    for field in SCHEMA_FIELDS_TO_REMOVE:
+        assert field not in props
+    # Todo campo requerido por Concurso debe poder venir del LLM
+    for field in ("nombre", "organismo", "url"):
+        assert field in _item_schema()["required"]
+
+
+def test_llm_response_round_trips_through_schema():
+    extractor = LLMExtractor.__new__(LLMExtractor)
+    url = "https://anid.cl/concursos/fondecyt-regular-2026/"
+    concursos = extractor._parse_response(_response_from_schema(url))
+    assert len(concursos) == 1
+    assert concursos[0].nombre == "Fondecyt Regular 2026"
+    assert concursos[0].url == url
@@ -0,0 +1,62 @@
+"""
+acquire_request_slot no envía la solicitud con una key sin cupo diario
+"""
+
+import pytest
+
+import llm.gemini_client as gemini_client_module
+from llm.gemini_client import GeminiClient
+from utils.quota_ledger import QuotaLedger
+from utils.rate_limiter import RateLimiter, _quota_day
+
+MODEL = "gemini-2.5-flash"
+
+
+class _APIKeyManager:
+    def __init__(self, keys):
+        self.api_keys = list(keys)
+        self.exhausted_keys = {}
+        self.current_key_index = 0
+
+    def _clean_exhausted_keys(self):
+        pass
+
+    def get_current_key(self):
+        return self.api_keys[self.current_key_index]
+
+
+class _RacingLimiter(RateLimiter):
+    """Simula otro proceso que consume el último cupo diario de key1 entre select_key y acquire"""
+
+    def select_key(self, api_keys, model, tokens):
+        return api_keys[0]
+
+    def acquire(self, api_key, model, tokens, max_wait=None):
+        if api_key == "key1":
+            self.ledger.mark_day_exhausted(api_key, model, _quota_day())
+        return super().acquire(api_key, model, tokens, max_wait)
+
+
+def _client(keys, limiter, monkeypatch):
+    monkeypatch.setattr(gemini_client_module, "get_rate_limiter", lambda: limiter)
+    return GeminiClient(api_key_manager=_APIKeyManager(keys), config={"model": MODEL, "rate_limiting": True})
+
+
+def test_day_exhausted_on_acquire_moves_to_next_key(tmp_path, monkeypatch):
+    limiter = _RacingLimiter(safety_factor=1.0, ledger=QuotaLedger(str(tmp_path / "ledger.db")))
+    client = _client(["key1", "key2"], limiter, monkeypatch)
+
+    client.acquire_request_slot(100)
+
+    assert client.api_key == "key2"
+    assert limiter.ledger.usage("key1", MODEL, _quota_day())["day_requests"] == 0
+    assert limiter.ledger.usage("key2", MODEL, _quota_day())["day_requests"] == 1
+
+
+def test_no_key_with_daily_quota_raises_quota_error(tmp_path, monkeypatch):
+    limiter = _RacingLimiter(safety_factor=1.0, ledger=QuotaLedger(str(tmp_path / "ledger.db")))
+    client = _client(["key1"], limiter, monkeypatch)
+
+    with pytest.raises(Exception, match="quota") as excinfo:
+        client.acquire_request_slot(100)
+    assert excinfo.value.status_code == 429
@@ -0,0 +1,21 @@
+"""
+HtmlDocument: parser fijo y liberación del árbol cacheado
+"""
+
+import pickle
+
+from utils.html_document import HTML_PARSER, HtmlDocument
+
+
+def test_parser_is_pinned_to_html_parser():
+    assert HTML_PARSER == "html.parser"
+
+
+def test_release_drops_cached_tree_but_keeps_html():
+    document = HtmlDocument("<div><p>Fondecyt Regular 2026</p></div>")
+    assert document.soup.p.get_text() == "Fondecyt Regular 2026"
+    assert document.is_parsed
+    document.release()
+    assert not document.is_parsed
+    assert document == "<div><p>Fondecyt Regular 2026</p></div>"
+    assert not pickle.loads(pickle.dumps(document)).is_parsed
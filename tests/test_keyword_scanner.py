@@ -0,0 +1,24 @@
+"""
+KeywordScanner responde lo mismo que buscar cada palabra con `in`
+"""
+
+import random
+
+from utils.keyword_scanner import KeywordScanner
+
+GROUPS = {"a": ["ab", "abc", "b"], "b": ["bca", "ca"], "c": ["zz"]}
+
+
+def test_scanner_matches_substring_checks():
+    scanner = KeywordScanner(GROUPS)
+    keywords = {keyword for group in GROUPS.values() for keyword in group}
+    rng = random.Random(3)
+    for _ in range(500):
+        text = "".join(rng.choice("abcz ") for _ in range(30))
+        expected = {group for group, words in GROUPS.items() if any(word in text for word in words)}
+        assert scanner.scan(text.upper()) == expected
+        for group in GROUPS:
+            assert scanner.contains(text, group) == (group in expected)
+        assert scanner.find_all(text) == sorted(
+            (start, keyword) for keyword in keywords for start in range(len(text)) if text.startswith(keyword, start)
+        )
@@ -0,0 +1,89 @@
+"""
+Segmentación de listados: solo los items nuevos o modificados van al LLM y los sin
+cambios se reconstruyen desde el historial
+"""
+
+from models import Concurso
+from services.extraction_service import ExtractionService
+from utils.url_extractor import extract_listing_segments
+
+BASE = "https://anid.cl/concursos"
+
+
+def _item(slug, nombre, cierre):
+    return (
+        f'<div class="jet-listing-grid__item"><h3><a href="{BASE}/{slug}/">{nombre}</a></h3>'
+        f"<p>Cierre: {cierre}</p></div>"
+    )
+
+
+def _hist(slug, nombre, cierre):
+    return {
+        "nombre": nombre,
+        "url": f"{BASE}/{slug}/",
+        "organismo": "ANID",
+        "versions": [{"fecha_apertura": "2025-01-10", "fecha_cierre": cierre, "estado": "Cerrado"}],
+    }
+
+
+class _HistoryManager:
+    def __init__(self, hashes):
+        self.hashes = hashes
+
+    def get_listing_segment_hashes(self, site):
+        return self.hashes
+
+    def _normalize_concurso_key(self, concurso):
+        return concurso.nombre.lower().strip(), (concurso.url or "").strip()
+
+
+def test_new_changed_and_unchanged_segments():
+    old_html = _item("sin-cambios", "Concurso Sin Cambios", "2025-03-01") + _item("modificado", "Concurso Modificado", "2025-03-01")
+    old_hashes = {segment["url"]: segment["hash"] for segment in extract_listing_segments(old_html, f"{BASE}/")}
+    html = (
+        _item("sin-cambios", "Concurso Sin Cambios", "2025-03-01")
+        + _item("modificado", "Concurso Modificado", "2025-04-15")
+        + _item("nuevo", "Concurso Nuevo", "2025-05-01")
+    )
+    history_data = {"concursos": [
+        _hist("sin-cambios", "Concurso Sin Cambios", "2025-03-01"),
+        _hist("modificado", "Concurso Modificado", "2025-03-01"),
+    ]}
+    page = {
+        "url": f"{BASE}/",
+        "html": html,
+        "markdown_cleaned": "listado completo",
+        "concurso_urls_map": {f"{BASE}/{slug}/": slug for slug in ("sin-cambios", "modificado", "nuevo")},
+    }
+    service = ExtractionService.__new__(ExtractionService)
+    service.history_manager = _HistoryManager(old_hashes)
+    debug_info = {}
+
+    listing_diff = service._diff_listing_segments("anid.cl", [page], history_data, debug_info)
+
+    assert debug_info["listing_diff"]["new"] == 1
+    assert debug_info["listing_diff"]["changed"] == 1
+    assert debug_info["listing_diff"]["unchanged"] == 1
+    assert set(page["concurso_urls_map"]) == {f"{BASE}/modificado/", f"{BASE}/nuevo/"}
+    assert len(page["concurso_urls_map_all"]) == 3
+    assert "Concurso Sin Cambios" not in page["markdown_cleaned"]
+    assert "2025-04-15" in page["markdown_cleaned"]
+    assert set(listing_diff["hashes_to_store"]) == {f"{BASE}/sin-cambios/"}
+    assert set(listing_diff["pending_hashes"]) == {f"{BASE}/modificado/", f"{BASE}/nuevo/"}
+    assert listing_diff["changed_existing_urls"] == {f"{BASE}/modificado/"}
+
+    # El LLM solo devuelve los items enviados; el sin cambios se reconstruye desde el historial
+    extracted = [
+        Concurso(nombre="Concurso Modificado", organismo="ANID", url=f"{BASE}/modificado/"),
+        Concurso(nombre="Concurso Nuevo", organismo="ANID", url=f"{BASE}/nuevo/"),
+    ]
+    history_dict = {(h["nombre"].lower(), h["url"]): h for h in history_data["concursos"]}
+    restored = service._restore_unchanged_listing_concursos(
+        "anid.cl", listing_diff["hashes_to_store"], history_dict, extracted
+    )
+
+    assert [(c.nombre, c.url, c.fecha_cierre, c.fuente) for c in restored] == [
+        ("Concurso Sin Cambios", f"{BASE}/sin-cambios/", "2025-03-01", "anid.cl"),
+    ]
+    combined_urls = {c.url for c in extracted + restored}
+    assert combined_urls == set(page["concurso_urls_map_all"])
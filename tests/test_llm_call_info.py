@@ -0,0 +1,74 @@
+"""
+Cada llamada a extract_from_batch reporta sus propios truncamientos y timeouts
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import llm.extractors.llm_extractor as extractor_module
+from llm.extractors.llm_extractor import LLMExtractor
+
+
+class _GeminiClient:
+    model_name = "gemini-2.5-flash"
+    api_key = "key"
+    temperature = 0.1
+    max_output_tokens = 8192
+
+    def acquire_request_slot(self, estimated_tokens):
+        pass
+
+    def record_token_usage(self, result, estimated_tokens):
+        pass
+
+    def settle_request_slot(self, api_key, sent):
+        pass
+
+
+class _APIKeyManager:
+    api_keys = ["key1", "key2", "key3"]
+
+    def record_api_call(self, *args, **kwargs):
+        pass
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, text, finish_reason):
+        self._result = {"candidates": [{"content": {"parts": [{"text": text}]}, "finishReason": finish_reason}]}
+
+    def json(self):
+        return self._result
+
+
+def test_concurrent_batches_do_not_share_call_info(monkeypatch):
+    both_sent = threading.Barrier(2)
+    truncated_once = []
+
+    def fake_post(url, json=None, **kwargs):
+        truncated_batch = "PÁGINA TRUNCADA" in json["contents"][0]["parts"][0]["text"]
+        if truncated_batch and not truncated_once:
+            truncated_once.append(True)
+            both_sent.wait(timeout=5)
+            return _Response('{"concursos": [', "MAX_TOKENS")
+        if not truncated_batch:
+            both_sent.wait(timeout=5)
+        return _Response('{"concursos": []}', "STOP")
+
+    monkeypatch.setattr(extractor_module.requests, "post", fake_post)
+    extractor = LLMExtractor.__new__(LLMExtractor)
+    extractor.gemini_client = _GeminiClient()
+    extractor.api_key_manager = _APIKeyManager()
+    extractor.extraction_config = {"max_retries": 3, "api_timeout": 60}
+    extractor.prompt_cache = None
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        truncated = pool.submit(extractor.extract_from_batch, "PÁGINA TRUNCADA", ["https://anid.cl/concursos/a/"])
+        clean = pool.submit(extractor.extract_from_batch, "PÁGINA NORMAL", ["https://anid.cl/concursos/b/"])
+        _, truncated_raw = truncated.result()
+        _, clean_raw = clean.result()
+
+    assert truncated_raw["call_info"] == {"truncations": 1, "timeouts": 0}
+    assert clean_raw["call_info"] == {"truncations": 0, "timeouts": 0}
@@ -0,0 +1,166 @@
+"""
+Despacho de batches de predicción (generate_predictions) con un predictor de prueba:
+cada concurso termina predicho o no predecible, los resultados se guardan por batch y
+una detención o un error crítico no consumen los batches restantes
+"""
+
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import services.prediction_service as prediction_module
+import utils.file_manager as file_manager_module
+from services.prediction_service import PredictionService
+
+BASE = "https://anid.cl/concursos"
+TOTAL = 25  # 3 batches de 10, 10 y 5
+FUTURE = (datetime.now() + timedelta(days=120)).strftime("%Y-%m-%d")
+
+
+class _History:
+    def load_history(self, site):
+        return {"concursos": [
+            {
+                "url": f"{BASE}/concurso-{i}/",
+                "nombre": f"Concurso {i}",
+                "versions": [{"estado": "Cerrado", "fecha_cierre": "2025-04-30"}],
+                "previous_concursos": [{
+                    "nombre": f"Concurso {i} 2024",
+                    "url": f"{BASE}/concurso-{i}-2024/",
+                    "fecha_apertura": "2024-03-01",
+                    "año": 2024,
+                }],
+            }
+            for i in range(TOTAL)
+        ]}
+
+
+class _Predictor:
+    """Predictor de prueba: predice los concursos pares, rechaza los impares y omite el 7"""
+    
+    api_key_manager = None
+    gemini_client = SimpleNamespace(model_name="gemini-2.5-flash")
+    config = {}
+    
+    def __init__(self, fail_with=None, on_call=None):
+        self.calls = []
+        self.fail_with = fail_with
+        self.on_call = on_call
+        self.lock = threading.Lock()
+    
+    def predict_from_previous_concursos_batch(self, batch):
+        with self.lock:
+            self.calls.append([item["concurso_url"] for item in batch])
+        if self.on_call:
+            self.on_call()
+        if self.fail_with:
+            raise self.fail_with
+        results = {}
+        for item in batch:
+            index = int(item["concurso_url"].rstrip("/").rsplit("-", 1)[1])
+            if index == 7:
+                continue
+            results[item["concurso_url"]] = SimpleNamespace(
+                es_mismo_concurso=True,
+                fecha_predicha=FUTURE if index % 2 == 0 else None,
+                justificacion=f"Prueba {index}",
+            )
+        return results
+
+
+@pytest.fixture
+def harness(tmp_path, monkeypatch):
+    saved, unpredictable = [], []
+    monkeypatch.setattr(prediction_module, "is_operation_locked", lambda site, op: False)
+    monkeypatch.setattr(prediction_module, "PREDICTIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(prediction_module, "EXTRACTION_CONFIG", {"statistical_predictions": False})
+    monkeypatch.setattr(PredictionService, "_previous_from_entity_clusters", staticmethod(lambda url: []))
+    monkeypatch.setattr(
+        prediction_module, "save_predictions",
+        lambda site, predictions, replace_existing=False: saved.append([p["concurso_url"] for p in predictions])
+    )
+    monkeypatch.setattr(
+        prediction_module, "save_unpredictable_concursos",
+        lambda site, entries, replace_existing=False: unpredictable.extend(entries)
+    )
+    monkeypatch.setattr(prediction_module, "save_debug_info_predictions", lambda debug_info: "debug.json")
+    monkeypatch.setattr(file_manager_module, "save_debug_info_predictions", lambda debug_info: "debug.json")
+    
+    def run(predictor, keys=1, **kwargs):
+        if keys > 1:
+            # Varias API keys: concurrencia > 1, los predictores extra comparten el registro de llamadas
+            predictor.api_key_manager = SimpleNamespace(
+                api_keys=[f"key-{i}" for i in range(keys)],
+                exhausted_keys=set(),
+                _clean_exhausted_keys=lambda: None,
+            )
+            monkeypatch.setattr(prediction_module, "ConcursoPredictor", lambda **kw: predictor)
+        service = PredictionService.__new__(PredictionService)
+        service.history_manager = _History()
+        service.predictor = predictor
+        return service.generate_predictions("anid.cl", **kwargs)
+    
+    return SimpleNamespace(run=run, saved=saved, unpredictable=unpredictable)
+
+
+@pytest.mark.parametrize("keys", [1, 3])
+def test_every_contest_ends_predicted_or_unpredictable(harness, keys):
+    predictor = _Predictor()
+    result = harness.run(predictor, keys=keys)
+    
+    all_urls = {f"{BASE}/concurso-{i}/" for i in range(TOTAL)}
+    predicted = {p["concurso_url"] for p in result["predictions"]}
+    unpredictable = {entry["concurso_url"]: entry["reason"] for entry in harness.unpredictable}
+    assert predicted | set(unpredictable) == all_urls
+    assert not predicted & set(unpredictable)
+    assert predicted == {f"{BASE}/concurso-{i}/" for i in range(0, TOTAL, 2)}
+    assert unpredictable[f"{BASE}/concurso-7/"] == "llm_no_response"
+    assert unpredictable[f"{BASE}/concurso-9/"] == "llm_rejected"
+    assert sorted(len(call) for call in predictor.calls) == [5, 10, 10]
+    assert result["debug_info"]["execution"]["prediction_concurrency"] == keys
+    assert result["debug_info"]["execution"]["validation_passed"]
+
+
+def test_predictions_are_saved_after_each_batch(harness):
+    predictor = _Predictor()
+    result = harness.run(predictor)
+    
+    # Un guardado incremental por batch (solo sus predicciones nuevas) y el guardado final
+    incremental, final = harness.saved[:-1], harness.saved[-1]
+    assert len(incremental) == len(predictor.calls)
+    for batch_urls, saved_urls in zip(sorted(predictor.calls), sorted(incremental)):
+        assert set(saved_urls) <= set(batch_urls)
+    assert sorted(url for urls in incremental for url in urls) == sorted(final)
+    assert set(final) == {p["concurso_url"] for p in result["predictions"]}
+
+
+def test_stop_request_does_not_consume_remaining_batches(harness):
+    stop = threading.Event()
+    predictor = _Predictor(on_call=stop.set)
+    result = harness.run(predictor, should_stop_callback=stop.is_set)
+    
+    assert len(predictor.calls) == 1
+    # El batch en vuelo al pedir la detención se procesa y se guarda
+    first_batch = set(predictor.calls[0])
+    predicted = {p["concurso_url"] for p in result["predictions"]}
+    assert predicted | {entry["concurso_url"] for entry in harness.unpredictable} == first_batch
+    assert set(harness.saved[0]) == predicted
+    execution = result["debug_info"]["execution"]
+    assert execution["stopped_early"]
+    assert execution["pending_after_stop"] == TOTAL - len(first_batch)
+    assert "validation_passed" not in execution
+
+
+@pytest.mark.parametrize("keys, max_calls", [(1, 1), (2, 2)])
+def test_critical_error_does_not_consume_remaining_batches(harness, keys, max_calls):
+    predictor = _Predictor(fail_with=Exception("Error crítico: cuota agotada. Se detendrá la ejecución"))
+    result = harness.run(predictor, keys=keys)
+    
+    # Solo los batches ya en vuelo llegan al predictor; el tercero nunca se envía
+    assert 1 <= len(predictor.calls) <= max_calls
+    assert result["predictions"] == []
+    execution = result["debug_info"]["execution"]
+    assert execution["stopped_early"]
+    assert any(error.get("critical") for error in result["debug_info"]["predictions"]["errors"])
@@ -0,0 +1,58 @@
+"""
+Una predicción guardada sin fecha predicha válida no se memoiza, y si su recálculo
+no produce una predicción nueva queda marcada como desactualizada
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import services.prediction_service as prediction_module
+from services.prediction_service import PredictionService
+
+URL = "https://anid.cl/concursos/sin-fecha/"
+
+
+class _History:
+    def load_history(self, site):
+        return {"concursos": [{"url": URL, "nombre": "sin-fecha", "versions": [{"estado": "Cerrado"}]}]}
+
+
+class _Predictor:
+    class gemini_client:
+        model_name = "gemini-2.5-flash"
+
+
+def _service(tmp_path, monkeypatch, stored):
+    monkeypatch.setattr(prediction_module, "is_operation_locked", lambda site, op: False)
+    monkeypatch.setattr(prediction_module, "PREDICTIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(PredictionService, "_previous_from_entity_clusters", staticmethod(lambda url: []))
+    with open(tmp_path / "predictions_anid_cl.json", "w", encoding="utf-8") as f:
+        json.dump({"predictions": [stored]}, f)
+    saved = []
+    monkeypatch.setattr(
+        prediction_module, "save_predictions", lambda site, predictions, replace_existing=False: saved.extend(predictions)
+    )
+    service = PredictionService.__new__(PredictionService)
+    service.history_manager = _History()
+    service.predictor = _Predictor()
+    return service, saved
+
+
+def test_empty_fecha_predicha_is_recomputed_and_flagged_when_it_fails(tmp_path, monkeypatch):
+    service, saved = _service(tmp_path, monkeypatch, {"concurso_url": URL, "fecha_predicha": ""})
+
+    result = service.generate_predictions("anid.cl")
+
+    predictions_debug = result["debug_info"]["predictions"]
+    assert predictions_debug["memoized"] == 0
+    assert predictions_debug["recomputed"] == 1
+    assert predictions_debug["recompute_failed"] == 1
+    assert saved == [{"concurso_url": URL, "fecha_predicha": "", "stale": True}]
+    assert not PredictionService._prediction_is_current(saved[0])
+
+
+def test_stale_prediction_with_future_date_is_not_current():
+    future = (datetime.now() + timedelta(days=90)).strftime("%Y-%m-%d")
+    assert PredictionService._prediction_is_current({"fecha_predicha": future})
+    assert not PredictionService._prediction_is_current({"fecha_predicha": future, "stale": True})
+    assert not PredictionService._prediction_is_current({"fecha_predicha": "próximamente"})
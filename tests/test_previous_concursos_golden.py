@@ -0,0 +1,45 @@
+"""
+Extracción de "Concursos anteriores" contra fixtures de referencia (tests/fixtures/previous_concursos)
+
+Los archivos *.expected.json se generaron con el extractor escrito a mano anterior
+a la especificación compilada (ANID_PREVIOUS_CONCURSOS_SPEC), de modo que fijan el
+comportamiento original: prioridad del nombre, subdirecciones excluidas, fechas,
+deduplicación y búsqueda de la sección por heading, texto o grid cercano.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from utils.anid_previous_concursos import extract_previous_concursos_from_html
+from utils.html_document import HtmlDocument
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "previous_concursos"
+FIXTURES = sorted(FIXTURES_DIR.glob("*.html"))
+
+
+def _page_url(fixture):
+    return f"https://anid.cl/concursos/{fixture.stem.replace('_', '-')}/"
+
+
+def _expected(fixture):
+    return json.loads(fixture.with_suffix(".expected.json").read_text(encoding="utf-8"))
+
+
+def test_fixtures_present():
+    assert FIXTURES
+    assert any(_expected(fixture) for fixture in FIXTURES)
+    assert any(not _expected(fixture) for fixture in FIXTURES)
+
+
+@pytest.mark.parametrize("fixture", FIXTURES, ids=lambda path: path.stem)
+def test_extract_previous_concursos_matches_expected(fixture):
+    html = fixture.read_text(encoding="utf-8")
+    assert extract_previous_concursos_from_html(html, _page_url(fixture)) == _expected(fixture)
+
+
+@pytest.mark.parametrize("fixture", FIXTURES, ids=lambda path: path.stem)
+def test_extract_previous_concursos_from_parsed_document(fixture):
+    document = HtmlDocument(fixture.read_text(encoding="utf-8"))
+    assert extract_previous_concursos_from_html(document, _page_url(fixture)) == _expected(fixture)
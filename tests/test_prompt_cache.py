@@ -0,0 +1,46 @@
+"""
+Umbral de tokens y reintento tras fallos del caché de contexto de Gemini
+"""
+
+import llm.prompt_cache as prompt_cache
+from llm.prompt_cache import GeminiPromptCache, get_min_cache_tokens, get_prompt_prefix
+
+
+class _Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+        self.text = str(body)
+    
+    def json(self):
+        return self._body
+
+
+def test_min_tokens_come_from_model():
+    assert get_min_cache_tokens("gemini-2.5-flash-lite") == 1024
+    assert get_min_cache_tokens("gemini-2.5-pro") == 4096
+    assert get_min_cache_tokens("modelo-desconocido") == prompt_cache.DEFAULT_MIN_CACHE_TOKENS
+
+
+def test_prefix_below_model_minimum_is_sent_inline(monkeypatch):
+    calls = []
+    monkeypatch.setattr(prompt_cache.requests, "post", lambda *a, **k: calls.append(1))
+    cache = GeminiPromptCache()
+    assert cache.resolve("gemini-2.5-flash-lite", "key", "x" * 100) is None
+    assert calls == []
+
+
+def test_failed_creation_is_retried_after_ttl(monkeypatch):
+    responses = [_Response(503, {}), _Response(200, {"name": "cachedContents/abc"})]
+    monkeypatch.setattr(prompt_cache.requests, "post", lambda *a, **k: responses.pop(0))
+    now = [1000.0]
+    monkeypatch.setattr(prompt_cache.time, "time", lambda: now[0])
+    cache = GeminiPromptCache(min_tokens=1, failure_ttl_seconds=60)
+    prefix = get_prompt_prefix("batch")
+    
+    assert cache.resolve("gemini-2.5-flash", "key", prefix) is None
+    now[0] += 30
+    assert cache.resolve("gemini-2.5-flash", "key", prefix) is None
+    assert len(responses) == 1  # Dentro del TTL no se reintenta
+    now[0] += 31
+    assert cache.resolve("gemini-2.5-flash", "key", prefix) == "cachedContents/abc"
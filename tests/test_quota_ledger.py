@@ -0,0 +1,51 @@
+"""
+Las reservas de cuota de llamadas fallidas no siguen contando contra el cupo diario
+"""
+
+import time
+
+import utils.quota_ledger as quota_ledger_module
+from utils.quota_ledger import QuotaLedger
+from utils.rate_limiter import RateLimiter, _quota_day
+
+MODEL = "gemini-2.5-flash"
+LIMITS = {"rpm": 100, "tpm": 10 ** 9, "rpd": 1000}
+
+
+def test_settle_releases_unsent_and_commits_sent(tmp_path):
+    ledger = QuotaLedger(str(tmp_path / "ledger.db"))
+    limiter = RateLimiter(safety_factor=1.0, ledger=ledger)
+
+    limiter.acquire("key", MODEL, 100)
+    limiter.settle("key", MODEL, sent=False)
+    assert ledger.usage("key", MODEL, _quota_day())["day_requests"] == 0
+
+    limiter.acquire("key", MODEL, 100)
+    limiter.settle("key", MODEL, sent=True)
+    statuses = [row[0] for row in ledger._connect().execute("SELECT status FROM requests")]
+    assert statuses == ["committed"]
+
+
+def test_settle_after_record_usage_is_noop(tmp_path):
+    ledger = QuotaLedger(str(tmp_path / "ledger.db"))
+    limiter = RateLimiter(safety_factor=1.0, ledger=ledger)
+
+    limiter.acquire("key", MODEL, 100)
+    limiter.record_usage("key", MODEL, 100, 80)
+    limiter.settle("key", MODEL, sent=False)
+    rows = ledger._connect().execute("SELECT status, tokens FROM requests").fetchall()
+    assert rows == [("committed", 80)]
+
+
+def test_stale_reservations_expire(tmp_path, monkeypatch):
+    ledger = QuotaLedger(str(tmp_path / "ledger.db"))
+    day = _quota_day()
+    ledger.reserve("key", MODEL, 100, LIMITS, day)
+    committed_id, _ = ledger.reserve("key", MODEL, 100, LIMITS, day)
+    ledger.commit(committed_id)
+
+    later = time.time() + quota_ledger_module.RESERVATION_TTL_SECONDS + 1
+    monkeypatch.setattr(quota_ledger_module.time, "time", lambda: later)
+    ledger.reserve("key", MODEL, 100, LIMITS, day)
+    statuses = sorted(row[0] for row in ledger._connect().execute("SELECT status FROM requests"))
+    assert statuses == ["committed", "reserved"]
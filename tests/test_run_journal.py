@@ -0,0 +1,35 @@
+"""
+Bitácora de corridas: páginas individuales enriquecidas, reanudación y retención
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import utils.run_journal as run_journal_module
+from utils.run_journal import RunJournal
+
+
+def test_details_round_trip_and_old_runs_are_purged(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_journal_module, "RUNS_DIR", str(tmp_path))
+    url = "https://anid.cl/concursos/fondecyt-regular-2026/"
+
+    journal = RunJournal.create("anid.cl", ["https://anid.cl/concursos/"], True, 2)
+    journal.record_details({url: {
+        "concurso": {"nombre": "Fondecyt Regular 2026", "url": url, "financiamiento": "Hasta $50.000.000"},
+        "content": {"markdown": "# Fondecyt", "previous_concursos": [{"nombre": "Fondecyt Regular 2025"}]},
+    }})
+    assert RunJournal.find_resumable("anid.cl", 12) == journal.run_id
+
+    details = RunJournal.load(journal.run_id).get_details()
+    assert details[url]["concurso"]["financiamiento"] == "Hasta $50.000.000"
+    assert details[url]["content"]["markdown"] == "# Fondecyt"
+    assert details[url]["content"]["previous_concursos"] == [{"nombre": "Fondecyt Regular 2025"}]
+
+    # Una corrida sin actualizar desde hace más de la retención se elimina (y deja de ser reanudable)
+    journal_path = tmp_path / journal.run_id / "journal.json"
+    data = json.loads(journal_path.read_text(encoding="utf-8"))
+    data["updated_at"] = (datetime.now() - timedelta(days=10)).isoformat()
+    journal_path.write_text(json.dumps(data), encoding="utf-8")
+    assert RunJournal.find_resumable("anid.cl", 12) is None
+    assert RunJournal.purge_old_runs(7) == 1
+    assert not (tmp_path / journal.run_id).exists()
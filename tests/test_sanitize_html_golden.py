@@ -0,0 +1,36 @@
+"""
+Salida de sanitize_html contra fixtures de referencia (tests/fixtures/sanitize_html)
+
+Los archivos *.expected.html se generaron con la implementación de múltiples
+pasadas anterior al recorrido único, de modo que fijan el comportamiento
+original y no una instantánea del código actual.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from utils.html_sanitizer import sanitize_html
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "sanitize_html"
+FIXTURES = sorted(
+    path for path in FIXTURES_DIR.glob("*.html") if not path.name.endswith(".expected.html")
+)
+
+
+def test_fixtures_present():
+    assert FIXTURES
+    for path in FIXTURES:
+        assert path.with_name(path.stem + ".expected.html").exists()
+
+
+@pytest.mark.parametrize("preserve_structure", [True, False])
+@pytest.mark.parametrize("fixture", FIXTURES, ids=lambda path: path.stem)
+def test_sanitize_html_matches_expected(fixture, preserve_structure):
+    html = fixture.read_text(encoding="utf-8")
+    expected = fixture.with_name(fixture.stem + ".expected.html").read_text(encoding="utf-8")
+    assert sanitize_html(html, preserve_structure=preserve_structure) == expected.rstrip("\n")
+
+
+def test_sanitize_html_empty_input():
+    assert sanitize_html("") == ""
@@ -0,0 +1,85 @@
+"""
+Predicción estadística de aperturas (StatisticalPredictor): casos claros y ambiguos
+"""
+
+from datetime import datetime
+
+import pytest
+
+from utils.history_manager import HistoryManager
+from utils.statistical_predictor import StatisticalPredictor
+
+TODAY = datetime(2025, 6, 1)
+
+
+def _item(aperturas, nombre="Fondecyt Regular"):
+    *anteriores, actual = aperturas
+    return {
+        "concurso": {"nombre": f"{nombre} {actual[:4]}", "fecha_apertura": actual},
+        "concurso_url": f"https://anid.cl/concursos/{nombre.lower().replace(' ', '-')}/",
+        "previous_concursos": [
+            {"nombre": f"{nombre} {fecha[:4]}", "fecha_apertura": fecha} for fecha in anteriores
+        ],
+    }
+
+
+@pytest.fixture
+def predictor(tmp_path):
+    return StatisticalPredictor(history_manager=HistoryManager(history_dir=str(tmp_path)))
+
+
+def test_clean_annual_cadence_is_predicted_without_llm(predictor):
+    item = _item(["2022-03-01", "2023-03-03", "2024-02-28", "2025-03-02"])
+    predictions, ambiguous = predictor.predict([item], today=TODAY)
+    
+    assert ambiguous == []
+    assert len(predictions) == 1
+    prediction = predictions[0]
+    assert prediction["method"] == "statistical"
+    assert prediction["concurso_url"] == item["concurso_url"]
+    assert "2026-02-20" <= prediction["fecha_predicha"] <= "2026-03-10"
+    assert prediction["confidence"] >= predictor.min_confidence
+
+
+def test_window_crossing_year_boundary_keeps_next_cycle(predictor):
+    item = _item(["2021-12-20", "2023-01-05", "2023-12-28", "2025-01-03"])
+    predictions, ambiguous = predictor.predict([item], today=TODAY)
+    
+    assert ambiguous == []
+    assert len(predictions) == 1
+    # Ventana a fines de diciembre / inicios de enero: ni un año saltado ni de vuelta a 2025-01
+    assert "2025-12-15" <= predictions[0]["fecha_predicha"] <= "2026-01-20"
+
+
+def test_too_few_observations_go_to_llm(predictor):
+    item = _item(["2024-03-01", "2025-03-02"])
+    predictions, ambiguous = predictor.predict([item], today=TODAY)
+    
+    assert predictions == []
+    assert ambiguous == [item]
+
+
+def test_predicted_date_already_passed_goes_to_llm(predictor):
+    item = _item(["2021-03-01", "2022-03-02", "2023-03-01"])
+    predictions, ambiguous = predictor.predict([item], today=TODAY)
+    
+    assert predictions == []
+    assert ambiguous == [item]
+
+
+def test_irregular_cadence_goes_to_llm(predictor):
+    item = _item(["2021-03-01", "2021-09-15", "2023-05-10", "2025-03-02"])
+    predictions, ambiguous = predictor.predict([item], today=TODAY)
+    
+    assert predictions == []
+    assert ambiguous == [item]
+
+
+def test_mixed_batch_splits_each_item(predictor):
+    clean = _item(["2022-03-01", "2023-03-03", "2024-02-28", "2025-03-02"], nombre="Becas Chile")
+    few = _item(["2024-03-01", "2025-03-02"], nombre="Fondef IDeA")
+    passed = _item(["2021-03-01", "2022-03-02", "2023-03-01"], nombre="Startup Ciencia")
+    predictions, ambiguous = predictor.predict([few, clean, passed], today=TODAY)
+    
+    assert [p["concurso_url"] for p in predictions] == [clean["concurso_url"]]
+    assert ambiguous == [few, passed]
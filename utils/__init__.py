@@ -24,15 +24,18 @@ from .file_manager import (
 )
 from .api_key_manager import APIKeyManager
 from .history_manager import HistoryManager
+from .run_journal import RunJournal
 from .concurso_similarity import (
     normalize_concurso_name,
     extract_year_from_name,
     calculate_name_similarity,
     are_similar_concursos,
-    find_similar_concurso_in_list
+    find_similar_concurso_in_list,
+    ConcursoSimilarityIndex
 )
 from .url_extractor import (
     extract_concurso_urls_from_html,
+    extract_listing_segments,
     match_concurso_to_url
 )
 from .anid_previous_concursos import (
@@ -55,6 +58,7 @@ __all__ = [
     "save_debug_info_individual_prediction",
     "APIKeyManager",
     "HistoryManager",
+    "RunJournal",
     "save_predictions",
     "load_predictions",
     "delete_prediction",
@@ -68,7 +72,9 @@ __all__ = [
     "calculate_name_similarity",
     "are_similar_concursos",
     "find_similar_concurso_in_list",
+    "ConcursoSimilarityIndex",
     "extract_concurso_urls_from_html",
+    "extract_listing_segments",
     "match_concurso_to_url",
     "extract_previous_concursos_from_html",
     "format_previous_concursos_for_prediction"
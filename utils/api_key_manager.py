@@ -1,27 +1,110 @@
 """
 Gestor de múltiples API keys con rotación automática cuando se alcanza el límite de cuota
+
+Los contadores de uso y el estado de agotamiento se mantienen en memoria y se
+persisten en segundo plano (cada flush_interval segundos y al cerrar el proceso),
+fusionándolos con el archivo bajo un lock para no pisar el estado de otros
+procesos (UI y cron diario). Las keys agotadas se publican además de inmediato
+en el registro de cuota compartido (utils.quota_ledger), para que ningún proceso
+siga usando una key que otro ya sabe agotada.
 """
 
 import json
 import os
 import time
+import atexit
 import logging
-from typing import List, Optional, Dict, Any
+import threading
+import weakref
+from typing import List, Optional, Dict, Any, Callable
 from datetime import datetime, timedelta
 from config import DATA_DIR
+from utils.lock_manager import site_operation_lock
+from utils.quota_ledger import get_quota_ledger, key_hash
 
 logger = logging.getLogger(__name__)
 
+# Gestores con cambios pendientes de persistir (un solo hilo de flush para todos)
+_dirty_managers: "weakref.WeakSet[APIKeyManager]" = weakref.WeakSet()
+_flusher_lock = threading.Lock()
+_flusher_thread: Optional[threading.Thread] = None
+
+
+def _flush_all() -> None:
+    """Persiste los cambios pendientes de todos los gestores"""
+    for manager in list(_dirty_managers):
+        manager.flush()
+
+
+def _flusher_loop(interval: float) -> None:
+    """Hilo en segundo plano que persiste periódicamente los cambios pendientes"""
+    while True:
+        time.sleep(interval)
+        try:
+            _flush_all()
+        except Exception as e:
+            logger.error(f"Error en flush periódico de API keys: {e}")
+
+
+def _ensure_flusher(interval: float) -> None:
+    """Inicia (una sola vez por proceso) el hilo de flush y el flush al cerrar"""
+    global _flusher_thread
+    with _flusher_lock:
+        if _flusher_thread is None:
+            _flusher_thread = threading.Thread(
+                target=_flusher_loop, args=(interval,), name="api-key-flusher", daemon=True
+            )
+            _flusher_thread.start()
+            atexit.register(_flush_all)
+
+
+def _merge_stats(stats: Dict[str, Dict[str, Any]], deltas: Dict[str, Dict[str, Any]]) -> None:
+    """Suma incrementos de estadísticas por key sobre stats (en el lugar)"""
+    for key, delta in deltas.items():
+        current = stats.setdefault(key, {"calls": 0, "failed": 0, "last_used": None})
+        current["calls"] = current.get("calls", 0) + delta["calls"]
+        current["failed"] = current.get("failed", 0) + delta["failed"]
+        if delta["last_used"] and (not current.get("last_used") or delta["last_used"] > current["last_used"]):
+            current["last_used"] = delta["last_used"]
+
+
+def _merge_exhausted(
+    base: Dict[str, Dict[str, Any]],
+    other: Dict[str, Dict[str, Any]],
+    keys: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Unión de keys agotadas (por key, el retry_after más lejano), sin las vencidas ni las eliminadas"""
+    merged = dict(base)
+    for key, info in other.items():
+        if key not in merged or info.get("retry_after", "") > merged[key].get("retry_after", ""):
+            merged[key] = info
+    return {
+        key: info for key, info in merged.items()
+        if key in keys and not _retry_after_passed(info)
+    }
+
+
+def _retry_after_passed(exhausted_info: Dict[str, Any]) -> bool:
+    """True si ya pasó el retry_after de una key agotada (o no tiene uno válido)"""
+    retry_after_str = exhausted_info.get("retry_after")
+    if not retry_after_str:
+        return True
+    try:
+        return datetime.now() >= datetime.fromisoformat(retry_after_str)
+    except (TypeError, ValueError):
+        return True
+
 
 class APIKeyManager:
     """Gestiona múltiples API keys con rotación automática"""
     
-    def __init__(self, keys_file: Optional[str] = None):
+    def __init__(self, keys_file: Optional[str] = None, flush_interval: float = 5.0):
         """
         Inicializa el gestor de API keys
         
         Args:
             keys_file: Ruta al archivo JSON con las API keys (por defecto: data/.api_keys.json)
+            flush_interval: Segundos entre persistencias en segundo plano del estado en memoria
         """
         if keys_file is None:
             # Asegurar que el directorio existe
@@ -34,6 +117,13 @@ class APIKeyManager:
         self.exhausted_keys: Dict[str, Dict[str, Any]] = {}  # key -> {exhausted_at, retry_after}
         # Estadísticas por key: {key -> {"calls": int, "failed": int, "last_used": str}}
         self.key_stats: Dict[str, Dict[str, Any]] = {}
+        # Incrementos de estadísticas aún no persistidos (se suman a los del archivo al fusionar)
+        self._pending_stats: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        self.flush_interval = flush_interval
+        # Última sincronización de keys agotadas con el registro compartido
+        self._shared_synced_at = 0.0
         self.load_keys()
     
     def load_keys(self) -> None:
@@ -59,26 +149,104 @@ class APIKeyManager:
             self.api_keys = []
     
     def save_keys(self) -> bool:
-        """Guarda las API keys en el archivo"""
-        try:
-            data = {
-                "keys": self.api_keys,
-                "exhausted_keys": self.exhausted_keys,
-                "current_index": self.current_key_index,
-                "key_stats": self.key_stats,
-                "last_updated": datetime.now().isoformat()
-            }
-            
-            with open(self.keys_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-            
-            # Establecer permisos restrictivos
-            os.chmod(self.keys_file, 0o600)
-            
+        """Guarda las API keys y el estado en el archivo (fusionando con otros procesos)"""
+        return self._write_merged()
+    
+    def flush(self) -> bool:
+        """
+        Persiste el estado en memoria si hay cambios pendientes
+        
+        Returns:
+            True si no había cambios o se guardaron correctamente
+        """
+        if not self._dirty:
             return True
+        return self._write_merged()
+    
+    def _mark_dirty(self) -> None:
+        """Marca cambios pendientes para el próximo flush en segundo plano"""
+        self._dirty = True
+        _dirty_managers.add(self)
+        _ensure_flusher(self.flush_interval)
+    
+    def _write_merged(self, keys_op: Optional[Callable[[List[str]], List[str]]] = None) -> bool:
+        """
+        Fusiona el estado en memoria con el del archivo y lo guarda, bajo un lock entre procesos
+        
+        - Estadísticas: se suman los incrementos pendientes a las del archivo
+        - Keys agotadas: unión (por key, el retry_after más lejano); se descartan las vencidas
+        - Lista de keys: la del archivo, modificada por keys_op si se indica
+        
+        El estado se copia bajo self._lock y el archivo se escribe fuera de él: las
+        llamadas a la API (record_api_call, get_current_key) no esperan al lock de archivo.
+        
+        Args:
+            keys_op: Función que recibe la lista de keys del archivo y retorna la nueva lista
+            
+        Returns:
+            True si se guardó correctamente
+        """
+        with self._lock:
+            pending_stats, self._pending_stats = self._pending_stats, {}
+            exhausted_snapshot = dict(self.exhausted_keys)
+            keys_snapshot = list(self.api_keys)
+            current_index = self.current_key_index
+            self._dirty = False
+        
+        try:
+            with site_operation_lock(
+                "api_keys", "state", timeout_seconds=10, stale_seconds=30, poll_seconds=0.05
+            ):
+                disk_data = {}
+                if os.path.exists(self.keys_file):
+                    try:
+                        with open(self.keys_file, "r", encoding="utf-8") as f:
+                            disk_data = json.load(f)
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"Archivo de API keys ilegible, se reescribirá: {e}")
+                
+                keys = list(disk_data.get("keys", keys_snapshot)) if disk_data else keys_snapshot
+                if keys_op is not None:
+                    keys = keys_op(keys)
+                
+                # Fusionar estadísticas
+                key_stats = disk_data.get("key_stats", {})
+                _merge_stats(key_stats, pending_stats)
+                
+                # Fusionar keys agotadas
+                exhausted = _merge_exhausted(disk_data.get("exhausted_keys", {}), exhausted_snapshot, keys)
+                
+                data = {
+                    "keys": keys,
+                    "exhausted_keys": exhausted,
+                    "current_index": current_index if current_index < len(keys) else 0,
+                    "key_stats": key_stats,
+                    "last_updated": datetime.now().isoformat()
+                }
+                
+                tmp_file = f"{self.keys_file}.tmp"
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                # Establecer permisos restrictivos
+                os.chmod(tmp_file, 0o600)
+                os.replace(tmp_file, self.keys_file)
         except Exception as e:
             logger.error(f"Error al guardar API keys: {e}")
+            with self._lock:
+                # Conservar los incrementos para el próximo flush
+                _merge_stats(self._pending_stats, pending_stats)
+            self._mark_dirty()
             return False
+        
+        with self._lock:
+            # Los cambios hechos mientras se escribía (marcas de agotamiento, llamadas) se conservan
+            self.exhausted_keys = _merge_exhausted(exhausted, self.exhausted_keys, keys)
+            _merge_stats(key_stats, self._pending_stats)
+            self.key_stats = key_stats
+            self.api_keys = keys
+            if self.current_key_index >= len(self.api_keys):
+                self.current_key_index = 0
+        return True
     
     def add_key(self, api_key: str) -> bool:
         """
@@ -97,8 +265,10 @@ class APIKeyManager:
         
         # Evitar duplicados
         if api_key not in self.api_keys:
-            self.api_keys.append(api_key)
-            self.save_keys()
+            self._write_merged(keys_op=lambda keys: keys if api_key in keys else keys + [api_key])
+            if api_key not in self.api_keys:
+                # No se pudo guardar: mantener la key al menos en memoria
+                self.api_keys.append(api_key)
             logger.info(f"API key agregada (total: {len(self.api_keys)})")
             return True
         else:
@@ -131,20 +301,26 @@ class APIKeyManager:
         Returns:
             True si se eliminó correctamente
         """
-        if api_key in self.api_keys:
+        with self._lock:
+            if api_key not in self.api_keys:
+                return False
             self.api_keys.remove(api_key)
             # Si la key agotada está en exhausted_keys, eliminarla también
-            if api_key in self.exhausted_keys:
-                del self.exhausted_keys[api_key]
-            
+            self.exhausted_keys.pop(api_key, None)
             # Ajustar índice si es necesario
             if self.current_key_index >= len(self.api_keys):
                 self.current_key_index = 0
-            
-            self.save_keys()
-            logger.info(f"API key eliminada (total: {len(self.api_keys)})")
-            return True
-        return False
+        
+        ledger = get_quota_ledger()
+        if ledger is not None:
+            try:
+                ledger.clear_key_exhausted(api_key)
+            except Exception as e:
+                logger.warning(f"No se pudo limpiar la key en el registro de cuota compartido: {e}")
+        
+        self._write_merged(keys_op=lambda keys: [key for key in keys if key != api_key])
+        logger.info(f"API key eliminada (total: {len(self.api_keys)})")
+        return True
     
     def get_current_key(self) -> Optional[str]:
         """
@@ -156,33 +332,33 @@ class APIKeyManager:
         # Limpiar keys agotadas que ya pueden reutilizarse
         self._clean_exhausted_keys()
         
-        if not self.api_keys:
-            return None
-        
-        # Buscar una key disponible (no agotada)
-        attempts = 0
-        while attempts < len(self.api_keys):
-            key = self.api_keys[self.current_key_index]
-            
-            # Si la key no está agotada, usarla
-            if key not in self.exhausted_keys:
-                return key
+        with self._lock:
+            if not self.api_keys:
+                return None
             
-            # Si está agotada pero ya pasó el tiempo de retry, limpiarla y usarla
-            if self._can_retry_key(key):
-                logger.info(f"Reutilizando API key que estaba agotada (esperó suficiente tiempo)")
-                if key in self.exhausted_keys:
-                    del self.exhausted_keys[key]
-                self.save_keys()
-                return key
+            # Buscar una key disponible (no agotada)
+            attempts = 0
+            while attempts < len(self.api_keys):
+                key = self.api_keys[self.current_key_index]
+                
+                # Si la key no está agotada, usarla
+                if key not in self.exhausted_keys:
+                    return key
+                
+                # Si está agotada pero ya pasó el tiempo de retry, limpiarla y usarla
+                if self._can_retry_key(key):
+                    logger.info(f"Reutilizando API key que estaba agotada (esperó suficiente tiempo)")
+                    self.exhausted_keys.pop(key, None)
+                    self._mark_dirty()
+                    return key
+                
+                # Intentar siguiente key
+                self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
+                attempts += 1
             
-            # Intentar siguiente key
-            self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-            attempts += 1
-        
-        # Si todas están agotadas, usar la actual de todas formas
-        logger.warning("Todas las API keys están agotadas, usando la actual de todas formas")
-        return self.api_keys[self.current_key_index]
+            # Si todas están agotadas, usar la actual de todas formas
+            logger.warning("Todas las API keys están agotadas, usando la actual de todas formas")
+            return self.api_keys[self.current_key_index]
     
     def mark_key_exhausted(self, api_key: str, retry_after_seconds: Optional[int] = None) -> None:
         """
@@ -196,12 +372,21 @@ class APIKeyManager:
             # Por defecto, esperar 24 horas (límites diarios típicos)
             retry_after_seconds = 24 * 60 * 60
         
-        self.exhausted_keys[api_key] = {
-            "exhausted_at": datetime.now().isoformat(),
-            "retry_after_seconds": retry_after_seconds,
-            "retry_after": (datetime.now() + timedelta(seconds=retry_after_seconds)).isoformat()
-        }
-        self.save_keys()
+        with self._lock:
+            self.exhausted_keys[api_key] = {
+                "exhausted_at": datetime.now().isoformat(),
+                "retry_after_seconds": retry_after_seconds,
+                "retry_after": (datetime.now() + timedelta(seconds=retry_after_seconds)).isoformat()
+            }
+        self._mark_dirty()
+        
+        # Publicar de inmediato a los demás procesos (el archivo se escribe en segundo plano)
+        ledger = get_quota_ledger()
+        if ledger is not None:
+            try:
+                ledger.mark_key_exhausted(api_key, time.time() + retry_after_seconds)
+            except Exception as e:
+                logger.warning(f"No se pudo registrar la key agotada en el registro de cuota compartido: {e}")
         
         # Mensaje más descriptivo según el tipo de límite
         if retry_after_seconds < 60:
@@ -218,65 +403,92 @@ class APIKeyManager:
         Returns:
             Nueva API key o None si no hay más disponibles
         """
-        if not self.api_keys:
-            return None
-        
         # Limpiar keys agotadas
         self._clean_exhausted_keys()
         
-        # Rotar al siguiente índice
-        original_index = self.current_key_index
-        attempts = 0
-        
-        while attempts < len(self.api_keys):
-            self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-            key = self.api_keys[self.current_key_index]
+        with self._lock:
+            if not self.api_keys:
+                return None
+            
+            # Rotar al siguiente índice
+            original_index = self.current_key_index
+            attempts = 0
             
-            # Si la key no está agotada o puede reutilizarse, usarla
-            if key not in self.exhausted_keys or self._can_retry_key(key):
-                if key in self.exhausted_keys:
-                    del self.exhausted_keys[key]
-                    self.save_keys()
+            while attempts < len(self.api_keys):
+                self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
+                key = self.api_keys[self.current_key_index]
                 
-                # Log eliminado: se registra en gemini_client.py para evitar redundancia
-                return key
+                # Si la key no está agotada o puede reutilizarse, usarla
+                if key not in self.exhausted_keys or self._can_retry_key(key):
+                    if self.exhausted_keys.pop(key, None) is not None:
+                        self._mark_dirty()
+                    
+                    # Log eliminado: se registra en gemini_client.py para evitar redundancia
+                    return key
+                
+                attempts += 1
             
-            attempts += 1
-        
-        # Si todas están agotadas, rotar de todas formas
-        self.current_key_index = (original_index + 1) % len(self.api_keys)
-        logger.warning(f"Todas las keys están agotadas, rotando a índice {self.current_key_index}")
-        return self.api_keys[self.current_key_index]
+            # Si todas están agotadas, rotar de todas formas
+            self.current_key_index = (original_index + 1) % len(self.api_keys)
+            logger.warning(f"Todas las keys están agotadas, rotando a índice {self.current_key_index}")
+            return self.api_keys[self.current_key_index]
     
     def _can_retry_key(self, api_key: str) -> bool:
         """Verifica si una key agotada puede reintentarse"""
-        if api_key not in self.exhausted_keys:
-            return True
-        
-        exhausted_info = self.exhausted_keys[api_key]
-        retry_after_str = exhausted_info.get("retry_after")
-        
-        if not retry_after_str:
+        exhausted_info = self.exhausted_keys.get(api_key)
+        if exhausted_info is None:
             return True
+        return _retry_after_passed(exhausted_info)
+    
+    def _sync_shared_exhausted(self, min_interval: float = 1.0) -> None:
+        """
+        Incorpora las keys agotadas registradas por otros procesos en el registro compartido
         
+        Args:
+            min_interval: Segundos mínimos entre consultas al registro
+        """
+        now = time.time()
+        if now - self._shared_synced_at < min_interval:
+            return
+        self._shared_synced_at = now
+        ledger = get_quota_ledger()
+        if ledger is None:
+            return
         try:
-            retry_after = datetime.fromisoformat(retry_after_str)
-            return datetime.now() >= retry_after
-        except:
-            return True
+            shared = ledger.get_exhausted()
+        except Exception as e:
+            logger.warning(f"No se pudo leer el registro de cuota compartido: {e}")
+            return
+        if not shared:
+            return
+        # La consulta al registro se hace fuera del lock; solo la actualización lo toma
+        with self._lock:
+            for api_key in self.api_keys:
+                entry = shared.get(key_hash(api_key))
+                if entry is None:
+                    continue
+                exhausted_at, retry_after_ts = entry
+                retry_after = datetime.fromtimestamp(retry_after_ts).isoformat()
+                current = self.exhausted_keys.get(api_key)
+                if current is None or current.get("retry_after", "") < retry_after:
+                    self.exhausted_keys[api_key] = {
+                        "exhausted_at": datetime.fromtimestamp(exhausted_at).isoformat(),
+                        "retry_after_seconds": int(retry_after_ts - exhausted_at),
+                        "retry_after": retry_after
+                    }
+                    if current is None:
+                        logger.info("API key marcada como agotada por otro proceso")
     
     def _clean_exhausted_keys(self) -> None:
         """Limpia las keys agotadas que ya pueden reutilizarse"""
-        keys_to_remove = []
-        for key, info in self.exhausted_keys.items():
-            if self._can_retry_key(key):
-                keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del self.exhausted_keys[key]
+        self._sync_shared_exhausted()
+        with self._lock:
+            keys_to_remove = [key for key in self.exhausted_keys if self._can_retry_key(key)]
+            for key in keys_to_remove:
+                del self.exhausted_keys[key]
         
         if keys_to_remove:
-            self.save_keys()
+            self._mark_dirty()
             logger.info(f"Limpiadas {len(keys_to_remove)} API keys que ya pueden reutilizarse")
     
     def record_api_call(self, api_key: str, success: bool = True) -> None:
@@ -287,20 +499,23 @@ class APIKeyManager:
             api_key: API key utilizada
             success: True si la llamada fue exitosa, False si falló
         """
-        if api_key not in self.key_stats:
-            self.key_stats[api_key] = {
-                "calls": 0,
-                "failed": 0,
-                "last_used": None
-            }
-        
-        self.key_stats[api_key]["calls"] += 1
-        if not success:
-            self.key_stats[api_key]["failed"] += 1
-        self.key_stats[api_key]["last_used"] = datetime.now().isoformat()
+        now = datetime.now().isoformat()
+        with self._lock:
+            for stats in (self.key_stats, self._pending_stats):
+                if api_key not in stats:
+                    stats[api_key] = {
+                        "calls": 0,
+                        "failed": 0,
+                        "last_used": None
+                    }
+                
+                stats[api_key]["calls"] += 1
+                if not success:
+                    stats[api_key]["failed"] += 1
+                stats[api_key]["last_used"] = now
         
-        # Guardar automáticamente
-        self.save_keys()
+        # Se persiste en segundo plano (sin escritura a disco por llamada)
+        self._mark_dirty()
     
     def get_key_stats(self, api_key: str) -> Dict[str, Any]:
         """
@@ -312,11 +527,12 @@ class APIKeyManager:
         Returns:
             Diccionario con estadísticas o None si no existe
         """
-        return self.key_stats.get(api_key, {
-            "calls": 0,
-            "failed": 0,
-            "last_used": None
-        })
+        with self._lock:
+            return dict(self.key_stats.get(api_key, {
+                "calls": 0,
+                "failed": 0,
+                "last_used": None
+            }))
     
     def get_all_stats(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -325,7 +541,8 @@ class APIKeyManager:
         Returns:
             Diccionario con estadísticas por key
         """
-        return self.key_stats.copy()
+        with self._lock:
+            return {key: dict(stats) for key, stats in self.key_stats.items()}
     
     def get_total_stats(self) -> Dict[str, int]:
         """
@@ -334,8 +551,9 @@ class APIKeyManager:
         Returns:
             Diccionario con totales: {"total_calls": int, "total_failed": int}
         """
-        total_calls = sum(stats.get("calls", 0) for stats in self.key_stats.values())
-        total_failed = sum(stats.get("failed", 0) for stats in self.key_stats.values())
+        with self._lock:
+            total_calls = sum(stats.get("calls", 0) for stats in self.key_stats.values())
+            total_failed = sum(stats.get("failed", 0) for stats in self.key_stats.values())
         
         return {
             "total_calls": total_calls,
@@ -351,35 +569,36 @@ class APIKeyManager:
             Diccionario con información del estado
         """
         self._clean_exhausted_keys()
-        
-        available_keys = [key for key in self.api_keys if key not in self.exhausted_keys]
         current_key = self.get_current_key()
         current_key_stats = self.get_key_stats(current_key) if current_key else {}
         total_stats = self.get_total_stats()
         
-        return {
-            "total_keys": len(self.api_keys),
-            "available_keys": len(available_keys),
-            "exhausted_keys": len(self.exhausted_keys),
-            "current_index": self.current_key_index,
-            "current_key": current_key[:20] + "..." + current_key[-10:] if current_key else None,
-            "current_key_stats": current_key_stats,
-            "total_stats": total_stats,
-            "exhausted_keys_info": {
-                key: {
-                    "exhausted_at": info.get("exhausted_at"),
-                    "retry_after": info.get("retry_after"),
-                    "can_retry": self._can_retry_key(key)
+        with self._lock:
+            available_keys = [key for key in self.api_keys if key not in self.exhausted_keys]
+            return {
+                "total_keys": len(self.api_keys),
+                "available_keys": len(available_keys),
+                "exhausted_keys": len(self.exhausted_keys),
+                "current_index": self.current_key_index,
+                "current_key": current_key[:20] + "..." + current_key[-10:] if current_key else None,
+                "current_key_stats": current_key_stats,
+                "total_stats": total_stats,
+                "exhausted_keys_info": {
+                    key: {
+                        "exhausted_at": info.get("exhausted_at"),
+                        "retry_after": info.get("retry_after"),
+                        "can_retry": self._can_retry_key(key)
+                    }
+                    for key, info in self.exhausted_keys.items()
                 }
-                for key, info in self.exhausted_keys.items()
             }
-        }
     
     def clear_all_keys(self) -> None:
         """Elimina todas las API keys"""
-        self.api_keys = []
-        self.exhausted_keys = {}
-        self.current_key_index = 0
-        self.save_keys()
+        with self._lock:
+            self.api_keys = []
+            self.exhausted_keys = {}
+            self.current_key_index = 0
+        self._write_merged(keys_op=lambda keys: [])
         logger.info("Todas las API keys han sido eliminadas")
 
@@ -0,0 +1,239 @@
+"""
+Controlador adaptativo de tamaño de batch y timeout para llamadas al LLM
+
+Registra por modelo la latencia, la tasa de truncamiento y la tasa de timeouts
+según el tamaño del batch en un archivo JSON persistente, y decide el tamaño y
+el timeout del siguiente batch con una política AIMD: crecimiento aditivo tras
+batches rápidos y exitosos, reducción multiplicativa tras batches que fallaron por
+timeout o truncamiento, o cuando la tasa reciente de timeouts/truncamientos del
+rango de tamaño supera "adaptive_max_error_rate". Un truncamiento que se recuperó
+(el reintento con más tokens de salida tuvo éxito) no reduce el batch por sí solo,
+pero cuenta en la tasa y frena el crecimiento.
+
+Las estadísticas se guardan en disco como mucho cada "adaptive_stats_save_seconds"
+y al final de la corrida (flush).
+"""
+
+import json
+import os
+import time
+import logging
+from typing import Dict, Any, Optional
+from datetime import datetime
+from config import CACHE_DIR, EXTRACTION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Ancho de los rangos de tamaño de batch en las estadísticas (caracteres)
+BUCKET_WIDTH = 25000
+
+# Peso de la última llamada en las tasas recientes (media móvil exponencial)
+RATE_SMOOTHING = 0.3
+
+
+class AdaptiveBatchController:
+    """Elige el tamaño de batch y el timeout por modelo a partir del historial de llamadas"""
+    
+    def __init__(self, stats_file: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
+        """
+        Inicializa el controlador
+        
+        Args:
+            stats_file: Ruta al archivo JSON de estadísticas (por defecto: data/cache/batch_stats.json)
+            config: Configuración de extracción (por defecto: EXTRACTION_CONFIG)
+        """
+        config = config or EXTRACTION_CONFIG
+        if stats_file is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            stats_file = os.path.join(CACHE_DIR, "batch_stats.json")
+        
+        self.stats_file = stats_file
+        self.initial_batch_size = config.get("batch_size", 250000)
+        self.initial_timeout = config.get("api_timeout", 60)
+        self.min_batch_size = config.get("adaptive_min_batch_size", 20000)
+        self.max_batch_size = config.get("adaptive_max_batch_size", 500000)
+        self.batch_step = config.get("adaptive_batch_step", 25000)
+        self.min_timeout = config.get("adaptive_min_timeout", 30)
+        self.max_timeout = config.get("adaptive_max_timeout", 300)
+        self.max_error_rate = config.get("adaptive_max_error_rate", 0.2)
+        self.min_calls_for_rate = config.get("adaptive_min_calls_for_rate", 3)
+        self.save_interval = config.get("adaptive_stats_save_seconds", 60)
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.load_stats()
+    
+    def load_stats(self) -> None:
+        """Carga las estadísticas desde el archivo"""
+        try:
+            if os.path.exists(self.stats_file):
+                with open(self.stats_file, "r", encoding="utf-8") as f:
+                    self.models = json.load(f).get("models", {})
+        except Exception as e:
+            logger.warning(f"⚠️ Error al cargar estadísticas de batches: {e}")
+            self.models = {}
+    
+    def save_stats(self) -> None:
+        """Guarda las estadísticas en el archivo (escritura atómica)"""
+        try:
+            tmp_file = f"{self.stats_file}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"models": self.models}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.stats_file)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        except Exception as e:
+            logger.warning(f"⚠️ Error al guardar estadísticas de batches: {e}")
+    
+    def flush(self) -> None:
+        """Guarda las estadísticas pendientes (llamar al terminar la corrida)"""
+        if self._dirty:
+            self.save_stats()
+    
+    def _model_state(self, model: str) -> Dict[str, Any]:
+        """Obtiene (o inicializa) el estado de un modelo"""
+        if model not in self.models:
+            self.models[model] = {
+                "batch_size": self.initial_batch_size,
+                "api_timeout": self.initial_timeout,
+                "buckets": {},
+                "updated_at": None,
+            }
+        return self.models[model]
+    
+    def get_batch_size(self, model: str) -> int:
+        """
+        Retorna el tamaño de batch a usar para el siguiente batch
+        
+        Args:
+            model: Nombre del modelo
+        
+        Returns:
+            Tamaño de batch en caracteres
+        """
+        size = self._model_state(model)["batch_size"]
+        return int(max(self.min_batch_size, min(size, self.max_batch_size)))
+    
+    def get_timeout(self, model: str, batch_chars: int) -> int:
+        """
+        Retorna el timeout para un batch, según la latencia observada en batches de tamaño similar
+        
+        Args:
+            model: Nombre del modelo
+            batch_chars: Tamaño del batch en caracteres
+        
+        Returns:
+            Timeout en segundos
+        """
+        state = self._model_state(model)
+        timeout = state["api_timeout"]
+        bucket = state["buckets"].get(self._bucket_key(batch_chars))
+        if bucket and bucket.get("successes"):
+            # Margen de 2x sobre la latencia máxima observada con éxito en este rango
+            timeout = max(timeout, bucket["latency_max"] * 2)
+        return int(max(self.min_timeout, min(timeout, self.max_timeout)))
+    
+    def record(
+        self,
+        model: str,
+        batch_chars: int,
+        latency: float,
+        success: bool,
+        timed_out: bool = False,
+        truncated: bool = False
+    ) -> None:
+        """
+        Registra el resultado de un batch y ajusta tamaño y timeout (AIMD)
+        
+        Args:
+            model: Nombre del modelo
+            batch_chars: Tamaño del batch en caracteres
+            latency: Duración de la llamada (segundos)
+            success: Si el batch se extrajo correctamente
+            timed_out: Si la llamada excedió el timeout (en algún intento)
+            truncated: Si la respuesta se truncó (aunque luego se haya recuperado)
+        """
+        state = self._model_state(model)
+        bucket = state["buckets"].setdefault(self._bucket_key(batch_chars), {
+            "calls": 0, "successes": 0, "timeouts": 0, "truncations": 0, "failures": 0,
+            "latency_sum": 0.0, "latency_max": 0.0,
+        })
+        bucket.setdefault("recent_timeout_rate", 0.0)
+        bucket.setdefault("recent_truncation_rate", 0.0)
+        bucket["calls"] += 1
+        if success:
+            bucket["successes"] += 1
+            bucket["latency_sum"] += latency
+            bucket["latency_max"] = max(bucket["latency_max"], latency)
+        else:
+            bucket["failures"] += 1
+        if timed_out:
+            bucket["timeouts"] += 1
+        if truncated:
+            bucket["truncations"] += 1
+        bucket["recent_timeout_rate"] += RATE_SMOOTHING * (float(timed_out) - bucket["recent_timeout_rate"])
+        bucket["recent_truncation_rate"] += RATE_SMOOTHING * (float(truncated) - bucket["recent_truncation_rate"])
+        rates_too_high = bucket["calls"] >= self.min_calls_for_rate and (
+            bucket["recent_timeout_rate"] > self.max_error_rate
+            or bucket["recent_truncation_rate"] > self.max_error_rate
+        )
+        
+        old_size = state["batch_size"]
+        old_timeout = state["api_timeout"]
+        if (not success and (timed_out or truncated)) or rates_too_high:
+            # Reducción multiplicativa: el batch era demasiado grande para el modelo
+            state["batch_size"] = max(self.min_batch_size, min(old_size, batch_chars) // 2)
+        elif success and not (timed_out or truncated):
+            # Crecimiento aditivo solo si el batch usó el tamaño actual y respondió holgado
+            if batch_chars >= old_size * 0.8 and latency < old_timeout * 0.5:
+                state["batch_size"] = min(self.max_batch_size, old_size + self.batch_step)
+            if latency < old_timeout * 0.25:
+                state["api_timeout"] = max(self.min_timeout, int(old_timeout * 0.9))
+        if timed_out:
+            state["api_timeout"] = min(self.max_timeout, int(old_timeout * 1.5))
+        
+        if state["batch_size"] != old_size or state["api_timeout"] != old_timeout:
+            logger.info(
+                f"📐 Batch adaptativo ({model}): tamaño {old_size:,} → {state['batch_size']:,} chars, "
+                f"timeout {old_timeout}s → {state['api_timeout']}s"
+            )
+        
+        state["updated_at"] = datetime.now().isoformat()
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save_stats()
+    
+    def get_model_stats(self, model: str) -> Dict[str, Any]:
+        """
+        Retorna estadísticas agregadas por rango de tamaño para un modelo
+        
+        Args:
+            model: Nombre del modelo
+        
+        Returns:
+            Diccionario con tamaño/timeout actuales y tasas por rango
+        """
+        state = self._model_state(model)
+        buckets = {}
+        for key, bucket in state["buckets"].items():
+            calls = bucket["calls"] or 1
+            buckets[key] = {
+                "calls": bucket["calls"],
+                "avg_latency": round(bucket["latency_sum"] / bucket["successes"], 2) if bucket["successes"] else None,
+                "timeout_rate": round(bucket["timeouts"] / calls, 3),
+                "truncation_rate": round(bucket["truncations"] / calls, 3),
+                "recent_timeout_rate": round(bucket.get("recent_timeout_rate", 0.0), 3),
+                "recent_truncation_rate": round(bucket.get("recent_truncation_rate", 0.0), 3),
+                "failure_rate": round(bucket["failures"] / calls, 3),
+            }
+        return {
+            "batch_size": state["batch_size"],
+            "api_timeout": state["api_timeout"],
+            "buckets": buckets,
+        }
+    
+    @staticmethod
+    def _bucket_key(batch_chars: int) -> str:
+        """Rango de tamaño al que pertenece un batch (ej: "50000-75000")"""
+        start = (batch_chars // BUCKET_WIDTH) * BUCKET_WIDTH
+        return f"{start}-{start + BUCKET_WIDTH}"
@@ -0,0 +1,182 @@
+"""
+Cola persistente de eventos de cambio del historial (SQLite en modo WAL)
+
+HistoryManager.update_history detecta los cambios relevantes para las predicciones
+y, al guardarse el historial, se publican aquí:
+- "new_concurso": concurso que no estaba en el historial
+- "closed": el estado de un concurso pasó a "Cerrado"
+- "new_previous_concursos": aparecieron versiones anteriores nuevas en "Concursos anteriores"
+- "sweep": concurso cerrado sin predicción vigente (sin predicción o con la fecha predicha
+  vencida), encolado por el barrido periódico de PredictionService.process_change_events;
+  el primer barrido de cada sitio siembra la cola con los concursos ya existentes
+
+El worker de predicciones (PredictionService.process_change_events) consume los
+eventos pendientes de un sitio y predice solo los concursos afectados, de modo que
+el costo diario depende de lo que cambió y no del tamaño total del historial.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+EVENT_NEW_CONCURSO = "new_concurso"
+EVENT_CLOSED = "closed"
+EVENT_NEW_PREVIOUS_CONCURSOS = "new_previous_concursos"
+EVENT_SWEEP = "sweep"
+
+# Antigüedad tras la cual se purgan los eventos ya consumidos
+RETENTION_SECONDS = 30 * 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    nombre TEXT,
+    event_type TEXT NOT NULL,
+    detected_at TEXT NOT NULL,
+    created_ts REAL NOT NULL,
+    consumed_ts REAL
+);
+CREATE INDEX IF NOT EXISTS idx_events_site_pending ON events (site, consumed_ts);
+CREATE TABLE IF NOT EXISTS sweeps (
+    site TEXT PRIMARY KEY,
+    swept_ts REAL NOT NULL
+);
+"""
+
+
+class ChangeEventQueue:
+    """Eventos de cambio del historial pendientes de procesar, compartidos entre procesos"""
+    
+    def __init__(self, db_path: Optional[str] = None, busy_timeout: float = 10.0):
+        """
+        Inicializa la cola
+        
+        Args:
+            db_path: Ruta de la base SQLite (por defecto: data/.change_events.db)
+            busy_timeout: Segundos a esperar por el lock de escritura de otro proceso
+        """
+        if db_path is None:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            db_path = os.path.join(DATA_DIR, ".change_events.db")
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Conexión por hilo (sqlite3 no comparte conexiones entre hilos)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def publish(self, site: str, events: List[Dict[str, Any]]) -> int:
+        """
+        Encola eventos de un sitio
+        
+        Args:
+            site: Nombre del sitio
+            events: Eventos {"url", "nombre", "event_type", "detected_at"}
+        
+        Returns:
+            Número de eventos encolados
+        """
+        rows = [
+            (site, event["url"], event.get("nombre"), event["event_type"], event.get("detected_at") or "", time.time())
+            for event in events
+            if event.get("url")
+        ]
+        if not rows:
+            return 0
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM events WHERE consumed_ts IS NOT NULL AND consumed_ts < ?",
+                (time.time() - RETENTION_SECONDS,),
+            )
+            conn.executemany(
+                "INSERT INTO events (site, url, nombre, event_type, detected_at, created_ts) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+    
+    def pending(self, site: str) -> List[Dict[str, Any]]:
+        """
+        Eventos pendientes de un sitio, en orden de llegada
+        
+        Returns:
+            Lista de eventos {"id", "url", "nombre", "event_type", "detected_at"}
+        """
+        return [
+            {"id": row[0], "url": row[1], "nombre": row[2], "event_type": row[3], "detected_at": row[4]}
+            for row in self._connect().execute(
+                "SELECT id, url, nombre, event_type, detected_at FROM events "
+                "WHERE site = ? AND consumed_ts IS NULL ORDER BY id",
+                (site,),
+            )
+        ]
+    
+    def mark_consumed(self, event_ids: List[int]) -> None:
+        """Marca eventos como procesados (no se vuelven a entregar)"""
+        if not event_ids:
+            return
+        now = time.time()
+        self._connect().executemany(
+            "UPDATE events SET consumed_ts = ? WHERE id = ?",
+            [(now, event_id) for event_id in event_ids],
+        )
+    
+    def last_sweep(self, site: str) -> Optional[float]:
+        """Timestamp del último barrido del sitio (None si nunca se barrió)"""
+        row = self._connect().execute("SELECT swept_ts FROM sweeps WHERE site = ?", (site,)).fetchone()
+        return row[0] if row else None
+    
+    def record_sweep(self, site: str) -> None:
+        """Registra que el sitio se acaba de barrer"""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO sweeps (site, swept_ts) VALUES (?, ?)",
+            (site, time.time()),
+        )
+
+
+_change_event_queue: Optional[ChangeEventQueue] = None
+_change_event_queue_failed = False
+_change_event_queue_lock = threading.Lock()
+
+
+def get_change_event_queue() -> Optional[ChangeEventQueue]:
+    """
+    Retorna la cola de eventos compartida del proceso
+    
+    Returns:
+        ChangeEventQueue, o None si está deshabilitada o no se pudo abrir la base
+    """
+    global _change_event_queue, _change_event_queue_failed
+    from config import EXTRACTION_CONFIG
+    if not EXTRACTION_CONFIG.get("change_events", True):
+        return None
+    with _change_event_queue_lock:
+        if _change_event_queue is None and not _change_event_queue_failed:
+            try:
+                _change_event_queue = ChangeEventQueue()
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo abrir la cola de eventos de cambio: {e}")
+                _change_event_queue_failed = True
+        return _change_event_queue
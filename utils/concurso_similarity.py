@@ -6,12 +6,31 @@ o con variaciones menores en el nombre.
 """
 
 import re
-from typing import Tuple, Optional
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional
 from difflib import SequenceMatcher
 import logging
 
+import numpy as np
+
+try:
+    from rapidfuzz.distance import Indel
+except ImportError:
+    Indel = None
+
 logger = logging.getLogger(__name__)
 
+_YEAR_RE = re.compile(r'\b20\d{2}\b')
+_VERSION_RE = re.compile(r'\b(v|versi[oó]n|version)\s*\d+\b', flags=re.IGNORECASE)
+_ACADEMIC_YEAR_RE = re.compile(r'\b(año académico|año|year)\s*\d*\b', flags=re.IGNORECASE)
+_SPACES_RE = re.compile(r'\s+')
+_YEAR_GROUP_RE = re.compile(r'\b(20\d{2})\b')
+
+# Similitud mínima de nombres con la que are_similar_concursos puede dar un match
+# (rama de nombres y URLs similares); bajo ella un candidato se descarta sin compararlo
+_MIN_URL_BRANCH_SIMILARITY = 0.70
+
 
 def normalize_concurso_name(nombre: str) -> str:
     """
@@ -21,27 +40,32 @@ def normalize_concurso_name(nombre: str) -> str:
     
     Args:
         nombre: Nombre del concurso
-        
+    
     Returns:
         Nombre normalizado
     """
     if not nombre:
         return ""
-    
+    return _normalize_cached(nombre)
+
+
+@lru_cache(maxsize=16384)
+def _normalize_cached(nombre: str) -> str:
+    """normalize_concurso_name con caché (los mismos nombres se comparan muchas veces)"""
     # Convertir a minúsculas
     normalized = nombre.lower().strip()
     
     # Eliminar años (2024, 2025, etc.)
-    normalized = re.sub(r'\b20\d{2}\b', '', normalized)
+    normalized = _YEAR_RE.sub('', normalized)
     
     # Eliminar números de versión comunes (v1, v2, versión 1, etc.)
-    normalized = re.sub(r'\b(v|versi[oó]n|version)\s*\d+\b', '', normalized, flags=re.IGNORECASE)
+    normalized = _VERSION_RE.sub('', normalized)
     
     # Eliminar palabras comunes que no aportan (año académico, etc.)
-    normalized = re.sub(r'\b(año académico|año|year)\s*\d*\b', '', normalized, flags=re.IGNORECASE)
+    normalized = _ACADEMIC_YEAR_RE.sub('', normalized)
     
     # Normalizar espacios múltiples
-    normalized = re.sub(r'\s+', ' ', normalized)
+    normalized = _SPACES_RE.sub(' ', normalized)
     
     # Eliminar caracteres especiales al inicio/final
     normalized = normalized.strip('.,;:!?-_()[]{}')
@@ -55,7 +79,7 @@ def extract_year_from_name(nombre: str) -> Optional[int]:
     
     Args:
         nombre: Nombre del concurso
-        
+    
     Returns:
         Año encontrado o None
     """
@@ -63,7 +87,7 @@ def extract_year_from_name(nombre: str) -> Optional[int]:
         return None
     
     # Buscar años de 4 dígitos (2000-2099)
-    matches = re.findall(r'\b(20\d{2})\b', nombre)
+    matches = _YEAR_GROUP_RE.findall(nombre)
     if matches:
         try:
             return int(matches[-1])  # Tomar el último año encontrado
@@ -80,7 +104,7 @@ def calculate_name_similarity(nombre1: str, nombre2: str) -> float:
     Args:
         nombre1: Primer nombre
         nombre2: Segundo nombre
-        
+    
     Returns:
         Score de similitud (0.0 = completamente diferente, 1.0 = idéntico)
     """
@@ -88,9 +112,23 @@ def calculate_name_similarity(nombre1: str, nombre2: str) -> float:
         return 0.0
     
     # Normalizar ambos nombres
-    norm1 = normalize_concurso_name(nombre1)
-    norm2 = normalize_concurso_name(nombre2)
+    return calculate_normalized_similarity(
+        normalize_concurso_name(nombre1),
+        normalize_concurso_name(nombre2)
+    )
+
+
+def calculate_normalized_similarity(norm1: str, norm2: str) -> float:
+    """
+    Similitud entre dos nombres ya normalizados (ver calculate_name_similarity)
+    
+    Args:
+        norm1: Primer nombre normalizado (normalize_concurso_name)
+        norm2: Segundo nombre normalizado
     
+    Returns:
+        Score de similitud (0.0 a 1.0)
+    """
     if not norm1 or not norm2:
         return 0.0
     
@@ -135,7 +173,7 @@ def are_similar_concursos(
         nombre2: Nombre del segundo concurso
         url2: URL del segundo concurso
         similarity_threshold: Umbral mínimo de similitud (default: 0.85)
-        
+    
     Returns:
         Tupla (son_similares, score_similitud, razon)
     """
@@ -179,6 +217,168 @@ def are_similar_concursos(
     return (False, similarity, f"No son similares (similitud: {similarity:.2f})")
 
 
+def _significant_words(normalized: str) -> set:
+    """Palabras de más de 3 letras (las que cuentan para el bonus de palabras comunes)"""
+    return {w for w in normalized.split() if len(w) > 3}
+
+
+class ConcursoSimilarityIndex:
+    """
+    Índice de nombres normalizados de una lista de concursos para buscar similares
+    
+    Se construye una vez por sitio (o por lista) y responde find_similar con el mismo
+    resultado que comparar contra toda la lista, pero descartando sin compararlos los
+    concursos que no pueden alcanzar el umbral:
+    - Cota de SequenceMatcher.ratio por conteo de caracteres (la de quick_ratio),
+      calculada para todas las entradas a la vez con NumPy
+    - Palabras comunes (bonus de calculate_name_similarity) desde un índice invertido
+    - Si rapidfuzz está instalado, cota más ajustada con la similitud Indel (LCS)
+    Solo los candidatos que pasan las cotas se comparan con are_similar_concursos,
+    así que scores, razones y umbrales son los mismos.
+    
+    La lista se indexa al construir el índice: si cambia, hay que construir otro.
+    """
+    
+    def __init__(self, concursos_list: list):
+        """
+        Construye el índice
+        
+        Args:
+            concursos_list: Lista de diccionarios con concursos (deben tener 'nombre' y 'url')
+        """
+        self._entries: List[dict] = []
+        self._normalized: List[str] = []
+        self._words_index: Dict[str, List[int]] = {}
+        
+        char_counts = []
+        word_counts = []
+        for concurso in concursos_list:
+            nombre = concurso.get("nombre", "")
+            url = concurso.get("url", "")
+            if not nombre or not url:
+                continue
+            normalized = normalize_concurso_name(nombre)
+            if not normalized:
+                # Sin nombre normalizado la similitud siempre es 0.0
+                continue
+            position = len(self._entries)
+            self._entries.append(concurso)
+            self._normalized.append(normalized)
+            char_counts.append(Counter(normalized))
+            words = _significant_words(normalized)
+            word_counts.append(len(words))
+            for word in words:
+                self._words_index.setdefault(word, []).append(position)
+        
+        self._alphabet: Dict[str, int] = {}
+        for counts in char_counts:
+            for char in counts:
+                self._alphabet.setdefault(char, len(self._alphabet))
+        self._char_matrix = np.zeros((len(self._entries), len(self._alphabet)), dtype=np.int32)
+        for row, counts in enumerate(char_counts):
+            for char, count in counts.items():
+                self._char_matrix[row, self._alphabet[char]] = count
+        self._lengths = np.array([len(n) for n in self._normalized], dtype=np.float64)
+        self._word_counts = np.array(word_counts, dtype=np.float64)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def candidates(self, normalized: str, min_similarity: float) -> np.ndarray:
+        """
+        Posiciones de las entradas cuya similitud con un nombre puede llegar a min_similarity
+        
+        Las posiciones siguen el orden de la lista indexada, sin las entradas sin nombre,
+        URL o nombre normalizado.
+        
+        Args:
+            normalized: Nombre normalizado (normalize_concurso_name)
+            min_similarity: Similitud mínima
+        
+        Returns:
+            Arreglo de posiciones (ascendente)
+        """
+        query_counts = np.zeros(len(self._alphabet), dtype=np.int32)
+        for char, count in Counter(normalized).items():
+            column = self._alphabet.get(char)
+            if column is not None:
+                query_counts[column] = count
+        overlap = np.minimum(self._char_matrix, query_counts).sum(axis=1)
+        ratio_bound = 2.0 * overlap / (self._lengths + len(normalized))
+        
+        words = _significant_words(normalized)
+        common = np.zeros(len(self._entries), dtype=np.float64)
+        for word in words:
+            for position in self._words_index.get(word, ()):
+                common[position] += 1
+        word_bonus = common / np.maximum(np.maximum(self._word_counts, len(words)), 1)
+        
+        similarity_bound = np.maximum(ratio_bound, ratio_bound * 0.7 + word_bonus * 0.3)
+        # Margen para errores de redondeo: la cota nunca debe descartar un match
+        return np.nonzero(similarity_bound + 1e-9 >= min_similarity)[0]
+    
+    def find_similar(
+        self,
+        concurso_nombre: str,
+        concurso_url: str,
+        similarity_threshold: float = 0.85
+    ) -> Optional[dict]:
+        """
+        Busca un concurso similar en el índice (mismo resultado que find_similar_concurso_in_list)
+        
+        Args:
+            concurso_nombre: Nombre del concurso a buscar
+            concurso_url: URL del concurso a buscar (se excluyen los de la misma URL)
+            similarity_threshold: Umbral mínimo de similitud
+        
+        Returns:
+            Diccionario del concurso similar encontrado o None
+        """
+        normalized = normalize_concurso_name(concurso_nombre)
+        if not normalized or not self._entries:
+            return None
+        
+        min_similarity = min(similarity_threshold, _MIN_URL_BRANCH_SIMILARITY)
+        query_words = _significant_words(normalized)
+        target_url = concurso_url.strip()
+        best_match = None
+        best_similarity = 0.0
+        
+        for position in self.candidates(normalized, min_similarity):
+            concurso = self._entries[position]
+            url = concurso.get("url", "")
+            
+            # EXCLUIR concursos con la misma URL (mismo concurso)
+            if url.strip() == target_url:
+                continue
+            
+            if Indel is not None:
+                # LCS >= bloques de SequenceMatcher: la similitud Indel acota ratio()
+                ratio_bound = Indel.normalized_similarity(normalized, self._normalized[position])
+                words = _significant_words(self._normalized[position])
+                word_bonus = 0.0
+                if query_words and words:
+                    word_bonus = len(query_words & words) / max(len(query_words), len(words))
+                if max(ratio_bound, ratio_bound * 0.7 + word_bonus * 0.3) + 1e-9 < min_similarity:
+                    continue
+            
+            is_similar, similarity, reason = are_similar_concursos(
+                concurso_nombre,
+                concurso_url,
+                concurso.get("nombre", ""),
+                url,
+                similarity_threshold
+            )
+            
+            if is_similar and similarity > best_similarity:
+                best_similarity = similarity
+                best_match = concurso
+                best_match["_similarity_score"] = similarity
+                best_match["_similarity_reason"] = reason
+        
+        return best_match
+
+
 def find_similar_concurso_in_list(
     concurso_nombre: str,
     concurso_url: str,
@@ -191,45 +391,20 @@ def find_similar_concurso_in_list(
     Excluye concursos con la misma URL, ya que queremos encontrar versiones anteriores
     del mismo concurso, no el mismo concurso.
     
+    Para buscar varios concursos en la misma lista conviene construir un
+    ConcursoSimilarityIndex una vez y llamar a su find_similar.
+    
     Args:
         concurso_nombre: Nombre del concurso a buscar
         concurso_url: URL del concurso a buscar
         concursos_list: Lista de diccionarios con concursos (deben tener 'nombre' y 'url')
         similarity_threshold: Umbral mínimo de similitud
-        
+    
     Returns:
         Diccionario del concurso similar encontrado o None
     """
-    best_match = None
-    best_similarity = 0.0
-    
-    # Normalizar URL de búsqueda
-    target_url = concurso_url.strip()
-    
-    for concurso in concursos_list:
-        nombre = concurso.get("nombre", "")
-        url = concurso.get("url", "")
-        
-        if not nombre or not url:
-            continue
-        
-        # EXCLUIR concursos con la misma URL (mismo concurso)
-        if url.strip() == target_url:
-            continue
-        
-        is_similar, similarity, reason = are_similar_concursos(
-            concurso_nombre,
-            concurso_url,
-            nombre,
-            url,
-            similarity_threshold
-        )
-        
-        if is_similar and similarity > best_similarity:
-            best_similarity = similarity
-            best_match = concurso
-            best_match["_similarity_score"] = similarity
-            best_match["_similarity_reason"] = reason
-    
-    return best_match
-
+    return ConcursoSimilarityIndex(concursos_list).find_similar(
+        concurso_nombre,
+        concurso_url,
+        similarity_threshold
+    )
@@ -4,14 +4,41 @@ Utilidades para parsing y procesamiento de fechas
 
 import re
 from datetime import datetime, timedelta
+from functools import lru_cache
 from dateutil import parser as date_parser
 from typing import Optional, Tuple
 
 
+MONTHS_ES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
+    "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
+    "septiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12
+}
+
+# Formatos rápidos (los que usan ANID y el historial normalizado), compilados una sola vez
+_ISO_DATE_RE = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$')
+_ISO_DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{6})?)?$')
+_NUMERIC_DMY_RE = re.compile(r'^(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{4})$')
+# "10 de diciembre, 2025" / "19 de marzo, 2026 - 17:00" (la hora se descarta)
+_SPANISH_COMMA_RE = re.compile(r"(\d{1,2})\s+de\s+(\w+)\s*,\s*(\d{4})", re.IGNORECASE)
+# "15 de marzo de 2024"
+_SPANISH_DE_RE = re.compile(r"(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})", re.IGNORECASE)
+_FALLBACK_PATTERNS = [
+    re.compile(r"(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{4})", re.IGNORECASE),  # DD/MM/YYYY o DD-MM-YYYY
+    re.compile(r"(\d{4})[\/\-](\d{1,2})[\/\-](\d{1,2})", re.IGNORECASE),  # YYYY/MM/DD o YYYY-MM-DD
+    _SPANISH_DE_RE,  # "15 de marzo de 2024"
+]
+_MONTH_NAME_RE = re.compile(r"(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)")
+_YEAR_RE = re.compile(r"20\d{2}")
+
+
 def parse_date(date_str: str) -> Optional[datetime]:
     """
     Intenta parsear una fecha en varios formatos comunes en Chile
     
+    Los formatos habituales se resuelven con expresiones precompiladas; dateutil se
+    usa solo como último recurso. Los resultados se memorizan por string (LRU).
+    
     Args:
         date_str: String con la fecha
         
@@ -20,12 +47,66 @@ def parse_date(date_str: str) -> Optional[datetime]:
     """
     if not date_str or not isinstance(date_str, str):
         return None
+    return _parse_date_cached(date_str.strip())
+
+
+@lru_cache(maxsize=8192)
+def _parse_date_cached(date_str: str) -> Optional[datetime]:
+    """parse_date sobre un string ya limpio (memorizado)"""
+    parsed = _parse_date_fast(date_str)
+    if parsed is not None:
+        return parsed
+    return _parse_date_fallback(date_str)
+
+
+def _parse_date_fast(date_str: str) -> Optional[datetime]:
+    """
+    Formatos conocidos, con el mismo resultado que _parse_date_fallback (salvo los
+    datetime ISO, que se leen como año-mes-día)
     
-    # Limpiar el string
-    date_str = date_str.strip()
+    Returns:
+        datetime, o None si el string no tiene un formato rápido (o la fecha no es válida)
+    """
+    try:
+        # YYYY-MM-DD (sin dayfirst)
+        match = _ISO_DATE_RE.match(date_str)
+        if match:
+            return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        
+        # YYYY-MM-DDTHH:MM[:SS] (dateutil con dayfirst=True invertiría día y mes)
+        if _ISO_DATETIME_RE.match(date_str):
+            return datetime.fromisoformat(date_str)
+        
+        # DD/MM/YYYY o DD-MM-YYYY (dateutil con dayfirst=True da el mismo resultado si es válida)
+        match = _NUMERIC_DMY_RE.match(date_str)
+        if match:
+            return datetime(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+        
+        # Fechas en español: dateutil no reconoce los meses en español, por lo que
+        # el resultado es el de los patrones en español
+        if "de" in date_str.lower():
+            match = _SPANISH_COMMA_RE.search(date_str) or _SPANISH_DE_RE.search(date_str)
+            if match:
+                month = MONTHS_ES.get(match.group(2).lower())
+                if month:
+                    return datetime(int(match.group(3)), month, int(match.group(1)))
+    except ValueError:
+        return None
+    return None
+
+
+def _parse_date_fallback(date_str: str) -> Optional[datetime]:
+    """
+    Ruta general: dateutil (dayfirst) y luego patrones comunes en Chile
     
+    Args:
+        date_str: String con la fecha (ya limpio)
+        
+    Returns:
+        datetime object o None si no se puede parsear
+    """
     # Si ya está en formato YYYY-MM-DD, parsearlo directamente (no usar dayfirst)
-    if re.match(r'^\d{4}-\d{1,2}-\d{1,2}$', date_str):
+    if _ISO_DATE_RE.match(date_str):
         try:
             parts = date_str.split('-')
             return datetime(int(parts[0]), int(parts[1]), int(parts[2]))
@@ -41,35 +122,22 @@ def parse_date(date_str: str) -> Optional[datetime]:
     
     # Patrones comunes en Chile
     # Primero intentar formato con coma: "10 de diciembre, 2025"
-    pattern_comma = r"(\d{1,2})\s+de\s+(\w+)\s*,\s*(\d{4})"
-    match_comma = re.search(pattern_comma, date_str, re.IGNORECASE)
+    match_comma = _SPANISH_COMMA_RE.search(date_str)
     if match_comma:
         try:
             day = int(match_comma.group(1))
             month_name = match_comma.group(2).lower()
             year = int(match_comma.group(3))
             
-            months_es = {
-                "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
-                "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
-                "septiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12
-            }
-            
-            month = months_es.get(month_name)
+            month = MONTHS_ES.get(month_name)
             if month:
                 return datetime(year, month, day)
         except:
             pass
     
     # Luego intentar otros patrones
-    patterns = [
-        r"(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{4})",  # DD/MM/YYYY o DD-MM-YYYY
-        r"(\d{4})[\/\-](\d{1,2})[\/\-](\d{1,2})",  # YYYY/MM/DD o YYYY-MM-DD
-        r"(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})",  # "15 de marzo de 2024"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, date_str, re.IGNORECASE)
+    for pattern in _FALLBACK_PATTERNS:
+        match = pattern.search(date_str)
         if match:
             try:
                 if "de" in date_str.lower():
@@ -78,13 +146,7 @@ def parse_date(date_str: str) -> Optional[datetime]:
                     month_name = match.group(2).lower()
                     year = int(match.group(3))
                     
-                    months_es = {
-                        "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
-                        "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
-                        "septiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12
-                    }
-                    
-                    month = months_es.get(month_name)
+                    month = MONTHS_ES.get(month_name)
                     if month:
                         return datetime(year, month, day)
                 else:
@@ -143,17 +205,11 @@ def estimate_next_opening(
     
     if parsed_date is None:
         # Si no se puede parsear, intentar extraer mes/año del texto original
-        month_match = re.search(r"(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)", 
-                                fecha_cierre_original.lower())
-        year_match = re.search(r"20\d{2}", fecha_cierre_original)
+        month_match = _MONTH_NAME_RE.search(fecha_cierre_original.lower())
+        year_match = _YEAR_RE.search(fecha_cierre_original)
         
         if month_match and year_match:
-            months_es = {
-                "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
-                "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
-                "septiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12
-            }
-            month = months_es.get(month_match.group(1))
+            month = MONTHS_ES.get(month_match.group(1))
             year = int(year_match.group(0))
             
             if month:
@@ -6,9 +6,33 @@ encontrados en las páginas de concursos (especialmente ANID).
 """
 
 import re
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, List, Any, Set
 from datetime import datetime
-from bs4 import BeautifulSoup
+from utils.html_document import get_soup
+from utils.keyword_scanner import get_keyword_scanner
+
+# Textos que nunca se aceptan como nombre de concurso
+_GENERIC_NAMES = {'anid', 'concursos', 'concurso', 'presentación'}
+
+# Confianza asignada al nombre según la fuente de la que se obtuvo
+_NOMBRE_SOURCE_CONFIDENCE = {
+    "selector": 0.95,
+    "title": 0.85,
+    "og_title": 0.85,
+    "h1": 0.8,
+    "markdown": 0.6,
+}
+
+# Campos que deben quedar resueltos para omitir el LLM de enriquecimiento
+DEFAULT_REQUIRED_FIELDS = ["nombre", "fecha_apertura", "fecha_cierre"]
+
+# Palabras clave para recortar el contexto enviado al LLM por campo
+_FIELD_CONTEXT_KEYWORDS = {
+    "fecha_apertura": ("inicio", "apertura", "desde", "fecha", "plazo", "convocatoria"),
+    "fecha_cierre": ("cierre", "hasta", "vence", "fecha", "plazo", "postulaci"),
+    "financiamiento": ("financ", "monto", "$", "millones", "presupuesto", "aporte", "uf "),
+    "subdireccion": ("subdirecci", "área", "programa"),
+}
 
 
 def extract_dates_deterministically(markdown: str) -> Dict[str, Optional[str]]:
@@ -35,15 +59,8 @@ def extract_dates_deterministically(markdown: str) -> Dict[str, Optional[str]]:
             "is_suspendido": False
         }
     
-    markdown_lower = markdown.lower()
-    
-    # Detectar si está suspendido
-    suspendido_keywords = [
-        "concurso suspendido",
-        "suspendido",
-        "concurso adjudicado"  # Los adjudicados también están cerrados
-    ]
-    is_suspendido = any(keyword in markdown_lower for keyword in suspendido_keywords)
+    # Detectar si está suspendido (grupo "suspendido": los adjudicados también están cerrados)
+    is_suspendido = get_keyword_scanner().contains(markdown, "suspendido")
     
     fecha_apertura = None
     fecha_cierre = None
@@ -56,12 +73,12 @@ def extract_dates_deterministically(markdown: str) -> Dict[str, Optional[str]]:
         r'\*\*apertura\*\*[:\s]*([^\n\r]+?)(?:\n|$|cierre|hasta|vence)',
     ]
     
-    # Patrones para fecha de cierre
+    # Patrones para fecha de cierre (la coma corta el match salvo en "19 de marzo, 2026")
     cierre_patterns = [
-        r'(?:cierre|hasta|vence|fecha\s+de\s+cierre):\s*([^\n\r]+?)(?:\n|$|\.|,|;|apertura|inicio)',
-        r'(?:cierre|hasta|vence|fecha\s+de\s+cierre)\s*[:\-]\s*([^\n\r]+?)(?:\n|$|\.|,|;|apertura|inicio)',
-        r'\*\*cierre\*\*[:\s]*([^\n\r]+?)(?:\n|$|\.|,|;|apertura|inicio)',
-        r'\*\*fecha\s+de\s+cierre\*\*[:\s]*([^\n\r]+?)(?:\n|$|\.|,|;|apertura|inicio)',
+        r'(?:cierre|hasta|vence|fecha\s+de\s+cierre):\s*([^\n\r]+?)(?:\n|$|\.|,(?!\s*\d{4})|;|apertura|inicio)',
+        r'(?:cierre|hasta|vence|fecha\s+de\s+cierre)\s*[:\-]\s*([^\n\r]+?)(?:\n|$|\.|,(?!\s*\d{4})|;|apertura|inicio)',
+        r'\*\*cierre\*\*[:\s]*([^\n\r]+?)(?:\n|$|\.|,(?!\s*\d{4})|;|apertura|inicio)',
+        r'\*\*fecha\s+de\s+cierre\*\*[:\s]*([^\n\r]+?)(?:\n|$|\.|,(?!\s*\d{4})|;|apertura|inicio)',
     ]
     
     # Validadores auxiliares
@@ -177,12 +194,48 @@ def extract_nombre_deterministically(html: str, markdown: str) -> Optional[str]:
     Returns:
         Nombre del concurso extraído o None si no se pudo determinar
     """
-    nombre = None
+    nombre, _ = _extract_nombre_with_source(html, markdown)
+    return nombre
+
+
+def _extract_nombre_with_source(
+    html: str,
+    markdown: str,
+    selectors: Optional[List[str]] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Extrae el nombre del concurso indicando de qué fuente se obtuvo.
     
-    # Método 1: Extraer desde <title> tag en HTML
+    Args:
+        html: Contenido HTML de la página
+        markdown: Contenido markdown de la página
+        selectors: Selectores CSS específicos del sitio (se prueban primero)
+        
+    Returns:
+        Tupla (nombre o None, fuente: "selector", "title", "og_title", "h1", "markdown" o None)
+    """
+    soup = None
     if html:
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = get_soup(html)
+        except Exception:
+            soup = None
+    
+    # Método 0: Selectores específicos del sitio (definidos por la estrategia)
+    if soup is not None and selectors:
+        for selector in selectors:
+            try:
+                element = soup.select_one(selector)
+            except Exception:
+                continue
+            if element:
+                text = element.get_text(" ", strip=True)
+                if text and len(text) > 5 and text.lower() not in _GENERIC_NAMES:
+                    return text, "selector"
+    
+    # Método 1: Extraer desde <title> tag en HTML
+    if soup is not None:
+        try:
             title_tag = soup.find('title')
             if title_tag:
                 title_text = title_tag.get_text().strip()
@@ -190,28 +243,26 @@ def extract_nombre_deterministically(html: str, markdown: str) -> Optional[str]:
                 title_text = re.sub(r'\s*-\s*ANID\s*$', '', title_text, flags=re.IGNORECASE)
                 title_text = re.sub(r'\s*-\s*anid\.cl\s*$', '', title_text, flags=re.IGNORECASE)
                 if title_text and len(title_text) > 5:
-                    nombre = title_text.strip()
+                    return title_text.strip(), "title"
         except Exception:
             pass
     
     # Método 2: Buscar en meta tag og:title
-    if not nombre and html:
+    if soup is not None:
         try:
-            soup = BeautifulSoup(html, 'html.parser')
             og_title = soup.find('meta', property='og:title')
             if og_title and og_title.get('content'):
                 og_text = og_title.get('content').strip()
                 # Remover sufijos comunes
                 og_text = re.sub(r'\s*-\s*ANID\s*$', '', og_text, flags=re.IGNORECASE)
                 if og_text and len(og_text) > 5:
-                    nombre = og_text.strip()
+                    return og_text.strip(), "og_title"
         except Exception:
             pass
     
     # Método 3: Buscar el primer h1 en el contenido principal
-    if not nombre and html:
+    if soup is not None:
         try:
-            soup = BeautifulSoup(html, 'html.parser')
             # Buscar h1 que no esté en header/nav
             h1_tags = soup.find_all('h1')
             for h1 in h1_tags:
@@ -222,13 +273,12 @@ def extract_nombre_deterministically(html: str, markdown: str) -> Optional[str]:
                     if h1_text and len(h1_text) > 5:
                         # Filtrar textos genéricos
                         if h1_text.lower() not in ['anid', 'concursos', 'concurso']:
-                            nombre = h1_text.strip()
-                            break
+                            return h1_text.strip(), "h1"
         except Exception:
             pass
     
     # Método 4: Buscar en markdown (primer heading grande)
-    if not nombre and markdown:
+    if markdown:
         # Buscar el primer # o ## heading que no sea genérico
         heading_pattern = r'^#+\s+(.+)$'
         for line in markdown.split('\n'):
@@ -237,11 +287,10 @@ def extract_nombre_deterministically(html: str, markdown: str) -> Optional[str]:
                 heading_text = match.group(1).strip()
                 if heading_text and len(heading_text) > 5:
                     # Filtrar textos genéricos
-                    if heading_text.lower() not in ['anid', 'concursos', 'concurso', 'presentación']:
-                        nombre = heading_text.strip()
-                        break
+                    if heading_text.lower() not in _GENERIC_NAMES:
+                        return heading_text.strip(), "markdown"
     
-    return nombre
+    return None, None
 
 
 def extract_concurso_data_deterministically(
@@ -303,3 +352,189 @@ def extract_concurso_data_deterministically(
         "is_suspendido": dates_result["is_suspendido"] or is_suspendido_by_url
     }
 
+
+
+def _score_fecha(fecha_texto: Optional[str], from_selector: bool) -> Tuple[Optional[str], float]:
+    """
+    Valida una fecha extraída con parse_date y le asigna una confianza.
+    
+    Args:
+        fecha_texto: Texto original de la fecha (o None)
+        from_selector: True si el texto provino de un selector específico del sitio
+        
+    Returns:
+        Tupla (fecha normalizada YYYY-MM-DD o None, confianza entre 0 y 1)
+    """
+    from utils.date_parser import parse_date
+    
+    if not fecha_texto:
+        return None, 0.0
+    parsed = parse_date(fecha_texto)
+    if not parsed:
+        return None, 0.0
+    # Años fuera de un rango razonable indican un match equivocado
+    current_year = datetime.now().year
+    if parsed.year < 2000 or parsed.year > current_year + 5:
+        return parsed.strftime("%Y-%m-%d"), 0.3
+    return parsed.strftime("%Y-%m-%d"), 0.95 if from_selector else 0.9
+
+
+def extract_concurso_data_with_confidence(
+    markdown: str,
+    concurso_url: Optional[str] = None,
+    html: Optional[str] = None,
+    selectors: Optional[Dict[str, List[str]]] = None,
+    known_subdirecciones: Optional[Set[str]] = None,
+    required_fields: Optional[List[str]] = None,
+    threshold: float = 0.8
+) -> Optional[Dict[str, Any]]:
+    """
+    Extracción determinística con puntaje de confianza por campo.
+    
+    Amplía extract_concurso_data_deterministically: valida cada fecha con
+    parse_date, prueba primero los selectores CSS del sitio (ver
+    ScrapingStrategy.get_deterministic_selectors) y calcula qué campos
+    requeridos quedaron resueltos con confianza suficiente.
+    
+    Args:
+        markdown: Contenido markdown de la página del concurso
+        concurso_url: URL del concurso (para detectar "concurso-suspendido")
+        html: Contenido HTML de la página (opcional)
+        selectors: Selectores del sitio: {"nombre": [...], "fechas": [...]}
+        known_subdirecciones: Subdirecciones que no se aceptan como nombre
+        required_fields: Campos requeridos (default: DEFAULT_REQUIRED_FIELDS)
+        threshold: Confianza mínima para considerar un campo resuelto
+        
+    Returns:
+        Diccionario compatible con extract_concurso_data_deterministically
+        (nombre, fecha_apertura, fecha_cierre, is_suspendido) más:
+        - fecha_apertura_normalized / fecha_cierre_normalized: YYYY-MM-DD
+        - confidence: {campo: confianza}
+        - unresolved_fields: campos requeridos sin resolver
+        - fully_resolved: True si todos los campos requeridos están resueltos
+        O None si no se encontró nada útil (se debe usar el LLM completo).
+    """
+    if not markdown and not html:
+        return None
+    
+    selectors = selectors or {}
+    known_subdirecciones = known_subdirecciones or set()
+    required_fields = required_fields or DEFAULT_REQUIRED_FIELDS
+    
+    # Detectar suspendido por URL
+    is_suspendido_by_url = bool(concurso_url and "concurso-suspendido" in concurso_url.lower())
+    
+    # Nombre: selectores del sitio primero, luego title/og:title/h1/markdown
+    nombre, nombre_source = _extract_nombre_with_source(
+        html or "", markdown or "", selectors.get("nombre")
+    )
+    nombre_confidence = _NOMBRE_SOURCE_CONFIDENCE.get(nombre_source, 0.0)
+    if nombre and nombre.strip().lower() in known_subdirecciones:
+        nombre_confidence = 0.0
+    
+    # Fechas: primero en el texto de los selectores del sitio, luego en todo el markdown
+    selector_dates = {"fecha_apertura": None, "fecha_cierre": None, "is_suspendido": False}
+    if html and selectors.get("fechas"):
+        try:
+            soup = get_soup(html)
+            textos = []
+            for selector in selectors["fechas"]:
+                for element in soup.select(selector):
+                    textos.append(element.get_text(" ", strip=True))
+            if textos:
+                selector_dates = extract_dates_deterministically("\n".join(textos))
+        except Exception:
+            pass
+    dates_result = extract_dates_deterministically(markdown or "")
+    
+    is_suspendido = dates_result["is_suspendido"] or is_suspendido_by_url
+    
+    fields: Dict[str, Any] = {}
+    confidence: Dict[str, float] = {"nombre": nombre_confidence}
+    for campo in ("fecha_apertura", "fecha_cierre"):
+        from_selector = bool(selector_dates.get(campo))
+        texto = selector_dates.get(campo) or dates_result.get(campo)
+        normalized, score = _score_fecha(texto, from_selector)
+        fields[campo] = texto if normalized else None
+        fields[f"{campo}_normalized"] = normalized
+        confidence[campo] = score
+    
+    # Validación cruzada: un cierre anterior a la apertura es sospechoso
+    if fields["fecha_apertura_normalized"] and fields["fecha_cierre_normalized"]:
+        if fields["fecha_cierre_normalized"] < fields["fecha_apertura_normalized"]:
+            confidence["fecha_apertura"] = min(confidence["fecha_apertura"], 0.5)
+            confidence["fecha_cierre"] = min(confidence["fecha_cierre"], 0.5)
+    
+    # Si está suspendido, eliminar fechas para no contaminar el estado; las fechas
+    # dejan de ser requeridas porque el estado queda determinado por la suspensión
+    if is_suspendido:
+        for campo in ("fecha_apertura", "fecha_cierre"):
+            fields[campo] = None
+            fields[f"{campo}_normalized"] = None
+            confidence[campo] = 1.0
+    
+    # Si no se encontró nada útil, retornar None (indicando que se debe usar LLM)
+    if not nombre and not fields["fecha_apertura"] and not fields["fecha_cierre"] and not is_suspendido:
+        return None
+    
+    unresolved_fields = [
+        campo for campo in required_fields
+        if confidence.get(campo, 0.0) < threshold
+    ]
+    
+    return {
+        "nombre": nombre,
+        "fecha_apertura": fields["fecha_apertura"],
+        "fecha_cierre": fields["fecha_cierre"],
+        "fecha_apertura_normalized": fields["fecha_apertura_normalized"],
+        "fecha_cierre_normalized": fields["fecha_cierre_normalized"],
+        "is_suspendido": is_suspendido,
+        "nombre_source": nombre_source,
+        "confidence": confidence,
+        "unresolved_fields": unresolved_fields,
+        "fully_resolved": not unresolved_fields,
+    }
+
+
+def extract_field_context(markdown: str, fields: List[str], max_chars: int = 4000) -> str:
+    """
+    Recorta el markdown a las líneas relevantes para los campos pedidos.
+    
+    Se usa para armar prompts pequeños y focalizados: en lugar de enviar la
+    página completa, se envían el encabezado (para el nombre) y las líneas
+    que mencionan fechas con una línea de contexto alrededor. Para la descripción se
+    envía el comienzo de la página (donde suele estar el texto introductorio).
+    
+    Args:
+        markdown: Markdown limpio de la página
+        fields: Campos sin resolver (ej: ["fecha_cierre"])
+        max_chars: Tamaño máximo del contexto resultante
+        
+    Returns:
+        Contexto recortado (o el markdown truncado si no hay coincidencias)
+    """
+    if not markdown:
+        return ""
+    
+    lines = markdown.split('\n')
+    selected = set()
+    
+    if "nombre" in fields:
+        selected.update(range(min(len(lines), 15)))
+    if "descripcion" in fields:
+        selected.update(range(min(len(lines), 30)))
+    
+    keywords = set()
+    for campo in fields:
+        keywords.update(_FIELD_CONTEXT_KEYWORDS.get(campo, ()))
+    if keywords:
+        for i, line in enumerate(lines):
+            line_lower = line.lower()
+            if any(keyword in line_lower for keyword in keywords):
+                selected.update(range(max(0, i - 1), min(len(lines), i + 2)))
+    
+    if not selected:
+        return markdown[:max_chars]
+    
+    context = '\n'.join(lines[i] for i in sorted(selected))
+    return context[:max_chars]
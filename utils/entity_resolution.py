@@ -0,0 +1,519 @@
+"""
+Resolución de entidades: agrupa los concursos de todos los historiales en clusters
+
+Un cluster reúne los registros de un mismo concurso en distintos años (o versiones):
+los concursos del historial de cada sitio y sus "Concursos anteriores". El trabajo
+(run_entity_resolution, scripts/resolve_entities.py) se ejecuta offline:
+1. Agrupa los registros por nombre normalizado (mismo nombre sin año/versión)
+2. Une cada concurso con sus "Concursos anteriores" (enlace explícito de la página)
+3. Bloqueo: entre los nombres distintos solo se puntúan los pares que comparten
+   suficientes trigramas y que, según la cota de ConcursoSimilarityIndex, pueden
+   alcanzar la similitud mínima; los candidatos se puntúan con las reglas de
+   are_similar_concursos
+Los pasos 2 y 3 no unen clusters que quedarían con dos nombres distintos en un mismo
+año (dos programas distintos, p. ej. "Magíster" y "Doctorado" del mismo llamado), y la
+rama de URLs de are_similar_concursos solo une clusters de un único nombre: así un
+enlace débil no encadena programas distintos de forma transitiva.
+y guarda los clusters en data/entity_clusters.json. La UI y el servicio de
+predicciones consultan "mismo concurso, otros años" con EntityClusters en O(1).
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+from config import DATA_DIR
+from utils.concurso_similarity import (
+    ConcursoSimilarityIndex,
+    calculate_normalized_similarity,
+    extract_year_from_name,
+    normalize_concurso_name
+)
+from utils.date_parser import parse_date
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLUSTERS_FILE = os.path.join(DATA_DIR, "entity_clusters.json")
+
+# Similitud mínima con la que are_similar_concursos puede unir dos registros
+# (rama de nombres y URLs similares del mismo dominio)
+_MIN_PAIR_SIMILARITY = 0.70
+
+# Bloqueo: los nombres se comparan solo si su coeficiente de Dice de trigramas llega a este valor
+_TRIGRAM_BLOCKING_MIN_DICE = 0.5
+
+_RECORD_FIELDS = ("url", "nombre", "site", "año", "fecha_apertura", "fecha_cierre", "source")
+
+
+def _record_year(nombre: str, fecha_apertura: Optional[str], fecha_cierre: Optional[str]) -> Optional[int]:
+    """Año de un registro: el del nombre o, si no tiene, el de sus fechas"""
+    year = extract_year_from_name(nombre)
+    if year:
+        return year
+    for fecha in (fecha_apertura, fecha_cierre):
+        parsed = parse_date(fecha) if fecha else None
+        if parsed:
+            return parsed.year
+    return None
+
+
+def collect_records(history_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Registros de concursos de todos los historiales (uno por URL)
+    
+    Args:
+        history_dir: Directorio de historiales (por defecto: data/history)
+    
+    Returns:
+        Lista de registros {"url", "nombre", "site", "año", "fecha_apertura",
+        "fecha_cierre", "source" ("history" o "previous"), "parent_url"}
+    """
+    history_dir = history_dir or os.path.join(DATA_DIR, "history")
+    records: Dict[str, Dict[str, Any]] = {}
+    
+    for path in sorted(glob.glob(os.path.join(history_dir, "history_*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                history = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer el historial {path}: {e}")
+            continue
+        site = history.get("site") or os.path.basename(path)[len("history_"):-len(".json")]
+        
+        for hist_concurso in history.get("concursos", []):
+            url = (hist_concurso.get("url") or "").strip()
+            nombre = hist_concurso.get("nombre") or ""
+            if not url or not nombre:
+                continue
+            latest = (hist_concurso.get("versions") or [{}])[-1]
+            records[url] = {
+                "url": url,
+                "nombre": nombre,
+                "site": site,
+                "año": _record_year(nombre, latest.get("fecha_apertura"), latest.get("fecha_cierre")),
+                "fecha_apertura": latest.get("fecha_apertura"),
+                "fecha_cierre": latest.get("fecha_cierre"),
+                "source": "history",
+                "parent_url": None,
+            }
+            
+            for prev in hist_concurso.get("previous_concursos") or []:
+                prev_url = (prev.get("url") or "").strip()
+                prev_nombre = prev.get("nombre") or ""
+                # Los concursos del historial tienen prioridad sobre sus menciones como anteriores
+                if not prev_url or not prev_nombre or prev_url == url:
+                    continue
+                existing = records.get(prev_url)
+                if existing and existing["source"] == "history":
+                    continue
+                records[prev_url] = {
+                    "url": prev_url,
+                    "nombre": prev_nombre,
+                    "site": site,
+                    "año": prev.get("año") or _record_year(prev_nombre, prev.get("fecha_apertura"), prev.get("fecha_cierre")),
+                    "fecha_apertura": prev.get("fecha_apertura"),
+                    "fecha_cierre": prev.get("fecha_cierre"),
+                    "source": "previous",
+                    "parent_url": url,
+                }
+    
+    return list(records.values())
+
+
+class _UnionFind:
+    """Conjuntos disjuntos sobre índices 0..n-1"""
+    
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+    
+    def find(self, i: int) -> int:
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+    
+    def union(self, i: int, j: int) -> bool:
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i == root_j:
+            return False
+        self.parent[max(root_i, root_j)] = min(root_i, root_j)
+        return True
+
+
+class _NamedClusters(_UnionFind):
+    """
+    Union-find que recuerda los nombres normalizados de cada cluster, por año
+    
+    merge() rechaza uniones que dejarían dos nombres distintos en un mismo año y,
+    si no es transitiva, las que involucran clusters que ya tienen más de un nombre.
+    """
+    
+    def __init__(self, names: List[str], years: List[Optional[int]]):
+        super().__init__(len(names))
+        self.names: Dict[int, set] = {i: {name} for i, name in enumerate(names)}
+        self.years: Dict[int, Dict[int, set]] = {
+            i: ({year: {name}} if year else {}) for i, (name, year) in enumerate(zip(names, years))
+        }
+    
+    def conflicts(self, root_i: int, root_j: int) -> bool:
+        """True si unir los clusters dejaría dos nombres distintos en un mismo año"""
+        years_i, years_j = self.years[root_i], self.years[root_j]
+        if len(years_i) > len(years_j):
+            years_i, years_j = years_j, years_i
+        return any(
+            len(names | years_j[year]) > 1
+            for year, names in years_i.items() if year in years_j
+        )
+    
+    def merge(self, i: int, j: int, transitive: bool = True) -> bool:
+        """
+        Une los clusters de i y j si no hay conflicto de nombres por año
+        
+        Args:
+            i, j: Índices de registros
+            transitive: Si es False, solo se unen clusters de un único nombre
+        
+        Returns:
+            True si se unieron
+        """
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i == root_j or self.conflicts(root_i, root_j):
+            return False
+        if not transitive and (len(self.names[root_i]) > 1 or len(self.names[root_j]) > 1):
+            return False
+        self.union(root_i, root_j)
+        root = self.find(root_i)
+        other = root_j if root == root_i else root_i
+        self.names[root] |= self.names.pop(other)
+        for year, names in self.years.pop(other).items():
+            self.years[root].setdefault(year, set()).update(names)
+        return True
+
+
+def _trigrams(name: str) -> set:
+    """Trigramas de caracteres de un nombre (con espacio de relleno en los bordes)"""
+    padded = f" {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _url_parts(url: str) -> Tuple[str, str]:
+    """Dominio y ruta (sin / final) de una URL"""
+    parsed = urlparse(url.strip())
+    return parsed.netloc, parsed.path.rstrip('/')
+
+
+def _similar_paths(parts1: Tuple[str, str], parts2: Tuple[str, str]) -> bool:
+    """Mismo dominio y rutas con similitud >= 0.8 (como en are_similar_concursos)"""
+    if parts1[0] != parts2[0]:
+        return False
+    matcher = SequenceMatcher(None, parts1[1], parts2[1])
+    return matcher.real_quick_ratio() >= 0.8 and matcher.quick_ratio() >= 0.8 and matcher.ratio() >= 0.8
+
+
+def _candidate_name_pairs(
+    names: List[str],
+    groups: Dict[str, List[int]],
+    records: List[Dict[str, Any]],
+    similarity_threshold: float
+) -> Iterator[Tuple[int, int]]:
+    """
+    Pares (i, j), i < j, de nombres normalizados que vale la pena puntuar
+    
+    Un par es candidato si comparte suficientes trigramas (coeficiente de Dice, con
+    un índice invertido de trigramas) y si la cota de ConcursoSimilarityIndex permite
+    alcanzar la similitud mínima. El bloqueo por trigramas es aproximado: puede
+    perder pares muy poco parecidos que solo se unirían por la rama de URLs.
+    """
+    # Se indexa un nombre original de cada grupo: normalizado da la clave del grupo,
+    # así las posiciones del índice coinciden con las de names
+    index = ConcursoSimilarityIndex([
+        {"nombre": records[groups[name][0]]["nombre"], "url": str(position)}
+        for position, name in enumerate(names)
+    ])
+    min_similarity = min(similarity_threshold, _MIN_PAIR_SIMILARITY)
+    
+    trigram_sets = [_trigrams(name) for name in names]
+    postings: Dict[str, List[int]] = {}
+    for position, trigrams in enumerate(trigram_sets):
+        for trigram in trigrams:
+            postings.setdefault(trigram, []).append(position)
+    posting_arrays = {trigram: np.array(positions) for trigram, positions in postings.items()}
+    sizes = np.array([len(trigrams) for trigrams in trigram_sets], dtype=np.float64)
+    
+    for position, trigrams in enumerate(trigram_sets):
+        shared = np.bincount(
+            np.concatenate([posting_arrays[trigram] for trigram in trigrams]),
+            minlength=len(names)
+        )
+        dice = 2.0 * shared / (sizes + sizes[position])
+        mask = dice >= _TRIGRAM_BLOCKING_MIN_DICE
+        mask[:position + 1] = False
+        if not mask.any():
+            continue
+        bound_ok = np.zeros(len(names), dtype=bool)
+        bound_ok[index.candidates(names[position], min_similarity)] = True
+        for other in np.nonzero(mask & bound_ok)[0]:
+            yield position, int(other)
+
+
+def cluster_records(
+    records: List[Dict[str, Any]],
+    similarity_threshold: float = 0.85
+) -> List[List[Dict[str, Any]]]:
+    """
+    Agrupa registros del mismo concurso (componentes conexas de "son similares")
+    
+    Un cluster nunca reúne dos nombres normalizados distintos del mismo año, y las
+    uniones por la rama de URLs no se encadenan (ver _NamedClusters).
+    
+    Args:
+        records: Registros de collect_records
+        similarity_threshold: Umbral de similitud de nombres (el de are_similar_concursos)
+    
+    Returns:
+        Clusters de dos o más registros
+    """
+    position_by_url = {record["url"]: i for i, record in enumerate(records)}
+    normalized_names = [normalize_concurso_name(record["nombre"]) for record in records]
+    union_find = _NamedClusters(
+        # Sin nombre normalizado, el registro cuenta como un nombre propio
+        [normalized or f"url:{record['url']}" for normalized, record in zip(normalized_names, records)],
+        [record.get("año") for record in records]
+    )
+    
+    # 1. Mismo nombre normalizado: mismo concurso en otro año o versión
+    groups: Dict[str, List[int]] = {}
+    for i, normalized in enumerate(normalized_names):
+        if normalized:
+            groups.setdefault(normalized, []).append(i)
+    for members in groups.values():
+        for i in members[1:]:
+            union_find.merge(members[0], i)
+    
+    # 2. Enlaces explícitos de "Concursos anteriores"
+    for i, record in enumerate(records):
+        parent = position_by_url.get(record.get("parent_url") or "")
+        if parent is not None:
+            union_find.merge(parent, i)
+    
+    # 3. Nombres distintos similares: bloqueo (trigramas + cota del índice) y puntuación por
+    # pares. Los pares se unen de más a menos similares, para que cada nombre se una primero
+    # con su programa más parecido y los rechazos por año protejan el resto
+    names = list(groups)
+    url_parts = [_url_parts(record["url"]) for record in records]
+    scored_pairs = []
+    for position, other in _candidate_name_pairs(names, groups, records, similarity_threshold):
+        similarity = calculate_normalized_similarity(names[position], names[other])
+        if similarity >= _MIN_PAIR_SIMILARITY:
+            scored_pairs.append((similarity, position, other))
+    scored_pairs.sort(key=lambda pair: -pair[0])
+    
+    for similarity, position, other in scored_pairs:
+        name, other_name = names[position], names[other]
+        if union_find.find(groups[name][0]) == union_find.find(groups[other_name][0]):
+            continue  # Ya están en el mismo cluster
+        if similarity >= similarity_threshold:
+            union_find.merge(groups[name][0], groups[other_name][0])
+        elif any(
+            _similar_paths(url_parts[i], url_parts[j])
+            for i in groups[name] for j in groups[other_name]
+        ):
+            # Depende de las URLs (regla de are_similar_concursos): mismo dominio y rutas
+            # parecidas. Es un enlace débil: no se encadena con otras uniones
+            union_find.merge(groups[name][0], groups[other_name][0], transitive=False)
+    
+    clusters: Dict[int, List[Dict[str, Any]]] = {}
+    for i, record in enumerate(records):
+        clusters.setdefault(union_find.find(i), []).append(record)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+def _assign_cluster_ids(
+    clusters: List[List[Dict[str, Any]]],
+    previous_by_url: Dict[str, str]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    IDs estables entre corridas: cada cluster conserva el ID anterior que tenía la
+    mayoría de sus miembros; los clusters nuevos reciben un hash de su URL menor
+    """
+    assigned: Dict[str, List[Dict[str, Any]]] = {}
+    # Los clusters grandes eligen primero (si uno se divide, la parte mayor conserva el ID)
+    for members in sorted(clusters, key=len, reverse=True):
+        votes = Counter(previous_by_url[m["url"]] for m in members if m["url"] in previous_by_url)
+        cluster_id = next(
+            (candidate for candidate, _ in sorted(votes.items(), key=lambda item: (-item[1], item[0]))
+             if candidate not in assigned),
+            None
+        )
+        if cluster_id is None:
+            digest = hashlib.sha1(min(m["url"] for m in members).encode("utf-8")).hexdigest()[:12]
+            cluster_id = f"c_{digest}"
+        assigned[cluster_id] = sorted(members, key=lambda m: (-(m.get("año") or 0), m["url"]))
+    return assigned
+
+
+def run_entity_resolution(
+    history_dir: Optional[str] = None,
+    output_path: Optional[str] = None,
+    similarity_threshold: float = 0.85
+) -> Dict[str, Any]:
+    """
+    Trabajo offline: agrupa los concursos de todos los historiales y guarda los clusters
+    
+    Args:
+        history_dir: Directorio de historiales (por defecto: data/history)
+        output_path: Archivo de clusters (por defecto: data/entity_clusters.json)
+        similarity_threshold: Umbral de similitud de nombres
+    
+    Returns:
+        Estadísticas {"records", "clusters", "clustered_records", "duration_seconds", "path"}
+    """
+    start = time.perf_counter()
+    output_path = output_path or DEFAULT_CLUSTERS_FILE
+    records = collect_records(history_dir)
+    clusters = cluster_records(records, similarity_threshold)
+    
+    previous_by_url: Dict[str, str] = {}
+    if os.path.exists(output_path):
+        try:
+            with open(output_path, "r", encoding="utf-8") as f:
+                previous_by_url = json.load(f).get("by_url", {})
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron leer los clusters anteriores ({output_path}): {e}")
+    
+    by_id = _assign_cluster_ids(clusters, previous_by_url)
+    stats = {
+        "records": len(records),
+        "clusters": len(by_id),
+        "clustered_records": sum(len(members) for members in by_id.values()),
+        "duration_seconds": round(time.perf_counter() - start, 3),
+        "path": output_path,
+    }
+    data = {
+        "generated_at": datetime.now().isoformat(),
+        "similarity_threshold": similarity_threshold,
+        "stats": {key: value for key, value in stats.items() if key != "path"},
+        "clusters": {
+            cluster_id: [{field: member.get(field) for field in _RECORD_FIELDS} for member in members]
+            for cluster_id, members in by_id.items()
+        },
+        "by_url": {
+            member["url"]: cluster_id
+            for cluster_id, members in by_id.items()
+            for member in members
+        },
+    }
+    
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, output_path)
+    
+    logger.info(
+        f"🧩 Resolución de entidades: {stats['records']} registros, {stats['clusters']} clusters "
+        f"({stats['clustered_records']} registros agrupados) en {stats['duration_seconds']}s"
+    )
+    return stats
+
+
+class EntityClusters:
+    """Clusters guardados por run_entity_resolution, con búsqueda por URL en O(1)"""
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Carga los clusters
+        
+        Args:
+            path: Archivo de clusters (por defecto: data/entity_clusters.json; si no
+                existe, no hay clusters)
+        """
+        self.path = path or DEFAULT_CLUSTERS_FILE
+        self.generated_at: Optional[str] = None
+        self._clusters: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_url: Dict[str, str] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.generated_at = data.get("generated_at")
+            self._clusters = data.get("clusters", {})
+            self._by_url = data.get("by_url", {})
+    
+    def __len__(self) -> int:
+        return len(self._clusters)
+    
+    def cluster_id(self, url: str) -> Optional[str]:
+        """ID del cluster de una URL (None si el concurso no se agrupó con otros)"""
+        return self._by_url.get((url or "").strip())
+    
+    def members(self, cluster_id: str) -> List[Dict[str, Any]]:
+        """Registros de un cluster (del año más reciente al más antiguo)"""
+        return self._clusters.get(cluster_id, [])
+    
+    def other_years(self, url: str) -> List[Dict[str, Any]]:
+        """
+        Mismo concurso, otros años: los demás registros del cluster de una URL
+        
+        Args:
+            url: URL del concurso
+        
+        Returns:
+            Registros {"url", "nombre", "site", "año", "fecha_apertura", "fecha_cierre",
+            "source"} sin la propia URL ni los del mismo año (si se conoce)
+        """
+        url = (url or "").strip()
+        cluster_id = self._by_url.get(url)
+        if cluster_id is None:
+            return []
+        members = self._clusters.get(cluster_id, [])
+        year = next((m.get("año") for m in members if m["url"] == url), None)
+        return [
+            m for m in members
+            if m["url"] != url and not (year and m.get("año") == year)
+        ]
+
+
+_entity_clusters: Optional[EntityClusters] = None
+_entity_clusters_mtime: Optional[float] = None
+_entity_clusters_lock = threading.Lock()
+
+
+def get_entity_clusters() -> Optional[EntityClusters]:
+    """
+    Clusters del proceso (se recargan si run_entity_resolution reescribió el archivo)
+    
+    Returns:
+        EntityClusters, o None si está deshabilitado o el archivo no se pudo leer
+    """
+    global _entity_clusters, _entity_clusters_mtime
+    from config import EXTRACTION_CONFIG
+    if not EXTRACTION_CONFIG.get("entity_clusters", True):
+        return None
+    try:
+        mtime = os.path.getmtime(DEFAULT_CLUSTERS_FILE)
+    except OSError:
+        mtime = None
+    with _entity_clusters_lock:
+        if _entity_clusters is None or mtime != _entity_clusters_mtime:
+            try:
+                _entity_clusters = EntityClusters()
+                _entity_clusters_mtime = mtime
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudieron cargar los clusters de concursos: {e}")
+                return None
+        return _entity_clusters
@@ -0,0 +1,138 @@
+"""
+Cálculo vectorizado del estado de los concursos de un sitio
+
+Las fechas de apertura/cierre de la versión más reciente de cada concurso se parsean
+una sola vez a arreglos datetime64 (HistoryManager.get_date_columns los cachea junto
+al historial) y el estado (Abierto/Cerrado/Próximo/Suspendido) de todas las filas se
+calcula en una pasada con NumPy, con las mismas reglas que
+main.calculate_estado_from_fechas.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.date_parser import parse_date
+
+logger = logging.getLogger(__name__)
+
+_NAT = np.datetime64("NaT", "us")
+
+
+def _to_datetime64(value: Optional[str], cache: Dict[str, np.datetime64]) -> np.datetime64:
+    """Fecha como datetime64[us] (NaT si falta o no se puede parsear)"""
+    if not value or not isinstance(value, str):
+        return _NAT
+    parsed = cache.get(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is not None and date.tzinfo is not None:
+            date = date.replace(tzinfo=None)
+        parsed = np.datetime64(date, "us") if date is not None else _NAT
+        cache[value] = parsed
+    return parsed
+
+
+def build_date_columns(history: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Columnas de un historial (una fila por concurso, en el orden de history["concursos"])
+    
+    Args:
+        history: Historial de un sitio
+    
+    Returns:
+        Diccionario de arreglos: has_versions, fecha_apertura y fecha_cierre (datetime64,
+        NaT si no se pudo parsear), has_apertura y has_cierre (el campo tiene texto) y
+        estado_guardado (estado del historial o de la última versión)
+    """
+    concursos = history.get("concursos", [])
+    n = len(concursos)
+    columns = {
+        "has_versions": np.zeros(n, dtype=bool),
+        "fecha_apertura": np.full(n, _NAT),
+        "fecha_cierre": np.full(n, _NAT),
+        "has_apertura": np.zeros(n, dtype=bool),
+        "has_cierre": np.zeros(n, dtype=bool),
+        "estado_guardado": np.full(n, None, dtype=object),
+    }
+    parsed_cache: Dict[str, np.datetime64] = {}
+    for row, hist_concurso in enumerate(concursos):
+        versions = hist_concurso.get("versions", [])
+        if not versions:
+            continue
+        latest = versions[-1]
+        fecha_apertura = latest.get("fecha_apertura")
+        fecha_cierre = latest.get("fecha_cierre")
+        columns["has_versions"][row] = True
+        columns["has_apertura"][row] = bool(fecha_apertura)
+        columns["has_cierre"][row] = bool(fecha_cierre)
+        columns["fecha_apertura"][row] = _to_datetime64(fecha_apertura, parsed_cache)
+        columns["fecha_cierre"][row] = _to_datetime64(fecha_cierre, parsed_cache)
+        columns["estado_guardado"][row] = hist_concurso.get("estado") or latest.get("estado")
+    return columns
+
+
+def compute_estados(columns: Dict[str, np.ndarray], now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Estado de todas las filas en una pasada vectorizada
+    
+    Reglas (las de calculate_estado_from_fechas):
+    - Estado guardado "Suspendido" se mantiene
+    - Con fecha de cierre: "Cerrado" si ya pasó; si no (o no se pudo parsear), "Abierto"
+    - Solo con fecha de apertura: "Próximo" si es futura; si no, "Abierto"
+    - Sin fechas: el estado guardado
+    
+    Args:
+        columns: Columnas de build_date_columns
+        now: Fecha de referencia (por defecto: ahora)
+    
+    Returns:
+        Arreglo de estados (object; None si la fila no tiene versiones ni estado)
+    """
+    now64 = np.datetime64(now or datetime.now(), "us")
+    cierre = columns["fecha_cierre"]
+    apertura = columns["fecha_apertura"]
+    has_cierre = columns["has_cierre"]
+    has_apertura = columns["has_apertura"] & ~has_cierre
+    
+    # Comparaciones con NaT dan False: cierre no parseable -> "Abierto", apertura no parseable -> "Abierto"
+    estados = np.where(
+        has_cierre,
+        np.where(cierre < now64, "Cerrado", "Abierto"),
+        np.where(apertura > now64, "Próximo", "Abierto"),
+    ).astype(object)
+    sin_fechas = ~(has_cierre | has_apertura)
+    estados[sin_fechas] = columns["estado_guardado"][sin_fechas]
+    estados[columns["estado_guardado"] == "Suspendido"] = "Suspendido"
+    estados[~columns["has_versions"]] = None
+    return estados
+
+
+def filter_mask(
+    values: List[Optional[str]],
+    equals: Optional[str] = None,
+    contains: Optional[str] = None
+) -> np.ndarray:
+    """
+    Máscara booleana de una columna de texto (comparación sin distinguir mayúsculas)
+    
+    Args:
+        values: Valores de la columna (None se trata como "")
+        equals: Valor exacto buscado
+        contains: Substring buscado
+    
+    Returns:
+        Arreglo booleano alineado con values
+    """
+    column = np.array([value or "" for value in values], dtype=str)
+    mask = np.ones(len(values), dtype=bool)
+    if not len(values):
+        return mask
+    lowered = np.char.lower(column)
+    if equals is not None:
+        mask &= lowered == equals.lower()
+    if contains is not None:
+        mask &= np.char.find(lowered, contains.lower()) >= 0
+    return mask
@@ -7,9 +7,12 @@ como "concursos anteriores" u otra información estructurada.
 
 from utils.extractors.base_extractor import BaseExtractor
 from utils.extractors.generic_extractor import GenericExtractor
+from utils.extractors.spec_extractor import SpecExtractor, compile_listing_spec
 
 __all__ = [
     "BaseExtractor",
     "GenericExtractor",
+    "SpecExtractor",
+    "compile_listing_spec",
 ]
 
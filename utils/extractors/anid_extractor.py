@@ -1,26 +1,25 @@
 """
 Extractor específico para ANID.
 
-Extrae información de "Concursos anteriores" de páginas ANID usando
-la lógica específica de JetEngine/Elementor.
+Extrae información de "Concursos anteriores" de páginas ANID con la
+especificación declarativa de JetEngine/Elementor (ANID_PREVIOUS_CONCURSOS_SPEC).
 """
 
 from typing import List, Dict, Any
-from utils.extractors.base_extractor import BaseExtractor
+from utils.extractors.spec_extractor import SpecExtractor
+from utils.anid_previous_concursos import ANID_PREVIOUS_CONCURSOS_SPEC
 
-# Importar función legacy desde anid_previous_concursos.py
-# Mantener compatibilidad mientras migramos
-from utils.anid_previous_concursos import extract_previous_concursos_from_html
 
-
-class AnidExtractor(BaseExtractor):
+class AnidExtractor(SpecExtractor):
     """
     Extractor específico para ANID.
     
-    Extrae información de "Concursos anteriores" usando la lógica
-    específica de ANID (selectores JetEngine, estructura Elementor).
+    Extrae información de "Concursos anteriores" usando la especificación
+    de ANID (selectores JetEngine, estructura Elementor).
     """
     
+    SPEC = ANID_PREVIOUS_CONCURSOS_SPEC
+    
     def extract_previous_concursos(
         self,
         html: str,
@@ -32,7 +31,7 @@ class AnidExtractor(BaseExtractor):
         Args:
             html: Contenido HTML de la página del concurso
             url: URL de la página (para logging)
-            
+        
         Returns:
             Lista de diccionarios con información de concursos anteriores:
             [
@@ -48,6 +47,5 @@ class AnidExtractor(BaseExtractor):
                 ...
             ]
         """
-        # Usar la función legacy que ya tiene toda la lógica específica de ANID
-        return extract_previous_concursos_from_html(html, url)
+        return self.compiled_spec().extract(html, url)
 
@@ -0,0 +1,667 @@
+"""
+Extracción de "Concursos anteriores" a partir de una especificación declarativa
+
+Cada estrategia describe su sección de concursos anteriores con un diccionario
+(selectores CSS, patrones de fechas, textos a descartar y el orden de las fuentes
+del nombre) y el motor la compila una sola vez:
+- Los selectores simples (tag, .clase, [atributo], [atributo*="valor"], :is(...))
+  se compilan a predicados de Python; los demás se evalúan con soupsieve
+- Patrones de fechas con re y listas de exclusión como una sola expresión regular
+
+Por página, el motor recorre el árbol una vez (reusando el de HtmlDocument) y guarda
+los elementos en orden de documento con el rango de sus descendientes; buscar el grid
+dentro de un hermano o contar los items de un grid es una búsqueda binaria en vez
+de un find/find_all sobre el subárbol.
+
+Claves de la especificación:
+    section_title: Texto del título de la sección (minúsculas, sin tildes)
+    section_pattern: Regex del texto de la sección fuera de headings (sin distinguir mayúsculas)
+    grid: Selector CSS del contenedor de items
+    item: Selector CSS de cada item
+    date_field: Selector CSS de los campos con fechas dentro de un item
+    date_keywords: Palabras que identifican un campo de fecha
+    dates: {"fecha_apertura": regex, "fecha_cierre": regex} (el grupo 1 es la fecha)
+    link: Selector CSS del link del item
+    name_element: Selector CSS del elemento con el nombre (fuente "name_element")
+    name_sources: Fuentes del nombre en orden de prioridad (ver NAME_SOURCES)
+    generic_link_texts: Textos de link que no son nombres ("ver más", ...)
+    excluded_names: Textos que no son nombres de concursos (subdirecciones, ...)
+    max_sibling_hops: Hermanos siguientes del título donde buscar el grid
+"""
+
+import logging
+import re
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import soupsieve
+from bs4 import Tag
+
+from utils.date_parser import parse_date
+from utils.extractors.base_extractor import BaseExtractor
+from utils.html_document import get_soup, parse_html
+from utils.keyword_scanner import KeywordScanner
+
+logger = logging.getLogger(__name__)
+
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+
+# Fuentes del nombre de un item disponibles en name_sources
+NAME_SOURCES = (
+    "link_text",      # Texto del link
+    "link_attrs",     # Atributos title y data-* del link
+    "url_slug",       # Slug de la URL del link
+    "name_element",   # Elemento de name_element
+    "heading",        # Primer heading del item
+    "item_text",      # Texto completo del item
+)
+
+_HEADING_SET = frozenset(HEADING_TAGS)
+_ACCENTS = str.maketrans('áéíóú', 'aeiou')
+_DATE_FIELD_PREFIX_RE = re.compile(r'^(inicio|apertura|cierre|fecha)')
+_YEAR_PREFIX_RE = re.compile(r'^(\d{4})')
+_YEAR_RE = re.compile(r'\b(20\d{2})\b')
+
+# Bytes quoted-printable de caracteres acentuados (MHTML)
+_QUOTED_PRINTABLE_CHARS = (
+    ('=C3=B3', 'ó'), ('=C3=A1', 'á'), ('=C3=A9', 'é'),
+    ('=C3=AD', 'í'), ('=C3=BA', 'ú'), ('=C3=B1', 'ñ'),
+    ('=C3=81', 'Á'), ('=C3=89', 'É'), ('=C3=8D', 'Í'),
+    ('=C3=93', 'Ó'), ('=C3=9A', 'Ú'), ('=C3=91', 'Ñ'),
+)
+
+# Partes de un selector simple: tag, .clase, [atributo] y [atributo<op>"valor"]
+_SELECTOR_TOKEN_RE = re.compile(
+    r'(?P<tag>[a-zA-Z][\w-]*)'
+    r'|\.(?P<cls>[\w-]+)'
+    r'|\[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$]?=)\s*"(?P<value>[^"]*)"\s*)?\]'
+)
+
+TagPredicate = Callable[[Tag], bool]
+
+
+def _split_selector_list(selector: str) -> Optional[List[str]]:
+    """Separa una lista de selectores por las comas de primer nivel (None si los paréntesis no cierran)"""
+    parts = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(selector):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return None
+        elif char == ',' and depth == 0:
+            parts.append(selector[start:i].strip())
+            start = i + 1
+    if depth != 0:
+        return None
+    parts.append(selector[start:].strip())
+    return parts
+
+
+def _attr_predicate(name: str, op: Optional[str], expected: Optional[str]) -> TagPredicate:
+    """Predicado de [name], [name="v"], [name*="v"], [name^="v"] o [name$="v"]"""
+    if op is None:
+        return lambda tag: name in tag.attrs
+    if op != '=' and not expected:
+        # [a*=""], [a^=""] y [a$=""] no coinciden con nada en CSS
+        return lambda tag: False
+    if op == '*=':
+        # El caso más común (clases de Elementor/JetEngine): sin llamadas extra por elemento
+        def contains(tag: Tag) -> bool:
+            value = tag.attrs.get(name)
+            if value is None:
+                return False
+            if isinstance(value, list):
+                value = ' '.join(value)
+            return expected in value
+        return contains
+    
+    compare = {
+        '=': lambda value: value == expected,
+        '^=': lambda value: value.startswith(expected),
+        '$=': lambda value: value.endswith(expected),
+    }[op]
+    
+    def predicate(tag: Tag) -> bool:
+        value = tag.attrs.get(name)
+        if value is None:
+            return False
+        # Atributos con varios valores (class, rel, ...) se comparan unidos por espacios
+        if isinstance(value, list):
+            value = ' '.join(value)
+        return compare(value)
+    
+    return predicate
+
+
+def _compile_compound(selector: str) -> Optional[TagPredicate]:
+    """Predicado de un selector compuesto sin combinadores (None si no es simple)"""
+    conditions: List[TagPredicate] = []
+    pos = 0
+    while pos < len(selector):
+        if selector.startswith(':is(', pos):
+            depth = 0
+            for end in range(pos + 3, len(selector)):
+                depth += selector[end] == '('
+                depth -= selector[end] == ')'
+                if depth == 0:
+                    break
+            else:
+                return None
+            inner = _compile_simple_selector(selector[pos + 4:end])
+            if inner is None:
+                return None
+            conditions.append(inner)
+            pos = end + 1
+            continue
+        match = _SELECTOR_TOKEN_RE.match(selector, pos)
+        if not match or (match.group('tag') and pos > 0):
+            return None
+        if match.group('tag'):
+            tag_name = match.group('tag').lower()
+            conditions.append(lambda tag, tag_name=tag_name: tag.name == tag_name)
+        elif match.group('cls'):
+            cls = match.group('cls')
+            conditions.append(lambda tag, cls=cls: cls in (tag.attrs.get('class') or ()))
+        else:
+            conditions.append(_attr_predicate(match.group('attr').lower(), match.group('op'), match.group('value')))
+        pos = match.end()
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return lambda tag: all(condition(tag) for condition in conditions)
+
+
+def _compile_simple_selector(selector: str) -> Optional[TagPredicate]:
+    """Predicado de una lista de selectores simples (None si alguno no lo es)"""
+    parts = _split_selector_list(selector)
+    if not parts:
+        return None
+    predicates = [_compile_compound(part) for part in parts]
+    if any(predicate is None for predicate in predicates):
+        return None
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda tag: any(predicate(tag) for predicate in predicates)
+
+
+def compile_selector(selector: str) -> TagPredicate:
+    """
+    Compila un selector CSS a un predicado sobre un elemento
+    
+    Los selectores simples se evalúan con Python puro; el resto (combinadores,
+    pseudo-clases distintas de :is) con soupsieve.
+    
+    Args:
+        selector: Selector CSS
+    
+    Returns:
+        Función tag -> bool
+    """
+    predicate = _compile_simple_selector(selector.strip())
+    if predicate is not None:
+        return predicate
+    return soupsieve.compile(selector).match
+
+
+class _TreeIndex:
+    """Elementos de un árbol en orden de documento, con el rango de sus descendientes"""
+    
+    def __init__(self, soup):
+        self.soup = soup
+        self.tags: List[Tag] = []
+        self.strings = []
+        for node in soup.descendants:
+            (self.tags if isinstance(node, Tag) else self.strings).append(node)
+        self.position: Dict[int, int] = {id(tag): i for i, tag in enumerate(self.tags)}
+        self._ends: Dict[int, int] = {}
+    
+    def end(self, index: int) -> int:
+        """Posición siguiente al último descendiente del elemento index"""
+        if index not in self._ends:
+            # El primer elemento después del subárbol es el siguiente hermano del
+            # elemento o del ancestro más cercano que tenga uno
+            end = len(self.tags)
+            node = self.tags[index]
+            while node is not None and node is not self.soup:
+                sibling = node.next_sibling
+                while sibling is not None and not isinstance(sibling, Tag):
+                    sibling = sibling.next_sibling
+                if sibling is not None:
+                    end = self.position[id(sibling)]
+                    break
+                node = node.parent
+            self._ends[index] = end
+        return self._ends[index]
+    
+    def descendants_range(self, node) -> Tuple[int, int]:
+        """Rango [inicio, fin) de los descendientes de un elemento (o de todo el documento)"""
+        index = self.position.get(id(node))
+        if index is None:
+            return 0, len(self.tags)
+        return index + 1, self.end(index)
+    
+    def select(self, predicate: TagPredicate, lo: int = 0, hi: Optional[int] = None) -> List[int]:
+        """Posiciones de los elementos de [lo, hi) que cumplen el predicado"""
+        tags = self.tags
+        return [i for i in range(lo, len(tags) if hi is None else hi) if predicate(tags[i])]
+
+
+def _in_range(positions: List[int], lo: int, hi: int) -> List[int]:
+    return positions[bisect_left(positions, lo):bisect_left(positions, hi)]
+
+
+def _first_in_range(positions: List[int], lo: int, hi: int) -> Optional[int]:
+    i = bisect_left(positions, lo)
+    if i < len(positions) and positions[i] < hi:
+        return positions[i]
+    return None
+
+
+def _slug_name(url: Optional[str]) -> Optional[str]:
+    """Nombre legible desde el slug de una URL ("nodos-macrozonales-2025" -> "Nodos Macrozonales 2025")"""
+    if not url or '/' not in url:
+        return None
+    slug = url.rstrip('/').split('/')[-1]
+    if slug and len(slug) > 5:
+        return slug.replace('-', ' ').title()
+    return None
+
+
+def _to_iso(raw: Optional[str]) -> Optional[str]:
+    parsed = parse_date(raw) if raw else None
+    return parsed.strftime("%Y-%m-%d") if parsed else None
+
+
+class CompiledListingSpec:
+    """
+    Especificación de "Concursos anteriores" compilada, lista para extraer
+    
+    Se construye una vez por estrategia (compile_listing_spec) y se reutiliza en
+    todas las páginas.
+    """
+    
+    def __init__(self, spec: Dict[str, Any]):
+        """
+        Args:
+            spec: Especificación declarativa (ver claves en el docstring del módulo)
+        """
+        unknown = [source for source in spec["name_sources"] if source not in NAME_SOURCES]
+        if unknown:
+            raise ValueError(f"Fuentes de nombre desconocidas: {unknown}")
+        
+        self.section_title = spec["section_title"]
+        self.section_re = re.compile(spec["section_pattern"], re.I)
+        self.grid = compile_selector(spec["grid"])
+        self.item = compile_selector(spec["item"])
+        self.date_field = compile_selector(spec["date_field"])
+        self.link = compile_selector(spec["link"])
+        self.name_element = compile_selector(spec["name_element"])
+        self.date_keywords = tuple(spec["date_keywords"])
+        self.date_patterns = [
+            (field, re.compile(pattern, re.I)) for field, pattern in spec["dates"].items()
+        ]
+        self.name_sources = tuple(spec["name_sources"])
+        self.generic_link_texts = frozenset(spec.get("generic_link_texts", ()))
+        # Escáner de palabras clave para "contiene alguno de los textos excluidos"
+        self.excluded = KeywordScanner({"excluded": spec.get("excluded_names") or ()})
+        self.max_sibling_hops = spec.get("max_sibling_hops", 10)
+    
+    def _is_excluded(self, text_lower: str) -> bool:
+        return self.excluded.contains(text_lower, "excluded")
+    
+    # --- Sección ---------------------------------------------------------------
+    
+    def find_section(self, index: _TreeIndex) -> Optional[Tag]:
+        """
+        Grid de la sección: el que tiene más items entre los cercanos al título
+        
+        Busca primero desde los headings con section_title, luego desde cualquier
+        texto que coincida con section_pattern y, como último recurso, entre todos
+        los grids cuyo texto (o el de su contenedor) menciona la sección.
+        """
+        grids = index.select(self.grid)
+        items: List[List[int]] = []  # Se calculan al considerar el primer grid
+        best: List[Any] = [None, 0]  # grid, items
+        
+        def first_grid(node) -> Optional[int]:
+            return _first_in_range(grids, *index.descendants_range(node))
+        
+        def consider(grid: Optional[int]) -> None:
+            if grid is None:
+                return
+            if not items:
+                items.append(index.select(self.item))
+            count = len(_in_range(items[0], grid + 1, index.end(grid)))
+            if count > best[1]:
+                best[0], best[1] = index.tags[grid], count
+        
+        def consider_following(start) -> None:
+            current = start
+            for _ in range(self.max_sibling_hops):
+                current = current.find_next_sibling()
+                if not current:
+                    break
+                consider(first_grid(current))
+        
+        if not grids:
+            return None
+        
+        for position in index.select(lambda tag: tag.name in _HEADING_SET):
+            heading = index.tags[position]
+            heading_text = heading.get_text(strip=True).lower()
+            if self.section_title not in heading_text and self.section_title not in heading_text.translate(_ACCENTS):
+                continue
+            parent = heading.parent
+            if not parent:
+                continue
+            for sibling in parent.find_next_siblings():
+                consider(first_grid(sibling))
+            if best[0] is None:
+                consider(first_grid(parent))
+            consider_following(heading)
+        if best[0] is not None:
+            return best[0]
+        
+        for string in index.strings:
+            parent = string.parent
+            if not parent or not self.section_re.search(string):
+                continue
+            for sibling in parent.find_next_siblings():
+                consider(first_grid(sibling))
+            if best[0] is None and parent.parent:
+                consider(first_grid(parent.parent))
+            consider_following(parent)
+        if best[0] is not None:
+            return best[0]
+        
+        # Muchos grids comparten contenedor: su texto se revisa una vez
+        mentions: Dict[int, bool] = {}
+        
+        def mentions_section(node) -> bool:
+            if id(node) not in mentions:
+                mentions[id(node)] = self.section_title in node.get_text().lower()
+            return mentions[id(node)]
+        
+        for position in grids:
+            grid = index.tags[position]
+            if mentions_section(grid) or (grid.parent is not None and mentions_section(grid.parent)):
+                consider(position)
+        return best[0]
+    
+    # --- Items -----------------------------------------------------------------
+    
+    def _has_dates(self, fields: List[Tag]) -> bool:
+        for field in fields:
+            text = field.get_text(strip=True).lower()
+            if any(keyword in text for keyword in self.date_keywords):
+                return True
+        return False
+    
+    def _name_from(
+        self,
+        source: str,
+        item: Tag,
+        link: Optional[Tag],
+        url_anterior: Optional[str],
+        name_element: Optional[Tag],
+        headings: List[Tag]
+    ) -> Optional[str]:
+        """Nombre desde una fuente (None si no hay uno válido)"""
+        if source == "link_text":
+            if link is None:
+                return None
+            text = link.get_text(strip=True)
+            lower = text.lower().strip()
+            if text and len(text) > 5 and lower not in self.generic_link_texts and not self._is_excluded(lower):
+                return text
+        
+        elif source == "link_attrs":
+            if link is None:
+                return None
+            title = link.get('title', '').strip()
+            if title and len(title) > 5 and not self._is_excluded(title.lower().strip()) and \
+               title.lower() not in self.generic_link_texts:
+                return title
+            for attr_name, attr_value in link.attrs.items():
+                if attr_name.startswith('data-') and isinstance(attr_value, str) and len(attr_value) > 5:
+                    if not self._is_excluded(attr_value.lower().strip()) and \
+                       attr_value.lower() not in self.generic_link_texts:
+                        return attr_value
+        
+        elif source == "url_slug":
+            slug_name = _slug_name(url_anterior)
+            if slug_name and not self._is_excluded(slug_name.lower().strip()):
+                return slug_name
+        
+        elif source == "name_element":
+            if name_element is not None:
+                text = name_element.get_text(strip=True)
+                if text and len(text) > 5 and not self._is_excluded(text.lower().strip()):
+                    return text
+        
+        elif source == "heading":
+            for heading in headings:
+                text = heading.get_text(strip=True)
+                if text and len(text) > 5 and not self._is_excluded(text.lower().strip()):
+                    return text
+        
+        elif source == "item_text":
+            item_text = item.get_text(separator=' ', strip=True)
+            for line in item_text.split('\n'):
+                line = line.strip()
+                if len(line) > 10:
+                    line_lower = line.lower()
+                    if not self._is_excluded(line_lower) and not _DATE_FIELD_PREFIX_RE.match(line_lower):
+                        return line
+        
+        return None
+    
+    def extract_item(
+        self,
+        item: Tag,
+        fields: List[Tag],
+        link: Optional[Tag],
+        name_element: Optional[Tag],
+        headings: List[Tag],
+        url: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Concurso anterior de un item
+        
+        Args:
+            item: Elemento del item
+            fields: Campos de fecha del item (date_field)
+            link: Primer link del item (link)
+            name_element: Primer elemento de nombre del item (name_element)
+            headings: Headings del item
+            url: URL de la página (para URLs relativas)
+        
+        Returns:
+            Concurso anterior, o None si el item no tiene nombre
+        """
+        url_anterior = link.get('href') if link is not None else None
+        if url_anterior and url_anterior.startswith('/'):
+            parsed = urlparse(url)
+            url_anterior = urljoin(f"{parsed.scheme}://{parsed.netloc}", url_anterior)
+        
+        nombre = None
+        for source in self.name_sources:
+            nombre = self._name_from(source, item, link, url_anterior, name_element, headings)
+            if nombre:
+                break
+        
+        if nombre:
+            for encoded, char in _QUOTED_PRINTABLE_CHARS:
+                nombre = nombre.replace(encoded, char)
+            nombre = nombre.strip()
+            # Si después de limpiar parece un texto excluido, usar el slug de la URL
+            if nombre and self._is_excluded(nombre.lower().strip()):
+                nombre = _slug_name(url_anterior) or nombre
+        if not nombre:
+            return None
+        
+        raw_dates: Dict[str, Optional[str]] = {field: None for field, _ in self.date_patterns}
+        for field_elem in fields:
+            field_text = field_elem.get_text(strip=True)
+            for field, pattern in self.date_patterns:
+                match = pattern.search(field_text)
+                if match:
+                    raw_dates[field] = match.group(1).strip()
+        fecha_apertura_raw = raw_dates.get("fecha_apertura")
+        fecha_cierre_raw = raw_dates.get("fecha_cierre")
+        fecha_apertura = _to_iso(fecha_apertura_raw)
+        fecha_cierre = _to_iso(fecha_cierre_raw)
+        
+        # Año: fechas, luego URL y solo al final el nombre (puede ser engañoso, como "2030")
+        año = None
+        for fecha in (fecha_apertura, fecha_cierre):
+            match = _YEAR_PREFIX_RE.search(fecha) if fecha else None
+            if match:
+                año = int(match.group(1))
+                break
+        if not año:
+            for text in (url_anterior, nombre):
+                match = _YEAR_RE.search(text) if text else None
+                if match:
+                    año = int(match.group(1))
+                    break
+        if año is not None and not (1900 <= año <= 2100):
+            año = None
+        
+        return {
+            "nombre": nombre,
+            "fecha_apertura": fecha_apertura,
+            "fecha_cierre": fecha_cierre,
+            "fecha_apertura_original": fecha_apertura_raw,
+            "fecha_cierre_original": fecha_cierre_raw,
+            "url": url_anterior,
+            "año": año
+        }
+    
+    # --- Página ----------------------------------------------------------------
+    
+    def extract(self, html: str, url: str) -> List[Dict[str, Any]]:
+        """
+        Concursos anteriores de una página
+        
+        Args:
+            html: HTML de la página (si es HtmlDocument se reutiliza su árbol)
+            url: URL de la página (para URLs relativas y logging)
+        
+        Returns:
+            Lista de concursos anteriores (formato de BaseExtractor.extract_previous_concursos)
+        """
+        try:
+            # Decodificar quoted-printable (común en MHTML) antes de parsear
+            html_decoded = html.replace('=3D', '=').replace('=0A', '\n').replace('=\n', '')
+            soup = get_soup(html) if html_decoded == html else parse_html(html_decoded)
+            index = _TreeIndex(soup)
+            
+            section = self.find_section(index)
+            if section is None:
+                logger.debug(f"No se encontró sección 'Concursos anteriores' en {url}")
+                return []
+            
+            # Elementos de la sección que usan los items, en orden de documento
+            lo, hi = index.descendants_range(section)
+            section_items = index.select(self.item, lo, hi)
+            if not section_items:
+                logger.debug(f"No se encontraron items en la sección 'Concursos anteriores' de {url}")
+                return []
+            fields = index.select(self.date_field, lo, hi)
+            links = index.select(self.link, lo, hi)
+            name_elements = index.select(self.name_element, lo, hi)
+            headings = index.select(lambda tag: tag.name in _HEADING_SET, lo, hi)
+            
+            def first(positions: List[int], item: int) -> Optional[Tag]:
+                position = _first_in_range(positions, item + 1, index.end(item))
+                return index.tags[position] if position is not None else None
+            
+            def inside(positions: List[int], item: int) -> List[Tag]:
+                return [index.tags[i] for i in _in_range(positions, item + 1, index.end(item))]
+            
+            # Se prefieren los items con campos de fecha (más probable que sean concursos reales)
+            items_fields = [(item, inside(fields, item)) for item in section_items]
+            with_dates = [(item, item_fields) for item, item_fields in items_fields if self._has_dates(item_fields)]
+            
+            previous_concursos = []
+            seen = set()  # Deduplicación por nombre + fechas
+            for item, item_fields in with_dates or items_fields:
+                try:
+                    previous = self.extract_item(
+                        index.tags[item], item_fields, first(links, item),
+                        first(name_elements, item), inside(headings, item), url
+                    )
+                except (AttributeError, KeyError, ValueError, TypeError) as e:
+                    logger.warning(f"Error al extraer item de concurso anterior: {e}")
+                    continue
+                except Exception as e:
+                    logger.warning(f"Error inesperado al extraer item de concurso anterior: {e}", exc_info=True)
+                    continue
+                if previous is None:
+                    continue
+                key = (previous["nombre"].lower().strip(), previous["fecha_apertura"] or "", previous["fecha_cierre"] or "")
+                if key not in seen:
+                    seen.add(key)
+                    previous_concursos.append(previous)
+            
+            logger.info(f"✅ Extraídos {len(previous_concursos)} concursos anteriores de {url}")
+            return previous_concursos
+        
+        except Exception as e:
+            logger.error(f"Error al extraer concursos anteriores de {url}: {e}", exc_info=True)
+            return []
+
+
+def compile_listing_spec(spec: Dict[str, Any]) -> CompiledListingSpec:
+    """
+    Compila una especificación de "Concursos anteriores"
+    
+    Args:
+        spec: Especificación declarativa (ver claves en el docstring del módulo)
+    
+    Returns:
+        Especificación compilada
+    """
+    return CompiledListingSpec(spec)
+
+
+class SpecExtractor(BaseExtractor):
+    """
+    Extractor de "Concursos anteriores" definido por una especificación declarativa
+    
+    Las subclases solo definen SPEC; se compila una vez por clase, al primer uso.
+    """
+    
+    SPEC: Dict[str, Any] = {}
+    _compiled: Optional[CompiledListingSpec] = None
+    
+    @classmethod
+    def compiled_spec(cls) -> CompiledListingSpec:
+        """Especificación compilada de la clase"""
+        if cls.__dict__.get("_compiled") is None:
+            cls._compiled = compile_listing_spec(cls.SPEC)
+        return cls._compiled
+    
+    def extract_previous_concursos(
+        self,
+        html: str,
+        url: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Extrae "Concursos anteriores" según SPEC.
+        
+        Args:
+            html: Contenido HTML de la página del concurso
+            url: URL de la página (para logging)
+        
+        Returns:
+            Lista de diccionarios con información de concursos anteriores
+        """
+        return self.compiled_spec().extract(html, url)
@@ -675,13 +675,15 @@ def save_debug_info(debug_data: Dict[str, Any]) -> str:
     return filepath
 
 
-def save_predictions(site: str, predictions: List[Dict[str, Any]]) -> str:
+def save_predictions(site: str, predictions: List[Dict[str, Any]], replace_existing: bool = False) -> str:
     """
     Guarda predicciones de concursos en un archivo JSON único por sitio.
     
     Args:
         site: Nombre del sitio (ej: "anid.cl")
         predictions: Lista de diccionarios con predicciones
+        replace_existing: Si True, una predicción nueva reemplaza a la guardada con la misma URL
+            (p. ej. al recalcular porque cambió la evidencia); si False, se conserva la existente
         
     Returns:
         Ruta del archivo guardado
@@ -707,6 +709,9 @@ def save_predictions(site: str, predictions: List[Dict[str, Any]]) -> str:
             pass
     
     # Combinar predicciones (evitar duplicados por URL)
+    if replace_existing:
+        new_urls = {p.get("concurso_url") for p in predictions if p.get("concurso_url")}
+        existing_predictions = [p for p in existing_predictions if p.get("concurso_url") not in new_urls]
     existing_urls = {p.get("concurso_url") for p in existing_predictions if p.get("concurso_url")}
     
     for pred in predictions:
@@ -732,13 +737,20 @@ def save_predictions(site: str, predictions: List[Dict[str, Any]]) -> str:
     return filepath
 
 
-def save_unpredictable_concursos(site: str, unpredictable_concursos: List[Dict[str, Any]]) -> str:
+def save_unpredictable_concursos(
+    site: str,
+    unpredictable_concursos: List[Dict[str, Any]],
+    replace_existing: bool = False
+) -> str:
     """
     Guarda concursos no predecibles en un archivo JSON único por sitio.
     
     Args:
         site: Nombre del sitio (ej: "anid.cl")
         unpredictable_concursos: Lista de diccionarios con concursos no predecibles
+        replace_existing: Si True, una entrada nueva reemplaza a la guardada con la misma URL
+            (p. ej. un error transitorio de batch que ahora es un rechazo del LLM); si False,
+            se conserva la existente
         
     Returns:
         Ruta del archivo guardado
@@ -764,6 +776,9 @@ def save_unpredictable_concursos(site: str, unpredictable_concursos: List[Dict[s
             pass
     
     # Combinar (evitar duplicados por URL)
+    if replace_existing:
+        new_urls = {u.get("concurso_url") for u in unpredictable_concursos if u.get("concurso_url")}
+        existing_unpredictable = [u for u in existing_unpredictable if u.get("concurso_url") not in new_urls]
     existing_urls = {u.get("concurso_url") for u in existing_unpredictable if u.get("concurso_url")}
     
     for unpred in unpredictable_concursos:
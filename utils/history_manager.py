@@ -17,6 +17,13 @@ from pathlib import Path
 from urllib.parse import urlparse
 
 from models import Concurso
+from utils.change_events import (
+    EVENT_CLOSED,
+    EVENT_NEW_CONCURSO,
+    EVENT_NEW_PREVIOUS_CONCURSOS,
+    get_change_event_queue
+)
+from utils.estado_engine import build_date_columns
 # Eliminado uso de similitud; solo comparación por URL
 
 logger = logging.getLogger(__name__)
@@ -42,6 +49,10 @@ class HistoryManager:
         # Caché simple en memoria para evitar recargas innecesarias del mismo historial
         # Estructura: { site: { "history": dict, "last_loaded": datetime.isoformat() } }
         self._cache: Dict[str, Dict[str, Any]] = {}
+        
+        # Eventos de cambio detectados por update_history, pendientes de publicar al guardar
+        # Estructura: { site: [ {"url", "nombre", "event_type", "detected_at"}, ... ] }
+        self._pending_events: Dict[str, List[Dict[str, Any]]] = {}
     
     def _get_site_from_url(self, url: str) -> str:
         """
@@ -139,11 +150,60 @@ class HistoryManager:
             logger.info(f"💾 Historial guardado para {site}: {len(history.get('concursos', []))} concursos")
             # Actualizar caché para que futuros load_history() no tengan que re-leer de disco
             self._cache[site] = {"history": history, "last_loaded": datetime.now().isoformat()}
+            self._publish_change_events(site)
             return filepath
         except Exception as e:
             logger.error(f"Error al guardar historial de {site}: {e}", exc_info=True)
             raise
     
+    def get_date_columns(self, site: str) -> Dict[str, Any]:
+        """
+        Columnas de fechas y estados del historial de un sitio (ver utils.estado_engine).
+        
+        Las fechas se parsean una sola vez y se cachean junto al historial en memoria;
+        se recalculan cuando el historial cambia (guardado o recarga).
+        
+        Args:
+            site: Nombre del sitio
+            
+        Returns:
+            Diccionario de arreglos NumPy alineados con history["concursos"]
+        """
+        history = self.load_history(site)
+        cached = self._cache.setdefault(site, {"history": history})
+        key = (id(history), len(history.get("concursos", [])), history.get("last_updated"))
+        if cached.get("date_columns_key") != key:
+            cached["date_columns"] = build_date_columns(history)
+            cached["date_columns_key"] = key
+        return cached["date_columns"]
+    
+    def _publish_change_events(self, site: str) -> None:
+        """
+        Publica en la cola de eventos los cambios detectados desde el último guardado.
+        
+        Args:
+            site: Nombre del sitio
+        """
+        events = self._pending_events.pop(site, [])
+        if not events:
+            return
+        try:
+            queue = get_change_event_queue()
+            if queue is None:
+                return
+            published = queue.publish(site, events)
+            logger.info(f"📣 {published} eventos de cambio publicados para {site}")
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron publicar los eventos de cambio de {site}: {e}")
+    
+    @staticmethod
+    def _previous_concursos_keys(previous_concursos: List[Dict[str, Any]]) -> Set[Tuple[str, str]]:
+        """Claves (url, nombre) de una lista de concursos anteriores"""
+        return {
+            ((p.get("url") or "").strip(), (p.get("nombre") or "").lower().strip())
+            for p in previous_concursos or []
+        }
+    
     def _normalize_concurso_key(self, concurso: Concurso) -> Tuple[str, str]:
         """
         Genera una clave normalizada para identificar un concurso.
@@ -237,6 +297,10 @@ class HistoryManager:
         """
         Actualiza el historial con nuevos concursos y versiones.
         
+        Los cambios relevantes para predicción (concurso nuevo, paso a "Cerrado",
+        concursos anteriores nuevos) se registran como eventos y se publican en la
+        cola de eventos (utils.change_events) al guardar el historial.
+        
         Args:
             site: Nombre del sitio
             concursos: Lista de concursos a agregar/actualizar
@@ -266,6 +330,15 @@ class HistoryManager:
         
         # Procesar cada concurso
         detected_at = datetime.now().isoformat()
+        change_events = self._pending_events.setdefault(site, [])
+        
+        def emit(event_type: str, concurso_dict: Dict[str, Any]) -> None:
+            change_events.append({
+                "url": (concurso_dict.get("url") or "").strip(),
+                "nombre": concurso_dict.get("nombre"),
+                "event_type": event_type,
+                "detected_at": detected_at
+            })
         
         for concurso in concursos:
             key = self._normalize_concurso_key(concurso)
@@ -301,6 +374,9 @@ class HistoryManager:
                 
                 # Agregar nueva versión solo si es diferente a la última
                 versions = hist_concurso.get("versions", [])
+                previous_estado = versions[-1].get("estado") if versions else hist_concurso.get("estado")
+                if concurso_dict.get("estado") == "Cerrado" and previous_estado != "Cerrado":
+                    emit(EVENT_CLOSED, concurso_dict)
                 if versions:
                     last_version = versions[-1]
                     # Comparar fechas y estado para detectar cambios
@@ -345,6 +421,10 @@ class HistoryManager:
                     hist_concurso["latest_page_content_updated"] = detected_at
                 
                 # Guardar concursos anteriores (SIEMPRE, incluso si está vacío para indicar que ya se procesó)
+                if self._previous_concursos_keys(previous_concursos) - self._previous_concursos_keys(
+                    hist_concurso.get("previous_concursos", [])
+                ):
+                    emit(EVENT_NEW_PREVIOUS_CONCURSOS, concurso_dict)
                 hist_concurso["previous_concursos"] = previous_concursos  # Puede ser [] si no tiene versiones anteriores
                 hist_concurso["previous_concursos_updated"] = detected_at
                 
@@ -399,9 +479,96 @@ class HistoryManager:
                 new_entry["previous_concursos_updated"] = detected_at
                 
                 history["concursos"].append(new_entry)
+                emit(EVENT_NEW_CONCURSO, concurso_dict)
         
         return history
     
+    def get_listing_segment_hashes(self, site: str) -> Dict[str, str]:
+        """
+        Retorna los hashes de los items de listado vistos en la última extracción.
+        
+        Args:
+            site: Nombre del sitio
+        
+        Returns:
+            Diccionario {url_concurso: hash_del_item}
+        """
+        history = self.load_history(site)
+        return {
+            url: entry.get("hash")
+            for url, entry in history.get("listing_segments", {}).items()
+            if entry.get("hash")
+        }
+    
+    def set_listing_segment_hashes(self, site: str, hashes: Dict[str, str]) -> None:
+        """
+        Registra los hashes de items de listado en el historial (en memoria).
+        
+        Los cambios se persisten con el siguiente save_history del sitio.
+        
+        Args:
+            site: Nombre del sitio
+            hashes: Diccionario {url_concurso: hash_del_item}
+        """
+        if not hashes:
+            return
+        history = self.load_history(site)
+        segments = history.setdefault("listing_segments", {})
+        updated_at = datetime.now().isoformat()
+        for url, segment_hash in hashes.items():
+            entry = segments.get(url)
+            if entry and entry.get("hash") == segment_hash:
+                continue
+            segments[url] = {"hash": segment_hash, "updated_at": updated_at}
+    
+    def add_listing_version(self, site: str, concurso: Concurso) -> bool:
+        """
+        Agrega una versión a un concurso existente a partir de su item de listado.
+        
+        Se usa cuando el item del listado cambió (hash distinto) para un concurso que
+        ya está en el historial. A diferencia de update_history, no toca el contenido
+        de la página ni los "concursos anteriores" (no se scrapea la página individual).
+        
+        Args:
+            site: Nombre del sitio
+            concurso: Concurso extraído desde el item de listado modificado
+        
+        Returns:
+            True si se agregó una versión nueva, False si no hubo cambios o no existe
+        """
+        history = self.load_history(site)
+        concurso_url = (concurso.url or "").strip()
+        for hist_concurso in history.get("concursos", []):
+            if (hist_concurso.get("url") or "").strip() != concurso_url:
+                continue
+            
+            versions = hist_concurso.setdefault("versions", [])
+            last_version = versions[-1] if versions else {}
+            estado = concurso.estado
+            if "concurso-suspendido" in concurso_url:
+                estado = "Suspendido"
+            
+            detected_at = datetime.now().isoformat()
+            hist_concurso["last_seen"] = detected_at
+            
+            if (last_version.get("fecha_apertura") == concurso.fecha_apertura and
+                last_version.get("fecha_cierre") == concurso.fecha_cierre and
+                last_version.get("estado") == estado):
+                return False
+            
+            versions.append({
+                "fecha_apertura": concurso.fecha_apertura or last_version.get("fecha_apertura"),
+                "fecha_cierre": concurso.fecha_cierre or last_version.get("fecha_cierre"),
+                "estado": estado or last_version.get("estado"),
+                "financiamiento": concurso.financiamiento or last_version.get("financiamiento"),
+                "descripcion": concurso.descripcion or last_version.get("descripcion"),
+                "subdireccion": concurso.subdireccion or last_version.get("subdireccion"),
+                "detected_at": detected_at,
+                "source": "listing_diff"
+            })
+            return True
+        return False
+    
     def fix_suspended_concursos_by_url(self, site: str) -> Dict[str, Any]:
         """
         Corrige concursos existentes en el historial que tienen "concurso-suspendido" 
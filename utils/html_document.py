@@ -0,0 +1,111 @@
+"""
+Documento HTML parseado una sola vez por página
+
+HtmlDocument es un str (se guarda, serializa y concatena como el HTML original) que
+parsea su contenido a demanda y reutiliza el árbol en todos los extractores:
+sanitize_html, extract_concurso_urls_from_html, extract_listing_segments,
+extract_previous_concursos_from_html y la extracción determinística de nombre/fechas.
+
+El parser es siempre html.parser: lxml (que crawl4ai instala) arma árboles distintos
+para HTML mal formado y cambiaría la salida de sanitize_html y de los extractores,
+cuya equivalencia se verificó solo con html.parser.
+
+Los resultados de scraping guardan el HTML como HtmlDocument, de modo que cada
+página se parsea una vez aunque la lean varios extractores. El árbol compartido
+es de solo lectura; quien necesite modificarlo (sanitize_html) usa take_soup().
+Como los resultados siguen en memoria durante la corrida, el árbol se libera con
+release() cuando termina el post-procesamiento de la página.
+"""
+
+import logging
+from typing import Optional, Union
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+HTML_PARSER = "html.parser"
+
+
+class HtmlDocument(str):
+    """HTML de una página con su árbol BeautifulSoup parseado a demanda y cacheado"""
+    
+    _soup: Optional[BeautifulSoup] = None
+    
+    @property
+    def soup(self) -> BeautifulSoup:
+        """Árbol parseado (compartido: no modificar)"""
+        if self._soup is None:
+            self._soup = parse_html(str(self))
+        return self._soup
+    
+    @property
+    def is_parsed(self) -> bool:
+        """True si el árbol ya está parseado"""
+        return self._soup is not None
+    
+    def take_soup(self) -> BeautifulSoup:
+        """
+        Entrega el árbol para modificarlo; el documento deja de cachearlo
+        (si se vuelve a pedir .soup, se parsea de nuevo)
+        """
+        soup = self.soup
+        self._soup = None
+        return soup
+    
+    def release(self) -> None:
+        """Descarta el árbol cacheado (el HTML se conserva; si se vuelve a pedir .soup, se parsea de nuevo)"""
+        self._soup = None
+    
+    def __reduce__(self):
+        # Al serializar (pickle) se envía solo el HTML, no el árbol
+        return (HtmlDocument, (str(self),))
+
+
+def parse_html(html: str, parser: Optional[str] = None) -> BeautifulSoup:
+    """
+    Parsea HTML con el parser indicado o HTML_PARSER
+    
+    Args:
+        html: HTML a parsear
+        parser: Parser de BeautifulSoup (por defecto HTML_PARSER)
+    
+    Returns:
+        Árbol BeautifulSoup
+    """
+    try:
+        return BeautifulSoup(html, parser or HTML_PARSER)
+    except Exception as e:
+        if (parser or HTML_PARSER) == "html.parser":
+            raise
+        logger.debug(f"Parser {parser or HTML_PARSER} falló, usando html.parser: {e}")
+        return BeautifulSoup(html, "html.parser")
+
+
+def as_html_document(html: Union[str, HtmlDocument, None]) -> HtmlDocument:
+    """Envuelve un HTML en HtmlDocument (sin copiar el árbol si ya lo es)"""
+    if isinstance(html, HtmlDocument):
+        return html
+    return HtmlDocument(html or "")
+
+
+def get_soup(html: Union[str, HtmlDocument]) -> BeautifulSoup:
+    """
+    Árbol de solo lectura de un HTML: el cacheado si es HtmlDocument, si no uno nuevo
+    
+    Args:
+        html: HTML (str o HtmlDocument)
+    
+    Returns:
+        Árbol BeautifulSoup
+    """
+    if isinstance(html, HtmlDocument):
+        return html.soup
+    return parse_html(html)
+
+
+def get_mutable_soup(html: Union[str, HtmlDocument]) -> BeautifulSoup:
+    """Árbol que el llamador puede modificar (toma el cacheado si es HtmlDocument)"""
+    if isinstance(html, HtmlDocument):
+        return html.take_soup()
+    return parse_html(html)
@@ -3,8 +3,231 @@ Sanitizador de HTML para eliminar código superfluo antes de enviar al LLM
 """
 
 import re
-from bs4 import BeautifulSoup
-from typing import Optional
+import logging
+from typing import List
+from bs4 import BeautifulSoup, CData, Comment, NavigableString, Tag
+from utils.html_document import get_mutable_soup
+
+logger = logging.getLogger(__name__)
+
+
+# Fase en la que el sanitizador original eliminaba cada nodo. Las reglas de texto
+# (aside, header/nav, footer, form) y la de elementos vacíos miran el árbol tal como
+# quedaba tras las fases anteriores; el recorrido único las reproduce sabiendo, para
+# cada string y elemento, en qué fase lo elimina alguno de sus ancestros.
+_PHASE_BASIC = 1       # head, scripts, estilos, links, comentarios, imágenes de tracking
+_PHASE_ASIDE = 2
+_PHASE_HEADER = 3
+_PHASE_FOOTER = 4
+_PHASE_FORM = 5
+_PHASE_EMPTY = 6       # elementos vacíos (después de limpiar atributos)
+_KEPT = 7
+
+_BASIC_TAGS = frozenset(['script', 'noscript', 'iframe', 'embed', 'object', 'style', 'link'])
+_EMPTY_CANDIDATES = frozenset(['div', 'span', 'p', 'li', 'td', 'th'])
+_CONTENT_TAGS = frozenset(['img', 'a', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'li', 'article', 'section', 'strong', 'em', 'b', 'i'])
+_FORM_CONTAINERS = frozenset(['header', 'nav', 'footer'])
+_TRACKERS = ('pixel', 'track', 'analytics', 'beacon', '1x1', 'spacer')
+_ASIDE_KEYWORDS = ('concurso', 'postulacion', 'fecha', 'cierre', 'apertura')
+_HEADER_KEYWORDS = ('concurso', 'postulacion', 'fecha', 'cierre')
+_IMPORTANT_ATTRS = frozenset(['id', 'class', 'href', 'src', 'alt', 'title'])
+_SEMANTIC_CLASS_KEYWORDS = (
+    'concurso', 'postulacion', 'fecha', 'cierre', 'apertura', 'fallo', 'resultado',
+    'title', 'heading', 'content', 'main', 'article',
+    'card', 'item', 'list', 'date', 'time', 'status',
+    'grid', 'row', 'col'
+)
+# Tipos de string que cuenta get_text() (excluye comentarios, scripts, estilos, templates)
+_TEXT_TYPES = (NavigableString, CData)
+
+_SPACES_RE = re.compile(r'[ \t]+')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+_LEADING_SPACES_RE = re.compile(r'\n\s+')
+_TRAILING_SPACES_RE = re.compile(r'\s+\n')
+
+
+def _is_tracking_img(tag: Tag) -> bool:
+    """Imagen decorativa o de tracking"""
+    src = tag.get('src', '').lower()
+    alt = tag.get('alt', '').lower()
+    return any(tracker in src for tracker in _TRACKERS) or \
+        (not alt and not src) or \
+        ('icon' in src and 'logo' not in src)
+
+
+def _clean_attrs(tag: Tag) -> None:
+    """Deja solo los atributos esenciales y las clases relevantes para concursos"""
+    for attr in list(tag.attrs.keys()):
+        # Elimina data-*, style y cualquier otro atributo no importante
+        if attr not in _IMPORTANT_ATTRS:
+            del tag.attrs[attr]
+    
+    classes = tag.attrs.get('class')
+    if isinstance(classes, list):
+        semantic_classes = [
+            cls for cls in classes
+            if any(keyword in cls.lower() for keyword in _SEMANTIC_CLASS_KEYWORDS)
+        ]
+        tag.attrs['class'] = semantic_classes if semantic_classes else None
+
+
+def _sanitize_tree(soup: BeautifulSoup) -> None:
+    """
+    Aplica todas las reglas de sanitize_html al árbol con un solo recorrido
+    
+    1. Recorre el árbol una vez (orden de documento) registrando elementos y strings,
+       el rango de descendientes de cada elemento y si está dentro de header/nav/footer.
+    2. Decide la fase de eliminación de cada elemento de abajo hacia arriba: al evaluar
+       un elemento ya se conoce la de todos sus descendientes, así que su texto "vivo"
+       en esa fase es el de los strings que ningún descendiente eliminó antes.
+    3. Aplica los cambios: limpia atributos, extrae comentarios y strings de solo
+       puntuación, y elimina los elementos marcados.
+    """
+    tags: List[Tag] = []
+    parent_of: List[int] = []
+    tag_end: List[int] = []
+    string_start: List[int] = []
+    string_end: List[int] = []
+    in_container: List[bool] = []
+    strings: List[NavigableString] = []
+    string_parent: List[int] = []
+    has_text: List[bool] = []
+    head_index = -1
+    
+    open_tags: List[int] = []
+    for node in soup.descendants:
+        parent = node.parent
+        while open_tags and tags[open_tags[-1]] is not parent:
+            closed = open_tags.pop()
+            tag_end[closed] = len(tags)
+            string_end[closed] = len(strings)
+        parent_index = open_tags[-1] if open_tags else -1
+        if isinstance(node, Tag):
+            index = len(tags)
+            tags.append(node)
+            parent_of.append(parent_index)
+            tag_end.append(0)
+            string_start.append(len(strings))
+            string_end.append(0)
+            in_container.append(parent_index >= 0 and (
+                in_container[parent_index] or tags[parent_index].name in _FORM_CONTAINERS
+            ))
+            has_text.append(False)
+            if head_index < 0 and node.name == 'head':
+                head_index = index
+            open_tags.append(index)
+        else:
+            strings.append(node)
+            string_parent.append(parent_index)
+            if parent_index >= 0 and type(node) in _TEXT_TYPES and node.strip():
+                has_text[parent_index] = True
+    for closed in open_tags:
+        tag_end[closed] = len(tags)
+        string_end[closed] = len(strings)
+    
+    n_tags = len(tags)
+    phase = [_KEPT] * n_tags
+    # Fase en que un ancestor (o el propio elemento) elimina cada elemento/string;
+    # solo se registran las fases que afectan a reglas de texto posteriores
+    tag_killed = [_KEPT] * n_tags
+    string_killed = [_KEPT] * len(strings)
+    has_content = [False] * n_tags
+    
+    def live_text(index: int, at_phase: int) -> str:
+        return "".join(
+            strings[i] for i in range(string_start[index], string_end[index])
+            if string_killed[i] >= at_phase and type(strings[i]) in _TEXT_TYPES
+        ).lower()
+    
+    def has_concurso_link(index: int, at_phase: int) -> bool:
+        for i in range(index + 1, tag_end[index]):
+            tag = tags[i]
+            if tag_killed[i] >= at_phase and tag.name == 'a' and tag.get('href') is not None and \
+               'concurso' in tag.get('href', '').lower():
+                return True
+        return False
+    
+    for index in range(n_tags - 1, -1, -1):
+        tag = tags[index]
+        name = tag.name
+        removed_at = _KEPT
+        
+        if index == head_index or name in _BASIC_TAGS or (name == 'img' and _is_tracking_img(tag)):
+            removed_at = _PHASE_BASIC
+        elif name == 'aside':
+            # Sidebars sin contenido relevante
+            text = live_text(index, _PHASE_ASIDE)
+            if not any(keyword in text for keyword in _ASIDE_KEYWORDS):
+                removed_at = _PHASE_ASIDE
+        elif name == 'header' or name == 'nav':
+            # Solo se mantienen si tienen contenido específico de concursos
+            text = live_text(index, _PHASE_HEADER)
+            if not any(keyword in text for keyword in _HEADER_KEYWORDS) and \
+               not has_concurso_link(index, _PHASE_HEADER):
+                removed_at = _PHASE_HEADER
+        elif name == 'footer':
+            if not has_concurso_link(index, _PHASE_FOOTER):
+                removed_at = _PHASE_FOOTER
+        elif name == 'form':
+            # Formularios de búsqueda o dentro de header/nav/footer
+            if in_container[index]:
+                removed_at = _PHASE_FORM
+            else:
+                text = live_text(index, _PHASE_FORM)
+                if 'search' in text or 'buscar' in text:
+                    removed_at = _PHASE_FORM
+        # (La antigua regla de widgets sociales nunca eliminaba nada: su filtro de
+        # clases recibía cada clase como string y ' '.join separaba sus letras)
+        elif name in _EMPTY_CANDIDATES:
+            # Vacío: sin texto, sin hijos con contenido relevante y sin id/class
+            if not has_text[index] and not has_content[index] and \
+               'id' not in tag.attrs and 'class' not in tag.attrs:
+                removed_at = _PHASE_EMPTY
+        
+        phase[index] = removed_at
+        if removed_at <= _PHASE_FORM:
+            for i in range(index, tag_end[index]):
+                if tag_killed[i] > removed_at:
+                    tag_killed[i] = removed_at
+            for i in range(string_start[index], string_end[index]):
+                if string_killed[i] > removed_at:
+                    string_killed[i] = removed_at
+        
+        # Lo que ve la regla de elementos vacíos del padre
+        parent_index = parent_of[index]
+        if parent_index >= 0 and removed_at >= _PHASE_EMPTY:
+            if has_text[index]:
+                has_text[parent_index] = True
+            if has_content[index] or name in _CONTENT_TAGS:
+                has_content[parent_index] = True
+    
+    # Aplicar cambios sobre lo que sobrevive; se eliminan solo las raíces de cada subárbol
+    removed = [False] * n_tags
+    to_decompose: List[Tag] = []
+    for index in range(n_tags):
+        parent_index = parent_of[index]
+        if parent_index >= 0 and removed[parent_index]:
+            removed[index] = True
+        elif phase[index] != _KEPT:
+            removed[index] = True
+            to_decompose.append(tags[index])
+        elif tags[index].attrs:
+            _clean_attrs(tags[index])
+    
+    for i, string in enumerate(strings):
+        parent_index = string_parent[i]
+        if parent_index >= 0 and removed[parent_index]:
+            continue
+        if isinstance(string, Comment):
+            string.extract()
+            continue
+        # Strings muy cortos que probablemente son solo espacios/puntuación
+        stripped = string.strip()
+        if stripped and len(stripped) < 3 and not any(char.isalnum() for char in stripped):
+            string.extract()
+    
+    for tag in to_decompose:
+        tag.decompose()
 
 
 def sanitize_html(html: str, preserve_structure: bool = True) -> str:
@@ -12,10 +235,12 @@ def sanitize_html(html: str, preserve_structure: bool = True) -> str:
     Sanitiza HTML eliminando elementos innecesarios para análisis con LLM
     Optimizado para reducir significativamente el tamaño del HTML
     
+    Todas las reglas se aplican en un solo recorrido del árbol (ver _sanitize_tree)
+    
     Args:
-        html: HTML crudo a sanitizar
+        html: HTML crudo a sanitizar (si es HtmlDocument se reutiliza su árbol ya parseado)
         preserve_structure: Si True, mantiene la estructura semántica (headers, lists, etc.)
-        
+    
     Returns:
         HTML sanitizado
     """
@@ -23,149 +248,20 @@ def sanitize_html(html: str, preserve_structure: bool = True) -> str:
         return ""
     
     try:
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Eliminar TODO el <head> (no necesitamos title para análisis)
-        if soup.head:
-            soup.head.decompose()
-        
-        # Eliminar scripts, noscript, iframes (tracking, ads, etc.)
-        for element in soup.find_all(['script', 'noscript', 'iframe', 'embed', 'object']):
-            element.decompose()
-        
-        # Eliminar estilos inline y tags style
-        for style in soup.find_all('style'):
-            style.decompose()
-        
-        # Eliminar todos los <link> tags (CSS, favicons, etc.)
-        for link in soup.find_all('link'):
-            link.decompose()
-        
-        # Eliminar comentarios HTML
-        from bs4 import Comment
-        for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
-            comment.extract()
-        
-        # Eliminar elementos de tracking y analytics
-        for element in soup.find_all(['img']):
-            # Eliminar imágenes que son claramente decorativas o de tracking
-            src = element.get('src', '').lower()
-            alt = element.get('alt', '').lower()
-            if any(tracker in src for tracker in ['pixel', 'track', 'analytics', 'beacon', '1x1', 'spacer']) or \
-               (not alt and not src) or \
-               ('icon' in src and 'logo' not in src):
-                element.decompose()
-        
-        # Eliminar elementos de redes sociales y widgets
-        for element in soup.find_all(['aside']):
-            # Eliminar sidebars que no tienen contenido relevante
-            text = element.get_text().lower()
-            if not any(keyword in text for keyword in ['concurso', 'postulacion', 'fecha', 'cierre', 'apertura']):
-                element.decompose()
-        
-        # Eliminar headers y navegación (generalmente no tienen contenido de concursos)
-        for header in soup.find_all(['header', 'nav']):
-            text = header.get_text().lower()
-            links = header.find_all('a', href=True)
-            # Solo mantener si tiene contenido específico de concursos
-            if not any(keyword in text for keyword in ['concurso', 'postulacion', 'fecha', 'cierre']) and \
-               not any('concurso' in link.get('href', '').lower() for link in links):
-                header.decompose()
-        
-        # Eliminar footers completos
-        for footer in soup.find_all('footer'):
-            links = footer.find_all('a', href=True)
-            if not any('concurso' in link.get('href', '').lower() for link in links):
-                footer.decompose()
-        
-        # Eliminar formularios de búsqueda y otros formularios no relevantes
-        for form in soup.find_all('form'):
-            parent = form.find_parent(['header', 'nav', 'footer'])
-            form_text = form.get_text().lower()
-            if parent or ('search' in form_text or 'buscar' in form_text):
-                form.decompose()
-        
-        # Eliminar elementos de redes sociales (iconos, botones, etc.)
-        for element in soup.find_all(['a', 'div', 'span'], class_=lambda x: x and any(
-            social in ' '.join(x).lower() for social in ['social', 'facebook', 'twitter', 'instagram', 'youtube', 'linkedin']
-        )):
-            # Solo eliminar si no tiene contenido de concursos
-            if 'concurso' not in element.get_text().lower():
-                element.decompose()
-        
-        # Eliminar atributos innecesarios (mantener solo los esenciales)
-        important_attrs = {'id', 'class', 'href', 'src', 'alt', 'title'}
-        
-        for tag in soup.find_all():
-            if tag.attrs:
-                attrs_to_remove = []
-                for attr in list(tag.attrs.keys()):
-                    # Eliminar TODOS los atributos data-*
-                    if attr.startswith('data-'):
-                        attrs_to_remove.append(attr)
-                    # Eliminar atributos de estilo inline
-                    elif attr == 'style':
-                        attrs_to_remove.append(attr)
-                    # Eliminar otros atributos no importantes
-                    elif attr not in important_attrs:
-                        attrs_to_remove.append(attr)
-                
-                for attr in attrs_to_remove:
-                    del tag.attrs[attr]
-                
-                # Limpiar valores de class - mantener SOLO clases muy relevantes
-                if 'class' in tag.attrs:
-                    classes = tag.attrs['class']
-                    if isinstance(classes, list):
-                        semantic_classes = []
-                        for cls in classes:
-                            # Mantener SOLO clases que son claramente relevantes para concursos
-                            if any(keyword in cls.lower() for keyword in [
-                                'concurso', 'postulacion', 'fecha', 'cierre', 'apertura', 'fallo', 'resultado',
-                                'title', 'heading', 'content', 'main', 'article',
-                                'card', 'item', 'list', 'date', 'time', 'status',
-                                'grid', 'row', 'col'
-                            ]):
-                                semantic_classes.append(cls)
-                        tag.attrs['class'] = semantic_classes if semantic_classes else None
-        
-        # Eliminar elementos vacíos o con solo whitespace
-        for tag in soup.find_all(['div', 'span', 'p', 'li', 'td', 'th']):
-            text = tag.get_text(strip=True)
-            # Si no tiene texto y no tiene hijos con contenido relevante
-            if not text:
-                children_with_content = tag.find_all(['img', 'a', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'li', 'article', 'section', 'strong', 'em', 'b', 'i'])
-                if not children_with_content:
-                    # Solo eliminar si no tiene atributos importantes
-                    if not any(attr in tag.attrs for attr in ['id', 'class']):
-                        tag.decompose()
-        
-        # Eliminar elementos con solo espacios o caracteres especiales
-        for tag in soup.find_all(string=True):
-            if isinstance(tag, str) and tag.strip() and len(tag.strip()) < 3:
-                # Eliminar strings muy cortos que probablemente son solo espacios/puntuación
-                if not any(char.isalnum() for char in tag.strip()):
-                    tag.extract()
+        soup = get_mutable_soup(html)
+        _sanitize_tree(soup)
         
         # Limpiar espacios múltiples y saltos de línea excesivos
         result = str(soup)
-        
-        # Reducir espacios en blanco múltiples (más agresivo)
-        result = re.sub(r'[ \t]+', ' ', result)
-        
-        # Limpiar saltos de línea múltiples
-        result = re.sub(r'\n\s*\n+', '\n', result)
-        
-        # Eliminar espacios al inicio y final de líneas
-        result = re.sub(r'\n\s+', '\n', result)
-        result = re.sub(r'\s+\n', '\n', result)
+        result = _SPACES_RE.sub(' ', result)
+        result = _BLANK_LINES_RE.sub('\n', result)
+        result = _LEADING_SPACES_RE.sub('\n', result)
+        result = _TRAILING_SPACES_RE.sub('\n', result)
         
         return result.strip()
-        
+    
     except Exception as e:
         # Si falla el parsing, retornar HTML original
-        import logging
-        logger = logging.getLogger(__name__)
         logger.warning(f"Error al sanitizar HTML: {e}. Retornando HTML original.")
         return html
 
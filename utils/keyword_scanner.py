@@ -0,0 +1,158 @@
+"""
+Búsqueda de varias palabras clave en una sola pasada sobre el texto
+
+KeywordScanner se construye una vez a partir de grupos de palabras clave
+({"grupo": [palabras]}) y responde qué grupos aparecen en un texto:
+- Con pyahocorasick (requirements.txt), un autómata Aho–Corasick que recorre el
+  texto una sola vez, en vez de un `palabra in texto` por palabra y por grupo
+- Si no está instalado, búsquedas literales por palabra (`in` / str.find), que
+  para los grupos chicos de config.sites son más rápidas que una regex combinada
+
+La comparación no distingue mayúsculas (palabras y texto se pasan a minúsculas).
+get_keyword_scanner(sitio) arma y cachea el escáner de un sitio con los grupos de
+config.sites (DEFAULT_KEYWORD_GROUPS, "keyword_groups" y known_subdirecciones).
+"""
+
+import logging
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+from config.sites import DEFAULT_KEYWORD_GROUPS, get_site_config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class KeywordScanner:
+    """
+    Escáner de grupos de palabras clave (se construye una vez y se reutiliza)
+    """
+    
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        """
+        Args:
+            groups: {"grupo": [palabras clave]} (las palabras vacías se ignoran)
+        """
+        keyword_groups: Dict[str, Set[str]] = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                keyword = (keyword or "").lower()
+                if keyword:
+                    keyword_groups.setdefault(keyword, set()).add(group)
+        self.groups: FrozenSet[str] = frozenset(groups)
+        self._keyword_groups = {keyword: frozenset(found) for keyword, found in keyword_groups.items()}
+        self._group_keywords: Dict[str, Tuple[str, ...]] = {
+            group: tuple(keyword for keyword, found in self._keyword_groups.items() if group in found)
+            for group in self.groups
+        }
+        
+        self._automaton = None
+        if self._keyword_groups and ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self._keyword_groups:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+    
+    def _hits(self, text: str) -> Iterator[Tuple[int, str]]:
+        """(inicio, palabra) de cada ocurrencia, incluidas las superpuestas"""
+        if self._automaton is not None:
+            for end, keyword in self._automaton.iter(text):
+                yield end - len(keyword) + 1, keyword
+            return
+        for keyword in self._keyword_groups:
+            start = text.find(keyword)
+            while start != -1:
+                yield start, keyword
+                start = text.find(keyword, start + 1)
+    
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Todas las ocurrencias de las palabras clave (incluidas las superpuestas)
+        
+        Args:
+            text: Texto a recorrer
+        
+        Returns:
+            Lista ordenada de (posición en el texto en minúsculas, palabra)
+        """
+        if not text:
+            return []
+        return sorted(self._hits(text.lower()))
+    
+    def scan(self, text: str) -> Set[str]:
+        """
+        Grupos con al menos una palabra clave en el texto
+        
+        Args:
+            text: Texto a recorrer
+        
+        Returns:
+            Conjunto de grupos encontrados
+        """
+        found: Set[str] = set()
+        if not text:
+            return found
+        text = text.lower()
+        if self._automaton is not None:
+            for _, keyword in self._automaton.iter(text):
+                found |= self._keyword_groups[keyword]
+                if len(found) == len(self.groups):
+                    break
+            return found
+        for keyword, groups in self._keyword_groups.items():
+            if not groups <= found and keyword in text:
+                found |= groups
+        return found
+    
+    def contains(self, text: str, group: str) -> bool:
+        """
+        True si alguna palabra clave del grupo aparece en el texto (se detiene en la primera)
+        
+        Args:
+            text: Texto a recorrer
+            group: Grupo de palabras clave
+        
+        Returns:
+            True si el grupo aparece en el texto
+        """
+        keywords = self._group_keywords.get(group)
+        if not text or not keywords:
+            return False
+        text = text.lower()
+        if self._automaton is not None:
+            return any(group in self._keyword_groups[keyword] for _, keyword in self._automaton.iter(text))
+        return any(keyword in text for keyword in keywords)
+
+
+@lru_cache(maxsize=None)
+def _site_scanner(site: str) -> KeywordScanner:
+    site_config = get_site_config(site) if site else {}
+    groups: Dict[str, Set[str]] = {group: set(keywords) for group, keywords in DEFAULT_KEYWORD_GROUPS.items()}
+    for group, keywords in (site_config.get("keyword_groups") or {}).items():
+        groups.setdefault(group, set()).update(keywords)
+    groups["subdireccion"] = set(site_config.get("known_subdirecciones") or ())
+    return KeywordScanner(groups)
+
+
+def get_keyword_scanner(site_or_url: Optional[str] = None) -> KeywordScanner:
+    """
+    Escáner de palabras clave de un sitio (se construye una vez por sitio)
+    
+    Grupos: los de DEFAULT_KEYWORD_GROUPS, más las palabras de "keyword_groups" del
+    sitio en SITE_CONFIGS y "subdireccion" con sus known_subdirecciones.
+    
+    Args:
+        site_or_url: Dominio o URL del sitio (None: solo los grupos por defecto)
+    
+    Returns:
+        KeywordScanner del sitio
+    """
+    site = site_or_url or ""
+    if "://" in site:
+        from urllib.parse import urlparse
+        site = urlparse(site).netloc
+    return _site_scanner(site.replace("www.", "").lower())
@@ -0,0 +1,302 @@
+"""
+Post-procesamiento de páginas scrapeadas en un pool de procesos
+
+Sanitizar el HTML, limpiar el markdown, extraer URLs de concursos, "Concursos
+anteriores" y los datos determinísticos es trabajo de CPU (BeautifulSoup) que
+bloquea el event loop donde corren el navegador y las requests. Las funciones
+process_* reciben el HTML/markdown crudo (strings: un HtmlDocument se serializa
+sin su árbol) y devuelven los artefactos derivados, de modo que pueden correr en
+otro proceso mientras se scrapea la página siguiente.
+
+PageProcessingPool envuelve un ProcessPoolExecutor con workers configurables
+(EXTRACTION_CONFIG["page_processing_workers"]; 0 = procesar en el proceso
+principal). Si el pool no se puede crear o se rompe, las tareas se ejecutan en
+el proceso principal, como antes.
+
+Los procesos del pool se inician con "spawn": el proceso principal tiene hilos
+(Streamlit, el flusher de APIKeyManager, Playwright) y un fork podría heredar
+locks tomados por esos hilos y bloquear al hijo.
+"""
+
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import EXTRACTION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def sanitize_page_html(html: str) -> str:
+    """
+    Sanitiza el HTML de una página (conservando la estructura)
+    
+    Args:
+        html: HTML crudo de la página
+    
+    Returns:
+        HTML sanitizado
+    """
+    from utils.html_sanitizer import sanitize_html
+    return sanitize_html(html, preserve_structure=True)
+
+
+def process_listing_page(markdown: str, html: str, page_url: str) -> Dict[str, Any]:
+    """
+    Artefactos de una página de listado: markdown limpio y URLs de concursos
+    
+    Args:
+        markdown: Markdown de la página
+        html: HTML (sanitizado) de la página
+        page_url: URL de la página (base para URLs relativas)
+    
+    Returns:
+        {"markdown_cleaned": str, "concurso_urls_map": {url: nombre}}
+    """
+    from crawler.markdown_processor import clean_markdown_for_llm
+    from utils.url_extractor import extract_concurso_urls_from_html
+    
+    return {
+        "markdown_cleaned": clean_markdown_for_llm(markdown),
+        "concurso_urls_map": extract_concurso_urls_from_html(html, page_url),
+    }
+
+
+def process_detail_page(
+    url: str,
+    html: str,
+    markdown: str,
+    deterministic_options: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Artefactos de la página individual de un concurso
+    
+    Detecta el aviso de suspensión, extrae "Concursos anteriores" con la estrategia
+    del sitio y, si no está suspendido, los datos determinísticos (nombre y fechas).
+    Los errores de cada paso se registran y el paso queda vacío, sin interrumpir los demás.
+    
+    Args:
+        url: URL de la página
+        html: HTML (sanitizado) de la página
+        markdown: Markdown de la página
+        deterministic_options: Opciones de extract_concurso_data_with_confidence
+            (required_fields, threshold) con los selectores del sitio; si es None se usa
+            extract_concurso_data_deterministically (sin puntajes de confianza)
+    
+    Returns:
+        {"markdown_cleaned", "is_suspended", "previous_concursos", "deterministic_data"}
+    """
+    from crawler.markdown_processor import clean_markdown_for_llm
+    from crawler.strategies import get_strategy_for_url
+    from utils.html_document import as_html_document
+    from utils.keyword_scanner import get_keyword_scanner
+    
+    cleaned_markdown = clean_markdown_for_llm(markdown)
+    # Un solo parseo compartido por todos los extractores de la página
+    html_content = as_html_document(html)
+    
+    # Detectar concursos suspendidos directamente desde el HTML/markdown
+    is_suspended = False
+    try:
+        scanner = get_keyword_scanner(url)
+        if scanner.contains(html_content, "aviso_suspension") or scanner.contains(markdown, "aviso_suspension"):
+            is_suspended = True
+    except Exception:
+        # Si algo falla en la detección, no marcamos como suspendido y continuamos normalmente
+        is_suspended = False
+    
+    # Extraer información de "Concursos anteriores" usando la estrategia apropiada
+    previous_concursos = []
+    strategy = get_strategy_for_url(url)
+    if html_content:
+        try:
+            previous_concursos = strategy.extract_previous_concursos(html_content, url)
+        except Exception as e:
+            logger.warning(f"Error al extraer concursos anteriores de {url}: {e}", exc_info=True)
+    
+    # Extraer nombre/fechas determinísticamente (solo si no está suspendido)
+    deterministic_data = None
+    if not is_suspended:
+        from utils.deterministic_date_extractor import (
+            extract_concurso_data_deterministically,
+            extract_concurso_data_with_confidence,
+        )
+        try:
+            if deterministic_options is not None:
+                deterministic_data = extract_concurso_data_with_confidence(
+                    cleaned_markdown,
+                    url,
+                    html_content,
+                    selectors=strategy.get_deterministic_selectors(),
+                    known_subdirecciones=strategy.get_known_subdirecciones(),
+                    **deterministic_options
+                )
+            else:
+                deterministic_data = extract_concurso_data_deterministically(cleaned_markdown, url, html_content)
+        except Exception as e:
+            logger.debug(f"Error en extracción determinística para {url}: {e}")
+            deterministic_data = None
+    
+    return {
+        "markdown_cleaned": cleaned_markdown,
+        "is_suspended": is_suspended,
+        "previous_concursos": previous_concursos,
+        "deterministic_data": deterministic_data,
+    }
+
+
+class PageProcessingPool:
+    """
+    Pool de procesos para el post-procesamiento de páginas (con respaldo en el proceso principal)
+    """
+    
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: Procesos del pool (None: núcleos disponibles - 1; 0: sin pool)
+        """
+        if workers is None:
+            workers = max((os.cpu_count() or 1) - 1, 0)
+        self.workers = max(int(workers), 0)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Tarea de cada future enviado al pool, para reintentarla si el pool se rompe
+        self._tasks: Dict[Future, Tuple[Callable[..., Any], Tuple[Any, ...]]] = {}
+        self._tasks_lock = threading.Lock()
+        if self.workers:
+            try:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"⚙️ Pool de procesamiento de páginas: {self.workers} procesos")
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo crear el pool de procesos, se procesa en el proceso principal: {e}")
+                self._executor = None
+    
+    @property
+    def is_parallel(self) -> bool:
+        """True si las tareas corren en procesos del pool"""
+        return self._executor is not None
+    
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Envía una tarea al pool (sin pool, la ejecuta en el proceso principal)
+        
+        Args:
+            fn: Función de nivel de módulo (serializable)
+            *args: Argumentos serializables
+        
+        Returns:
+            Future con el resultado (usar result_of para recuperarlo)
+        """
+        if self._executor is not None:
+            try:
+                future = self._executor.submit(fn, *args)
+                with self._tasks_lock:
+                    self._tasks[future] = (fn, args)
+                future.add_done_callback(self._forget_task)
+                return future
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._disable(e)
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def result_of(self, future: Future) -> Any:
+        """
+        Resultado de una tarea; si el pool se rompió, la reintenta en el proceso principal
+        
+        Args:
+            future: Future retornado por submit
+        
+        Returns:
+            Resultado de la función (propaga sus excepciones)
+        """
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            self._disable(e)
+            with self._tasks_lock:
+                fn, args = self._tasks.pop(future)
+            return fn(*args)
+    
+    def _forget_task(self, future: Future) -> None:
+        """Descarta la tarea de un future terminado (salvo si el pool se rompió: result_of la reintenta)"""
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            return
+        with self._tasks_lock:
+            self._tasks.pop(future, None)
+    
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Ejecuta una tarea en el pool sin bloquear el event loop
+        
+        Args:
+            fn: Función de nivel de módulo (serializable)
+            *args: Argumentos serializables
+        
+        Returns:
+            Resultado de la función
+        """
+        future = self.submit(fn, *args)
+        if not future.done():
+            try:
+                await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                pass
+        return self.result_of(future)
+    
+    def _disable(self, error: Exception) -> None:
+        """Descarta el pool (roto o cerrado); las tareas siguientes corren en el proceso principal"""
+        logger.warning(f"⚠️ Pool de procesamiento de páginas no disponible, se procesa en el proceso principal: {error}")
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def shutdown(self) -> None:
+        """Cierra los procesos del pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+_pool: Optional[PageProcessingPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_page_processing_pool(workers: Optional[int] = None) -> PageProcessingPool:
+    """
+    Pool compartido del proceso (se crea al primer uso y se reutiliza entre corridas)
+    
+    Args:
+        workers: Procesos del pool (None: EXTRACTION_CONFIG["page_processing_workers"]);
+            si difiere del pool actual, este se reemplaza
+    
+    Returns:
+        PageProcessingPool compartido
+    """
+    global _pool
+    if workers is None:
+        workers = EXTRACTION_CONFIG.get("page_processing_workers")
+    with _pool_lock:
+        if _pool is not None and (workers is None or _pool.workers == workers):
+            return _pool
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = PageProcessingPool(workers)
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool() -> None:
+    if _pool is not None:
+        _pool.shutdown()
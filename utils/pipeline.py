@@ -0,0 +1,216 @@
+"""
+Pipeline por etapas con colas acotadas (productor–consumidor sobre asyncio)
+
+Cada etapa consume items de su cola de entrada y emite cero o más items a la
+siguiente. Las colas entre etapas tienen tamaño máximo: si una etapa lenta (el
+LLM) se satura, las anteriores se bloquean al emitir (backpressure) en vez de
+acumular páginas en memoria, y en cuanto hay trabajo listo la etapa siguiente lo
+toma sin esperar a que termine la anterior.
+
+SizeBatcher agrupa items por tamaño con la misma regla que los batches del LLM
+(se cierra el batch cuando el siguiente item no cabe).
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Marca de fin de la entrada de una etapa
+_DONE = object()
+
+Emit = Callable[[Any], Awaitable[None]]
+
+
+class SizeBatcher:
+    """
+    Acumula items hasta un tamaño máximo por batch
+    """
+    
+    def __init__(self, max_size: int):
+        """
+        Args:
+            max_size: Tamaño máximo por batch (un item más grande forma su propio batch)
+        """
+        self.max_size = max_size
+        self._items: List[Any] = []
+        self._size = 0
+    
+    def add(self, item: Any, size: int) -> Optional[List[Any]]:
+        """
+        Agrega un item
+        
+        Args:
+            item: Item a agregar
+            size: Tamaño del item
+        
+        Returns:
+            El batch anterior si el item no cabía en él (el item inicia uno nuevo), si no None
+        """
+        full = None
+        if self._items and self._size + size > self.max_size:
+            full = self.flush()
+        self._items.append(item)
+        self._size += size
+        return full
+    
+    def flush(self) -> Optional[List[Any]]:
+        """
+        Returns:
+            El batch en curso (None si está vacío); el batcher queda vacío
+        """
+        if not self._items:
+            return None
+        items, self._items, self._size = self._items, [], 0
+        return items
+
+
+class _Stage:
+    def __init__(self, name: str, handler: Callable[[Any, Emit], Awaitable[None]], workers: int,
+                 on_end: Optional[Callable[[Emit], Awaitable[None]]]):
+        self.name = name
+        self.handler = handler
+        self.workers = max(int(workers), 1)
+        self.on_end = on_end
+
+
+class StagedPipeline:
+    """
+    Etapas conectadas por colas acotadas; cada etapa puede tener varios workers
+    """
+    
+    def __init__(self, queue_size: int = 4):
+        """
+        Args:
+            queue_size: Items máximos en espera entre dos etapas
+        """
+        self.queue_size = max(int(queue_size), 1)
+        self._stages: List[_Stage] = []
+        self.stats: dict = {}
+    
+    def add_stage(
+        self,
+        name: str,
+        handler: Callable[[Any, Emit], Awaitable[None]],
+        workers: int = 1,
+        on_end: Optional[Callable[[Emit], Awaitable[None]]] = None
+    ) -> "StagedPipeline":
+        """
+        Agrega una etapa al final del pipeline
+        
+        Args:
+            name: Nombre de la etapa (logs y estadísticas)
+            handler: async handler(item, emit): procesa un item y llama await emit(x) por
+                cada item para la etapa siguiente. Sus excepciones se registran y el
+                item se descarta, sin detener el pipeline
+            workers: Items que la etapa procesa en paralelo
+            on_end: async on_end(emit) al agotarse la entrada (p. ej. emitir el último batch)
+        
+        Returns:
+            El mismo pipeline (para encadenar)
+        """
+        self._stages.append(_Stage(name, handler, workers, on_end))
+        return self
+    
+    async def run(self, source: Union[AsyncIterable[Any], Iterable[Any]]) -> dict:
+        """
+        Ejecuta el pipeline hasta agotar la fuente y vaciar todas las etapas
+        
+        Args:
+            source: Items de entrada de la primera etapa (iterable o iterable asíncrono)
+        
+        Returns:
+            Estadísticas por etapa: {nombre: {"items": n, "errors": n, "max_queue": n}}
+        """
+        if not self._stages:
+            return {}
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self._stages]
+        self.stats = {stage.name: {"items": 0, "errors": 0, "max_queue": 0} for stage in self._stages}
+        
+        async def feed():
+            stats = self.stats[self._stages[0].name]
+            try:
+                items = source if hasattr(source, "__aiter__") else _as_async(source)
+                async for item in items:
+                    await queues[0].put(item)
+                    stats["max_queue"] = max(stats["max_queue"], queues[0].qsize())
+            except Exception as e:
+                logger.error(f"❌ Error en la fuente del pipeline: {e}", exc_info=True)
+            finally:
+                for _ in range(self._stages[0].workers):
+                    await queues[0].put(_DONE)
+        
+        async def run_stage(index: int, stage: _Stage):
+            next_stage = self._stages[index + 1] if index + 1 < len(self._stages) else None
+            stats = self.stats[stage.name]
+            
+            async def emit(item: Any) -> None:
+                if next_stage is not None:
+                    await queues[index + 1].put(item)
+                    stats_next = self.stats[next_stage.name]
+                    stats_next["max_queue"] = max(stats_next["max_queue"], queues[index + 1].qsize())
+            
+            async def worker():
+                while True:
+                    item = await queues[index].get()
+                    if item is _DONE:
+                        return
+                    stats["items"] += 1
+                    try:
+                        await stage.handler(item, emit)
+                    except Exception as e:
+                        stats["errors"] += 1
+                        logger.error(f"❌ Error en la etapa '{stage.name}' del pipeline: {e}", exc_info=True)
+            
+            try:
+                await asyncio.gather(*(worker() for _ in range(stage.workers)))
+                if stage.on_end is not None:
+                    try:
+                        await stage.on_end(emit)
+                    except Exception as e:
+                        stats["errors"] += 1
+                        logger.error(f"❌ Error al cerrar la etapa '{stage.name}' del pipeline: {e}", exc_info=True)
+            finally:
+                if next_stage is not None:
+                    for _ in range(next_stage.workers):
+                        await queues[index + 1].put(_DONE)
+        
+        await asyncio.gather(feed(), *(run_stage(i, stage) for i, stage in enumerate(self._stages)))
+        return self.stats
+
+
+async def _as_async(items: Iterable[Any]) -> AsyncIterable[Any]:
+    for item in items:
+        yield item
+
+
+def batch_stage(
+    batchers: List[Tuple[Callable[[Any], bool], SizeBatcher, Callable[[Any], int]]],
+    wrap: Callable[[int, List[Any]], Any] = lambda index, batch: batch
+) -> Tuple[Callable[[Any, Emit], Awaitable[None]], Callable[[Emit], Awaitable[None]]]:
+    """
+    Handler y on_end de una etapa que reparte items entre batchers por tamaño
+    
+    Args:
+        batchers: [(acepta(item), batcher, tamaño(item))]; cada item va al primero que lo acepta
+        wrap: Arma lo que se emite a partir de (índice del batcher, batch)
+    
+    Returns:
+        (handler, on_end) para StagedPipeline.add_stage
+    """
+    async def handler(item: Any, emit: Emit) -> None:
+        for index, (accepts, batcher, size_of) in enumerate(batchers):
+            if accepts(item):
+                full = batcher.add(item, size_of(item))
+                if full:
+                    await emit(wrap(index, full))
+                return
+    
+    async def on_end(emit: Emit) -> None:
+        for index, (_, batcher, _) in enumerate(batchers):
+            rest = batcher.flush()
+            if rest:
+                await emit(wrap(index, rest))
+    
+    return handler, on_end
@@ -0,0 +1,297 @@
+"""
+Registro de cuota compartido entre procesos (SQLite en modo WAL)
+
+La UI de Streamlit y el cron diario (scripts/daily_anid.py) usan las mismas API
+keys. Este registro es la fuente común de verdad sobre:
+- Solicitudes reservadas/consumidas por (key, modelo) en el último minuto y en el día
+  de cuota, para respetar RPM/TPM/RPD entre todos los procesos.
+- Keys agotadas (tras un 429), visibles de inmediato para los demás procesos.
+
+Cada reserva se hace en una transacción BEGIN IMMEDIATE (verificar cupo + insertar
+es atómico) y luego se confirma con los tokens reales, o se libera si la solicitud
+no llegó a enviarse. Las reservas que nadie confirmó ni liberó (p. ej. un proceso
+que terminó a mitad de una llamada) expiran tras RESERVATION_TTL_SECONDS para no
+seguir contando contra el cupo diario. Las keys se guardan como hash: el registro
+no contiene secretos.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Ventana de RPM/TPM (segundos) y antigüedad tras la cual se purgan las solicitudes
+WINDOW_SECONDS = 60
+RETENTION_SECONDS = 2 * 24 * 60 * 60
+# Antigüedad tras la cual una reserva sin confirmar se descarta (muy por sobre el timeout máximo de una llamada)
+RESERVATION_TTL_SECONDS = 10 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    day TEXT NOT NULL,
+    ts REAL NOT NULL,
+    tokens INTEGER NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_requests_key_model_ts ON requests (key_hash, model, ts);
+CREATE INDEX IF NOT EXISTS idx_requests_key_model_day ON requests (key_hash, model, day);
+CREATE TABLE IF NOT EXISTS exhausted_keys (
+    key_hash TEXT PRIMARY KEY,
+    exhausted_at REAL NOT NULL,
+    retry_after REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS day_exhausted (
+    key_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (key_hash, model, day)
+);
+"""
+
+
+def key_hash(api_key: str) -> str:
+    """Hash corto de una API key (identificador en el registro)"""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+class QuotaLedger:
+    """Reservas de cupo y keys agotadas compartidas por todos los procesos"""
+    
+    def __init__(self, db_path: Optional[str] = None, busy_timeout: float = 10.0):
+        """
+        Inicializa el registro
+        
+        Args:
+            db_path: Ruta de la base SQLite (por defecto: data/.quota_ledger.db)
+            busy_timeout: Segundos a esperar por el lock de escritura de otro proceso
+        """
+        if db_path is None:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            db_path = os.path.join(DATA_DIR, ".quota_ledger.db")
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Conexión por hilo (sqlite3 no comparte conexiones entre hilos)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def reserve(
+        self,
+        api_key: str,
+        model: str,
+        tokens: int,
+        limits: Dict[str, int],
+        day: str
+    ) -> Tuple[Optional[int], float]:
+        """
+        Reserva atómicamente un request y `tokens` si la key tiene cupo
+        
+        Args:
+            api_key: API key
+            model: Nombre del modelo
+            tokens: Tokens de entrada estimados
+            limits: Límites efectivos {"rpm", "tpm", "rpd"}
+            day: Día de cuota actual
+        
+        Returns:
+            Tupla (id de la reserva, 0) si hay cupo; (None, segundos a esperar) si no;
+            (None, inf) si la key agotó su cupo diario
+        """
+        kh = key_hash(api_key)
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM requests WHERE ts < ?", (now - RETENTION_SECONDS,))
+            conn.execute(
+                "DELETE FROM requests WHERE status = 'reserved' AND ts < ?", (now - RESERVATION_TTL_SECONDS,)
+            )
+            wait = self._wait_locked(conn, kh, model, tokens, limits, day, now)
+            if wait > 0:
+                conn.execute("COMMIT")
+                return None, wait
+            cursor = conn.execute(
+                "INSERT INTO requests (key_hash, model, day, ts, tokens, status) VALUES (?, ?, ?, ?, ?, 'reserved')",
+                (kh, model, day, now, int(tokens)),
+            )
+            conn.execute("COMMIT")
+            return cursor.lastrowid, 0.0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _wait_locked(
+        self,
+        conn: sqlite3.Connection,
+        kh: str,
+        model: str,
+        tokens: int,
+        limits: Dict[str, int],
+        day: str,
+        now: float
+    ) -> float:
+        """Segundos hasta que la key tenga cupo (inf si agotó el día); requiere la transacción abierta"""
+        if conn.execute(
+            "SELECT 1 FROM day_exhausted WHERE key_hash = ? AND model = ? AND day = ?", (kh, model, day)
+        ).fetchone():
+            return float("inf")
+        day_requests = conn.execute(
+            "SELECT COUNT(*) FROM requests WHERE key_hash = ? AND model = ? AND day = ?", (kh, model, day)
+        ).fetchone()[0]
+        if day_requests >= limits["rpd"]:
+            return float("inf")
+        
+        window = conn.execute(
+            "SELECT ts, tokens FROM requests WHERE key_hash = ? AND model = ? AND ts > ? ORDER BY ts",
+            (kh, model, now - WINDOW_SECONDS),
+        ).fetchall()
+        wait = 0.0
+        if len(window) >= limits["rpm"]:
+            # Esperar a que salga de la ventana la solicitud que libera un slot
+            wait = window[len(window) - limits["rpm"]][0] + WINDOW_SECONDS - now
+        tokens = min(tokens, limits["tpm"])
+        used_tokens = sum(row[1] for row in window)
+        if used_tokens + tokens > limits["tpm"]:
+            for ts, row_tokens in window:
+                used_tokens -= row_tokens
+                if used_tokens + tokens <= limits["tpm"]:
+                    wait = max(wait, ts + WINDOW_SECONDS - now)
+                    break
+        return max(0.0, wait)
+    
+    def commit(self, reservation_id: int, actual_tokens: Optional[int] = None) -> None:
+        """
+        Confirma una reserva como consumida, con los tokens reales si se conocen
+        
+        Args:
+            reservation_id: Id retornado por reserve
+            actual_tokens: Tokens reales (usageMetadata.promptTokenCount) o None
+        """
+        conn = self._connect()
+        if actual_tokens is None:
+            conn.execute("UPDATE requests SET status = 'committed' WHERE id = ?", (reservation_id,))
+        else:
+            conn.execute(
+                "UPDATE requests SET status = 'committed', tokens = ? WHERE id = ?",
+                (int(actual_tokens), reservation_id),
+            )
+    
+    def release(self, reservation_id: int) -> None:
+        """Libera una reserva cuya solicitud no llegó a enviarse"""
+        self._connect().execute("DELETE FROM requests WHERE id = ? AND status = 'reserved'", (reservation_id,))
+    
+    def usage(self, api_key: str, model: str, day: str) -> Dict[str, int]:
+        """
+        Uso actual de una key
+        
+        Returns:
+            {"minute_requests", "minute_tokens", "day_requests", "day_exhausted"}
+        """
+        kh = key_hash(api_key)
+        conn = self._connect()
+        minute_requests, minute_tokens = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM requests WHERE key_hash = ? AND model = ? AND ts > ?",
+            (kh, model, time.time() - WINDOW_SECONDS),
+        ).fetchone()
+        day_requests = conn.execute(
+            "SELECT COUNT(*) FROM requests WHERE key_hash = ? AND model = ? AND day = ?", (kh, model, day)
+        ).fetchone()[0]
+        day_exhausted = conn.execute(
+            "SELECT 1 FROM day_exhausted WHERE key_hash = ? AND model = ? AND day = ?", (kh, model, day)
+        ).fetchone() is not None
+        return {
+            "minute_requests": minute_requests,
+            "minute_tokens": minute_tokens,
+            "day_requests": day_requests,
+            "day_exhausted": int(day_exhausted),
+        }
+    
+    def wait_time(self, api_key: str, model: str, tokens: int, limits: Dict[str, int], day: str) -> float:
+        """Segundos hasta que la key tenga cupo para una solicitud (sin reservar)"""
+        return self._wait_locked(self._connect(), key_hash(api_key), model, tokens, limits, day, time.time())
+    
+    def mark_day_exhausted(self, api_key: str, model: str, day: str) -> None:
+        """Marca el cupo diario de una key como consumido para todos los procesos"""
+        self._connect().execute(
+            "INSERT OR IGNORE INTO day_exhausted (key_hash, model, day) VALUES (?, ?, ?)",
+            (key_hash(api_key), model, day),
+        )
+    
+    def mark_key_exhausted(self, api_key: str, retry_after: float) -> None:
+        """
+        Registra una key como agotada hasta `retry_after` (timestamp); conserva el plazo más lejano
+        
+        Args:
+            api_key: API key agotada
+            retry_after: Timestamp (time.time()) a partir del cual puede reintentarse
+        """
+        self._connect().execute(
+            "INSERT INTO exhausted_keys (key_hash, exhausted_at, retry_after) VALUES (?, ?, ?) "
+            "ON CONFLICT(key_hash) DO UPDATE SET exhausted_at = excluded.exhausted_at, "
+            "retry_after = MAX(retry_after, excluded.retry_after)",
+            (key_hash(api_key), time.time(), retry_after),
+        )
+    
+    def clear_key_exhausted(self, api_key: str) -> None:
+        """Elimina la marca de agotamiento de una key (p. ej. al eliminarla)"""
+        self._connect().execute("DELETE FROM exhausted_keys WHERE key_hash = ?", (key_hash(api_key),))
+    
+    def get_exhausted(self) -> Dict[str, Tuple[float, float]]:
+        """
+        Keys agotadas vigentes
+        
+        Returns:
+            Diccionario {hash de key: (exhausted_at, retry_after)}
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("DELETE FROM exhausted_keys WHERE retry_after <= ?", (now,))
+        return {
+            row[0]: (row[1], row[2])
+            for row in conn.execute("SELECT key_hash, exhausted_at, retry_after FROM exhausted_keys")
+        }
+
+
+_quota_ledger: Optional[QuotaLedger] = None
+_quota_ledger_failed = False
+_quota_ledger_lock = threading.Lock()
+
+
+def get_quota_ledger() -> Optional[QuotaLedger]:
+    """
+    Retorna el registro compartido del proceso
+    
+    Returns:
+        QuotaLedger, o None si está deshabilitado o no se pudo abrir la base
+        (en ese caso cada proceso usa solo su estado en memoria)
+    """
+    global _quota_ledger, _quota_ledger_failed
+    from config import GEMINI_CONFIG
+    if not GEMINI_CONFIG.get("quota_ledger", True):
+        return None
+    with _quota_ledger_lock:
+        if _quota_ledger is None and not _quota_ledger_failed:
+            try:
+                _quota_ledger = QuotaLedger()
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo abrir el registro de cuota compartido, se usará solo el estado local: {e}")
+                _quota_ledger_failed = True
+        return _quota_ledger
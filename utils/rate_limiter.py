@@ -0,0 +1,309 @@
+"""
+Limitador de tasa proactivo por API key y modelo (token buckets RPM/TPM + cupo RPD)
+
+En lugar de esperar un 429 para reaccionar, cada llamada reserva un request y sus
+tokens estimados en los buckets de la key: si no hay capacidad se espera lo justo
+para quedar bajo el límite, y entre varias keys se elige la de mayor holgura.
+Los límites se configuran por modelo en AVAILABLE_MODELS["<modelo>"]["rate_limits"].
+
+Si el registro de cuota compartido está disponible (utils.quota_ledger), las
+reservas se hacen en él y los límites se respetan entre todos los procesos que
+usan las mismas keys; si no, se usan buckets en memoria del proceso.
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from config import AVAILABLE_MODELS, GEMINI_CONFIG
+from utils.quota_ledger import QuotaLedger, get_quota_ledger, key_hash
+
+logger = logging.getLogger(__name__)
+
+# Límites para modelos sin "rate_limits" en AVAILABLE_MODELS
+DEFAULT_RATE_LIMITS = {"rpm": 10, "tpm": 250000, "rpd": 250}
+
+
+def _quota_day() -> str:
+    """Día de cuota de Gemini (los límites diarios se reinician a medianoche, hora del Pacífico)"""
+    try:
+        from zoneinfo import ZoneInfo
+        return datetime.now(ZoneInfo("America/Los_Angeles")).strftime("%Y-%m-%d")
+    except Exception:
+        return datetime.now().strftime("%Y-%m-%d")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación rápida de tokens de entrada (~4 caracteres por token)"""
+    return max(1, len(text or "") // 4)
+
+
+class _TokenBucket:
+    """Bucket que se rellena de forma continua hasta su capacidad"""
+    
+    def __init__(self, capacity: float, per_seconds: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / per_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, amount: float) -> float:
+        """Segundos hasta que haya `amount` disponible (una solicitud mayor a la capacidad espera el bucket lleno)"""
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class RateLimiter:
+    """Buckets RPM/TPM y contador RPD por (API key, modelo), en el registro compartido o en memoria"""
+    
+    def __init__(self, safety_factor: Optional[float] = None, ledger: Optional[QuotaLedger] = None):
+        """
+        Args:
+            safety_factor: Fracción de cada límite que se usa (deja margen bajo el límite real)
+            ledger: Registro de cuota compartido entre procesos (None = solo estado en memoria)
+        """
+        self.safety_factor = safety_factor if safety_factor is not None else GEMINI_CONFIG.get("rate_limit_safety_factor", 0.9)
+        self.ledger = ledger
+        self._state: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Reservas del registro pendientes de confirmar: (hilo, hash de key, modelo) -> id
+        self._reservations: Dict[Tuple[int, str, str], int] = {}
+        self._lock = threading.Lock()
+    
+    def get_limits(self, model: str) -> Dict[str, int]:
+        """Límites configurados para un modelo"""
+        return AVAILABLE_MODELS.get(model, {}).get("rate_limits") or DEFAULT_RATE_LIMITS
+    
+    def get_effective_limits(self, model: str) -> Dict[str, int]:
+        """Límites de un modelo con el factor de seguridad aplicado"""
+        limits = self.get_limits(model)
+        return {name: max(1, int(limits[name] * self.safety_factor)) for name in ("rpm", "tpm", "rpd")}
+    
+    def _get_state(self, api_key: str, model: str) -> Dict[str, Any]:
+        key = (hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12], model)
+        state = self._state.get(key)
+        if state is None:
+            limits = self.get_effective_limits(model)
+            state = {
+                "rpm": _TokenBucket(limits["rpm"]),
+                "tpm": _TokenBucket(limits["tpm"]),
+                "rpd": limits["rpd"],
+                "day": _quota_day(),
+                "requests_today": 0,
+            }
+            self._state[key] = state
+        now = time.monotonic()
+        state["rpm"].refill(now)
+        state["tpm"].refill(now)
+        today = _quota_day()
+        if state["day"] != today:
+            state["day"] = today
+            state["requests_today"] = 0
+        return state
+    
+    def _wait_and_headroom(self, state: Dict[str, Any], tokens: int) -> Tuple[float, float]:
+        """(segundos de espera, holgura 0..1) de una key para una solicitud de `tokens`"""
+        if state["requests_today"] >= state["rpd"]:
+            return float("inf"), 0.0
+        wait = max(state["rpm"].wait_time(1), state["tpm"].wait_time(tokens))
+        headroom = min(
+            state["rpm"].tokens / state["rpm"].capacity,
+            max(0.0, state["tpm"].tokens - tokens) / state["tpm"].capacity,
+            1 - state["requests_today"] / state["rpd"],
+        )
+        return wait, headroom
+    
+    def select_key(self, api_keys: List[str], model: str, tokens: int) -> Optional[str]:
+        """
+        Elige la key con menor espera y, a igual espera, mayor holgura
+        
+        Args:
+            api_keys: Keys candidatas (no agotadas)
+            model: Nombre del modelo
+            tokens: Tokens de entrada estimados de la solicitud
+        
+        Returns:
+            Key elegida, o None si todas agotaron su cupo diario
+        """
+        if self.ledger is not None:
+            try:
+                return self._select_key_shared(api_keys, model, tokens)
+            except Exception as e:
+                logger.warning(f"⚠️ Registro de cuota compartido no disponible, usando estado local: {e}")
+        
+        best = None
+        best_score = None
+        with self._lock:
+            for api_key in api_keys:
+                wait, headroom = self._wait_and_headroom(self._get_state(api_key, model), tokens)
+                if wait == float("inf"):
+                    continue
+                score = (wait, -headroom)
+                if best_score is None or score < best_score:
+                    best, best_score = api_key, score
+        return best
+    
+    def _select_key_shared(self, api_keys: List[str], model: str, tokens: int) -> Optional[str]:
+        """select_key a partir del uso registrado por todos los procesos"""
+        limits = self.get_effective_limits(model)
+        day = _quota_day()
+        best = None
+        best_score = None
+        for api_key in api_keys:
+            wait = self.ledger.wait_time(api_key, model, tokens, limits, day)
+            if wait == float("inf"):
+                continue
+            usage = self.ledger.usage(api_key, model, day)
+            headroom = min(
+                1 - usage["minute_requests"] / limits["rpm"],
+                max(0, limits["tpm"] - usage["minute_tokens"] - tokens) / limits["tpm"],
+                1 - usage["day_requests"] / limits["rpd"],
+            )
+            score = (wait, -headroom)
+            if best_score is None or score < best_score:
+                best, best_score = api_key, score
+        return best
+    
+    def acquire(self, api_key: str, model: str, tokens: int, max_wait: Optional[float] = None) -> float:
+        """
+        Reserva un request y `tokens` en los buckets de la key, esperando si es necesario
+        
+        Args:
+            api_key: API key a usar
+            model: Nombre del modelo
+            tokens: Tokens de entrada estimados
+            max_wait: Espera máxima en segundos (None = GEMINI_CONFIG["rate_limit_max_wait"])
+        
+        Returns:
+            Segundos esperados (-1 si la key agotó su cupo diario; no se reserva nada)
+        """
+        if max_wait is None:
+            max_wait = GEMINI_CONFIG.get("rate_limit_max_wait", 120)
+        if self.ledger is not None:
+            try:
+                return self._acquire_shared(api_key, model, tokens, max_wait)
+            except Exception as e:
+                logger.warning(f"⚠️ Registro de cuota compartido no disponible, usando estado local: {e}")
+        waited = 0.0
+        while True:
+            with self._lock:
+                state = self._get_state(api_key, model)
+                wait, _ = self._wait_and_headroom(state, tokens)
+                if wait == float("inf"):
+                    return -1
+                if wait <= 0 or waited >= max_wait:
+                    state["rpm"].tokens -= 1
+                    state["tpm"].tokens -= min(tokens, state["tpm"].capacity)
+                    state["requests_today"] += 1
+                    return waited
+            sleep_for = min(wait, max_wait - waited)
+            if waited == 0:
+                logger.info(f"⏳ Limitador de tasa: esperando {wait:.1f}s para no exceder RPM/TPM de {model}")
+            time.sleep(sleep_for)
+            waited += sleep_for
+    
+    def _acquire_shared(self, api_key: str, model: str, tokens: int, max_wait: float) -> float:
+        """acquire con reserva atómica en el registro compartido entre procesos"""
+        limits = self.get_effective_limits(model)
+        waited = 0.0
+        while True:
+            day = _quota_day()
+            reservation_id, wait = self.ledger.reserve(api_key, model, tokens, limits, day)
+            if wait == float("inf"):
+                return -1
+            if reservation_id is None and waited >= max_wait:
+                # Espera máxima alcanzada: registrar la solicitud sin verificar cupo
+                reservation_id, _ = self.ledger.reserve(
+                    api_key, model, tokens, {"rpm": 10 ** 9, "tpm": 10 ** 12, "rpd": limits["rpd"]}, day
+                )
+                if reservation_id is None:
+                    return -1
+            if reservation_id is not None:
+                with self._lock:
+                    self._reservations[(threading.get_ident(), key_hash(api_key), model)] = reservation_id
+                return waited
+            sleep_for = min(wait, max_wait - waited)
+            if waited == 0:
+                logger.info(f"⏳ Limitador de tasa: esperando {wait:.1f}s para no exceder RPM/TPM de {model} (cuota compartida)")
+            time.sleep(sleep_for)
+            waited += sleep_for
+    
+    def record_usage(self, api_key: str, model: str, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """
+        Corrige el bucket TPM con los tokens reales reportados por la API
+        
+        Args:
+            api_key: API key usada
+            model: Nombre del modelo
+            estimated_tokens: Tokens reservados en acquire
+            actual_tokens: Tokens reales (usageMetadata.promptTokenCount) o None
+        """
+        if self.ledger is not None:
+            with self._lock:
+                reservation_id = self._reservations.pop((threading.get_ident(), key_hash(api_key), model), None)
+            if reservation_id is not None:
+                try:
+                    self.ledger.commit(reservation_id, actual_tokens)
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo confirmar la reserva de cuota: {e}")
+                return
+        if actual_tokens is None:
+            return
+        with self._lock:
+            state = self._get_state(api_key, model)
+            state["tpm"].tokens -= actual_tokens - estimated_tokens
+    
+    def settle(self, api_key: str, model: str, sent: bool) -> None:
+        """
+        Cierra la reserva pendiente de una solicitud que no pasó por record_usage (falló)
+        
+        Args:
+            api_key: API key con la que se reservó en acquire
+            model: Nombre del modelo
+            sent: True si la solicitud llegó a enviarse (cuenta como consumida);
+                False si falló antes de enviarse (se libera el cupo)
+        """
+        if self.ledger is None:
+            return
+        with self._lock:
+            reservation_id = self._reservations.pop((threading.get_ident(), key_hash(api_key), model), None)
+        if reservation_id is None:
+            return
+        try:
+            if sent:
+                self.ledger.commit(reservation_id)
+            else:
+                self.ledger.release(reservation_id)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo cerrar la reserva de cuota: {e}")
+    
+    def mark_day_exhausted(self, api_key: str, model: str) -> None:
+        """Marca el cupo diario de la key como consumido (p. ej. tras un 429 de límite diario)"""
+        with self._lock:
+            state = self._get_state(api_key, model)
+            state["requests_today"] = state["rpd"]
+        if self.ledger is not None:
+            try:
+                self.ledger.mark_day_exhausted(api_key, model, _quota_day())
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo registrar el cupo diario agotado en el registro compartido: {e}")
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Retorna el limitador compartido del proceso"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(ledger=get_quota_ledger())
+        return _rate_limiter
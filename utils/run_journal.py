@@ -0,0 +1,342 @@
+"""
+Bitácora de corridas de extracción para reanudar ejecuciones interrumpidas
+
+Cada corrida guarda en data/runs/<run_id>/ un journal.json con los parámetros,
+las páginas de listado ya scrapeadas (referencias a su HTML/Markdown guardado en
+la carpeta de la corrida), los concursos parseados de cada batch completado y
+las páginas individuales ya enriquecidas (concurso actualizado y contenido).
+Al reanudar una corrida se reutiliza ese trabajo en lugar de volver a scrapear
+y a pagar las llamadas al LLM.
+
+Las corridas más antiguas que "run_journal_retention_days" se eliminan al crear
+una nueva (RunJournal.purge_old_runs).
+"""
+
+import json
+import os
+import uuid
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+from config import RUNS_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class RunJournal:
+    """Registra el progreso de una corrida de extracción en disco"""
+    
+    def __init__(self, run_id: str, data: Dict[str, Any]):
+        """
+        Inicializa la bitácora (usar RunJournal.create o RunJournal.load)
+        
+        Args:
+            run_id: Identificador de la corrida
+            data: Contenido del journal
+        """
+        self.run_id = run_id
+        self.run_dir = Path(RUNS_DIR) / run_id
+        self.journal_path = self.run_dir / "journal.json"
+        self.data = data
+    
+    @classmethod
+    def create(
+        cls,
+        site: Optional[str],
+        urls: List[str],
+        follow_pagination: bool,
+        max_pages: int,
+        model_name: Optional[str] = None
+    ) -> "RunJournal":
+        """
+        Crea una nueva corrida
+        
+        Args:
+            site: Sitio de la corrida
+            urls: URLs semilla
+            follow_pagination: Parámetro de la corrida
+            max_pages: Parámetro de la corrida
+            model_name: Modelo LLM usado
+        
+        Returns:
+            Bitácora de la nueva corrida
+        """
+        safe_site = (site or "unknown").replace("www.", "").replace(".", "_").replace("/", "_")
+        run_id = f"{safe_site}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        now = datetime.now().isoformat()
+        journal = cls(run_id, {
+            "run_id": run_id,
+            "site": site,
+            "urls": urls,
+            "follow_pagination": follow_pagination,
+            "max_pages": max_pages,
+            "model_name": model_name,
+            "status": "in_progress",
+            "created_at": now,
+            "updated_at": now,
+            "scraped": {},
+            "batches": [],
+            "details": {},
+        })
+        journal.save()
+        logger.info(f"📒 Corrida registrada: {run_id}")
+        return journal
+    
+    @classmethod
+    def load(cls, run_id: str) -> Optional["RunJournal"]:
+        """
+        Carga una corrida existente
+        
+        Args:
+            run_id: Identificador de la corrida
+        
+        Returns:
+            Bitácora de la corrida o None si no existe
+        """
+        journal_path = Path(RUNS_DIR) / run_id / "journal.json"
+        if not journal_path.exists():
+            return None
+        try:
+            with open(journal_path, "r", encoding="utf-8") as f:
+                return cls(run_id, json.load(f))
+        except Exception as e:
+            logger.error(f"Error al cargar corrida {run_id}: {e}")
+            return None
+    
+    @staticmethod
+    def list_runs(status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Lista las corridas registradas, de la más reciente a la más antigua
+        
+        Args:
+            status: Filtrar por estado ("in_progress", "completed")
+        
+        Returns:
+            Lista de resúmenes {run_id, site, status, created_at, updated_at}
+        """
+        runs = []
+        runs_dir = Path(RUNS_DIR)
+        if not runs_dir.exists():
+            return runs
+        for journal_path in runs_dir.glob("*/journal.json"):
+            try:
+                with open(journal_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                continue
+            if status and data.get("status") != status:
+                continue
+            runs.append({
+                "run_id": data.get("run_id"),
+                "site": data.get("site"),
+                "status": data.get("status"),
+                "created_at": data.get("created_at"),
+                "updated_at": data.get("updated_at"),
+            })
+        return sorted(runs, key=lambda r: r.get("created_at") or "", reverse=True)
+    
+    @staticmethod
+    def find_resumable(site: str, max_age_hours: float) -> Optional[str]:
+        """
+        Busca la corrida en curso más reciente de un sitio que aún vale la pena reanudar
+        
+        Args:
+            site: Sitio de la corrida
+            max_age_hours: Antigüedad máxima de la última actualización (páginas más
+                antiguas probablemente ya cambiaron y conviene scrapear de nuevo)
+        
+        Returns:
+            run_id de la corrida o None
+        """
+        cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+        for run in RunJournal.list_runs(status="in_progress"):
+            if run.get("site") == site and (run.get("updated_at") or "") >= cutoff:
+                return run["run_id"]
+        return None
+    
+    @staticmethod
+    def purge_old_runs(retention_days: float) -> int:
+        """
+        Elimina las corridas (journal y páginas guardadas) sin actualizar hace más de retention_days
+        
+        Args:
+            retention_days: Días de retención
+        
+        Returns:
+            Número de corridas eliminadas
+        """
+        runs_dir = Path(RUNS_DIR)
+        if not runs_dir.exists():
+            return 0
+        cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+        removed = 0
+        for run in RunJournal.list_runs():
+            if not run.get("run_id") or (run.get("updated_at") or "") >= cutoff:
+                continue
+            try:
+                shutil.rmtree(runs_dir / run["run_id"])
+                removed += 1
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo eliminar la corrida {run['run_id']}: {e}")
+        if removed:
+            logger.info(f"🧹 {removed} corridas con más de {retention_days} días eliminadas de {RUNS_DIR}")
+        return removed
+    
+    def save(self) -> None:
+        """Guarda el journal en disco (escritura atómica)"""
+        try:
+            self.run_dir.mkdir(parents=True, exist_ok=True)
+            self.data["updated_at"] = datetime.now().isoformat()
+            tmp_path = f"{self.journal_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp_path, self.journal_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Error al guardar journal de la corrida {self.run_id}: {e}")
+    
+    def record_scrape(self, seed_url: str, page_results: List[Dict[str, Any]]) -> None:
+        """
+        Registra las páginas scrapeadas desde una URL semilla, guardando su HTML/Markdown
+        
+        Las páginas de una paginación dinámica comparten URL, por lo que se guardan por
+        posición en la carpeta de la corrida y no en el caché de páginas por URL.
+        
+        Args:
+            seed_url: URL semilla scrapeada
+            page_results: Resultados de scraping exitosos (con "url", "html", "markdown")
+        """
+        pages_dir = self.run_dir / "pages"
+        pages_dir.mkdir(parents=True, exist_ok=True)
+        seed_idx = len(self.data["scraped"])
+        refs = []
+        for page_idx, page_result in enumerate(page_results):
+            base = pages_dir / f"{seed_idx:03d}_{page_idx:03d}"
+            html_path = f"{base}.html"
+            md_path = f"{base}.md"
+            Path(html_path).write_text(page_result.get("html", "") or "", encoding="utf-8")
+            Path(md_path).write_text(page_result.get("markdown", "") or "", encoding="utf-8")
+            page_result["journal_key"] = html_path
+            refs.append({
+                "url": page_result.get("url", seed_url),
+                "html_path": html_path,
+                "markdown_path": md_path,
+            })
+        self.data["scraped"][seed_url] = refs
+        self.save()
+    
+    def get_scraped_pages(self, seed_url: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Retorna las páginas ya scrapeadas de una URL semilla
+        
+        Args:
+            seed_url: URL semilla
+        
+        Returns:
+            Lista de resultados de scraping (como los de WebScraper) o None si la URL
+            no se scrapeó en esta corrida o faltan archivos
+        """
+        refs = self.data["scraped"].get(seed_url)
+        if refs is None:
+            return None
+        page_results = []
+        for ref in refs:
+            try:
+                page_results.append({
+                    "success": True,
+                    "url": ref["url"],
+                    "html": Path(ref["html_path"]).read_text(encoding="utf-8"),
+                    "markdown": Path(ref["markdown_path"]).read_text(encoding="utf-8"),
+                    "journal_key": ref["html_path"],
+                    "from_journal": True,
+                })
+            except Exception as e:
+                logger.warning(f"⚠️ Página de la corrida {self.run_id} no disponible ({ref.get('html_path')}): {e}")
+                return None
+        return page_results
+    
+    def page_key(self, page_result: Dict[str, Any]) -> str:
+        """
+        Identificador estable de una página dentro de la corrida
+        
+        Args:
+            page_result: Página (de scraping o reanudada)
+        
+        Returns:
+            Ruta del HTML guardado en la corrida, o la URL si la página no se registró
+        """
+        return page_result.get("journal_key") or page_result.get("url", "")
+    
+    def record_batch(self, pages_in_batch: List[Dict[str, Any]], concursos: List[Dict[str, Any]]) -> None:
+        """
+        Registra los concursos parseados de un batch completado
+        
+        Args:
+            pages_in_batch: Páginas incluidas en el batch
+            concursos: Concursos extraídos (serializados con model_dump)
+        """
+        self.data["batches"].append({
+            "pages": [self.page_key(page) for page in pages_in_batch],
+            "concursos": concursos,
+            "completed_at": datetime.now().isoformat(),
+        })
+        self.save()
+    
+    def get_completed_batches(self) -> List[Dict[str, Any]]:
+        """Retorna los batches completados ({"pages", "concursos", "completed_at"})"""
+        return self.data.get("batches", [])
+    
+    def record_details(self, details: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Registra páginas individuales cuyo enriquecimiento terminó
+        
+        El markdown limpio de cada página se guarda en la carpeta de la corrida
+        (se usa en el reintento de fechas); el resto del contenido va al journal.
+        
+        Args:
+            details: {url: {"concurso": concurso serializado, "content": contenido
+                enriquecido (markdown, previous_concursos, deterministic_data, ...)}}
+        """
+        if not details:
+            return
+        pages_dir = self.run_dir / "pages"
+        pages_dir.mkdir(parents=True, exist_ok=True)
+        recorded = self.data.setdefault("details", {})
+        for url, detail in details.items():
+            content = dict(detail["content"])
+            md_path = str(pages_dir / f"detail_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}.md")
+            Path(md_path).write_text(content.pop("markdown", "") or "", encoding="utf-8")
+            recorded[url] = {
+                "concurso": detail["concurso"],
+                "content": content,
+                "markdown_path": md_path,
+            }
+        self.save()
+    
+    def get_details(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna las páginas individuales ya enriquecidas en la corrida
+        
+        Returns:
+            {url: {"concurso", "content"}} con el markdown cargado en content;
+            se omiten las páginas cuyo markdown ya no está disponible
+        """
+        details = {}
+        for url, detail in self.data.get("details", {}).items():
+            try:
+                markdown = Path(detail["markdown_path"]).read_text(encoding="utf-8")
+            except Exception as e:
+                logger.warning(f"⚠️ Página individual de la corrida {self.run_id} no disponible ({url}): {e}")
+                continue
+            details[url] = {
+                "concurso": detail["concurso"],
+                "content": {**detail["content"], "markdown": markdown},
+            }
+        return details
+    
+    def mark_completed(self) -> None:
+        """Marca la corrida como completada"""
+        self.data["status"] = "completed"
+        self.save()
@@ -0,0 +1,217 @@
+"""
+Predictor estadístico de fechas de apertura para concursos con cadencia anual regular
+
+Para cada concurso predecible se toman las fechas de apertura conocidas (versiones
+anteriores + versión actual; la de cierre si falta la de apertura) y, vectorizado
+con NumPy sobre todos los concursos del sitio, se calcula:
+- Cadencia: mediana de los intervalos entre versiones y su desviación máxima del año
+- Ventana estacional: día del año medio (media circular) y su dispersión en días
+- Confianza (0..1): según número de versiones y dispersión estacional
+
+Los casos con cadencia anual clara, confirmada por HistoryManager._calculate_date_pattern,
+se predicen sin LLM; el resto (ambiguos) se envían al ConcursoPredictor.
+"""
+
+import logging
+import warnings
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.date_parser import parse_date
+
+logger = logging.getLogger(__name__)
+
+DAYS_PER_YEAR = 365.25
+
+_MESES = [
+    "enero", "febrero", "marzo", "abril", "mayo", "junio",
+    "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+]
+
+
+def _observed_dates(
+    concurso: Dict[str, Any],
+    previous_concursos: List[Dict[str, Any]]
+) -> Tuple[List[datetime], List[datetime], List[datetime]]:
+    """
+    Fechas conocidas de apertura y cierre de un concurso (versiones anteriores + actual)
+    
+    Returns:
+        Tupla (fechas por versión, aperturas, cierres): por versión se usa la apertura
+        o, si falta, el cierre
+    """
+    aperturas, cierres, por_version = [], [], []
+    for version in list(previous_concursos or []) + [concurso]:
+        apertura = parse_date(version.get("fecha_apertura")) if version.get("fecha_apertura") else None
+        cierre = parse_date(version.get("fecha_cierre")) if version.get("fecha_cierre") else None
+        if apertura:
+            aperturas.append(apertura)
+        if cierre:
+            cierres.append(cierre)
+        if apertura or cierre:
+            por_version.append(apertura or cierre)
+    return sorted(set(por_version)), aperturas, cierres
+
+
+def _format_day_of_year(day: float, year: int) -> str:
+    """Fecha legible ("15 de marzo") de un día del año (0 = 1 de enero)"""
+    date = datetime(year, 1, 1) + timedelta(days=int(round(day)) % 365)
+    return f"{date.day} de {_MESES[date.month - 1]}"
+
+
+class StatisticalPredictor:
+    """Predice aperturas de concursos anuales regulares a partir de su historial de fechas"""
+    
+    def __init__(self, history_manager=None, config: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            history_manager: HistoryManager (se usa su _calculate_date_pattern como confirmación)
+            config: Configuración (statistical_min_observations, statistical_min_confidence,
+                statistical_max_interval_deviation_days, statistical_max_dispersion_days)
+        """
+        config = config or {}
+        self.history_manager = history_manager
+        self.min_observations = config.get("statistical_min_observations", 3)
+        self.min_confidence = config.get("statistical_min_confidence", 0.75)
+        self.max_interval_deviation = config.get("statistical_max_interval_deviation_days", 45)
+        self.max_dispersion = config.get("statistical_max_dispersion_days", 60)
+    
+    def analyze(self, observations: List[List[datetime]]) -> Dict[str, np.ndarray]:
+        """
+        Calcula cadencia, ventana estacional, dispersión y confianza para varios concursos a la vez
+        
+        Args:
+            observations: Por concurso, sus fechas observadas ordenadas (una por versión)
+        
+        Returns:
+            Diccionario de arreglos (uno por concurso): n_intervals, cadence_days,
+            interval_deviation, season_day, dispersion_days, last_day, confidence
+        """
+        n = len(observations)
+        width = max((len(dates) for dates in observations), default=0) or 1
+        # Matriz concursos x versiones (días desde epoch, NaN como relleno)
+        days = np.full((n, width), np.nan)
+        for row, dates in enumerate(observations):
+            if dates:
+                days[row, :len(dates)] = np.array(
+                    [np.datetime64(d.date(), "D") for d in dates]
+                ).astype("int64")
+        
+        with warnings.catch_warnings():
+            # Filas sin intervalos producen NaN (se filtran luego por n_intervals)
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            intervals = np.diff(days, axis=1)
+            n_intervals = np.sum(~np.isnan(intervals), axis=1)
+            cadence = np.nanmedian(intervals, axis=1) if width > 1 else np.full(n, np.nan)
+            deviation = np.nanmax(np.abs(intervals - DAYS_PER_YEAR), axis=1) if width > 1 else np.full(n, np.nan)
+            
+            # Día del año (0..365) y media circular: marzo de varios años cae en la misma ventana
+            dates64 = days.astype("int64").astype("datetime64[D]")
+            day_of_year = (dates64 - dates64.astype("datetime64[Y]")).astype("int64").astype(float)
+            day_of_year[np.isnan(days)] = np.nan
+            angles = 2 * np.pi * day_of_year / DAYS_PER_YEAR
+            mean_cos = np.nanmean(np.cos(angles), axis=1)
+            mean_sin = np.nanmean(np.sin(angles), axis=1)
+            resultant = np.clip(np.hypot(mean_cos, mean_sin), 1e-12, 1.0)
+            season_day = (np.arctan2(mean_sin, mean_cos) % (2 * np.pi)) * DAYS_PER_YEAR / (2 * np.pi)
+            dispersion = np.sqrt(-2 * np.log(resultant)) * DAYS_PER_YEAR / (2 * np.pi)
+            last_day = np.nanmax(days, axis=1)
+        
+        obs_factor = np.minimum(1.0, 0.8 + 0.05 * n_intervals)
+        seasonal_factor = np.clip(1 - dispersion / self.max_dispersion, 0.0, 1.0)
+        confidence = np.where(
+            (n_intervals >= self.min_observations - 1) & (deviation <= self.max_interval_deviation),
+            obs_factor * seasonal_factor,
+            0.0,
+        )
+        return {
+            "n_intervals": n_intervals,
+            "cadence_days": cadence,
+            "interval_deviation": deviation,
+            "season_day": season_day,
+            "dispersion_days": dispersion,
+            "last_day": last_day,
+            "confidence": np.nan_to_num(confidence),
+        }
+    
+    def predict(
+        self,
+        items: List[Dict[str, Any]],
+        today: Optional[datetime] = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Predice los concursos con cadencia anual clara y separa los ambiguos
+        
+        Args:
+            items: Concursos predecibles ({"concurso", "concurso_url", "previous_concursos"})
+            today: Fecha de referencia (por defecto: ahora)
+        
+        Returns:
+            Tupla (predicciones en el formato de predictions_to_save, items ambiguos para el LLM)
+        """
+        if not items:
+            return [], []
+        today = today or datetime.now()
+        
+        parsed = [_observed_dates(item["concurso"], item["previous_concursos"]) for item in items]
+        stats = self.analyze([dates for dates, _, _ in parsed])
+        
+        predictions, ambiguous = [], []
+        for idx, item in enumerate(items):
+            confidence = float(stats["confidence"][idx])
+            if confidence < self.min_confidence:
+                ambiguous.append(item)
+                continue
+            
+            # Confirmación con el detector de patrones del historial
+            _, aperturas, cierres = parsed[idx]
+            if self.history_manager is not None:
+                pattern = self.history_manager._calculate_date_pattern(aperturas, cierres)
+                if not pattern.get("has_pattern"):
+                    ambiguous.append(item)
+                    continue
+            
+            last_date = datetime(1970, 1, 1) + timedelta(days=int(stats["last_day"][idx]))
+            season_day = float(stats["season_day"][idx])
+            # Día de la ventana estacional más cercano a "última versión + cadencia"
+            # (evita saltarse un año cuando la ventana cruza el cambio de año)
+            expected = last_date + timedelta(days=float(stats["cadence_days"][idx]))
+            predicted = min(
+                (
+                    datetime(year, 1, 1) + timedelta(days=int(round(season_day)))
+                    for year in (expected.year - 1, expected.year, expected.year + 1)
+                ),
+                key=lambda candidate: abs((candidate - expected).days)
+            )
+            # Si la próxima versión ya debió ocurrir (o está a más de un año), el caso es ambiguo
+            if predicted.date() <= today.date() or predicted.year - today.year > 1:
+                ambiguous.append(item)
+                continue
+            
+            dispersion = float(stats["dispersion_days"][idx])
+            n_versions = int(stats["n_intervals"][idx]) + 1
+            concurso = item["concurso"]
+            window_start = _format_day_of_year(season_day - dispersion, predicted.year)
+            window_end = _format_day_of_year(season_day + dispersion, predicted.year)
+            justificacion = (
+                f"Las {n_versions} versiones conocidas se abrieron cada año "
+                f"(intervalo mediano de {int(stats['cadence_days'][idx])} días) en una ventana estacional "
+                f"estable, entre el {window_start} y el {window_end} (dispersión de {dispersion:.0f} días). "
+                f"Se proyecta la próxima convocatoria para el {predicted.day} de {_MESES[predicted.month - 1]} "
+                f"de {predicted.year}, un ciclo después de la última versión ({last_date.strftime('%Y-%m-%d')})."
+            )
+            predictions.append({
+                "concurso_nombre": concurso.get("nombre", ""),
+                "concurso_url": item["concurso_url"],
+                "fecha_predicha": predicted.strftime("%Y-%m-%d"),
+                "justificacion": justificacion,
+                "predicted_at": datetime.now().isoformat(),
+                "source": "previous_concursos",
+                "method": "statistical",
+                "confidence": round(confidence, 3),
+                "previous_concursos": item["previous_concursos"],
+            })
+        
+        return predictions, ambiguous
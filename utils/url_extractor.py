@@ -3,9 +3,10 @@ Utilidades para extraer URLs de concursos desde HTML
 """
 
 import re
+import hashlib
 import logging
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+from typing import List, Dict, Optional, Tuple
+from utils.html_document import get_soup
 from urllib.parse import urljoin, urlparse
 
 logger = logging.getLogger(__name__)
@@ -23,6 +24,91 @@ KNOWN_SUBDIRECCIONES = {
 }
 
 
+def _parse_listing_item(item, base_url: str) -> Optional[Tuple[str, str]]:
+    """
+    Obtiene la URL y el nombre de un item de listado (.jet-listing-grid__item).
+    
+    Args:
+        item: Elemento BeautifulSoup del item
+        base_url: URL base para construir URLs absolutas
+        
+    Returns:
+        Tupla (url_concurso, nombre_concurso) o None si el item no enlaza a un concurso.
+        El nombre puede ser cadena vacía si no se pudo extraer.
+    """
+    # Buscar enlace "Ver más" o enlace del título
+    # ANID usa: <a> con texto "Ver más" o el título del concurso es un enlace
+    link = None
+    
+    # Opción 1: Buscar botón "Ver más"
+    ver_mas_links = item.select('a[href*="/concursos/"]')
+    for ver_mas_link in ver_mas_links:
+        link_text = ver_mas_link.get_text(strip=True).lower()
+        href = ver_mas_link.get('href', '')
+        
+        # Si el texto dice "ver más" o el href parece ser de un concurso específico
+        if 'ver más' in link_text or 'ver' in link_text or (
+            href and '/concursos/' in href and href != base_url and 
+            href != base_url.rstrip('/') and not href.endswith('/concursos/')
+        ):
+            link = ver_mas_link
+            break
+    
+    # Opción 2: Si no hay "Ver más", buscar enlace del título
+    if not link:
+        title_link = item.select_one('h2 a, h3 a, .elementor-heading-title a, a[href*="/concursos/"]')
+        if title_link:
+            link = title_link
+    
+    # Opción 3: Buscar cualquier enlace que parezca ser de un concurso
+    if not link:
+        all_links = item.select('a[href*="/concursos/"]')
+        for candidate_link in all_links:
+            href = candidate_link.get('href', '')
+            # Excluir URLs genéricas
+            if (href and href != base_url and href != base_url.rstrip('/') and 
+                not href.endswith('/concursos/') and 
+                not href.endswith('/concursos') and
+                '/concursos/' in href):
+                link = candidate_link
+                break
+    
+    if not link:
+        return None
+    
+    href = link.get('href', '')
+    if not href:
+        return None
+    
+    # Construir URL absoluta
+    if href.startswith('/'):
+        full_url = urljoin(base_url, href)
+    elif href.startswith('http'):
+        full_url = href
+    else:
+        full_url = urljoin(base_url, href)
+    
+    # Verificar que sea del mismo dominio y sea una URL de concurso específico
+    if not (urlparse(full_url).netloc == urlparse(base_url).netloc and
+            '/concursos/' in full_url and
+            full_url != base_url and
+            not full_url.endswith('/concursos/') and
+            not full_url.endswith('/concursos')):
+        return None
+    
+    # Intentar extraer nombre del concurso para mapeo
+    nombre = None
+    title_elem = item.select_one('h2, h3, .elementor-heading-title, [class*="title"]')
+    if title_elem:
+        nombre = title_elem.get_text(strip=True)
+    
+    # Evitar usar subdirecciones/categorías como "nombre" de concurso
+    if nombre and nombre.strip().lower() in KNOWN_SUBDIRECCIONES:
+        nombre = ""
+    
+    return full_url, nombre or ""
+
+
 def extract_concurso_urls_from_html(html: str, base_url: str) -> Dict[str, str]:
     """
     Extrae URLs de concursos desde el HTML de una página de listado.
@@ -42,82 +128,18 @@ def extract_concurso_urls_from_html(html: str, base_url: str) -> Dict[str, str]:
         return {}
     
     try:
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = get_soup(html)
         # Mapear siempre por URL para evitar colisiones de nombre entre concursos
         # Estructura: { full_url: nombre_concurso_ou_vacio }
         concurso_urls: Dict[str, str] = {}
         
         # Buscar todos los items de concursos
-        items = soup.select('.jet-listing-grid__item')
-        
-        for item in items:
-            # Buscar enlace "Ver más" o enlace del título
-            # ANID usa: <a> con texto "Ver más" o el título del concurso es un enlace
-            link = None
-            
-            # Opción 1: Buscar botón "Ver más"
-            ver_mas_links = item.select('a[href*="/concursos/"]')
-            for ver_mas_link in ver_mas_links:
-                link_text = ver_mas_link.get_text(strip=True).lower()
-                href = ver_mas_link.get('href', '')
-                
-                # Si el texto dice "ver más" o el href parece ser de un concurso específico
-                if 'ver más' in link_text or 'ver' in link_text or (
-                    href and '/concursos/' in href and href != base_url and 
-                    href != base_url.rstrip('/') and not href.endswith('/concursos/')
-                ):
-                    link = ver_mas_link
-                    break
-            
-            # Opción 2: Si no hay "Ver más", buscar enlace del título
-            if not link:
-                title_link = item.select_one('h2 a, h3 a, .elementor-heading-title a, a[href*="/concursos/"]')
-                if title_link:
-                    link = title_link
-            
-            # Opción 3: Buscar cualquier enlace que parezca ser de un concurso
-            if not link:
-                all_links = item.select('a[href*="/concursos/"]')
-                for candidate_link in all_links:
-                    href = candidate_link.get('href', '')
-                    # Excluir URLs genéricas
-                    if (href and href != base_url and href != base_url.rstrip('/') and 
-                        not href.endswith('/concursos/') and 
-                        not href.endswith('/concursos') and
-                        '/concursos/' in href):
-                        link = candidate_link
-                        break
-            
-            if link:
-                href = link.get('href', '')
-                if href:
-                    # Construir URL absoluta
-                    if href.startswith('/'):
-                        full_url = urljoin(base_url, href)
-                    elif href.startswith('http'):
-                        full_url = href
-                    else:
-                        full_url = urljoin(base_url, href)
-                    
-                    # Verificar que sea del mismo dominio y sea una URL de concurso específico
-                    if (urlparse(full_url).netloc == urlparse(base_url).netloc and
-                        '/concursos/' in full_url and
-                        full_url != base_url and
-                        not full_url.endswith('/concursos/') and
-                        not full_url.endswith('/concursos')):
-                        
-                        # Intentar extraer nombre del concurso para mapeo
-                        nombre = None
-                        title_elem = item.select_one('h2, h3, .elementor-heading-title, [class*="title"]')
-                        if title_elem:
-                            nombre = title_elem.get_text(strip=True)
-                        
-                        # Evitar usar subdirecciones/categorías como "nombre" de concurso
-                        if nombre and nombre.strip().lower() in KNOWN_SUBDIRECCIONES:
-                            nombre = ""
-                        
-                        # Guardar usando siempre la URL como clave; nombre puede ser vacío si no se encontró
-                        concurso_urls[full_url] = nombre or ""
+        for item in soup.select('.jet-listing-grid__item'):
+            parsed = _parse_listing_item(item, base_url)
+            if parsed:
+                # Guardar usando siempre la URL como clave; nombre puede ser vacío si no se encontró
+                full_url, nombre = parsed
+                concurso_urls[full_url] = nombre
         
         logger.info(f"📎 Extraídas {len(concurso_urls)} URLs de concursos desde HTML")
         return concurso_urls
@@ -127,6 +149,55 @@ def extract_concurso_urls_from_html(html: str, base_url: str) -> Dict[str, str]:
         return {}
 
 
+def extract_listing_segments(html: str, base_url: str) -> List[Dict[str, str]]:
+    """
+    Segmenta una página de listado en un segmento por item de concurso.
+    
+    Usa el mismo parsing que extract_concurso_urls_from_html. El hash se calcula
+    sobre el texto visible del item con espacios normalizados, de modo que cambios
+    de atributos o de markup que no alteran el contenido no cuentan como cambio.
+    
+    Args:
+        html: HTML de la página de listado
+        base_url: URL base para construir URLs absolutas
+        
+    Returns:
+        Lista de segmentos en orden de aparición:
+        [{"url": str, "nombre": str, "text": str, "hash": str}, ...]
+    """
+    if not html:
+        return []
+    
+    try:
+        soup = get_soup(html)
+        segments: List[Dict[str, str]] = []
+        seen_urls = set()
+        
+        for item in soup.select('.jet-listing-grid__item'):
+            parsed = _parse_listing_item(item, base_url)
+            if not parsed:
+                continue
+            full_url, nombre = parsed
+            if full_url in seen_urls:
+                continue
+            seen_urls.add(full_url)
+            
+            text = item.get_text("\n", strip=True)
+            normalized = re.sub(r'\s+', ' ', text).strip()
+            segments.append({
+                "url": full_url,
+                "nombre": nombre,
+                "text": text,
+                "hash": hashlib.sha256(normalized.encode("utf-8")).hexdigest(),
+            })
+        
+        return segments
+        
+    except Exception as e:
+        logger.error(f"Error al segmentar listado desde HTML: {e}", exc_info=True)
+        return []
+
+
 def match_concurso_to_url(concurso_nombre: str, concurso_urls_map: Dict[str, str],
                          default_url: str) -> str:
     """